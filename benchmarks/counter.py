@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Measures how the rate of increments to a shared count scales with the number
+of threads, for a `ByteCounter`, an integer behind a lock, and an
+`Information` behind a lock. Run from the root of the repository, e.g.
+`python benchmarks/counter.py`.
+"""
+from __future__ import unicode_literals, print_function, division
+import sys
+import threading
+import time
+
+from nibble import Information
+from nibble.counter import ByteCounter
+
+_INCREMENTS = 200000
+_THREADS = (1, 2, 4, 8)
+
+
+class _LockedInteger(object):
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.total = 0
+
+    def add(self, bytes_):
+        with self.lock:
+            self.total += bytes_
+
+
+class _LockedInformation(object):
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.total = Information.ZERO
+
+    def add(self, bytes_):
+        with self.lock:
+            self.total = self.total + Information(bytes_, Information.BYTES)
+
+
+def _rate(counter, threads):
+    """
+    Find the rate of increments with a number of threads adding at once.
+
+    :param counter: The object to call `add()` on.
+    :param threads: The number of threads.
+    :return: The total increments per second.
+    """
+    start = threading.Event()
+
+    def work():
+        add = counter.add
+        start.wait()
+        for _ in range(_INCREMENTS):
+            add(1500)
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    began = time.time()
+    start.set()
+    for worker in workers:
+        worker.join()
+    return _INCREMENTS * threads / (time.time() - began)
+
+
+def main():
+    """
+    Time each counter with each number of threads, and print the rates.
+    """
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print('GIL {0}'.format('enabled' if gil else 'disabled'))
+    print('{0:<20}'.format('threads') +
+          ''.join('{0:>12}'.format(threads) for threads in _THREADS))
+    for name, factory in (('ByteCounter', ByteCounter),
+                          ('locked int', _LockedInteger),
+                          ('locked Information', _LockedInformation)):
+        rates = [_rate(factory(), threads) for threads in _THREADS]
+        print('{0:<20}'.format(name) +
+              ''.join('{0:>10.2f} M'.format(rate / 1000000)
+                      for rate in rates))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,21 @@
+#!/bin/sh
+# Compares the throughput of `nibble pv` with `cat` when copying between pipes.
+# Run from the root of the repository, optionally with the number of GiB to
+# copy (default 8), e.g. `sh benchmarks/pv.sh 16`.
+set -e
+
+GIB=${1:-8}
+BLOCKS=$((GIB * 1024))
+
+run() {
+    name=$1
+    shift
+    start=$(date +%s.%N)
+    dd if=/dev/zero bs=1M count=$BLOCKS status=none | "$@" | cat > /dev/null
+    end=$(date +%s.%N)
+    echo "$name: $(python -c "print('{0:.2f} s'.format($end - $start))")"
+}
+
+run 'cat' cat
+run 'nibble pv' python -m nibble pv -i 10s
+run 'nibble pv --no-zero-copy' python -m nibble pv -i 10s --no-zero-copy
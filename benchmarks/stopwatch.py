@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Measures the overhead of timing code with `Stopwatch`, compared with reading
+the clock directly and with not timing at all. Run from the root of the
+repository, e.g. `python benchmarks/stopwatch.py`.
+"""
+from __future__ import unicode_literals, print_function
+import timeit
+
+_SETUP = '''
+import time
+from nibble.stopwatch import Stopwatch, ThroughputTimer, _nanoseconds
+
+stopwatch = Stopwatch()
+timer = ThroughputTimer()
+
+
+def function():
+    pass
+
+
+timed = stopwatch(function)
+'''
+
+_CASES = [
+    ('nothing', 'pass'),
+    ('call', 'function()'),
+    ('two clock reads', 'start = _nanoseconds(); _nanoseconds() - start'),
+    ('with Stopwatch', 'with stopwatch: pass'),
+    ('start() and stop()', 'stopwatch.start(); stopwatch.stop()'),
+    ('decorated call', 'timed()'),
+    ('with ThroughputTimer and add()',
+     'with timer: timer.add(4096)'),
+]
+
+
+def main():
+    """
+    Time each case, and print the cost of one iteration.
+    """
+    for name, statement in _CASES:
+        timings = timeit.repeat(statement, _SETUP, repeat=5, number=1000000)
+        # the minimum is least disturbed by other processes
+        print('{0:<32}{1:>8.0f} ns'.format(name, min(timings) * 1000))
+
+
+if __name__ == '__main__':
+    main()
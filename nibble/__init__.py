@@ -7,6 +7,7 @@ import os
 from nibble.information import Information
 from nibble.duration import Duration
 from nibble.speed import Speed
+from nibble.stopwatch import Stopwatch, ThroughputTimer
 from nibble.expression.lexer import Lexer, LexingError
 from nibble.expression.parser import Parser, ParsingError
 
@@ -6,24 +6,20 @@ import argparse
 import logging
 
 import nibble
-from nibble import util, LexingError, Parser, ParsingError
+from nibble import util, commands, LexingError, Parser, ParsingError
 
 logger = logging.getLogger(__name__)
 
 
-def _parse_args(args):
+def _base_parser(prog, description):
     """
-    Interpret command line arguments.
+    Create an argument parser with the options common to all commands.
 
-    :param args: `sys.argv`
-    :return: The populated argparse namespace.
+    :param prog: The name of the program, as shown in usage messages.
+    :param description: What the program does.
+    :return: The new `argparse.ArgumentParser`.
     """
-
-    parser = argparse.ArgumentParser(prog='nibble',
-                                     description='Speed, distance and time '
-                                                 'calculations around '
-                                                 'quantities of digital '
-                                                 'information.')
+    parser = argparse.ArgumentParser(prog=prog, description=description)
     parser.add_argument('-V', '--version',
                         action='version',
                         version='%(prog)s ' + nibble.__version__)
@@ -31,10 +27,39 @@ def _parse_args(args):
                         help='increase output verbosity',
                         action='count',
                         default=0)
+    return parser
+
+
+def _parse_args(args):
+    """
+    Interpret command line arguments. If the first argument names a command,
+    the remainder are parsed according to that command, otherwise they are
+    treated as a calculation expression.
+
+    :param args: `sys.argv`
+    :return: The populated argparse namespace. Its `command` attribute is the
+             module implementing the requested command, or None for an
+             expression.
+    """
+
+    if len(args) > 1 and args[1] in commands.COMMANDS:
+        name = args[1]
+        command = commands.COMMANDS[name]
+        parser = _base_parser('nibble ' + name, command.DESCRIPTION)
+        command.configure(parser)
+        parser.set_defaults(command=command)
+        return parser.parse_args(args[2:])
+
+    parser = _base_parser('nibble',
+                          'Speed, distance and time calculations around '
+                          'quantities of digital information.')
+    parser.epilog = 'other commands: {0}; see nibble <command> -h'.format(
+        ', '.join(commands.COMMANDS))
     parser.add_argument('expression',
                         type=util.decode_cli_arg,
                         nargs='+',
                         help='the calculation to execute')
+    parser.set_defaults(command=None)
     return parser.parse_args(args[1:])
 
 
@@ -51,13 +76,21 @@ def main(args):
     level = util.log_level_from_vebosity(args.verbosity)
     root = logging.getLogger()
     root.setLevel(level)
-    handler = logging.StreamHandler(sys.stdout)
+    # commands may write their results to stdout, so keep logging out of it
+    handler = logging.StreamHandler(sys.stderr if args.command else sys.stdout)
     handler.setLevel(level)
     handler.setFormatter(logging.Formatter('%(levelname)s %(message)s'))
     root.addHandler(handler)
 
     logger.debug(args)
 
+    if args.command:
+        try:
+            return args.command.run(args)
+        except (ValueError, EnvironmentError) as e:
+            util.print_error(e)
+            return 1
+
     expression = ' '.join(args.expression)
     try:
         print(Parser().parse(expression))
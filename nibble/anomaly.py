@@ -0,0 +1,425 @@
+# -*- coding: utf-8 -*-
+"""
+Detectors of anomalous throughput, e.g. a link suddenly dropping to a
+fraction of its usual rate, fed one `Speed` sample at a time in constant time
+and memory per sample.
+
+`EwmaBands` flags samples far outside a moving average, `Cusum` flags smaller
+shifts that persist, and `SeasonalBaseline` compares each sample with the
+usual rate at that time of day. Each can also `backfill()` historical rates,
+e.g. `nibble.rates.RateSeries.rates`, creating objects only for anomalies.
+
+Timestamps are wall clock times in seconds since the epoch, so a seasonal
+baseline can follow the time of day, and default to now.
+"""
+from __future__ import unicode_literals, division
+import math
+import time
+
+from nibble import Information, Duration, Speed
+
+
+def _bytes_per_second(speed):
+    """
+    :param speed: A `Speed`.
+    :return: The speed in bytes per second.
+    """
+    return speed.information.bits * Duration.SECONDS / \
+        speed.duration.nanoseconds / Information.BYTES
+
+
+def _speed(bytes_per_second):
+    """
+    :param bytes_per_second: A non-negative rate in bytes per second.
+    :return: The `Speed`.
+    """
+    return Speed(Information(bytes_per_second * Information.BYTES))
+
+
+class Anomaly(object):
+    """
+    A sample flagged by a detector.
+    """
+
+    __slots__ = ('time', 'speed', 'expected', 'score')
+
+    def __init__(self, time_, speed, expected, score):
+        """
+        Initialise a new anomaly.
+
+        :param time_: The time of the sample, in seconds since the epoch.
+        :param speed: The `Speed` sampled.
+        :param expected: The `Speed` the detector expected.
+        :param score: How far the sample is from the expected speed, in
+                      standard deviations; negative for drops. For `Cusum`,
+                      this is the cumulative sum that crossed the threshold.
+        """
+        self.time = time_
+        self.speed = speed
+        self.expected = expected
+        self.score = score
+
+    @property
+    def drop(self):
+        """
+        :return: Whether the sample was slower than expected.
+        """
+        return self.score < 0
+
+    @property
+    def deviation(self):
+        """
+        :return: The difference between the sampled and expected speeds, as
+                 a `Speed`.
+        """
+        if self.drop:
+            return self.expected - self.speed \
+                if self.expected != self.speed else Speed.ZERO
+        return self.speed - self.expected \
+            if self.expected != self.speed else Speed.ZERO
+
+    def __repr__(self):
+        return '<Anomaly({0}, {1}, {2}, {3})>'.format(
+            repr(self.time), repr(self.speed), repr(self.expected),
+            repr(self.score))
+
+    def __str__(self):
+        return '{0} is {1} {2} the expected {3} ({4:+.1f} sd)'.format(
+            self.speed, self.deviation, 'below' if self.drop else 'above',
+            self.expected, self.score)
+
+
+class _Detector(object):
+    """
+    Functionality common to every detector. Subclasses implement
+    `expected(now=None)`, returning the `Speed` expected at a time, or None
+    before there are samples to expect it from, and `_step(rate, now)`,
+    which scores a sample in bytes per second at a time in seconds since the
+    epoch, adds it to the baseline, and returns a tuple of the expected rate
+    in bytes per second and the score if the sample is anomalous, otherwise
+    None.
+    """
+
+    def __init__(self, width, tolerance, rises):
+        """
+        :param width: The number of standard deviations from the expected rate
+                      at which a sample is anomalous.
+        :param tolerance: The standard deviation is taken to be at least this
+                          fraction of the expected rate, so a perfectly steady
+                          rate does not make tiny changes anomalous.
+        :param rises: Whether to also flag rates above the expected rate,
+                      rather than only drops.
+        :raises ValueError: If the width or tolerance is invalid.
+        """
+        if width <= 0:
+            raise ValueError('The width must be positive')
+        if tolerance < 0:
+            raise ValueError('The tolerance cannot be negative')
+        self.width = width
+        self.tolerance = tolerance
+        self.rises = rises
+
+    def _banded(self, baseline, rate):
+        """
+        Score a sample against bands around a baseline, and add it to the
+        baseline.
+
+        :param baseline: The `_Baseline`. Samples are only scored once it
+                         has `warmup` samples.
+        :param rate: The sampled rate in bytes per second.
+        :return: A tuple of (expected rate in bytes per second, score) if the
+                 sample is anomalous, otherwise None.
+        """
+        result = None
+        if baseline.count >= self.warmup:
+            deviation = baseline.deviation(self.tolerance)
+            if deviation:
+                score = (rate - baseline.mean) / deviation
+                if score < -self.width or (self.rises and
+                                           score > self.width):
+                    result = baseline.mean, score
+        baseline.add(rate)
+        return result
+
+    def update(self, speed, now=None):
+        """
+        Score a sample, and add it to the baseline.
+
+        :param speed: The `Speed` sampled.
+        :param now: The time of the sample, in seconds since the epoch.
+                    Defaults to now.
+        :return: An `Anomaly` if the sample is anomalous, otherwise None.
+        """
+        now = time.time() if now is None else now
+        result = self._step(_bytes_per_second(speed), now)
+        if result is None:
+            return None
+        return Anomaly(now, speed, _speed(result[0]), result[1])
+
+    def backfill(self, timestamps, rates):
+        """
+        Score historical samples, in time order, as if each were passed to
+        `update()`. Rates are plain numbers, so no object is created for
+        samples that are not anomalous.
+
+        :param timestamps: A sequence of the time of each sample, in seconds
+                           since the epoch.
+        :param rates: A sequence of the rate of each sample, in bytes per
+                      second, e.g. `nibble.rates.RateSeries.rates`.
+        :return: A list of `Anomaly`, in time order.
+        :raises ValueError: If the sequences differ in length.
+        """
+        if len(timestamps) != len(rates):
+            raise ValueError('There must be one rate per timestamp')
+        step = self._step
+        anomalies = []
+        for now, rate in zip(timestamps, rates):
+            result = step(rate, now)
+            if result is not None:
+                anomalies.append(Anomaly(now, _speed(rate),
+                                         _speed(result[0]), result[1]))
+        return anomalies
+
+
+class _Baseline(object):
+    """
+    An exponentially weighted moving average and variance of a rate.
+    """
+
+    __slots__ = ('alpha', 'count', 'mean', 'variance')
+
+    def __init__(self, alpha):
+        """
+        :param alpha: The weight of each new sample, between 0 and 1.
+        """
+        self.alpha = alpha
+        self.count = 0
+        self.mean = 0.
+        self.variance = 0.
+
+    def add(self, rate):
+        """
+        Add a sample.
+
+        :param rate: The rate in bytes per second.
+        """
+        self.count += 1
+        # until there are 1 / alpha samples, weight them equally, so early
+        # estimates are the plain mean and variance rather than biased
+        # towards the first sample and zero
+        alpha = max(self.alpha, 1 / self.count)
+        difference = rate - self.mean
+        increment = alpha * difference
+        self.mean += increment
+        self.variance = (1 - alpha) * (self.variance +
+                                       difference * increment)
+
+    def deviation(self, tolerance):
+        """
+        :param tolerance: The minimum standard deviation, as a fraction of
+                          the mean.
+        :return: The standard deviation, or None if it is zero.
+        """
+        return max(math.sqrt(self.variance), tolerance * self.mean) or None
+
+
+def _validate(alpha, warmup):
+    """
+    Check the arguments common to every detector's baseline.
+
+    :param alpha: The weight of each sample in the baseline.
+    :param warmup: The number of samples to learn from before flagging any.
+    :raises ValueError: If the weight of each sample or number of warm-up
+                        samples is invalid.
+    """
+    if not 0 < alpha <= 1:
+        raise ValueError('The weight of each sample must be between 0 and 1')
+    if warmup < 1:
+        raise ValueError('At least 1 warm-up sample is needed')
+
+
+class EwmaBands(_Detector):
+    """
+    Flags samples outside bands around an exponentially weighted moving
+    average, a number of standard deviations wide. Quick to flag a sudden
+    drop, but a drop that persists becomes the new average within a few
+    multiples of 1 / `alpha` samples; use `Cusum` to catch those.
+    """
+
+    def __init__(self, alpha=0.1, width=3, warmup=10, tolerance=0.01,
+                 rises=False):
+        """
+        Initialise a new detector.
+
+        :param alpha: The weight of each sample in the average, between 0 and
+                      1. Defaults to 0.1.
+        :param width: The number of standard deviations from the average at
+                      which a sample is anomalous. Defaults to 3.
+        :param warmup: The number of samples to learn from before flagging
+                       any. Defaults to 10.
+        :param tolerance: The standard deviation is taken to be at least this
+                          fraction of the average, so a perfectly steady rate
+                          does not make tiny changes anomalous. Defaults to
+                          1%.
+        :param rises: Whether to also flag rates above the bands. Defaults to
+                      only flagging drops.
+        :raises ValueError: If an argument is invalid.
+        """
+        super(EwmaBands, self).__init__(width, tolerance, rises)
+        _validate(alpha, warmup)
+        self.warmup = warmup
+        self._baseline = _Baseline(alpha)
+
+    def expected(self, now=None):
+        """
+        Find the current average. It does not depend on the time, which is
+        accepted so every detector can be asked the same way.
+
+        :param now: The time, in seconds since the epoch. Ignored.
+        :return: The average, as a `Speed`, or None if there are no samples
+                 yet.
+        """
+        baseline = self._baseline
+        return _speed(baseline.mean) if baseline.count else None
+
+    def _step(self, rate, now):
+        return self._banded(self._baseline, rate)
+
+
+class Cusum(_Detector):
+    """
+    A cumulative sum control chart: accumulates how far each sample falls
+    below a slowly moving baseline, less an allowance for noise, and flags
+    the sample at which the sum crosses a threshold. Slower than `EwmaBands`
+    to flag a sudden large drop, but catches smaller drops that persist.
+    After flagging, the sum restarts, so a drop that continues is flagged
+    again every few samples.
+    """
+
+    def __init__(self, alpha=0.01, slack=0.5, threshold=5, warmup=30,
+                 tolerance=0.01, rises=False):
+        """
+        Initialise a new detector.
+
+        :param alpha: The weight of each sample in the baseline, between 0
+                      and 1. Defaults to 0.01.
+        :param slack: The number of standard deviations each sample may fall
+                      below the baseline without adding to the sum. Defaults
+                      to 0.5, to detect shifts of about 1 standard deviation.
+        :param threshold: The sum, in standard deviations, at which a sample
+                          is anomalous. Defaults to 5.
+        :param warmup: The number of samples to learn from before flagging
+                       any. Defaults to 30.
+        :param tolerance: The standard deviation is taken to be at least this
+                          fraction of the baseline. Defaults to 1%.
+        :param rises: Whether to also accumulate and flag rates above the
+                      baseline. Defaults to only flagging drops.
+        :raises ValueError: If an argument is invalid.
+        """
+        super(Cusum, self).__init__(threshold, tolerance, rises)
+        _validate(alpha, warmup)
+        if slack < 0:
+            raise ValueError('The slack cannot be negative')
+        self.slack = slack
+        self.warmup = warmup
+        self._baseline = _Baseline(alpha)
+        self._low = 0.
+        self._high = 0.
+
+    def expected(self, now=None):
+        """
+        Find the current baseline. It does not depend on the time, which is
+        accepted so every detector can be asked the same way.
+
+        :param now: The time, in seconds since the epoch. Ignored.
+        :return: The baseline, as a `Speed`, or None if there are no samples
+                 yet.
+        """
+        baseline = self._baseline
+        return _speed(baseline.mean) if baseline.count else None
+
+    def _step(self, rate, now):
+        baseline = self._baseline
+        result = None
+        if baseline.count >= self.warmup:
+            deviation = baseline.deviation(self.tolerance)
+            if deviation:
+                score = (rate - baseline.mean) / deviation
+                self._low = max(0., self._low - score - self.slack)
+                if self._low > self.width:
+                    result = baseline.mean, -self._low
+                    self._low = 0.
+                if self.rises:
+                    self._high = max(0., self._high + score - self.slack)
+                    if self._high > self.width:
+                        result = baseline.mean, self._high
+                        self._high = 0.
+        baseline.add(rate)
+        return result
+
+
+class SeasonalBaseline(_Detector):
+    """
+    Flags samples far from the usual rate at the same point in a period,
+    e.g. the same time of day, so a quiet night is not mistaken for an
+    outage, and an outage at the busiest time is flagged even if the rate is
+    still above the daily average. The period is divided into bins, each
+    with its own moving average and standard deviation; periods are aligned
+    to the epoch, so daily bins follow UTC.
+    """
+
+    def __init__(self, period=Duration(days=1), bins=96, alpha=0.01,
+                 width=3, warmup=30, tolerance=0.01, rises=False):
+        """
+        Initialise a new detector.
+
+        :param period: The length of the cycle, as a `Duration`. Defaults to
+                       a day.
+        :param bins: The number of bins the period is divided into. Defaults
+                     to 96, i.e. 15 minutes per bin for a day.
+        :param alpha: The weight of each sample in its bin's average, between
+                      0 and 1. Keep this small enough that each average spans
+                      several periods. Defaults to 0.01.
+        :param width: The number of standard deviations from the bin's
+                      average at which a sample is anomalous. Defaults to 3.
+        :param warmup: The number of samples each bin learns from before
+                       flagging any. Defaults to 30.
+        :param tolerance: The standard deviation is taken to be at least this
+                          fraction of the bin's average. Defaults to 1%.
+        :param rises: Whether to also flag rates above the average. Defaults
+                      to only flagging drops.
+        :raises ValueError: If an argument is invalid.
+        """
+        super(SeasonalBaseline, self).__init__(width, tolerance, rises)
+        _validate(alpha, warmup)
+        if period.nanoseconds <= 0:
+            raise ValueError('The period must be positive')
+        if bins < 1:
+            raise ValueError('There must be at least 1 bin')
+        self.period = period
+        self.warmup = warmup
+        self._seconds = period.total_seconds()
+        self._bins = [_Baseline(alpha) for _ in range(bins)]
+
+    def _bin(self, now):
+        """
+        :param now: A time in seconds since the epoch.
+        :return: The baseline of the bin the time falls in.
+        """
+        bins = self._bins
+        index = int(now % self._seconds / self._seconds * len(bins))
+        return bins[min(index, len(bins) - 1)]
+
+    def expected(self, now=None):
+        """
+        Find the usual rate at a point in the period.
+
+        :param now: The time, in seconds since the epoch. Defaults to now.
+        :return: The average of the time's bin, as a `Speed`, or None if the
+                 bin has no samples yet.
+        """
+        baseline = self._bin(time.time() if now is None else now)
+        return _speed(baseline.mean) if baseline.count else None
+
+    def _step(self, rate, now):
+        return self._banded(self._bin(now), rate)
@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, division
+import bz2
+import hashlib
+import multiprocessing
+import random
+import time
+import zlib
+
+from nibble import Information, Duration, Speed
+
+try:
+    import lzma
+except ImportError:
+    # only in the standard library from Python 3.3
+    lzma = None
+
+# `time.perf_counter_ns()` avoids the float conversion, but needs Python 3.7
+try:
+    _nanoseconds = time.perf_counter_ns
+except AttributeError:
+    _counter = getattr(time, 'perf_counter', time.time)
+
+    def _nanoseconds():
+        return int(_counter() * 1000000000)
+
+
+def _lzma_compress(data, level):
+    return lzma.compress(data, preset=level)
+
+
+# algorithm: (compression function, valid levels, default levels)
+_COMPRESSORS = {
+    'zlib': (zlib.compress, range(10), (1, 6, 9)),
+    'bz2': (bz2.compress, range(1, 10), (1, 9))
+}
+if lzma is not None:
+    _COMPRESSORS['lzma'] = (_lzma_compress, range(10), (0, 6))
+
+
+def _available(name):
+    """
+    Find whether a hash algorithm is provided by this build of Python.
+
+    :param name: The name of the algorithm, as passed to `hashlib.new()`.
+    :return: True if it is available, False otherwise.
+    """
+    try:
+        hashlib.new(name)
+    except ValueError:
+        return False
+    return True
+
+
+COMPRESSORS = tuple(name for name in ('zlib', 'bz2', 'lzma')
+                    if name in _COMPRESSORS)
+HASHES = tuple(name for name in ('md5', 'sha1', 'sha256', 'sha512',
+                                 'blake2b')
+               if _available(name))
+ALGORITHMS = COMPRESSORS + HASHES
+
+# words for synthetic data, chosen at random so it compresses about as well as
+# text or logs, rather than not at all like random bytes, or absurdly well
+# like repeated blocks
+_WORDS = ('the', 'of', 'and', 'to', 'in', 'is', 'request', 'response',
+          'GET', 'POST', 'user', 'id', 'time', 'error', 'ok', 'status',
+          '200', '404', '500', 'bytes', 'duration', 'host', 'path', 'nibble',
+          'information', 'speed', '\n', '=', ':', '/', '-')
+
+
+def levels(algorithm):
+    """
+    Get the levels worth benchmarking an algorithm at by default.
+
+    :param algorithm: The name of the algorithm.
+    :return: A tuple of levels, or (None,) for hashes, which have no levels.
+    :raises ValueError: If the algorithm is not recognised.
+    """
+    if algorithm in HASHES:
+        return None,
+    if algorithm not in _COMPRESSORS:
+        raise ValueError('Unrecognised algorithm: {0}'.format(algorithm))
+    return _COMPRESSORS[algorithm][2]
+
+
+def synthetic_data(size, seed=None):
+    """
+    Generate text-like data to benchmark with.
+
+    :param size: The amount to generate, as an `Information`.
+    :param seed: The random seed.
+    :return: The data as bytes.
+    """
+    length = size.bits // Information.BYTES
+    rng = random.Random(seed)
+    choice = rng.choice
+    words = []
+    generated = 0
+    # words are joined by one space fewer than counted
+    while generated <= length:
+        word = choice(_WORDS)
+        words.append(word)
+        generated += len(word) + 1
+    return ' '.join(words).encode('ascii')[:length]
+
+
+def _compress_chunk(arguments):
+    """
+    Compress one chunk, in a worker process.
+
+    :param arguments: A tuple of the algorithm, level and chunk.
+    :return: The length of the compressed chunk in bytes.
+    """
+    algorithm, level, chunk = arguments
+    return len(_COMPRESSORS[algorithm][0](chunk, level))
+
+
+class CodecResult(object):
+    """
+    The outcome of one compression or hash benchmark.
+    """
+
+    def __init__(self, algorithm, level, chunk_size, processes, information,
+                 output, duration):
+        """
+        Initialise a new result.
+
+        :param algorithm: The name of the algorithm, e.g. 'zlib'.
+        :param level: The compression level, or None for hashes.
+        :param chunk_size: The size of each chunk, as an `Information`.
+        :param processes: The number of processes chunks were spread across.
+        :param information: The amount of input processed.
+        :param output: The total size of the compressed chunks, or None for
+                       hashes.
+        :param duration: The time taken, as a `Duration`.
+        """
+        self.algorithm = algorithm
+        self.level = level
+        self.chunk_size = chunk_size
+        self.processes = processes
+        self.information = information
+        self.output = output
+        self.duration = duration
+
+    @property
+    def speed(self):
+        """
+        The rate input was processed at.
+
+        :return: The throughput as a `Speed`.
+        """
+        return Speed(self.information, self.duration)
+
+    @property
+    def ratio(self):
+        """
+        How many times smaller the compressed output was than the input.
+
+        :return: The ratio as a float, or None for hashes.
+        """
+        if self.output is None:
+            return None
+        return self.information.bits / max(1, self.output.bits)
+
+    def transfer_durations(self, link):
+        """
+        Project how long sending the input over a link would take as it is,
+        and compressed. Compression and sending are assumed to overlap, chunk
+        by chunk, so the slower of the two determines the time taken.
+        Decompression by the receiver is not included.
+
+        :param link: The `Speed` of the link.
+        :return: A tuple of the raw and compressed `Duration`.
+        :raises ValueError: If this is a hash, or the link speed is zero.
+        """
+        if self.output is None:
+            raise ValueError('{0} is not a compressor'.format(self.algorithm))
+        if not link.information:
+            raise ValueError('The link speed must be positive')
+        nanoseconds = link.duration.nanoseconds / link.information.bits
+        raw = Duration(nanoseconds=int(self.information.bits * nanoseconds))
+        compressed = Duration(nanoseconds=int(max(
+            self.duration.nanoseconds, self.output.bits * nanoseconds)))
+        return raw, compressed
+
+    def speedup(self, link):
+        """
+        Find how many times faster compressing then sending the input over a
+        link would be than sending it as it is.
+
+        :param link: The `Speed` of the link.
+        :return: The factor as a float; less than 1 if compression is slower.
+        :raises ValueError: If this is a hash, or the link speed is zero.
+        """
+        raw, compressed = self.transfer_durations(link)
+        return raw.nanoseconds / max(1, compressed.nanoseconds)
+
+    def __repr__(self):
+        return '<CodecResult({0}, {1}, {2})>'.format(
+            repr(self.algorithm), repr(self.level), repr(self.speed))
+
+
+class CodecBenchmark(object):
+    """
+    Measures the throughput of compression and hash algorithms on some data.
+    The data is split into chunks, each compressed independently, as a
+    streaming sender would, optionally in several processes at once. Hashes
+    are fed each chunk in turn, so always run in a single process.
+    """
+
+    def __init__(self, data, processes=1):
+        """
+        Prepare to benchmark some data.
+
+        :param data: The data, as bytes.
+        :param processes: The number of processes to compress chunks in.
+                          Defaults to 1, which compresses in this process.
+        :raises ValueError: If there is no data, or fewer than 1 process.
+        """
+        if not data:
+            raise ValueError('There must be at least 1 byte of data')
+        if processes < 1:
+            raise ValueError('There must be at least 1 process')
+        self.data = data
+        self.processes = processes
+        self._pool = multiprocessing.Pool(processes) if processes > 1 \
+            else None
+
+    def close(self):
+        """
+        Stop the worker processes, if any.
+        """
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def information(self):
+        """
+        The amount of data being benchmarked.
+
+        :return: The size as an `Information`.
+        """
+        return Information(len(self.data), Information.BYTES)
+
+    def run(self, algorithm, level=None,
+            chunk_size=Information(1, Information.MEBIBYTES)):
+        """
+        Compress or hash the data once.
+
+        :param algorithm: One of `ALGORITHMS`.
+        :param level: The compression level. Defaults to the algorithm's
+                      default. Must be None for hashes.
+        :param chunk_size: The size of each chunk. Defaults to 1 MiB.
+        :return: The `CodecResult`.
+        :raises ValueError: If an argument is invalid.
+        """
+        if algorithm not in ALGORITHMS:
+            raise ValueError('Unrecognised algorithm: {0}'.format(algorithm))
+        if algorithm in HASHES and level is not None:
+            raise ValueError('Hashes do not have levels')
+        if algorithm in _COMPRESSORS:
+            compress, valid, defaults = _COMPRESSORS[algorithm]
+            if level is None:
+                level = defaults[len(defaults) // 2]
+            if level not in valid:
+                raise ValueError('{0} levels are {1} to {2}'.format(
+                    algorithm, valid[0], valid[-1]))
+        chunk = chunk_size.bits // Information.BYTES
+        if not chunk:
+            raise ValueError('The chunk size must be at least 1 byte')
+
+        # slicing is done up front, so is not timed
+        chunks = [self.data[offset:offset + chunk]
+                  for offset in range(0, len(self.data), chunk)]
+        output = None
+        if algorithm in HASHES:
+            hash_ = hashlib.new(algorithm)
+            update = hash_.update
+            start = _nanoseconds()
+            for piece in chunks:
+                update(piece)
+            hash_.digest()
+            finish = _nanoseconds()
+        elif self._pool is None:
+            start = _nanoseconds()
+            output = sum(len(compress(piece, level)) for piece in chunks)
+            finish = _nanoseconds()
+        else:
+            start = _nanoseconds()
+            output = sum(self._pool.map(
+                _compress_chunk,
+                [(algorithm, level, piece) for piece in chunks], 1))
+            finish = _nanoseconds()
+
+        return CodecResult(
+            algorithm, level, chunk_size,
+            1 if self._pool is None or algorithm in HASHES
+            else self.processes,
+            self.information,
+            None if output is None else Information(output,
+                                                    Information.BYTES),
+            Duration(nanoseconds=max(1, finish - start)))
@@ -0,0 +1,431 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, division
+import errno
+import logging
+import math
+import mmap
+import os
+import random
+import tempfile
+import threading
+import time
+
+from nibble import Information, Duration, Speed
+
+logger = logging.getLogger(__name__)
+
+OPERATIONS = ('read', 'write')
+PATTERNS = ('sequential', 'random')
+MODES = ('buffered', 'direct', 'mmap')
+
+# `time.perf_counter_ns()` avoids the float conversion, but needs Python 3.7
+try:
+    _nanoseconds = time.perf_counter_ns
+except AttributeError:
+    _counter = getattr(time, 'perf_counter', time.time)
+
+    def _nanoseconds():
+        return int(_counter() * 1000000000)
+
+# the test file is filled by repeating a block of this size of random data, so
+# compression and deduplication cannot flatter the results
+_FILL_SIZE = 1024 * 1024
+
+
+class BenchmarkResult(object):
+    """
+    The outcome of one disk benchmark.
+    """
+
+    def __init__(self, operation, pattern, mode, block_size, queue_depth,
+                 information, duration, latencies):
+        """
+        Initialise a new result.
+
+        :param operation: 'read' or 'write'.
+        :param pattern: 'sequential' or 'random'.
+        :param mode: 'buffered', 'direct' or 'mmap'.
+        :param block_size: The size of each operation, as an `Information`.
+        :param queue_depth: The number of operations in flight at once.
+        :param information: The total amount read or written.
+        :param duration: The time the benchmark took, as a `Duration`.
+        :param latencies: The time taken by each operation in nanoseconds, in
+                          ascending order.
+        """
+        self.operation = operation
+        self.pattern = pattern
+        self.mode = mode
+        self.block_size = block_size
+        self.queue_depth = queue_depth
+        self.information = information
+        self.duration = duration
+        self.latencies = latencies
+
+    @property
+    def speed(self):
+        """
+        The throughput achieved.
+
+        :return: The throughput as a `Speed`.
+        """
+        return Speed(self.information, self.duration)
+
+    @property
+    def operations_per_second(self):
+        """
+        The number of operations completed per second.
+
+        :return: The rate as a float.
+        """
+        return len(self.latencies) / self.duration.total_seconds()
+
+    def percentile(self, percentile):
+        """
+        Find the latency at or below which a percentage of operations
+        completed.
+
+        :param percentile: The percentage, between 0 and 100.
+        :return: The latency as a `Duration`.
+        """
+        rank = int(math.ceil(len(self.latencies) * percentile / 100))
+        return Duration(nanoseconds=self.latencies[max(0, rank - 1)])
+
+    def __repr__(self):
+        return '<BenchmarkResult({0}, {1}, {2}, {3})>'.format(
+            repr(self.operation), repr(self.pattern), repr(self.mode),
+            repr(self.speed))
+
+
+def _evict(fd):
+    """
+    Ask the kernel to drop a file from the page cache, so reads come from the
+    disk. This is only advice, and not available on all platforms.
+
+    :param fd: A file descriptor of the file.
+    """
+    if hasattr(os, 'posix_fadvise'):
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def _read_op(fd, buffer_, offset):
+    """
+    Read a block into a buffer.
+
+    :param fd: The file descriptor to read from.
+    :param buffer_: The writable buffer to read into, which determines the
+                    size of the read.
+    :param offset: The offset to read at.
+    """
+    os.preadv(fd, [buffer_], offset)
+
+
+def _read_op_copy(fd, buffer_, offset):
+    """
+    Read a block into a buffer where `preadv()` is unavailable, at the cost of
+    an extra copy.
+
+    :param fd: The file descriptor to read from.
+    :param buffer_: The writable buffer to read into.
+    :param offset: The offset to read at.
+    """
+    data = os.pread(fd, len(buffer_), offset)
+    buffer_[:len(data)] = data
+
+
+def _write_op(fd, buffer_, offset):
+    """
+    Write a block.
+
+    :param fd: The file descriptor to write to.
+    :param buffer_: The data to write.
+    :param offset: The offset to write at.
+    """
+    os.pwrite(fd, buffer_, offset)
+
+
+def _seek_op(operation):
+    """
+    Make a read or write operation for Python before 3.3, which has neither
+    `os.pread()` nor `os.pwrite()`. The threads share a file descriptor, so
+    each seek and transfer holds a lock, and queue depths above 1 only
+    measure the cost of threads taking turns.
+
+    :param operation: 'read' or 'write'.
+    :return: A function taking the file descriptor, buffer and offset.
+    """
+    lock = threading.Lock()
+
+    def op(fd, buffer_, offset):
+        with lock:
+            os.lseek(fd, offset, os.SEEK_SET)
+            if operation == 'write':
+                os.write(fd, buffer_)
+            else:
+                data = os.read(fd, len(buffer_))
+                buffer_[:len(data)] = data
+
+    return op
+
+
+class DiskBenchmark(object):
+    """
+    Measures the throughput and latency of reading and writing a file. Given
+    a directory, a temporary file is created in it and removed on `close()`.
+    Given a file, only reads may be benchmarked, as writes would destroy its
+    contents.
+    """
+
+    def __init__(self, path, size=Information(256, Information.MEBIBYTES)):
+        """
+        Prepare to benchmark a path.
+
+        :param path: A directory to create a test file in, or an existing
+                     file to read.
+        :param size: The size of the test file to create in a directory.
+                     Should be larger than the disk's cache. Defaults to
+                     256 MiB. Ignored for existing files.
+        :raises ValueError: If the size is less than one byte.
+        :raises OSError: If the file cannot be created or opened.
+        """
+        self._created = os.path.isdir(path)
+        if not self._created:
+            self.path = path
+            self.size_bytes = os.path.getsize(path)
+            return
+
+        self.size_bytes = size.bits // Information.BYTES
+        if not self.size_bytes:
+            raise ValueError('The test file must be at least 1 byte')
+        descriptor, self.path = tempfile.mkstemp(prefix='nibble-bench',
+                                                 dir=path)
+        try:
+            self._fill(descriptor)
+        except Exception:
+            os.close(descriptor)
+            os.remove(self.path)
+            raise
+        os.close(descriptor)
+
+    def _fill(self, fd):
+        """
+        Write the test file, and make sure it is on disk.
+
+        :param fd: The file descriptor of the empty test file.
+        """
+        logger.info('Writing %s test file %s',
+                    Information(self.size_bytes, Information.BYTES), self.path)
+        data = memoryview(os.urandom(_FILL_SIZE))
+        remaining = self.size_bytes
+        while remaining:
+            remaining -= os.write(fd, data[:min(remaining, _FILL_SIZE)])
+        os.fsync(fd)
+
+    @property
+    def size(self):
+        """
+        The size of the file being benchmarked.
+
+        :return: The size as an `Information`.
+        """
+        return Information(self.size_bytes, Information.BYTES)
+
+    def close(self):
+        """
+        Remove the test file, if one was created.
+        """
+        if self._created:
+            os.remove(self.path)
+            self._created = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _open(self, operation, mode):
+        """
+        Open the file for a benchmark.
+
+        :param operation: 'read' or 'write'.
+        :param mode: 'buffered', 'direct' or 'mmap'.
+        :return: A file descriptor.
+        :raises ValueError: If direct I/O is not supported.
+        """
+        flags = os.O_RDONLY if operation == 'read' else os.O_WRONLY
+        if mode != 'direct':
+            return os.open(self.path, flags)
+
+        if not hasattr(os, 'O_DIRECT'):
+            raise ValueError('Direct I/O is not supported on this platform')
+        try:
+            return os.open(self.path, flags | os.O_DIRECT)
+        except OSError as e:
+            if e.errno == errno.EINVAL:
+                raise ValueError('Direct I/O is not supported by the '
+                                 'filesystem of {0}'.format(self.path))
+            raise
+
+    def run(self, operation='read', pattern='sequential',
+            block_size=Information(1, Information.MEBIBYTES), queue_depth=1,
+            mode='buffered', limit=None, seed=None):
+        """
+        Read or write the file a block at a time, by default once, with several
+        threads each keeping one operation in flight. Sequential benchmarks
+        interleave consecutive blocks between the threads; random benchmarks
+        choose block-aligned offsets uniformly. Before reads, the file is
+        evicted from the page cache where the platform allows, and writes
+        include the time to `fsync()` the file.
+
+        :param operation: 'read' or 'write'.
+        :param pattern: 'sequential' or 'random'.
+        :param block_size: The size of each operation. Defaults to 1 MiB.
+        :param queue_depth: The number of threads. Defaults to 1. Before
+                            Python 3.3, buffered operations are serialised,
+                            as the threads must seek the shared descriptor.
+        :param mode: 'buffered' for normal reads and writes, 'direct' to
+                     bypass the page cache with `O_DIRECT`, which requires a
+                     block size that is a multiple of the page size, and for
+                     reads, `os.preadv()` (Python 3.7), or 'mmap'
+                     to copy from a memory map of the file, for reads only.
+        :param limit: The maximum number of operations, to keep benchmarks
+                      with small blocks short. Defaults to as many as there
+                      are blocks in the file.
+        :param seed: The random seed for random offsets.
+        :return: The `BenchmarkResult`.
+        :raises ValueError: If an argument is invalid, or the mode is not
+                            supported.
+        """
+        if operation not in OPERATIONS:
+            raise ValueError('Unrecognised operation: {0}'.format(operation))
+        if pattern not in PATTERNS:
+            raise ValueError('Unrecognised pattern: {0}'.format(pattern))
+        if mode not in MODES:
+            raise ValueError('Unrecognised mode: {0}'.format(mode))
+        if operation == 'write' and not self._created:
+            raise ValueError('Write benchmarks need a directory, to avoid '
+                             'overwriting an existing file')
+        if mode == 'mmap' and operation == 'write':
+            raise ValueError('Memory mapped benchmarks only support reads')
+        if queue_depth < 1:
+            raise ValueError('Queue depth must be at least 1')
+        if limit is not None and limit < 1:
+            raise ValueError('Limit must be at least 1 operation')
+
+        block = block_size.bits // Information.BYTES
+        if not 0 < block <= self.size_bytes:
+            raise ValueError('Block size must be between 1 byte and the size '
+                             'of the file')
+        if mode == 'direct' and block % mmap.PAGESIZE:
+            raise ValueError('Direct I/O needs a block size that is a '
+                             'multiple of {0} bytes'.format(mmap.PAGESIZE))
+        if mode == 'direct' and operation == 'read' and \
+                not hasattr(os, 'preadv'):
+            # `os.pread()` reads into a buffer of its own, which O_DIRECT
+            # rejects as it is not aligned
+            raise ValueError('Direct reads need os.preadv(), available from '
+                             'Python 3.7')
+
+        blocks = self.size_bytes // block
+        operations = blocks if limit is None else min(blocks, limit)
+        if pattern == 'sequential':
+            offsets = [index * block for index in range(operations)]
+        else:
+            rng = random.Random(seed)
+            offsets = [rng.randrange(blocks) * block
+                       for _ in range(operations)]
+
+        fd = self._open(operation, mode)
+        try:
+            if operation == 'read':
+                _evict(fd)
+            mapping = mmap.mmap(fd, 0, access=mmap.ACCESS_READ) \
+                if mode == 'mmap' else None
+            try:
+                duration, latencies = self._execute(
+                    fd, mapping, operation, block, queue_depth,
+                    [offsets[i::queue_depth] for i in range(queue_depth)])
+            finally:
+                if mapping is not None:
+                    mapping.close()
+        finally:
+            os.close(fd)
+
+        latencies.sort()
+        return BenchmarkResult(operation, pattern, mode, block_size,
+                               queue_depth,
+                               Information(operations * block,
+                                           Information.BYTES),
+                               duration, latencies)
+
+    @staticmethod
+    def _execute(fd, mapping, operation, block, queue_depth, offsets):
+        """
+        Run the operations of a benchmark.
+
+        :param fd: The file descriptor of the test file.
+        :param mapping: A memory map of the file, for mmap reads, else None.
+        :param operation: 'read' or 'write'.
+        :param block: The block size in bytes.
+        :param queue_depth: The number of threads.
+        :param offsets: A list of offsets for each thread.
+        :return: A tuple of the `Duration` taken, and the unsorted latencies
+                 of every operation in nanoseconds.
+        """
+        view = None
+        if mapping is not None:
+            try:
+                view = memoryview(mapping)
+            except TypeError:
+                # maps in Python 2 have no memoryview, and slicing one copies
+                view = mapping
+
+            def op(_, buffer_, offset):
+                buffer_[:] = view[offset:offset + block]
+        elif not hasattr(os, 'pread'):
+            op = _seek_op(operation)
+        elif operation == 'write':
+            op = _write_op
+        elif hasattr(os, 'preadv'):
+            op = _read_op
+        else:
+            op = _read_op_copy
+
+        latencies = [[] for _ in range(queue_depth)]
+        errors = []
+
+        def work(offsets_, latencies_):
+            # anonymous maps are page-aligned, as O_DIRECT requires
+            buffer_ = mmap.mmap(-1, block)
+            if operation == 'write':
+                buffer_.write(os.urandom(block))
+            clock = _nanoseconds
+            record = latencies_.append
+            try:
+                for offset in offsets_:
+                    start = clock()
+                    op(fd, buffer_, offset)
+                    record(clock() - start)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                buffer_.close()
+
+        threads = [threading.Thread(target=work, args=arguments)
+                   for arguments in zip(offsets, latencies)]
+        start = _nanoseconds()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if operation == 'write':
+            os.fsync(fd)
+        duration = Duration(nanoseconds=max(1, _nanoseconds() - start))
+        if isinstance(view, memoryview):
+            # the map cannot be closed while a view of it exists
+            view.release()
+        if errors:
+            raise errors[0]
+
+        return duration, [latency for thread in latencies
+                          for latency in thread]
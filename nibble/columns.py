@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, division
+import six
+
+from nibble import Information, Duration, Speed
+
+
+def _information_units(category):
+    """
+    Get the units an information category or unit symbol allows.
+
+    :param category: A category, e.g. 'dB', or a unit symbol, e.g. 'MiB'.
+    :return: A list of (symbol, bits) tuples, largest first.
+    :raises ValueError: If the category is not recognised.
+    """
+    if Information.is_valid_category(category):
+        # noinspection PyProtectedMember
+        return [(symbol, Information._SYMBOLS[symbol])
+                for symbol in Information._CATEGORY_MAPS[category]]
+    if Information.is_valid_symbol(category):
+        # noinspection PyProtectedMember
+        return [(category, Information._SYMBOLS[category])]
+    raise ValueError(
+        'Unrecognised information unit or category: {0}'.format(category))
+
+
+def _scale(kind, category):
+    """
+    Find how to reduce values of a type to numbers, and the units to show
+    them in.
+
+    :param kind: `Information`, `Duration` or `Speed`.
+    :param category: See `format_column()`.
+    :return: A tuple of a function mapping a value to a number, a list of
+             (symbol, size) tuples, largest first, and a suffix to follow the
+             symbol.
+    :raises ValueError: If the category is not valid for the type.
+    """
+    if kind is Information:
+        return (lambda information: information.bits,
+                _information_units(category or 'bB'), '')
+
+    if kind is Duration:
+        if not category:
+            # noinspection PyProtectedMember
+            return (lambda duration: duration.nanoseconds,
+                    list(six.iteritems(Duration._MAGNITUDES)), '')
+        return (lambda duration: duration.nanoseconds,
+                [(category, Duration.unit_nanoseconds(category))], '')
+
+    lhs, _, time = category.partition('/')
+    time = time or 's'
+    nanoseconds = Duration.unit_nanoseconds(time)
+    return (lambda speed: speed.information.bits * nanoseconds /
+            speed.duration.nanoseconds,
+            _information_units(lhs or 'bB'), '/' + time)
+
+
+def _median(numbers):
+    """
+    Find the median of a non-empty list of numbers.
+
+    :param numbers: The numbers.
+    :return: The median.
+    """
+    ordered = sorted(numbers)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def format_column(values, category='', statistic='max', separator=' '):
+    """
+    Format a column of quantities all in the same unit and to the same number
+    of decimal places, so they line up and can be compared at a glance. Unlike
+    formatting each value individually, the unit is only chosen once, from the
+    largest or median value, in the same way as `Information.__format__()`
+    chooses one. Every string is padded to the same width.
+
+    :param values: A sequence of `Information`, `Duration` or `Speed` objects,
+                   all of the same type.
+    :param category: The unit symbol or category to choose the unit from, as
+                     in the format specification of the type, e.g. 'dB',
+                     'ms' or 'db/s'. Defaults to binary bytes for information
+                     and speeds, and any unit for durations.
+    :param statistic: Which value to choose the unit for, 'max' or 'median'.
+                      With 'median', outliers will be shown in units smaller
+                      or larger than ideal, but most values will be shown in
+                      the ideal unit.
+    :param separator: The text between each number and its unit.
+    :return: A list of formatted strings, in the same order as `values`.
+    :raises TypeError: If the values are of different or unsupported types.
+    :raises ValueError: If the category or statistic is not recognised.
+    """
+    values = list(values)
+    if not values:
+        return []
+
+    kind = type(values[0])
+    if kind not in (Information, Duration, Speed) or \
+            any(type(value) is not kind for value in values):
+        raise TypeError('Values must all be Information, Duration or Speed '
+                        'objects of the same type')
+    if statistic not in ('max', 'median'):
+        raise ValueError('Unrecognised statistic: {0}'.format(statistic))
+
+    magnitude, units, suffix = _scale(kind, category)
+    magnitudes = [magnitude(value) for value in values]
+    largest = max(magnitudes)
+    representative = largest if statistic == 'max' else _median(magnitudes)
+
+    # the same rule as choosing a unit from a category for a single value
+    symbol, size = units[-1]
+    for candidate in units:
+        if representative >= candidate[1]:
+            symbol, size = candidate
+            break
+
+    # two decimal places, or enough to show two significant digits of a
+    # representative value less than 0.1 of the unit
+    quantity = representative / size
+    places = 2
+    while 0 < quantity < 0.1 and places < 12:
+        quantity *= 10
+        places += 1
+
+    unit = '{0}{1}{2}'.format(separator, symbol, suffix)
+    # negative values may be wider than the largest
+    numbers = ['{0:,.{1}f}'.format(number / size, places)
+               for number in magnitudes]
+    width = max(len(number) for number in numbers)
+    return [number.rjust(width) + unit for number in numbers]
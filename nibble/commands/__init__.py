@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+from collections import OrderedDict
+
+from nibble.commands import convert, sort, du, logstats, table, pv, \
+    bench_disk, ifstat, iotop, netbench, bench_codec, df, pcap
+
+
+# Subcommands of the command line interface, by name. Each module provides a
+# `DESCRIPTION`, a `configure(parser)` function to add its arguments, and a
+# `run(args)` function returning the exit status.
+COMMANDS = OrderedDict([
+    ('convert', convert),
+    ('sort', sort),
+    ('du', du),
+    ('logstats', logstats),
+    ('table', table),
+    ('pv', pv),
+    ('bench-disk', bench_disk),
+    ('ifstat', ifstat),
+    ('iotop', iotop),
+    ('netbench', netbench),
+    ('bench-codec', bench_codec),
+    ('df', df),
+    ('pcap', pcap)
+])
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+import itertools
+import logging
+
+from nibble import util, bench_codec, Information, Speed
+from nibble.columns import format_column
+from nibble.commands import common
+
+logger = logging.getLogger(__name__)
+
+DESCRIPTION = 'Measure the throughput and ratio of compression and hash ' \
+              'algorithms, and whether compressing before sending over a ' \
+              'link would be faster.'
+
+
+def configure(parser):
+    """
+    Add this command's arguments to its parser.
+
+    :param parser: The `argparse.ArgumentParser` for this command.
+    """
+    parser.add_argument('file',
+                        nargs='?',
+                        type=util.decode_cli_arg,
+                        help='a sample of the data to benchmark, - for stdin; '
+                             'defaults to generating text-like data')
+    parser.add_argument('-s', '--size',
+                        type=common.information_arg,
+                        default=Information(4, Information.MEBIBYTES),
+                        help='the most data to benchmark; defaults to 4MiB')
+    parser.add_argument('-a', '--algorithms',
+                        type=common.list_arg(
+                            common.choice_arg(bench_codec.ALGORITHMS)),
+                        default=list(bench_codec.ALGORITHMS),
+                        help='comma-separated algorithms to benchmark; '
+                             'defaults to all')
+    parser.add_argument('-L', '--levels',
+                        type=common.list_arg(int),
+                        help='comma-separated compression levels; defaults '
+                             'to a few for each compressor')
+    parser.add_argument('-c', '--chunk-sizes',
+                        type=common.list_arg(common.information_arg),
+                        default=[Information(64, Information.KIBIBYTES),
+                                 Information(1, Information.MEBIBYTES)],
+                        help='comma-separated sizes of each independently '
+                             'compressed chunk; defaults to 64KiB,1MiB')
+    parser.add_argument('-j', '--processes',
+                        type=common.positive_int_arg,
+                        default=1,
+                        help='the number of processes to compress chunks in; '
+                             'defaults to 1')
+    parser.add_argument('-l', '--link',
+                        type=common.speed_arg,
+                        default=Speed.GIGABIT,
+                        help='the speed of the link to project transfer '
+                             'times over; defaults to GIGABIT')
+    parser.add_argument('-f', '--format',
+                        type=util.decode_cli_arg,
+                        default='',
+                        help='the unit category of speeds, e.g. "db"; '
+                             'defaults to bB')
+
+
+def _read_sample(path, size):
+    """
+    Read the start of a file to benchmark with.
+
+    :param path: The path of the file, or - for stdin.
+    :param size: The most to read, as an `Information`.
+    :return: The data as bytes.
+    """
+    with common.open_input(path, binary=True) as file_:
+        return file_.read(size.bits // Information.BYTES)
+
+
+def _speedup(result, link):
+    """
+    Format how much faster compressing before sending would be.
+
+    :param result: The `CodecResult`.
+    :param link: The `Speed` of the link.
+    :return: The factor as a string, or '-' for hashes.
+    """
+    if result.ratio is None:
+        return '-'
+    return '{0:.2f}x'.format(result.speedup(link))
+
+
+def run(args):
+    """
+    Execute the command.
+
+    :param args: The populated argparse namespace.
+    :return: The exit status.
+    """
+    if args.file is None:
+        data = bench_codec.synthetic_data(args.size, 0)
+    else:
+        data = _read_sample(args.file, args.size)
+
+    results = []
+    with bench_codec.CodecBenchmark(data, args.processes) as benchmark:
+        for algorithm in args.algorithms:
+            levels = bench_codec.levels(algorithm)
+            if args.levels is not None and levels != (None,):
+                levels = args.levels
+            for level, chunk_size in itertools.product(levels,
+                                                       args.chunk_sizes):
+                logger.info('Benchmarking %s at level %s with %s chunks',
+                            algorithm, level, chunk_size)
+                results.append(benchmark.run(algorithm, level, chunk_size))
+
+    columns = [
+        ['algorithm'] + [result.algorithm for result in results],
+        ['level'] + ['-' if result.level is None else str(result.level)
+                     for result in results],
+        ['chunk'] + ['{0}'.format(result.chunk_size) for result in results],
+        ['speed'] + format_column([result.speed for result in results],
+                                  args.format, statistic='median'),
+        ['ratio'] + ['-' if result.ratio is None
+                     else '{0:.2f}'.format(result.ratio)
+                     for result in results],
+        ['vs raw'] + [_speedup(result, args.link) for result in results]
+    ]
+    widths = [max(len(cell) for cell in column) for column in columns]
+    for row in zip(*columns):
+        print('  '.join([row[0].ljust(widths[0])] +
+                        [cell.rjust(width)
+                         for cell, width in zip(row[1:], widths[1:])]))
+    return 0
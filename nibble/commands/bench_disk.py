@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+import itertools
+import logging
+
+from nibble import util, Information
+from nibble.bench_disk import OPERATIONS, PATTERNS, MODES, DiskBenchmark
+from nibble.columns import format_column
+from nibble.commands import common
+
+logger = logging.getLogger(__name__)
+
+DESCRIPTION = 'Measure the sequential and random read and write throughput ' \
+              'and latency of a disk.'
+
+
+def configure(parser):
+    """
+    Add this command's arguments to its parser.
+
+    :param parser: The `argparse.ArgumentParser` for this command.
+    """
+    parser.add_argument('path',
+                        type=util.decode_cli_arg,
+                        help='a directory to create a test file in, or a file '
+                             'to benchmark reading')
+    parser.add_argument('-s', '--size',
+                        type=common.information_arg,
+                        default=Information(256, Information.MEBIBYTES),
+                        help='the size of the test file; defaults to 256MiB')
+    parser.add_argument('-o', '--operations',
+                        type=common.list_arg(common.choice_arg(OPERATIONS)),
+                        default=list(OPERATIONS),
+                        help='comma-separated operations to benchmark; '
+                             'defaults to read,write')
+    parser.add_argument('-p', '--patterns',
+                        type=common.list_arg(common.choice_arg(PATTERNS)),
+                        default=list(PATTERNS),
+                        help='comma-separated access patterns; defaults to '
+                             'sequential,random')
+    parser.add_argument('-b', '--block-sizes',
+                        type=common.list_arg(common.information_arg),
+                        default=[Information(4, Information.KIBIBYTES),
+                                 Information(1, Information.MEBIBYTES)],
+                        help='comma-separated sizes of each operation; '
+                             'defaults to 4KiB,1MiB')
+    parser.add_argument('-q', '--queue-depths',
+                        type=common.list_arg(common.positive_int_arg),
+                        default=[1, 16],
+                        help='comma-separated numbers of operations to have '
+                             'in flight at once; defaults to 1,16')
+    parser.add_argument('-m', '--mode',
+                        choices=MODES,
+                        default='buffered',
+                        help='direct bypasses the page cache, mmap reads '
+                             'through a memory map; defaults to buffered')
+    parser.add_argument('-l', '--limit',
+                        type=common.positive_int_arg,
+                        help='the most operations per benchmark; defaults to '
+                             'covering the test file once')
+    parser.add_argument('-P', '--percentiles',
+                        type=common.percentiles_arg,
+                        default=[50, 99],
+                        help='the percentiles of latency to show; defaults to '
+                             '50,99')
+    parser.add_argument('-f', '--format',
+                        type=util.decode_cli_arg,
+                        default='',
+                        help='the unit category of speeds, e.g. "db"; '
+                             'defaults to bB')
+
+
+def run(args):
+    """
+    Execute the command.
+
+    :param args: The populated argparse namespace.
+    :return: The exit status.
+    """
+    results = []
+    with DiskBenchmark(args.path, args.size) as benchmark:
+        operations = args.operations
+        if args.mode == 'mmap' or benchmark.path == args.path:
+            # writes would be refused
+            operations = [operation for operation in operations
+                          if operation == 'read']
+        for operation, pattern, block_size, queue_depth in itertools.product(
+                operations, args.patterns, args.block_sizes,
+                args.queue_depths):
+            logger.info('Benchmarking %s %s of %s blocks at queue depth %d',
+                        pattern, operation, block_size, queue_depth)
+            results.append(benchmark.run(operation, pattern, block_size,
+                                         queue_depth, args.mode, args.limit))
+
+    if not results:
+        return 0
+
+    columns = [
+        ['operation'] + [result.operation for result in results],
+        ['pattern'] + [result.pattern for result in results],
+        ['block'] + ['{0}'.format(result.block_size) for result in results],
+        ['qd'] + ['{0}'.format(result.queue_depth) for result in results],
+        ['speed'] + format_column([result.speed for result in results],
+                                  args.format),
+        ['iops'] + ['{0:,.0f}'.format(result.operations_per_second)
+                    for result in results]
+    ]
+    for percentile in args.percentiles:
+        columns.append(['p{0:g}'.format(percentile)] + format_column(
+            [result.percentile(percentile) for result in results],
+            statistic='median'))
+
+    widths = [max(len(cell) for cell in column) for column in columns]
+    for row in zip(*columns):
+        print('  '.join([cell.ljust(width) if index < 2
+                         else cell.rjust(width)
+                         for index, (cell, width)
+                         in enumerate(zip(row, widths))]).rstrip())
+    return 0
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import argparse
+import contextlib
+import io
+import sys
+
+from nibble import util, Information, Duration, Speed
+
+
+def information_arg(string):
+    """
+    An `argparse` type for quantities of information, e.g. '10 GiB'.
+
+    :param string: The argument provided on the command line.
+    :return: The parsed `Information`.
+    :raises argparse.ArgumentTypeError: If the argument is invalid.
+    """
+    try:
+        return Information.parse(util.decode_cli_arg(string))
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(e)
+
+
+def duration_arg(string):
+    """
+    An `argparse` type for durations, e.g. '5m'.
+
+    :param string: The argument provided on the command line.
+    :return: The parsed `Duration`.
+    :raises argparse.ArgumentTypeError: If the argument is invalid.
+    """
+    try:
+        duration = Duration.parse(util.decode_cli_arg(string))
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(e)
+    if not duration:
+        raise argparse.ArgumentTypeError('Duration must be positive')
+    return duration
+
+
+def speed_arg(string):
+    """
+    An `argparse` type for speeds, either a string such as '10Gb/s', or the
+    name of one of the `Speed` constants, e.g. 'TEN_GIGABIT' or 'T3'.
+
+    :param string: The argument provided on the command line.
+    :return: The parsed `Speed`.
+    :raises argparse.ArgumentTypeError: If the argument is invalid.
+    """
+    string = util.decode_cli_arg(string)
+    constant = getattr(Speed, string, None) if string.isupper() else None
+    if isinstance(constant, Speed):
+        return constant
+
+    try:
+        return Speed.parse(string)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(e)
+
+
+def positive_int_arg(string):
+    """
+    An `argparse` type for integers greater than zero, e.g. a job count.
+
+    :param string: The argument provided on the command line.
+    :return: The parsed integer.
+    :raises argparse.ArgumentTypeError: If the argument is invalid.
+    """
+    try:
+        value = int(string)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            'Invalid integer: {0}'.format(string))
+    if value < 1:
+        raise argparse.ArgumentTypeError(
+            'Must be greater than zero: {0}'.format(string))
+    return value
+
+
+def percentiles_arg(string):
+    """
+    An `argparse` type for a comma-separated list of percentiles.
+
+    :param string: The argument provided on the command line.
+    :return: A list of floats.
+    :raises argparse.ArgumentTypeError: If the argument is invalid.
+    """
+    try:
+        percentiles = [float(percentile) for percentile in string.split(',')]
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            'Invalid percentiles: {0}'.format(string))
+    if any(not 0 <= percentile <= 100 for percentile in percentiles):
+        raise argparse.ArgumentTypeError(
+            'Percentiles must be between 0 and 100: {0}'.format(string))
+    return percentiles
+
+
+def list_arg(item_type):
+    """
+    Create an `argparse` type for a comma-separated list of another type.
+
+    :param item_type: The `argparse` type of each item, e.g. `information_arg`.
+    :return: A function parsing the argument into a list.
+    """
+    def parse(string):
+        return [item_type(item.strip())
+                for item in util.decode_cli_arg(string).split(',')]
+
+    return parse
+
+
+def choice_arg(choices):
+    """
+    Create an `argparse` type accepting one of several strings, for use with
+    `list_arg()`, which `choices=` cannot be combined with.
+
+    :param choices: The valid strings.
+    :return: A function validating the argument.
+    """
+    def parse(string):
+        if string not in choices:
+            raise argparse.ArgumentTypeError(
+                'Invalid choice: {0} (choose from {1})'.format(
+                    string, ', '.join(choices)))
+        return string
+
+    return parse
+
+
+def _standard_stream(stream, binary):
+    """
+    Get the text or binary version of a standard stream.
+
+    :param stream: `sys.stdin` or `sys.stdout`.
+    :param binary: Whether the binary stream is wanted.
+    :return: The stream to use.
+    """
+    if binary:
+        # Python 2's standard streams are already binary
+        return getattr(stream, 'buffer', stream)
+    return stream
+
+
+@contextlib.contextmanager
+def open_input(path, binary=False, buffering=-1):
+    """
+    Open a file named on the command line for reading, where '-' means stdin.
+    Files are opened in text mode without newline translation, which is what
+    the `csv` module expects.
+
+    :param path: The path of the file, or '-'.
+    :param binary: Whether to open the file in binary mode.
+    :param buffering: The buffer size, as for `io.open()`.
+    :return: A context manager yielding the file object. Leaving it will not
+             close stdin.
+    """
+    if path == '-':
+        yield _standard_stream(sys.stdin, binary)
+        return
+
+    if binary:
+        file_ = io.open(path, 'rb', buffering=buffering)
+    else:
+        file_ = io.open(path, 'r', buffering=buffering, newline='')
+    with file_:
+        yield file_
+
+
+@contextlib.contextmanager
+def open_output(path, binary=False, buffering=-1):
+    """
+    Open a file named on the command line for writing, where '-' means stdout.
+
+    :param path: The path of the file, or '-'.
+    :param binary: Whether to open the file in binary mode.
+    :param buffering: The buffer size, as for `io.open()`.
+    :return: A context manager yielding the file object. Leaving it will not
+             close stdout.
+    """
+    if path == '-':
+        yield _standard_stream(sys.stdout, binary)
+        return
+
+    if binary:
+        file_ = io.open(path, 'wb', buffering=buffering)
+    else:
+        file_ = io.open(path, 'w', buffering=buffering, newline='')
+    with file_:
+        yield file_
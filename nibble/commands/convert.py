@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import csv
+import logging
+
+from nibble import util
+from nibble.commands import common
+from nibble.convert import ColumnConverter, convert, format_row
+
+logger = logging.getLogger(__name__)
+
+DESCRIPTION = 'Reformat a column of quantities in a CSV or TSV file.'
+
+# 1 MiB reads keep the number of system calls negligible on large files
+_BUFFER_SIZE = 1024 ** 2
+
+
+def configure(parser):
+    """
+    Add this command's arguments to its parser.
+
+    :param parser: The `argparse.ArgumentParser` for this command.
+    """
+    parser.add_argument('file',
+                        type=util.decode_cli_arg,
+                        nargs='?',
+                        default='-',
+                        help='the file to read; defaults to stdin')
+    parser.add_argument('-c', '--column',
+                        type=util.decode_cli_arg,
+                        required=True,
+                        help='the one-based index of the column to convert, '
+                             'or its name if --header is given')
+    parser.add_argument('-k', '--kind',
+                        choices=['information', 'duration', 'speed'],
+                        default='information',
+                        help='the type of quantity in the column; defaults '
+                             'to information')
+    parser.add_argument('-u', '--unit',
+                        type=util.decode_cli_arg,
+                        help='the unit of plain numbers in the column, e.g. '
+                             'KiB, ms or Mb/s; defaults to B, s or B/s')
+    parser.add_argument('-f', '--format',
+                        type=util.decode_cli_arg,
+                        default='',
+                        help='the format specification to apply, e.g. " GiB"')
+    delimiter = parser.add_mutually_exclusive_group()
+    delimiter.add_argument('-d', '--delimiter',
+                           type=util.decode_cli_arg,
+                           default=',',
+                           help='the field delimiter; defaults to a comma')
+    delimiter.add_argument('-t', '--tsv',
+                           dest='delimiter',
+                           action='store_const',
+                           const='\t',
+                           help='use a tab as the field delimiter')
+    parser.add_argument('-H', '--header',
+                        action='store_true',
+                        help='copy the first row through unchanged')
+    parser.add_argument('-j', '--jobs',
+                        type=common.positive_int_arg,
+                        default=1,
+                        help='the number of processes to convert with')
+    parser.add_argument('-o', '--output',
+                        type=util.decode_cli_arg,
+                        default='-',
+                        help='the file to write; defaults to stdout')
+
+
+def _column_index(column, header):
+    """
+    Resolve the column argument to a zero-based index.
+
+    :param column: The column argument, a one-based index or a name.
+    :param header: The header row, or None if there isn't one.
+    :return: The zero-based index of the column.
+    :raises ValueError: If the column cannot be found.
+    """
+    if column.isdigit():
+        if int(column) < 1:
+            raise ValueError('Column indices start at 1')
+        return int(column) - 1
+
+    if header is None:
+        raise ValueError('Columns can only be named when --header is given')
+    try:
+        return header.index(column)
+    except ValueError:
+        raise ValueError('No column named \'{0}\''.format(column))
+
+
+def run(args):
+    """
+    Execute the command.
+
+    :param args: The populated argparse namespace.
+    :return: The exit status.
+    """
+    with common.open_input(args.file, buffering=_BUFFER_SIZE) as infile, \
+            common.open_output(args.output, buffering=_BUFFER_SIZE) as outfile:
+        # `csv` in Python 2 rejects unicode delimiters
+        delimiter = str(args.delimiter)
+        header = None
+        if args.header:
+            # read it here rather than in `convert()`, as it may name the column
+            header = next(csv.reader(infile, delimiter=delimiter), None)
+            if header is not None:
+                outfile.write(format_row(header, delimiter))
+
+        converter = ColumnConverter(_column_index(args.column, header),
+                                    args.format, args.kind, args.unit)
+        rows = convert(infile, outfile, converter, delimiter,
+                       jobs=args.jobs)
+        logger.info('Converted %d rows', rows)
+    return 0
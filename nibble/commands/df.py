@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+import datetime
+import itertools
+import time
+
+from nibble import util, Information, Duration, Speed
+from nibble.commands import common
+from nibble.df import FilesystemSampler
+
+DESCRIPTION = 'Show the usage of filesystems, how fast it is growing, and ' \
+              'when each will be full.'
+
+
+def configure(parser):
+    """
+    Add this command's arguments to its parser.
+
+    :param parser: The `argparse.ArgumentParser` for this command.
+    """
+    parser.add_argument('paths',
+                        nargs='*',
+                        type=util.decode_cli_arg,
+                        help='paths on the filesystems to show; defaults to '
+                             'every mounted filesystem')
+    parser.add_argument('-i', '--interval',
+                        type=common.duration_arg,
+                        default=Duration.SECOND,
+                        help='the time between samples; defaults to 1s')
+    parser.add_argument('-c', '--count',
+                        type=common.positive_int_arg,
+                        help='the number of samples to show; defaults to '
+                             'until interrupted')
+    parser.add_argument('-n', '--top',
+                        type=common.positive_int_arg,
+                        help='only show this many filesystems, soonest to '
+                             'fill first; defaults to all')
+    parser.add_argument('-f', '--format',
+                        type=util.decode_cli_arg,
+                        default='bB',
+                        help='the unit category of sizes and rates; defaults '
+                             'to bB')
+    parser.add_argument('--mounts',
+                        type=util.decode_cli_arg,
+                        default='/proc/self/mounts',
+                        help='the mount table; defaults to /proc/self/mounts')
+
+
+def _forecast_key(filesystem):
+    """
+    Order filesystems by how soon they will be full, then by how full they
+    are.
+
+    :param filesystem: The `Filesystem`.
+    :return: A sort key.
+    """
+    time_to_full = filesystem.time_to_full
+    return (time_to_full is None,
+            time_to_full.nanoseconds if time_to_full is not None else 0,
+            -filesystem.used / filesystem.size if filesystem.size else 0)
+
+
+def _format_rate(rate, format_spec):
+    """
+    Format a growth rate, which may be negative.
+
+    :param rate: The `Speed`, or None if unknown.
+    :param format_spec: The format specification.
+    :return: The rate as a string.
+    """
+    if rate is None:
+        return '-'
+    if rate.information.bits < 0:
+        # units are chosen by magnitude
+        return '-' + format(Speed(Information(-rate.information.bits),
+                                  rate.duration), format_spec)
+    return format(rate, format_spec)
+
+
+def _print_sample(sampler, top, format_spec):
+    """
+    Print the usage and forecast of each filesystem as of the last sample.
+
+    :param sampler: The `FilesystemSampler`.
+    :param top: The most filesystems to print, or None for all.
+    :param format_spec: The unit category of sizes and rates.
+    """
+    filesystems = sorted(sampler.filesystems, key=_forecast_key)[:top]
+    if not filesystems:
+        return
+
+    spec = ' ' + format_spec
+    headings = ['mount', 'size', 'used', 'avail', 'use%', 'growth',
+                'full in']
+    rows = [headings]
+    for filesystem in filesystems:
+        size, used, available = [
+            format(Information(value, Information.BYTES), spec)
+            for value in (filesystem.size, filesystem.used,
+                          filesystem.available)]
+        time_to_full = filesystem.time_to_full
+        rows.append([
+            filesystem.path, size, used, available,
+            '{0:.1f}%'.format(filesystem.used / filesystem.size * 100)
+            if filesystem.size else '-',
+            _format_rate(filesystem.rate, spec),
+            '-' if time_to_full is None else format(time_to_full, '.1f| ')
+        ])
+    widths = [max(len(row[column]) for row in rows)
+              for column in range(len(headings))]
+
+    now = '{0:%H:%M:%S}'.format(datetime.datetime.now())
+    for row in rows:
+        print('  '.join([now, row[0].ljust(widths[0])] +
+                        [cell.rjust(width)
+                         for cell, width in zip(row[1:], widths[1:])]))
+
+
+def run(args):
+    """
+    Execute the command.
+
+    :param args: The populated argparse namespace.
+    :return: The exit status.
+    """
+    interval = args.interval.total_seconds()
+    sampler = FilesystemSampler(args.paths or None, args.mounts)
+    sampler.sample()
+    deadline = time.time() + interval
+    samples = itertools.count() if args.count is None else range(args.count)
+    try:
+        for _ in samples:
+            # sleeping until a deadline rather than for the interval stops
+            # the time taken to print accumulating as drift
+            time.sleep(max(0, deadline - time.time()))
+            deadline += interval
+            sampler.sample()
+            _print_sample(sampler, args.top, args.format)
+    except KeyboardInterrupt:
+        pass
+    return 0
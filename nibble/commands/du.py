@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+
+from nibble import util
+from nibble.commands import common
+from nibble.du import scan
+
+DESCRIPTION = 'Summarise the storage used by directory trees, and how long ' \
+              'they would take to transfer.'
+
+
+def configure(parser):
+    """
+    Add this command's arguments to its parser.
+
+    :param parser: The `argparse.ArgumentParser` for this command.
+    """
+    parser.add_argument('paths',
+                        type=util.decode_cli_arg,
+                        nargs='*',
+                        default=['.'],
+                        help='the trees to scan; defaults to the current '
+                             'directory')
+    depth = parser.add_mutually_exclusive_group()
+    depth.add_argument('-d', '--max-depth',
+                       type=int,
+                       help='only show directories this many levels below '
+                            'each path')
+    depth.add_argument('-s', '--summarize',
+                       dest='max_depth',
+                       action='store_const',
+                       const=0,
+                       help='only show a total for each path')
+    parser.add_argument('-A', '--apparent-size',
+                        action='store_true',
+                        help='show apparent sizes rather than disk usage')
+    parser.add_argument('-x', '--one-file-system',
+                        action='store_true',
+                        help='skip directories on different filesystems')
+    parser.add_argument('-f', '--format',
+                        type=util.decode_cli_arg,
+                        default='',
+                        help='the format specification for sizes, e.g. " GB"')
+    parser.add_argument('-S', '--speed',
+                        type=common.speed_arg,
+                        help='also show how long each directory would take to '
+                             'transfer at this speed, e.g. 1Gb/s or GIGABIT')
+    parser.add_argument('-j', '--jobs',
+                        type=common.positive_int_arg,
+                        help='the number of threads to scan with; defaults to '
+                             'four per CPU')
+
+
+def run(args):
+    """
+    Execute the command.
+
+    :param args: The populated argparse namespace.
+    :return: The exit status; 1 if anything could not be read.
+    """
+    status = 0
+    for path in args.paths:
+        for usage in scan(path, args.max_depth, args.jobs,
+                          args.one_file_system):
+            size = usage.apparent if args.apparent_size else usage.allocated
+            columns = ['{0:{1}}'.format(size, args.format)]
+            if args.speed:
+                columns.append('{0: }'.format(usage.at_speed(args.speed)))
+            columns.append(usage.path)
+            print('\t'.join(columns))
+
+            if usage.depth == 0 and usage.errors:
+                status = 1
+    return status
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+import datetime
+import itertools
+import time
+
+from nibble import util, Duration
+from nibble.columns import format_column
+from nibble.commands import common
+from nibble.ifstat import InterfaceSampler, link_speed
+
+DESCRIPTION = 'Show the receive and transmit rates of network interfaces, ' \
+              'and their utilisation of each link.'
+
+
+def configure(parser):
+    """
+    Add this command's arguments to its parser.
+
+    :param parser: The `argparse.ArgumentParser` for this command.
+    """
+    parser.add_argument('-I', '--interfaces',
+                        type=common.list_arg(util.decode_cli_arg),
+                        help='comma-separated interfaces to show; defaults to '
+                             'all')
+    parser.add_argument('-i', '--interval',
+                        type=common.duration_arg,
+                        default=Duration.SECOND,
+                        help='the time between samples; defaults to 1s')
+    parser.add_argument('-c', '--count',
+                        type=common.positive_int_arg,
+                        help='the number of samples to show; defaults to '
+                             'until interrupted')
+    parser.add_argument('-l', '--link',
+                        type=common.speed_arg,
+                        help='the speed of every link, e.g. TEN_GIGABIT, to '
+                             'show utilisation against; defaults to the '
+                             'speed each interface reports')
+    parser.add_argument('-f', '--format',
+                        type=util.decode_cli_arg,
+                        default='db',
+                        help='the unit category of rates; defaults to db')
+    parser.add_argument('--path',
+                        type=util.decode_cli_arg,
+                        default='/proc/net/dev',
+                        help='the interface counters file, e.g. of a host '
+                             'from within a container; defaults to '
+                             '/proc/net/dev')
+
+
+def _percentage(fraction):
+    """
+    Format a fraction of a link's capacity.
+
+    :param fraction: The fraction, or None if the link speed is unknown.
+    :return: The percentage as a string.
+    """
+    return '-' if fraction is None else '{0:.1f}%'.format(fraction * 100)
+
+
+def _print_sample(sampler, links, format_spec):
+    """
+    Print the rates of every interface as of the last sample.
+
+    :param sampler: The `InterfaceSampler`.
+    :param links: A dict of interface name to link `Speed`, or None if
+                  unknown.
+    :param format_spec: The unit category of rates.
+    """
+    rates = list(sampler.rates())
+    if not rates:
+        return
+
+    utilisations = [sampler.utilisation(name, links[name])
+                    if links[name] else (None, None) for name, _, _ in rates]
+    columns = [
+        [name for name, _, _ in rates],
+        format_column([rx for _, rx, _ in rates], format_spec),
+        format_column([tx for _, _, tx in rates], format_spec),
+        [_percentage(rx) for rx, _ in utilisations],
+        [_percentage(tx) for _, tx in utilisations]
+    ]
+    headings = ['interface', 'rx', 'tx', 'rx%', 'tx%']
+    widths = [max(len(cell) for cell in [heading] + column)
+              for heading, column in zip(headings, columns)]
+
+    now = '{0:%H:%M:%S}'.format(datetime.datetime.now())
+    for row in [headings] + list(zip(*columns)):
+        print('  '.join([now, row[0].ljust(widths[0])] +
+                        [cell.rjust(width)
+                         for cell, width in zip(row[1:], widths[1:])]))
+
+
+def run(args):
+    """
+    Execute the command.
+
+    :param args: The populated argparse namespace.
+    :return: The exit status.
+    """
+    interval = args.interval.total_seconds()
+    links = {}
+    with InterfaceSampler(args.interfaces, args.path) as sampler:
+        sampler.sample()
+        deadline = time.time() + interval
+        samples = itertools.count() if args.count is None \
+            else range(args.count)
+        try:
+            for _ in samples:
+                # sleeping until a deadline rather than for the interval
+                # stops the time taken to print accumulating as drift
+                time.sleep(max(0, deadline - time.time()))
+                deadline += interval
+                sampler.sample()
+                # rebuilt so removed interfaces are forgotten
+                links = dict((name, links[name] if name in links
+                              else args.link or link_speed(name))
+                             for name in sampler.names)
+                _print_sample(sampler, links, args.format)
+        except KeyboardInterrupt:
+            pass
+    return 0
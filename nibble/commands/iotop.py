@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+import datetime
+import itertools
+import time
+
+from nibble import util, Duration
+from nibble.columns import format_column
+from nibble.commands import common
+from nibble.iotop import KINDS, ProcessSampler
+
+DESCRIPTION = 'Show the processes reading and writing the most data.'
+
+
+def configure(parser):
+    """
+    Add this command's arguments to its parser.
+
+    :param parser: The `argparse.ArgumentParser` for this command.
+    """
+    parser.add_argument('-p', '--pids',
+                        type=common.list_arg(common.positive_int_arg),
+                        help='comma-separated process IDs to show; defaults '
+                             'to all')
+    parser.add_argument('-n', '--top',
+                        type=common.positive_int_arg,
+                        default=10,
+                        help='the number of processes to show; defaults to 10')
+    parser.add_argument('-k', '--kind',
+                        choices=KINDS,
+                        default='disk',
+                        help='disk to rank by I/O reaching storage, all to '
+                             'include the page cache, pipes and sockets; '
+                             'defaults to disk')
+    parser.add_argument('-i', '--interval',
+                        type=common.duration_arg,
+                        default=Duration.SECOND,
+                        help='the time between samples; defaults to 1s')
+    parser.add_argument('-c', '--count',
+                        type=common.positive_int_arg,
+                        help='the number of samples to show; defaults to '
+                             'until interrupted')
+    parser.add_argument('-f', '--format',
+                        type=util.decode_cli_arg,
+                        default='bB',
+                        help='the unit category of rates; defaults to bB')
+    parser.add_argument('--proc',
+                        type=util.decode_cli_arg,
+                        default='/proc',
+                        help='where procfs is mounted, e.g. of a host from '
+                             'within a container; defaults to /proc')
+
+
+def _print_sample(sampler, top, kind, format_spec):
+    """
+    Print the busiest processes as of the last sample.
+
+    :param sampler: The `ProcessSampler`.
+    :param top: The number of processes to print.
+    :param kind: The kind of I/O to rank by.
+    :param format_spec: The unit category of rates.
+    """
+    processes = sampler.top(top, kind)
+    if not processes:
+        return
+
+    columns = [
+        ['{0}'.format(pid) for pid, _, _, _ in processes],
+        format_column([read for _, _, read, _ in processes], format_spec),
+        format_column([write for _, _, _, write in processes], format_spec),
+        [name for _, name, _, _ in processes]
+    ]
+    headings = ['pid', 'read', 'write', 'command']
+    widths = [max(len(cell) for cell in [heading] + column)
+              for heading, column in zip(headings, columns)]
+
+    now = '{0:%H:%M:%S}'.format(datetime.datetime.now())
+    for row in [headings] + list(zip(*columns)):
+        print('  '.join([now] +
+                        [cell.rjust(width)
+                         for cell, width in zip(row[:3], widths)] +
+                        [row[3]]))
+
+
+def run(args):
+    """
+    Execute the command.
+
+    :param args: The populated argparse namespace.
+    :return: The exit status.
+    """
+    interval = args.interval.total_seconds()
+    with ProcessSampler(args.pids, args.proc) as sampler:
+        sampler.sample()
+        deadline = time.time() + interval
+        samples = itertools.count() if args.count is None \
+            else range(args.count)
+        try:
+            for _ in samples:
+                # sleeping until a deadline rather than for the interval
+                # stops the time taken to print accumulating as drift
+                time.sleep(max(0, deadline - time.time()))
+                deadline += interval
+                sampler.sample()
+                _print_sample(sampler, args.top, args.kind, args.format)
+        except KeyboardInterrupt:
+            pass
+    return 0
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+
+from nibble import util, Duration
+from nibble.commands import common
+from nibble.logstats import scan_file
+
+DESCRIPTION = 'Show the egress rate over time and per-request transfer ' \
+              'speeds of a web server access log in the combined format.'
+
+
+def configure(parser):
+    """
+    Add this command's arguments to its parser.
+
+    :param parser: The `argparse.ArgumentParser` for this command.
+    """
+    parser.add_argument('file',
+                        type=util.decode_cli_arg,
+                        help='the log file to analyse')
+    parser.add_argument('-b', '--bucket',
+                        type=common.duration_arg,
+                        default=Duration(minutes=1),
+                        help='the period to aggregate egress over; defaults '
+                             'to 1m')
+    parser.add_argument('-u', '--time-unit',
+                        choices=['s', 'ms', 'us'],
+                        default='s',
+                        help='the unit of the request time at the end of each '
+                             'line; s for nginx\'s $request_time, us for '
+                             'Apache\'s %%D; defaults to s')
+    parser.add_argument('-p', '--percentiles',
+                        type=common.percentiles_arg,
+                        default=[50, 90, 99],
+                        help='the percentiles of per-request speed to show; '
+                             'defaults to 50,90,99')
+    parser.add_argument('-f', '--format',
+                        type=util.decode_cli_arg,
+                        default='',
+                        help='the format specification for speeds, e.g. '
+                             '" Mb/s"')
+    parser.add_argument('-j', '--jobs',
+                        type=common.positive_int_arg,
+                        default=1,
+                        help='the number of processes to scan with')
+
+
+def run(args):
+    """
+    Execute the command.
+
+    :param args: The populated argparse namespace.
+    :return: The exit status.
+    """
+    stats = scan_file(args.file, args.bucket,
+                      Duration.unit_nanoseconds(args.time_unit), args.jobs)
+
+    for start, requests, sent, speed in stats.series():
+        print('{0:%Y-%m-%dT%H:%M:%SZ}\t{1}\t{2}\t{3:{4}}'.format(
+            start, requests, sent, speed, args.format))
+
+    print('{0} requests, {1} sent'.format(stats.requests, stats.sent))
+    for percentile in args.percentiles:
+        speed = stats.percentile(percentile)
+        print('p{0:g}\t{1}'.format(
+            percentile, '-' if speed is None else
+            '{0:{1}}'.format(speed, args.format)))
+    return 0
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+
+from nibble import util, netbench, Information, Duration
+from nibble.columns import format_column
+from nibble.commands import common
+
+DESCRIPTION = 'Measure the throughput of TCP or Unix sockets on this host ' \
+              'over one or more streams.'
+
+
+def configure(parser):
+    """
+    Add this command's arguments to its parser.
+
+    :param parser: The `argparse.ArgumentParser` for this command.
+    """
+    parser.add_argument('-n', '--streams',
+                        type=common.positive_int_arg,
+                        default=1,
+                        help='the number of connections; defaults to 1')
+    parser.add_argument('-t', '--duration',
+                        type=common.duration_arg,
+                        default=Duration(seconds=10),
+                        help='how long to send for; defaults to 10s')
+    parser.add_argument('-F', '--family',
+                        choices=netbench.FAMILIES,
+                        default='tcp',
+                        help='tcp uses the loopback interface, unix uses Unix '
+                             'domain sockets; defaults to tcp')
+    parser.add_argument('-m', '--mode',
+                        choices=netbench.MODES,
+                        default='thread',
+                        help='thread gives each stream its own threads, '
+                             'asyncio runs every stream on one event loop; '
+                             'defaults to thread')
+    parser.add_argument('-b', '--buffer-size',
+                        type=common.information_arg,
+                        default=Information(128, Information.KIBIBYTES),
+                        help='the amount to send with each call; defaults to '
+                             '128KiB')
+    parser.add_argument('--sendfile',
+                        action='store_true',
+                        help='send from a file with sendfile()')
+    parser.add_argument('-f', '--format',
+                        type=util.decode_cli_arg,
+                        default='db',
+                        help='the unit category of speeds; defaults to db')
+
+
+def run(args):
+    """
+    Execute the command.
+
+    :param args: The populated argparse namespace.
+    :return: The exit status.
+    """
+    result = netbench.run(args.streams, args.duration, args.family,
+                          args.mode, args.buffer_size, args.sendfile)
+
+    labels = [str(index) for index in range(1, args.streams + 1)]
+    speeds = result.stream_speeds
+    informations = result.informations
+    durations = result.durations
+    if args.streams > 1:
+        labels.append('total')
+        speeds.append(result.speed)
+        informations = informations + [result.information]
+        durations = durations + [result.duration]
+
+    columns = [
+        ['stream'] + labels,
+        ['speed'] + format_column(speeds, args.format),
+        ['received'] + format_column(informations, 'bB'),
+        ['duration'] + format_column(durations)
+    ]
+    widths = [max(len(cell) for cell in column) for column in columns]
+    for row in zip(*columns):
+        print('  '.join([row[0].ljust(widths[0])] +
+                        [cell.rjust(width)
+                         for cell, width in zip(row[1:], widths[1:])]))
+    return 0
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+
+from nibble import util, Duration
+from nibble.columns import format_column
+from nibble.commands import common
+from nibble.pcap import FlowTimeline
+
+DESCRIPTION = 'Show the flows that sent the most in packet captures, and ' \
+              'how their throughput varied over time.'
+
+
+def configure(parser):
+    """
+    Add this command's arguments to its parser.
+
+    :param parser: The `argparse.ArgumentParser` for this command.
+    """
+    parser.add_argument('files',
+                        nargs='+',
+                        type=util.decode_cli_arg,
+                        help='classic pcap or pcapng captures')
+    parser.add_argument('-i', '--interval',
+                        type=common.duration_arg,
+                        default=Duration.SECOND,
+                        help='the length of each time bucket; defaults to 1s')
+    parser.add_argument('-n', '--top',
+                        type=common.positive_int_arg,
+                        default=10,
+                        help='the number of flows to show; defaults to 10')
+    parser.add_argument('-s', '--series',
+                        action='store_true',
+                        help='also show the throughput of each flow in every '
+                             'time bucket')
+    parser.add_argument('-f', '--format',
+                        type=util.decode_cli_arg,
+                        default='db',
+                        help='the unit category of speeds; defaults to db')
+
+
+def _print_table(columns, left=1):
+    """
+    Print columns of cells as an aligned table.
+
+    :param columns: A list of columns, each a list of cells starting with its
+                    heading.
+    :param left: The number of columns to align left.
+    """
+    widths = [max(len(cell) for cell in column) for column in columns]
+    for row in zip(*columns):
+        print('  '.join([cell.ljust(width) if index < left
+                         else cell.rjust(width)
+                         for index, (cell, width)
+                         in enumerate(zip(row, widths))]).rstrip())
+
+
+def run(args):
+    """
+    Execute the command.
+
+    :param args: The populated argparse namespace.
+    :return: The exit status.
+    """
+    timeline = FlowTimeline(args.interval)
+    for path in args.files:
+        timeline.read(path)
+    flows = timeline.top(args.top)
+    if not flows:
+        return 0
+
+    labels = ['#{0}'.format(rank) for rank in range(1, len(flows) + 1)]
+    _print_table([
+        [''] + labels,
+        ['flow'] + [str(flow) for flow in flows],
+        ['packets'] + ['{0:,}'.format(flow.packets) for flow in flows],
+        ['bytes'] + format_column([flow.information for flow in flows]),
+        ['average'] + format_column([timeline.average(flow)
+                                     for flow in flows], args.format),
+        ['peak'] + format_column([timeline.peak(flow) for flow in flows],
+                                 args.format)
+    ], 2)
+
+    if args.series:
+        print()
+        columns = [['time'] + format_column(
+            [args.interval * bucket for bucket in range(timeline.buckets)])]
+        columns.extend([label] + format_column(timeline.speeds(flow),
+                                                args.format)
+                       for label, flow in zip(labels, flows))
+        _print_table(columns, 0)
+    return 0
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, division
+import os
+import stat
+import sys
+
+from nibble import util, Information, Duration
+from nibble.commands import common
+from nibble.pv import pipe
+
+DESCRIPTION = 'Copy stdin or a file to stdout, showing the transfer rate on ' \
+              'stderr.'
+
+
+def configure(parser):
+    """
+    Add this command's arguments to its parser.
+
+    :param parser: The `argparse.ArgumentParser` for this command.
+    """
+    parser.add_argument('file',
+                        type=util.decode_cli_arg,
+                        nargs='?',
+                        default='-',
+                        help='the file to copy; defaults to stdin')
+    parser.add_argument('-s', '--size',
+                        type=common.information_arg,
+                        help='the amount expected, to show an ETA; defaults '
+                             'to the size of the input if it is a file')
+    parser.add_argument('-i', '--interval',
+                        type=common.duration_arg,
+                        default=Duration.SECOND,
+                        help='how often to show the rate; defaults to 1s')
+    parser.add_argument('-f', '--format',
+                        type=util.decode_cli_arg,
+                        default='',
+                        help='the format specification for speeds, e.g. '
+                             '" Gb/s"')
+    parser.add_argument('-B', '--buffer-size',
+                        type=common.information_arg,
+                        default=Information(1, Information.MEBIBYTES),
+                        help='the most to copy at once; defaults to 1MiB')
+    parser.add_argument('--no-zero-copy',
+                        dest='zero_copy',
+                        action='store_false',
+                        help='always copy through a buffer rather than using '
+                             'splice() or sendfile()')
+    parser.add_argument('-o', '--output',
+                        type=util.decode_cli_arg,
+                        default='-',
+                        help='the file to write to; defaults to stdout')
+
+
+def _remaining(fd):
+    """
+    Find how much is left to read from a file descriptor.
+
+    :param fd: The file descriptor.
+    :return: The remaining amount as an `Information`, or None if the
+             descriptor is not a regular file.
+    """
+    stat_result = os.fstat(fd)
+    if not stat.S_ISREG(stat_result.st_mode):
+        return None
+    position = os.lseek(fd, 0, os.SEEK_CUR)
+    return Information(max(0, stat_result.st_size - position),
+                       Information.BYTES)
+
+
+def _reporter(format_spec, stream):
+    """
+    Create a function to print progress.
+
+    :param format_spec: The format specification for speeds.
+    :param stream: The text stream to print to. If it is a terminal, each
+                   report overwrites the last.
+    :return: A function suitable for `nibble.pv.pipe()`.
+    """
+    terminal = stream.isatty()
+    state = {'width': 0}
+
+    def report(meter, sample):
+        current, average, eta = sample
+        line = '{0}  {1:{3}}  avg {2:{3}}'.format(meter.transferred, current,
+                                                  average, format_spec)
+        if eta is not None:
+            line += '  {0:.0f}%  ETA {1: }'.format(
+                100 * meter.transferred_bytes * Information.BYTES /
+                meter.size.bits if meter.size else 100, eta)
+
+        if terminal:
+            stream.write('\r' + line.ljust(state['width']))
+            state['width'] = len(line)
+        else:
+            stream.write(line + '\n')
+        stream.flush()
+
+    return report
+
+
+def run(args):
+    """
+    Execute the command.
+
+    :param args: The populated argparse namespace.
+    :return: The exit status.
+    """
+    buffer_size = args.buffer_size.bits // Information.BYTES
+    if not buffer_size:
+        raise ValueError('Buffer size must be at least 1 byte')
+
+    with common.open_input(args.file, binary=True, buffering=0) as infile, \
+            common.open_output(args.output, binary=True,
+                               buffering=0) as outfile:
+        in_fd = infile.fileno()
+        size = args.size if args.size is not None else _remaining(in_fd)
+        if args.output == '-':
+            # nothing else should have been written, but if it was, it has to
+            # come first
+            outfile.flush()
+        pipe(in_fd, outfile.fileno(), _reporter(args.format, sys.stderr),
+             args.interval, size, buffer_size, args.zero_copy)
+
+    if sys.stderr.isatty():
+        sys.stderr.write('\n')
+    return 0
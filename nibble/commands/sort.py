@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+from nibble import util, Information
+from nibble.commands import common
+from nibble.sort import KeyExtractor, sort_lines, top_lines
+
+DESCRIPTION = 'Sort lines by the quantity of information, duration or speed ' \
+              'they contain.'
+
+
+def configure(parser):
+    """
+    Add this command's arguments to its parser.
+
+    :param parser: The `argparse.ArgumentParser` for this command.
+    """
+    parser.add_argument('files',
+                        type=util.decode_cli_arg,
+                        nargs='*',
+                        default=['-'],
+                        help='the files to read; defaults to stdin')
+    key = parser.add_mutually_exclusive_group()
+    key.add_argument('-f', '--field',
+                     type=common.positive_int_arg,
+                     help='the one-based index of the field holding the '
+                          'quantity; defaults to the whole line')
+    key.add_argument('-e', '--regex',
+                     type=util.decode_cli_arg,
+                     help='a regular expression matching the quantity; if it '
+                          'has a group, the first group is used')
+    parser.add_argument('-t', '--delimiter',
+                        type=util.decode_cli_arg,
+                        help='the field delimiter; defaults to whitespace')
+    parser.add_argument('-k', '--kind',
+                        choices=['information', 'duration', 'speed'],
+                        default='information',
+                        help='the type of quantity to sort by; defaults to '
+                             'information')
+    parser.add_argument('-u', '--unit',
+                        type=util.decode_cli_arg,
+                        help='the unit of plain numbers, e.g. KiB, ms or '
+                             'Mb/s; defaults to B, s or B/s')
+    parser.add_argument('-r', '--reverse',
+                        action='store_true',
+                        help='sort largest first')
+    parser.add_argument('-n', '--top',
+                        type=common.positive_int_arg,
+                        help='only output this many lines, without sorting '
+                             'the entire input')
+    parser.add_argument('-S', '--buffer-size',
+                        type=common.information_arg,
+                        default=Information(64, Information.MEBIBYTES),
+                        help='the amount of input to sort in memory per job '
+                             'before using temporary files; defaults to '
+                             '64 MiB')
+    parser.add_argument('-T', '--temporary-directory',
+                        type=util.decode_cli_arg,
+                        help='where to write temporary files')
+    parser.add_argument('-j', '--jobs',
+                        type=common.positive_int_arg,
+                        default=1,
+                        help='the number of processes to sort with')
+    parser.add_argument('-o', '--output',
+                        type=util.decode_cli_arg,
+                        default='-',
+                        help='the file to write; defaults to stdout')
+
+
+def _lines(paths):
+    """
+    Read lines from files in turn, ensuring every line ends with a newline, as
+    the last line of a file may not.
+
+    :param paths: The paths of the files to read, where '-' means stdin.
+    :return: A generator of the lines.
+    """
+    for path in paths:
+        with common.open_input(path) as file_:
+            for line in file_:
+                if not line.endswith('\n'):
+                    line += '\n'
+                yield line
+
+
+def run(args):
+    """
+    Execute the command.
+
+    :param args: The populated argparse namespace.
+    :return: The exit status.
+    """
+    extractor = KeyExtractor(args.kind, args.unit,
+                             args.field - 1 if args.field else None,
+                             args.delimiter, args.regex)
+    lines = _lines(args.files)
+
+    if args.top:
+        sorted_ = iter(top_lines(lines, extractor, args.top, args.reverse))
+    else:
+        sorted_ = sort_lines(lines, extractor, args.reverse, args.buffer_size,
+                             args.jobs, args.temporary_directory)
+
+    # all input has been read by the time the first line is available, so
+    # only open the output then, allowing it to be one of the inputs
+    first = next(sorted_, None)
+    with common.open_output(args.output) as outfile:
+        if first is not None:
+            outfile.write(first)
+            outfile.writelines(sorted_)
+    return 0
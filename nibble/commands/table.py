@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import argparse
+import itertools
+
+from nibble import util, Information, Speed
+from nibble.commands import common
+from nibble.table import TransferTable, linear_range, geometric_range
+
+DESCRIPTION = 'Tabulate how long quantities of information take to transfer ' \
+              'at different speeds.'
+
+_DEFAULT_SIZES = '1GiB..10TiB*10'
+_DEFAULT_SPEEDS = 'E1,T3,HUNDRED_MEGABIT,GIGABIT,TEN_GIGABIT,HUNDRED_GIGABIT'
+
+
+def _size_range(string):
+    """
+    Parse a single size or range of sizes, e.g. '1GiB', '1GiB..1TiB*10' or
+    '1GiB..10GiB+1GiB'.
+
+    :param string: The size or range.
+    :return: A list of `Information`s.
+    :raises ValueError: If the size or range is invalid.
+    """
+    start, separator, rest = string.partition('..')
+    if not separator:
+        return [Information.parse(string)]
+
+    if '*' in rest:
+        stop, _, factor = rest.partition('*')
+        try:
+            factor = float(factor)
+        except ValueError:
+            raise ValueError('Invalid factor: {0}'.format(factor))
+        return list(geometric_range(Information.parse(start),
+                                    Information.parse(stop), factor))
+
+    if '+' in rest:
+        stop, _, step = rest.partition('+')
+        return list(linear_range(Information.parse(start),
+                                 Information.parse(stop),
+                                 Information.parse(step)))
+
+    raise ValueError('Ranges must end with *factor or +step: {0}'.format(
+        string))
+
+
+def sizes_arg(string):
+    """
+    An `argparse` type for a comma-separated list of sizes and ranges of
+    sizes. See `_size_range()`.
+
+    :param string: The argument provided on the command line.
+    :return: A list of `Information`s.
+    :raises argparse.ArgumentTypeError: If the argument is invalid.
+    """
+    try:
+        return list(itertools.chain.from_iterable(
+            _size_range(size.strip())
+            for size in util.decode_cli_arg(string).split(',')))
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(e)
+
+
+def speeds_arg(string):
+    """
+    An `argparse` type for a comma-separated list of speeds. Speeds given as
+    `Speed` constant names are labelled with the name.
+
+    :param string: The argument provided on the command line.
+    :return: A list of (label, `Speed`) tuples.
+    :raises argparse.ArgumentTypeError: If the argument is invalid.
+    """
+    speeds = []
+    for speed in util.decode_cli_arg(string).split(','):
+        speed = speed.strip()
+        parsed = common.speed_arg(speed)
+        if not parsed.information:
+            raise argparse.ArgumentTypeError(
+                'Speeds must be positive: {0}'.format(speed))
+        if parsed is getattr(Speed, speed, None):
+            speeds.append((speed, parsed))
+        else:
+            speeds.append(('{0: db}'.format(parsed), parsed))
+    return speeds
+
+
+def configure(parser):
+    """
+    Add this command's arguments to its parser.
+
+    :param parser: The `argparse.ArgumentParser` for this command.
+    """
+    parser.add_argument('-s', '--sizes',
+                        type=sizes_arg,
+                        action='append',
+                        help='comma-separated sizes, one per row, or ranges '
+                             'of sizes, e.g. 1GiB..1TiB*10 or 1GiB..8GiB+1GiB; '
+                             'may be given several times; defaults to '
+                             '{0}'.format(_DEFAULT_SIZES))
+    parser.add_argument('-S', '--speeds',
+                        type=speeds_arg,
+                        action='append',
+                        help='comma-separated speeds, one per column, e.g. '
+                             '1Gb/s or GIGABIT; may be given several times; '
+                             'defaults to {0}'.format(_DEFAULT_SPEEDS))
+    parser.add_argument('-F', '--size-format',
+                        type=util.decode_cli_arg,
+                        default='',
+                        help='the format specification for sizes, e.g. " dB" '
+                             'for decimal units')
+    parser.add_argument('-f', '--format',
+                        type=util.decode_cli_arg,
+                        default=' ',
+                        help='the format specification for durations; '
+                             'defaults to the largest whole unit, e.g. " h"')
+    style = parser.add_mutually_exclusive_group()
+    style.add_argument('--csv',
+                       dest='style',
+                       action='store_const',
+                       const='csv',
+                       default='text',
+                       help='output CSV rather than aligned text')
+    style.add_argument('--json',
+                       dest='style',
+                       action='store_const',
+                       const='json',
+                       help='output JSON rather than aligned text')
+    parser.add_argument('-o', '--output',
+                        type=util.decode_cli_arg,
+                        default='-',
+                        help='the file to write the table to; defaults to '
+                             'stdout')
+
+
+def run(args):
+    """
+    Execute the command.
+
+    :param args: The populated argparse namespace.
+    :return: The exit status.
+    """
+    sizes = list(itertools.chain.from_iterable(
+        args.sizes or [sizes_arg(_DEFAULT_SIZES)]))
+    speeds = list(itertools.chain.from_iterable(
+        args.speeds or [speeds_arg(_DEFAULT_SPEEDS)]))
+
+    table = TransferTable(sizes, [speed for _, speed in speeds],
+                          ['{0:{1}}'.format(size, args.size_format)
+                           for size in sizes],
+                          [label for label, _ in speeds])
+    with common.open_output(args.output) as output:
+        getattr(table, 'write_' + args.style)(output, args.format)
+    return 0
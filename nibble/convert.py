@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, division
+import csv
+import itertools
+import math
+import multiprocessing
+import six
+
+from nibble import util, Information, Duration, Speed
+
+
+class QuantityParser(object):
+    """
+    Interprets strings as quantities of information, durations or speeds,
+    accepting both strings with a unit, e.g. '1.5 GiB', and plain numbers in a
+    fixed unit, e.g. '1536' bytes.
+    """
+
+    # kind: (class, default unit for plain numbers)
+    _KINDS = {
+        'information': (Information, 'B'),
+        'duration': (Duration, 's'),
+        'speed': (Speed, 'B/s')
+    }
+
+    def __init__(self, kind='information', unit=None):
+        """
+        Initialise a new quantity parser.
+
+        :param kind: The type of quantity to parse: 'information', 'duration'
+                     or 'speed'. Defaults to information.
+        :param unit: The unit of values consisting of a plain number, e.g.
+                     'KiB', 'ms' or 'Mb/s'. Values with a unit suffix are
+                     parsed as-is. Defaults to bytes, seconds and bytes per
+                     second respectively.
+        :raises ValueError: If the kind or unit is not recognised.
+        """
+        if kind not in self._KINDS:
+            raise ValueError('Unrecognised kind: {0}'.format(kind))
+
+        self.kind = kind
+        self._class, default_unit = self._KINDS[kind]
+        self.unit = unit or default_unit
+
+        # validate the unit once, rather than discovering it is wrong on the
+        # first value
+        try:
+            self._from_number(1)
+        except KeyError:
+            raise ValueError('Unrecognised {0} unit: {1}'.format(kind,
+                                                                 self.unit))
+
+    def _from_number(self, number):
+        """
+        Create an object from a plain number in this parser's unit.
+
+        :param number: The quantity of the unit.
+        :return: The corresponding `Information`, `Duration` or `Speed`.
+        :raises KeyError: If the unit is invalid.
+        """
+        if self._class is Information:
+            return Information.from_quantity_unit(number, self.unit)
+        if self._class is Duration:
+            return Duration.from_quantity_unit(number, self.unit)
+
+        information_unit, _, duration_unit = self.unit.partition('/')
+        return Speed(Information.from_quantity_unit(number, information_unit),
+                     Duration.from_quantity_unit(1, duration_unit or 's'))
+
+    def parse(self, value):
+        """
+        Interpret a value.
+
+        :param value: The raw value, either a plain number, e.g. '1024', or a
+                      string with a unit, e.g. '1 KiB'.
+        :return: The corresponding `Information`, `Duration` or `Speed`.
+        :raises ValueError: If the value could not be parsed, or is not
+                            finite.
+        """
+        value = value.strip()
+        try:
+            number = int(value)
+        except ValueError:
+            try:
+                number = float(value)
+            except ValueError:
+                return self._class.parse(value)
+            if math.isinf(number) or math.isnan(number):
+                raise ValueError('Not a finite number: {0}'.format(value))
+        return self._from_number(number)
+
+
+class ColumnConverter(object):
+    """
+    Rewrites a single column of delimited rows, reinterpreting each value as a
+    quantity of information, a duration or a speed, and formatting it with a
+    `format()` specification, e.g. turning raw byte counts into '1.43 GiB'.
+    """
+
+    def __init__(self, column, format_spec='', kind='information', unit=None):
+        """
+        Initialise a new column converter.
+
+        :param column: The zero-based index of the column to convert.
+        :param format_spec: The format specification to apply to the parsed
+                            values, e.g. ' GiB' or '.1f|Mb/s'. Defaults to the
+                            default format of the kind.
+        :param kind: The type of quantity held in the column. See
+                     `QuantityParser`.
+        :param unit: The unit of values consisting of a plain number. See
+                     `QuantityParser`.
+        :raises ValueError: If the kind or unit is not recognised.
+        """
+        self.column = column
+        self.format_spec = format_spec
+        self.parser = QuantityParser(kind, unit)
+
+    def parse(self, value):
+        """
+        Interpret a column value.
+
+        :param value: The raw value.
+        :return: The corresponding `Information`, `Duration` or `Speed`.
+        :raises ValueError: If the value could not be parsed.
+        """
+        return self.parser.parse(value)
+
+    def convert_value(self, value):
+        """
+        Reformat a single column value.
+
+        :param value: The raw value.
+        :return: The value formatted with this converter's specification.
+        :raises ValueError: If the value could not be parsed.
+        """
+        return '{0:{1}}'.format(self.parse(value), self.format_spec)
+
+    def convert_row(self, row):
+        """
+        Reformat the converted column of a row in place.
+
+        :param row: The list of fields making up the row.
+        :return: The row.
+        :raises ValueError: If the row has too few fields, or the value could
+                            not be parsed.
+        """
+        if self.column >= len(row):
+            raise ValueError('Row has no column {0}'.format(self.column + 1))
+        row[self.column] = self.convert_value(row[self.column])
+        return row
+
+
+# set in each worker process by `_init_worker()`, so the converter is sent once
+# rather than with every batch
+_worker_state = None
+
+
+def _init_worker(converter, delimiter):
+    """
+    Prepare a worker process to convert batches.
+
+    :param converter: The `ColumnConverter` to apply to each row.
+    :param delimiter: The field delimiter.
+    """
+    global _worker_state
+    _worker_state = (converter, delimiter)
+
+
+def _convert_batch(batch):
+    """
+    Convert a batch of rows in a worker process.
+
+    :param batch: A tuple of the one-based number of the first row, and the
+                  list of rows.
+    :return: See `_convert_rows()`.
+    """
+    converter, delimiter = _worker_state
+    return _convert_rows(converter, delimiter, batch)
+
+
+def _convert_rows(converter, delimiter, batch):
+    """
+    Convert a batch of rows and serialise them.
+
+    :param converter: The `ColumnConverter` to apply to each row.
+    :param delimiter: The field delimiter.
+    :param batch: A tuple of the one-based number of the first row, and the
+                  list of rows.
+    :return: A tuple of the number of rows converted, and the rows as
+             delimited text.
+    :raises ValueError: If a row could not be converted.
+    """
+    first, rows = batch
+    buffer_ = six.StringIO()
+    writer = csv.writer(buffer_, delimiter=delimiter, lineterminator='\n')
+    for number, row in enumerate(rows, first):
+        try:
+            writer.writerow(converter.convert_row(row))
+        except ValueError as e:
+            raise ValueError('Row {0}: {1}'.format(number, e))
+    return len(rows), _text(buffer_.getvalue())
+
+
+def _text(written):
+    """
+    :param written: The output of a `csv.writer`, which is bytes in Python 2.
+    :return: The output as text.
+    """
+    if isinstance(written, bytes):
+        return written.decode('utf-8')
+    return written
+
+
+def format_row(row, delimiter=','):
+    """
+    Format a row as delimited text, e.g. to write a header.
+
+    :param row: A sequence of fields.
+    :param delimiter: The field delimiter. Defaults to a comma.
+    :return: The row as text, ending with a newline.
+    """
+    buffer_ = six.StringIO()
+    csv.writer(buffer_, delimiter=str(delimiter),
+               lineterminator='\n').writerow(row)
+    return _text(buffer_.getvalue())
+
+
+def _batches(rows, size, first):
+    """
+    Split an iterable of rows into numbered lists of rows.
+
+    :param rows: The rows to split.
+    :param size: The maximum number of rows per batch.
+    :param first: The one-based number of the first row.
+    :return: A generator of (first row number, rows) tuples.
+    """
+    while True:
+        batch = list(itertools.islice(rows, size))
+        if not batch:
+            return
+        yield first, batch
+        first += len(batch)
+
+
+def convert(infile, outfile, converter, delimiter=',', header=False, jobs=1,
+            batch_size=10000):
+    """
+    Stream delimited rows from one file to another, converting a column. Rows
+    are processed in fixed-size batches, so memory use is independent of the
+    size of the input.
+
+    :param infile: The text file to read, opened with `newline=''`.
+    :param outfile: The text file to write.
+    :param converter: The `ColumnConverter` to apply to each row.
+    :param delimiter: The field delimiter. Defaults to a comma.
+    :param header: Whether the first row is a header, to be copied unchanged.
+    :param jobs: The number of processes to convert batches in. Defaults to 1,
+                 which converts in this process.
+    :param batch_size: The number of rows to convert at a time.
+    :return: The number of rows converted.
+    :raises ValueError: If a row could not be converted.
+    """
+    # `csv` in Python 2 rejects unicode delimiters
+    delimiter = str(delimiter)
+    rows = csv.reader(infile, delimiter=delimiter)
+    first = 1
+    if header:
+        row = next(rows, None)
+        if row is not None:
+            outfile.write(format_row(row, delimiter))
+        first = 2
+
+    batches = _batches(rows, batch_size, first)
+    if jobs == 1:
+        return _write_batches(
+            (_convert_rows(converter, delimiter, batch) for batch in batches),
+            outfile)
+
+    pool = multiprocessing.Pool(jobs, initializer=_init_worker,
+                                initargs=(converter, delimiter))
+    try:
+        # keep a couple of batches queued per worker so none sit idle, but no
+        # more, as the reader is usually faster than the converters
+        return _write_batches(
+            util.imap_bounded(pool, _convert_batch, batches, jobs * 2),
+            outfile)
+    finally:
+        pool.terminate()
+
+
+def _write_batches(results, outfile):
+    """
+    Write converted batches to a file.
+
+    :param results: An iterable of `_convert_batch()` results.
+    :param outfile: The text file to write.
+    :return: The total number of rows written.
+    """
+    count = 0
+    for rows, text in results:
+        outfile.write(text)
+        count += rows
+    return count
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, division
+import threading
+import time
+import weakref
+
+from nibble import Information, Speed
+
+# `time.monotonic()` is unaffected by changes to the system clock, but is not
+# available in Python 2
+_clock = getattr(time, 'monotonic', time.time)
+
+# the fewest shards registering a thread's shard compacts
+_MIN_COMPACT = 16
+
+
+class Snapshot(object):
+    """
+    The total of a `ByteCounter` at a point in time.
+    """
+
+    __slots__ = ('bytes', 'time')
+
+    def __init__(self, bytes_, time_):
+        """
+        Initialise a new snapshot.
+
+        :param bytes_: The number of bytes counted.
+        :param time_: The clock time the snapshot was taken.
+        """
+        self.bytes = bytes_
+        self.time = time_
+
+    @property
+    def information(self):
+        """
+        :return: The amount counted, as an `Information`.
+        """
+        return Information(self.bytes, Information.BYTES)
+
+    def speed_since(self, earlier):
+        """
+        Find the rate bytes were counted at between an earlier snapshot and
+        this one.
+
+        :param earlier: The earlier `Snapshot`.
+        :return: The `Speed`, which is zero if no time has passed.
+        """
+        seconds = self.time - earlier.time
+        if seconds <= 0:
+            return Speed.ZERO
+        return Speed(Information((self.bytes - earlier.bytes) *
+                                 Information.BYTES / seconds))
+
+    def __repr__(self):
+        return '<Snapshot({0}, {1})>'.format(repr(self.bytes),
+                                             repr(self.time))
+
+
+class ByteCounter(object):
+    """
+    A count of bytes that many threads can add to at once without a lock.
+    Each thread adds to its own shard, which no other thread writes to, and
+    reading the count sums the shards. Adding allocates nothing beyond the
+    integer result, unlike `total = total + Information(n)`.
+
+    In CPython, the global interpreter lock runs one thread's bytecode at a
+    time, so adding does not get faster with more threads; sharding avoids
+    the cost of a lock, and of threads contending for it, not the GIL.
+    Increments scale with threads only on a free-threaded build of Python.
+    `benchmarks/counter.py` measures this on a given machine.
+
+    The shards of threads that have exited are folded into a base count
+    when the counter is read, and when registering a thread finds the number
+    of shards has doubled since they were last folded, so memory grows with
+    the number of live threads, not the number of threads ever started, e.g.
+    by a server with a thread per connection.
+    """
+
+    def __init__(self):
+        """
+        Initialise a new counter, at zero.
+        """
+        self._local = threading.local()
+        # (a single-item list holding the count, a weak reference to the
+        # thread that owns it) per thread
+        self._shards = []
+        # the count of threads that have exited
+        self._base = 0
+        self._compact_at = _MIN_COMPACT
+        # only held to register a thread's first shard, and to read
+        self._lock = threading.Lock()
+
+    def _compact(self):
+        """
+        Fold the shards of threads that have exited into the base count. Call
+        with the lock held.
+        """
+        live = []
+        for shard, owner in self._shards:
+            thread = owner()
+            if thread is None or not thread.is_alive():
+                # the thread can no longer add to its shard
+                self._base += shard[0]
+            else:
+                live.append((shard, owner))
+        self._shards = live
+
+    def _shard(self):
+        """
+        Create the shard of the current thread.
+
+        :return: The shard.
+        """
+        shard = self._local.shard = [0]
+        owner = weakref.ref(threading.current_thread())
+        with self._lock:
+            if len(self._shards) >= self._compact_at:
+                self._compact()
+                self._compact_at = max(_MIN_COMPACT, 2 * len(self._shards))
+            self._shards.append((shard, owner))
+        return shard
+
+    def add(self, bytes_):
+        """
+        Count bytes.
+
+        :param bytes_: The number of bytes.
+        """
+        try:
+            self._local.shard[0] += bytes_
+        except AttributeError:
+            self._shard()[0] += bytes_
+
+    @property
+    def bytes(self):
+        """
+        :return: The number of bytes counted by every thread so far.
+        """
+        with self._lock:
+            self._compact()
+            return self._base + sum(shard[0] for shard, _ in self._shards)
+
+    @property
+    def information(self):
+        """
+        :return: The amount counted so far, as an `Information`.
+        """
+        return Information(self.bytes, Information.BYTES)
+
+    def snapshot(self, now=None):
+        """
+        Take the current total, e.g. to find the rate with
+        `Snapshot.speed_since()`.
+
+        :param now: The current clock time. Defaults to now.
+        :return: The `Snapshot`.
+        """
+        now = _clock() if now is None else now
+        return Snapshot(self.bytes, now)
+
+    def __repr__(self):
+        return '<ByteCounter({0})>'.format(repr(self.bytes))
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, division
+import errno
+import os
+import re
+import time
+
+from nibble import Information, Duration, Speed
+
+# `time.monotonic()` is unaffected by changes to the system clock, but is not
+# available in Python 2
+_clock = getattr(time, 'monotonic', time.time)
+
+# characters in mount points that would be ambiguous are escaped as octal,
+# e.g. a space as \040
+_ESCAPE_REGEX = re.compile(r'\\([0-7]{3})')
+
+# errors statting a mount point that mean it has gone, or we are not allowed
+# to see it
+_SKIPPED = frozenset([errno.ENOENT, errno.EACCES, errno.EPERM, errno.ENOTDIR,
+                      errno.ESTALE])
+
+
+def mount_points(path='/proc/self/mounts'):
+    """
+    List the mount points in a mount table.
+
+    :param path: The path of the table, in the format of `/proc/self/mounts`.
+    :return: A list of mount points, in the order they were mounted.
+    :raises EnvironmentError: If the table cannot be read.
+    """
+    with open(path, 'rb') as file_:
+        table = file_.read().decode('utf-8', 'replace')
+    return [_ESCAPE_REGEX.sub(lambda match: chr(int(match.group(1), 8)),
+                              line.split(' ', 2)[1])
+            for line in table.splitlines() if line.count(' ') >= 2]
+
+
+class GrowthFit(object):
+    """
+    A least-squares line through (time, value) points, updated one point at a
+    time in constant memory. Points are not stored: only the means of each
+    coordinate and their centred sums of squares and products, updated with
+    Welford's method, which unlike summing raw squares does not lose
+    precision when times are large, e.g. seconds since the epoch.
+    """
+
+    __slots__ = ('count', '_mean_time', '_mean_value', '_time_squares',
+                 '_products')
+
+    def __init__(self):
+        self.count = 0
+        self._mean_time = 0.
+        self._mean_value = 0.
+        self._time_squares = 0.
+        self._products = 0.
+
+    def add(self, time_, value):
+        """
+        Add a point to the fit.
+
+        :param time_: The time of the point, in seconds.
+        :param value: The value at that time.
+        """
+        self.count += 1
+        time_delta = time_ - self._mean_time
+        self._mean_time += time_delta / self.count
+        self._mean_value += (value - self._mean_value) / self.count
+        self._time_squares += time_delta * (time_ - self._mean_time)
+        self._products += time_delta * (value - self._mean_value)
+
+    @property
+    def slope(self):
+        """
+        The rate the value changes by per second.
+
+        :return: The slope as a float, or None if there are fewer than two
+                 points at distinct times.
+        """
+        if not self._time_squares:
+            return None
+        return self._products / self._time_squares
+
+
+class Filesystem(object):
+    """
+    The usage of one filesystem, and the fit of its growth over time.
+    """
+
+    __slots__ = ('path', 'size', 'used', 'available', 'fit')
+
+    def __init__(self, path):
+        """
+        Initialise a new filesystem. Its usage is zero until sampled.
+
+        :param path: Its mount point.
+        """
+        self.path = path
+        # in bytes
+        self.size = 0
+        self.used = 0
+        self.available = 0
+        self.fit = GrowthFit()
+
+    @property
+    def rate(self):
+        """
+        The rate usage has grown at over every sample.
+
+        :return: The rate as a `Speed`, negative if usage has fallen, or None
+                 if fewer than two samples have been taken.
+        """
+        slope = self.fit.slope
+        if slope is None:
+            return None
+        # bits per day keeps the precision of slow rates
+        return Speed(Information(int(round(slope * Information.BYTES *
+                                           Duration.DAYS /
+                                           Duration.SECONDS))),
+                     Duration(days=1))
+
+    @property
+    def time_to_full(self):
+        """
+        Forecast how long until no space is available to unprivileged users,
+        if usage keeps growing at its fitted rate.
+
+        :return: The time as a `Duration`, or None if usage is not growing.
+        """
+        slope = self.fit.slope
+        if not slope or slope < 0:
+            return None
+        return Duration(seconds=self.available / slope)
+
+
+class FilesystemSampler(object):
+    """
+    Samples the usage of filesystems with `os.statvfs()`, and fits the growth
+    of each. Each sample costs one system call per filesystem, and the mount
+    table is only read when the sampler is created, so sampling hundreds of
+    filesystems every second is cheap. Filesystems mounted at several points,
+    e.g. by bind mounts, are only sampled once. Pseudo-filesystems with no
+    blocks, such as procfs, are skipped.
+    """
+
+    def __init__(self, paths=None, mounts='/proc/self/mounts'):
+        """
+        Find the filesystems to sample. Call `sample()` to take the first
+        sample.
+
+        :param paths: Paths on the filesystems to sample. Defaults to every
+                      mount point in the mount table.
+        :param mounts: The path of the mount table.
+        :raises EnvironmentError: If the mount table cannot be read, or a
+                                  given path does not exist.
+        """
+        explicit = paths is not None
+        if not explicit:
+            paths = mount_points(mounts)
+
+        self.filesystems = []
+        devices = set()
+        for path in paths:
+            try:
+                device = os.stat(path).st_dev
+                blocks = os.statvfs(path).f_blocks
+            except EnvironmentError as e:
+                if explicit or e.errno not in _SKIPPED:
+                    raise
+                continue
+            if device in devices or (not blocks and not explicit):
+                continue
+            devices.add(device)
+            self.filesystems.append(Filesystem(path))
+
+    def sample(self, now=None):
+        """
+        Read the usage of every filesystem, and add it to their fits.
+        Filesystems that can no longer be read, e.g. because they have been
+        unmounted, keep their last usage.
+
+        :param now: The current time in seconds, from a monotonic clock.
+                    Defaults to now.
+        """
+        now = _clock() if now is None else now
+        statvfs = os.statvfs
+        for filesystem in self.filesystems:
+            try:
+                stat = statvfs(filesystem.path)
+            except EnvironmentError as e:
+                if e.errno not in _SKIPPED:
+                    raise
+                continue
+            fragment = stat.f_frsize
+            filesystem.size = stat.f_blocks * fragment
+            filesystem.used = (stat.f_blocks - stat.f_bfree) * fragment
+            filesystem.available = stat.f_bavail * fragment
+            filesystem.fit.add(now, filesystem.used)
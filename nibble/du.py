@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, division
+import logging
+import multiprocessing
+import os
+import stat
+import threading
+from six.moves import queue
+
+from nibble import util, Information
+
+logger = logging.getLogger(__name__)
+
+# `st_blocks` is always in units of 512 bytes, whatever the block size of the
+# filesystem
+_BLOCK_SIZE = 512
+
+
+class DirectoryUsage(object):
+    """
+    The storage used by a directory and everything beneath it.
+    """
+
+    def __init__(self, path, depth):
+        """
+        Initialise a new, empty directory usage.
+
+        :param path: The path of the directory.
+        :param depth: How many levels below the scanned path the directory
+                      is, where the scanned path itself is at depth 0.
+        """
+        self.path = path
+        self.depth = depth
+        self.apparent_bytes = 0
+        self.allocated_bytes = 0
+        self.files = 0
+        self.directories = 0
+        self.errors = 0
+
+    @property
+    def apparent(self):
+        """
+        The total size of the files in the tree, as reported by `ls -l`.
+
+        :return: The apparent size as an `Information`.
+        """
+        return Information(self.apparent_bytes, Information.BYTES)
+
+    @property
+    def allocated(self):
+        """
+        The total space allocated on disk to the tree, which may be smaller
+        than the apparent size for sparse or compressed files, or larger due
+        to block rounding.
+
+        :return: The allocated size as an `Information`.
+        """
+        return Information(self.allocated_bytes, Information.BYTES)
+
+    def at_speed(self, speed):
+        """
+        Find how long it would take to transfer the contents of the tree.
+
+        :param speed: The speed of the transfer.
+        :return: The time taken as a `Duration`.
+        """
+        return self.apparent.at_speed(speed)
+
+    def _add(self, other):
+        """
+        Include the totals of a subtree in this one.
+
+        :param other: The `DirectoryUsage` of the subtree.
+        """
+        self.apparent_bytes += other.apparent_bytes
+        self.allocated_bytes += other.allocated_bytes
+        self.files += other.files
+        self.directories += other.directories
+        self.errors += other.errors
+
+    def __repr__(self):
+        return '<DirectoryUsage({0}, {1})>'.format(repr(self.path),
+                                                  repr(self.apparent))
+
+
+class _Node(object):
+    """
+    A directory awaiting the completion of itself and its subdirectories.
+    """
+
+    def __init__(self, path, depth, device, parent):
+        self.usage = DirectoryUsage(path, depth)
+        self.device = device
+        self.parent = parent
+        # the scan of the directory itself, plus one per subdirectory
+        self.pending = 1
+
+
+def _allocated_bytes(stat_result):
+    """
+    Find the space allocated to a file.
+
+    :param stat_result: The result of `stat()`ing the file.
+    :return: The number of bytes allocated, or the apparent size if the
+             platform does not report allocation.
+    """
+    blocks = getattr(stat_result, 'st_blocks', None)
+    if blocks is None:
+        return stat_result.st_size
+    return blocks * _BLOCK_SIZE
+
+
+class _Scanner(object):
+    """
+    Walks a directory tree with a pool of threads, each listing one directory
+    at a time. Directories are reported as soon as they and all of their
+    subdirectories have been scanned.
+    """
+
+    def __init__(self, jobs, max_depth, one_file_system):
+        self._jobs = jobs
+        self._max_depth = max_depth
+        self._one_file_system = one_file_system
+        self._lock = threading.Lock()
+        # (device, inode) of files with several hard links already counted
+        self._linked = set()
+        self._directories = queue.Queue()
+        self._results = queue.Queue()
+        self._stopped = False
+
+    def _count(self, usage, stat_result, device, inode):
+        """
+        Add a file or directory to a usage total, unless it is a hard link to
+        one already counted.
+
+        :param usage: The `DirectoryUsage` to add to.
+        :param stat_result: The result of `stat()`ing the file.
+        :param device: The device the file is on.
+        :param inode: The inode of the file.
+        """
+        if stat_result.st_nlink > 1 and not stat.S_ISDIR(stat_result.st_mode):
+            key = device, inode
+            with self._lock:
+                if key in self._linked:
+                    return
+                self._linked.add(key)
+
+        usage.apparent_bytes += stat_result.st_size
+        usage.allocated_bytes += _allocated_bytes(stat_result)
+
+    def _scan(self, node):
+        """
+        List a directory, counting its files and queueing its subdirectories.
+
+        :param node: The `_Node` of the directory.
+        """
+        usage = node.usage
+        children = []
+        try:
+            for entry in util.scandir(usage.path):
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stat_result = entry.stat(follow_symlinks=False)
+                        if self._one_file_system and \
+                                stat_result.st_dev != node.device:
+                            continue
+                        children.append((entry.path, stat_result))
+                        continue
+
+                    # checking before stat()ing means each hard linked file
+                    # is only stat()ed once; the directory's device is the
+                    # file's, as only directories can be mount points
+                    if (node.device, entry.inode()) in self._linked:
+                        continue
+
+                    stat_result = entry.stat(follow_symlinks=False)
+                    self._count(usage, stat_result, node.device,
+                                entry.inode())
+                    usage.files += 1
+                except OSError as e:
+                    logger.warning('Unable to stat %s: %s', entry.path, e)
+                    usage.errors += 1
+        except OSError as e:
+            logger.warning('Unable to list %s: %s', usage.path, e)
+            usage.errors += 1
+
+        with self._lock:
+            node.pending += len(children) - 1
+            complete = node.pending == 0
+
+        for path, stat_result in children:
+            child = _Node(path, usage.depth + 1, stat_result.st_dev, node)
+            child.usage.directories = 1
+            self._count(child.usage, stat_result, stat_result.st_dev,
+                        stat_result.st_ino)
+            self._directories.put(child)
+
+        if complete:
+            self._complete(node)
+
+    def _complete(self, node):
+        """
+        Report a directory whose entire subtree has been scanned, and fold its
+        totals into its parent's, completing the parent too if it was the last
+        subdirectory outstanding.
+
+        :param node: The `_Node` of the directory.
+        """
+        while node is not None:
+            if self._max_depth is None or node.usage.depth <= self._max_depth:
+                self._results.put(node.usage)
+
+            parent = node.parent
+            if parent is None:
+                # the root; the scan is over
+                self._results.put(None)
+                return
+
+            with self._lock:
+                parent.usage._add(node.usage)
+                parent.pending -= 1
+                if parent.pending:
+                    return
+            node = parent
+
+    def _work(self):
+        """
+        The body of each scanning thread.
+        """
+        while True:
+            node = self._directories.get()
+            if node is None:
+                return
+            if self._stopped:
+                continue
+            try:
+                self._scan(node)
+            except Exception as e:
+                # hand unexpected errors to the consumer, or it will wait for
+                # the scan to finish forever
+                self._results.put(e)
+
+    def scan(self, path):
+        """
+        Scan a directory tree.
+
+        :param path: The root of the tree.
+        :return: A generator of `DirectoryUsage`s.
+        """
+        stat_result = os.stat(path)
+        root = _Node(path, 0, stat_result.st_dev, None)
+        self._count(root.usage, stat_result, stat_result.st_dev,
+                    stat_result.st_ino)
+        if not stat.S_ISDIR(stat_result.st_mode):
+            root.usage.files = 1
+            yield root.usage
+            return
+
+        root.usage.directories = 1
+        self._directories.put(root)
+        threads = [threading.Thread(target=self._work)
+                   for _ in range(self._jobs)]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+
+        try:
+            while True:
+                usage = self._results.get()
+                if usage is None:
+                    return
+                if isinstance(usage, Exception):
+                    raise usage
+                yield usage
+        finally:
+            # also reached if the consumer stops early
+            self._stopped = True
+            for _ in threads:
+                self._directories.put(None)
+
+
+def scan(path, max_depth=None, jobs=None, one_file_system=False):
+    """
+    Find the storage used by each directory in a tree. Directories are
+    listed concurrently, and each is yielded as soon as it and all of its
+    subdirectories have been scanned, so the path itself comes last. Symbolic
+    links are not followed, and files with several hard links within the tree
+    are only counted once.
+
+    :param path: The root of the tree.
+    :param max_depth: The maximum depth of directories to report, where the
+                      path itself is at depth 0. Deeper directories are still
+                      included in their ancestors' totals. Defaults to all.
+    :param jobs: The number of threads to scan with. Defaults to four per
+                 CPU, as scanning mostly waits on the filesystem.
+    :param one_file_system: Whether to skip directories on other filesystems.
+    :return: A generator of `DirectoryUsage`s.
+    :raises OSError: If the path cannot be `stat()`ed. Errors within the tree
+                     are logged and counted in the `errors` attribute instead.
+    """
+    if jobs is None:
+        jobs = min(32, multiprocessing.cpu_count() * 4)
+    return _Scanner(jobs, max_depth, one_file_system).scan(path)
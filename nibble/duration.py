@@ -3,6 +3,7 @@ from __future__ import unicode_literals, division
 from collections import OrderedDict
 from decimal import Decimal
 import datetime
+import re
 import math
 import six
 
@@ -19,6 +20,10 @@ class Duration(object):
     addition of month and year units.
     """
 
+    # this is deliberately lax with the number to provide a more helpful error
+    # message
+    _PARSE_REGEX = re.compile(r'([\d\\.]+)(?: +)?(\w+)')
+
     NANOSECONDS = 1
     MICROSECONDS = 10 ** 3
     MILLISECONDS = 10 ** 6
@@ -123,6 +128,37 @@ class Duration(object):
         """
         return symbol in cls._SYMBOLS
 
+    @classmethod
+    def parse(cls, string):
+        """
+        Get an object representing a duration string, e.g. "1.5h" or "30 s".
+
+        :param string: The duration string.
+        :return: The parsed duration.
+        :raises ValueError: If the string could not be parsed. Check the message
+                            for the reason why.
+        """
+        result = cls._PARSE_REGEX.match(string.strip())
+        if not result:
+            raise ValueError(
+                'Unable to parse duration string: {0}'.format(string))
+
+        quantity_str = result.group(1)
+        try:
+            quantity = float(quantity_str)
+            if quantity.is_integer():
+                quantity = int(quantity)
+        except ValueError:
+            raise ValueError(
+                'Unable to parse quantity number: {0}'.format(quantity_str))
+
+        unit_str = result.group(2)
+        if unit_str not in cls._SYMBOLS:
+            raise ValueError(
+                'Unrecognised time unit symbol: {0}'.format(unit_str))
+
+        return cls.from_quantity_unit(quantity, unit_str)
+
     @property
     def timedelta(self):
         """
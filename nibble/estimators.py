@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+"""
+Estimators of the current rate of a stream of (timestamp, bytes) events, each
+updated in constant time and memory per event. Timestamps are clock times in
+seconds, as used by `nibble.pv.Meter`, and default to now.
+"""
+from __future__ import unicode_literals, division
+import math
+import time
+
+from nibble import Information, Duration, Speed
+
+# `time.monotonic()` is unaffected by changes to the system clock, but is not
+# available in Python 2
+_clock = getattr(time, 'monotonic', time.time)
+
+
+def _speed(count, seconds):
+    """
+    Find the speed of a number of bytes over some time.
+
+    :param count: The number of bytes.
+    :param seconds: The time taken.
+    :return: The `Speed`, which is zero if no time has passed.
+    """
+    if seconds <= 0:
+        return Speed.ZERO
+    return Speed(Information(count * Information.BYTES / seconds))
+
+
+class EwmaRate(object):
+    """
+    An exponentially weighted moving average of a rate. Each byte counts
+    half as much as one counted a half-life more recently, so the estimate
+    follows changes in rate within a few half-lives, without having to store
+    past events.
+
+    Events may arrive at irregular times, so rather than decaying by a fixed
+    factor per event, the decayed byte count is divided by the decayed time
+    it was counted over, and each event's bytes are taken to have been
+    transferred evenly since the previous event. This makes the estimate
+    exact for a constant rate, including before a half-life has passed since
+    the start, when the textbook recurrence would be biased towards zero.
+    """
+
+    __slots__ = ('half_life', '_decay', 'start', '_last', '_count')
+
+    def __init__(self, half_life=Duration(seconds=5), start=None):
+        """
+        Initialise a new estimator.
+
+        :param half_life: The age at which events count half as much as
+                          current ones, as a `Duration`. Defaults to 5
+                          seconds.
+        :param start: The clock time counting started. Defaults to now.
+        :raises ValueError: If the half-life is not positive.
+        """
+        if half_life.nanoseconds <= 0:
+            raise ValueError('The half-life must be positive')
+        self.half_life = half_life
+        # the rate of decay per second
+        self._decay = math.log(2) / half_life.total_seconds()
+        self.start = _clock() if start is None else start
+        self._last = self.start
+        # the decayed number of bytes, as of `_last`
+        self._count = 0.
+
+    def update(self, bytes_, now=None):
+        """
+        Count bytes transferred.
+
+        :param bytes_: The number of bytes.
+        :param now: The clock time they were transferred. Defaults to now.
+                    Times before an earlier update are counted at their own
+                    age.
+        :return: The bytes weighted for being spread since the previous
+                 update, which `add()` can count into another estimator with
+                 the same half-life and start.
+        """
+        now = _clock() if now is None else now
+        elapsed = now - self._last
+        if elapsed > 0:
+            exponent = self._decay * elapsed
+            # `expm1()` keeps precision when little time has passed
+            decayed = math.expm1(-exponent)
+            bytes_ = -bytes_ * decayed / exponent
+            self._count = self._count * (1 + decayed) + bytes_
+            self._last = now
+        else:
+            self._count += bytes_ * math.exp(self._decay * elapsed)
+        return bytes_
+
+    def add(self, weighted, now=None):
+        """
+        Count bytes as transferred all at once, rather than spread since the
+        previous update. As decay is linear, counting the values returned by
+        `update()` of several estimators into one with the same half-life
+        and start makes its rate their sum. Estimators started at different
+        times normalise by different amounts of time, so their rates must be
+        summed instead.
+
+        :param weighted: The number of bytes, e.g. as returned by `update()`.
+        :param now: The clock time they were transferred. Defaults to now.
+        """
+        now = _clock() if now is None else now
+        elapsed = now - self._last
+        if elapsed > 0:
+            self._count = self._count * math.exp(-self._decay * elapsed) + \
+                weighted
+            self._last = now
+        else:
+            self._count += weighted * math.exp(self._decay * elapsed)
+
+    def update_many(self, timestamps, counts):
+        """
+        Count several events at once, equivalent to calling `update()` for
+        each, but faster.
+
+        :param timestamps: A sequence of the clock time of each event, e.g. an
+                           `array.array`.
+        :param counts: A sequence of the number of bytes in each event.
+        :raises ValueError: If the sequences differ in length.
+        """
+        if len(timestamps) != len(counts):
+            raise ValueError('There must be one count per timestamp')
+        decay = self._decay
+        exp = math.exp
+        expm1 = math.expm1
+        last = self._last
+        count = self._count
+        for now, bytes_ in zip(timestamps, counts):
+            elapsed = now - last
+            if elapsed > 0:
+                exponent = decay * elapsed
+                decayed = expm1(-exponent)
+                count = count * (1 + decayed) - bytes_ * decayed / exponent
+                last = now
+            else:
+                count += bytes_ * exp(decay * elapsed)
+        self._last = last
+        self._count = count
+
+    def bytes_per_second(self, now=None):
+        """
+        Estimate the current rate as a number, e.g. to total it cheaply.
+
+        :param now: The current clock time. Defaults to now.
+        :return: The rate in bytes per second, which is zero if no time has
+                 passed.
+        """
+        now = _clock() if now is None else now
+        now = max(now, self._last)
+        # the weight of the time counted over, i.e. the integral of the decay
+        # from the start to now
+        seconds = -math.expm1(-self._decay * (now - self.start)) / self._decay
+        if seconds <= 0:
+            return 0.
+        return self._count * math.exp(-self._decay * (now - self._last)) / \
+            seconds
+
+    def speed(self, now=None):
+        """
+        Estimate the current rate.
+
+        :param now: The current clock time. Defaults to now.
+        :return: The rate as a `Speed`, which is zero if no time has passed.
+        """
+        return Speed(Information(self.bytes_per_second(now) *
+                                 Information.BYTES))
+
+    def __repr__(self):
+        return '<{0}({1})>'.format(self.__class__.__name__,
+                                   repr(self.half_life))
+
+
+class WindowRate(object):
+    """
+    The rate over a sliding window, e.g. the last 10 seconds. The window is
+    divided into buckets in a fixed-size ring buffer, so memory does not grow
+    with the number of events; the window slides a bucket at a time, so the
+    oldest bucket may be partly outside it. Unlike `EwmaRate`, all events in
+    the window count equally, and events drop out of it completely.
+    """
+
+    __slots__ = ('window', 'start', '_width', '_buckets', '_head', '_total')
+
+    def __init__(self, window=Duration(seconds=10), buckets=10, start=None):
+        """
+        Initialise a new estimator.
+
+        :param window: The length of the window, as a `Duration`. Defaults to
+                       10 seconds.
+        :param buckets: The number of buckets to divide the window into.
+                        More buckets slide it more smoothly, at the cost of
+                        memory and the time to clear expired buckets.
+                        Defaults to 10.
+        :param start: The clock time counting started. Defaults to now.
+        :raises ValueError: If the window is not positive, or there are fewer
+                            than 1 buckets.
+        """
+        if window.nanoseconds <= 0:
+            raise ValueError('The window must be positive')
+        if buckets < 1:
+            raise ValueError('There must be at least 1 bucket')
+        self.window = window
+        self.start = _clock() if start is None else start
+        # the duration of each bucket in seconds
+        self._width = window.total_seconds() / buckets
+        self._buckets = [0] * buckets
+        # the number of the newest bucket, counting from the start
+        self._head = 0
+        # the sum of the buckets
+        self._total = 0
+
+    def _advance(self, bucket):
+        """
+        Slide the window forward so a bucket is the newest, clearing the
+        buckets that expire.
+
+        :param bucket: The number of the new newest bucket.
+        """
+        buckets = self._buckets
+        length = len(buckets)
+        if bucket - self._head >= length:
+            buckets[:] = [0] * length
+            self._total = 0
+        else:
+            for expired in range(self._head + 1, bucket + 1):
+                index = expired % length
+                self._total -= buckets[index]
+                buckets[index] = 0
+        self._head = bucket
+
+    def update(self, bytes_, now=None):
+        """
+        Count bytes transferred.
+
+        :param bytes_: The number of bytes.
+        :param now: The clock time they were transferred. Defaults to now.
+                    Times before the window are ignored.
+        """
+        now = _clock() if now is None else now
+        bucket = int((now - self.start) // self._width)
+        if bucket > self._head:
+            self._advance(bucket)
+        elif bucket <= self._head - len(self._buckets) or bucket < 0:
+            return
+        self._buckets[bucket % len(self._buckets)] += bytes_
+        self._total += bytes_
+
+    def update_many(self, timestamps, counts):
+        """
+        Count several events at once, equivalent to calling `update()` for
+        each, but faster.
+
+        :param timestamps: A sequence of the clock time of each event, e.g. an
+                           `array.array`.
+        :param counts: A sequence of the number of bytes in each event.
+        :raises ValueError: If the sequences differ in length.
+        """
+        if len(timestamps) != len(counts):
+            raise ValueError('There must be one count per timestamp')
+        buckets = self._buckets
+        length = len(buckets)
+        start = self.start
+        width = self._width
+        head = self._head
+        index = head % length
+        # the newest bucket's count and the total are kept in locals, as
+        # most events land in the newest bucket
+        newest = buckets[index]
+        total = self._total
+        for now, bytes_ in zip(timestamps, counts):
+            bucket = int((now - start) // width)
+            if bucket == head:
+                newest += bytes_
+            elif bucket > head:
+                buckets[index] = newest
+                self._total = total
+                self._advance(bucket)
+                head = bucket
+                index = head % length
+                newest = bytes_
+                total = self._total
+            elif bucket > head - length and bucket >= 0:
+                buckets[bucket % length] += bytes_
+            else:
+                continue
+            total += bytes_
+        buckets[index] = newest
+        self._total = total
+
+    @property
+    def information(self):
+        """
+        The amount counted in the window, as of the last update.
+
+        :return: The amount as an `Information`.
+        """
+        return Information(self._total, Information.BYTES)
+
+    def speed(self, now=None):
+        """
+        Find the rate over the window.
+
+        :param now: The current clock time. Defaults to now.
+        :return: The rate as a `Speed`, which is zero if no time has passed.
+        """
+        now = _clock() if now is None else now
+        elapsed = now - self.start
+        bucket = int(elapsed // self._width)
+        if bucket > self._head:
+            self._advance(bucket)
+        # the full buckets before the newest, plus as much of it as has passed
+        seconds = min(elapsed, (len(self._buckets) - 1) * self._width +
+                      elapsed - self._head * self._width)
+        return _speed(self._total, seconds)
+
+    def __repr__(self):
+        return '<{0}({1}, {2})>'.format(self.__class__.__name__,
+                                        repr(self.window),
+                                        len(self._buckets))
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, division
+import array
+import io
+import os
+import re
+import sys
+import time
+
+from nibble import util, Information, Speed
+
+# `time.monotonic()` is unaffected by changes to the system clock, but is not
+# available in Python 2
+_clock = getattr(time, 'monotonic', time.time)
+
+# the kernel's counters are unsigned longs, so wrap at 2^32 on 32-bit systems
+_COUNTER_WIDTH = 64 if sys.maxsize > 2 ** 32 else 32
+
+# an interface's name and its received bytes and packets, then after six more
+# receive fields, its transmitted bytes and packets
+_LINE_REGEX = re.compile(br'([^\s:]+):\s*(\d+)\s+(\d+)\s+(?:\d+\s+){6}'
+                         br'(\d+)\s+(\d+)')
+
+
+def link_speed(interface, directory='/sys/class/net'):
+    """
+    Find the negotiated speed of a network interface, as reported by its
+    driver.
+
+    :param interface: The name of the interface, e.g. 'eth0'.
+    :param directory: Where interfaces are listed in sysfs.
+    :return: The speed as a `Speed`, or None if it is unknown, e.g. for
+             virtual interfaces, or those that are down.
+    """
+    try:
+        with open(os.path.join(directory, interface, 'speed')) as file_:
+            megabits = int(file_.read())
+    except (EnvironmentError, ValueError):
+        return None
+    if megabits <= 0:
+        return None
+    return Speed(Information(megabits, Information.MEGABITS))
+
+
+class InterfaceSampler(object):
+    """
+    Samples the traffic counters of network interfaces in `/proc/net/dev`,
+    and computes the rate of each since the last sample. The file is kept open
+    and re-read into the same buffer each time, and rates are held in arrays
+    updated in place, so sampling creates few objects beyond those the
+    regular expression match needs. Interfaces are assigned a slot in the
+    arrays the first time they are seen, and dropped when they are missing
+    from a sample, e.g. when a container's virtual interface is removed.
+    """
+
+    def __init__(self, interfaces=None, path='/proc/net/dev',
+                 width=_COUNTER_WIDTH):
+        """
+        Open the counters file. Call `sample()` to take the first sample.
+
+        :param interfaces: The names of the interfaces to sample. Defaults to
+                           all of them.
+        :param path: The path of the counters file.
+        :param width: The number of bits in each counter, after which they
+                      wrap. Defaults to the native word size.
+        :raises EnvironmentError: If the file cannot be opened.
+        """
+        self._file = io.FileIO(path, 'r')
+        self._buffer = bytearray(4096)
+        self._wanted = None if interfaces is None else \
+            set(interface.encode('ascii') for interface in interfaces)
+        self._width = width
+        # the offset of the first interface, after the two header lines
+        self._start = None
+        self._time = None
+        self.elapsed = 0
+        self._samples = 0
+
+        # name as bytes: slot
+        self._slots = {}
+        self.names = []
+        # the last reading of bytes received, packets received, bytes sent and
+        # packets sent by each slot in turn; -1 before the first reading
+        self._counters = []
+        # the number of the last sample each slot was seen in
+        self._seen = []
+        # Python 2's array rejects a unicode typecode
+        self.rx_bits_per_second = array.array(str('d'))
+        self.tx_bits_per_second = array.array(str('d'))
+        self.rx_packets_per_second = array.array(str('d'))
+        self.tx_packets_per_second = array.array(str('d'))
+
+    def close(self):
+        """
+        Close the counters file.
+        """
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _read(self):
+        """
+        Read the whole counters file into the buffer, growing it if the file
+        does not fit.
+
+        :return: The number of bytes read.
+        """
+        while True:
+            self._file.seek(0)
+            length = self._file.readinto(self._buffer)
+            if length < len(self._buffer):
+                return length
+            self._buffer = bytearray(len(self._buffer) * 2)
+
+    def _add(self, name):
+        """
+        Assign a slot to an interface seen for the first time.
+
+        :param name: The interface's name, as bytes.
+        :return: The slot.
+        """
+        slot = len(self.names)
+        self._slots[name] = slot
+        self.names.append(name.decode('ascii'))
+        self._counters.extend([-1] * 4)
+        self._seen.append(self._samples)
+        for rates in self._rates():
+            rates.append(0.)
+        return slot
+
+    def _rates(self):
+        """
+        :return: The arrays of rates, each indexed by slot.
+        """
+        return (self.rx_bits_per_second, self.tx_bits_per_second,
+                self.rx_packets_per_second, self.tx_packets_per_second)
+
+    def _drop_missing(self):
+        """
+        Drop the interfaces missing from the last sample, moving those after
+        them to earlier slots.
+        """
+        kept = [slot for slot, seen in enumerate(self._seen)
+                if seen == self._samples]
+        self.names = [self.names[slot] for slot in kept]
+        self._slots = dict((name.encode('ascii'), slot)
+                           for slot, name in enumerate(self.names))
+        self._counters = [self._counters[slot * 4 + field]
+                          for slot in kept for field in range(4)]
+        self._seen = [self._samples] * len(kept)
+        for rates in self._rates():
+            rates[:] = array.array(rates.typecode,
+                                   (rates[slot] for slot in kept))
+
+    def sample(self, now=None):
+        """
+        Read the counters, and update the rate of every interface since the
+        last sample. Rates are zero after the first sample, and for an
+        interface's first sample. Interfaces missing from the counters are
+        dropped, so may move to earlier slots.
+
+        :param now: The current time in seconds, from a monotonic clock.
+                    Defaults to now.
+        """
+        length = self._read()
+        now = _clock() if now is None else now
+        if self._start is None:
+            self._start = self._buffer.find(b'\n', self._buffer.find(b'\n') +
+                                            1) + 1
+        elapsed = now - self._time if self._time is not None else 0
+        self._time = now
+        self.elapsed = elapsed
+        self._samples += 1
+        samples = self._samples
+        present = 0
+
+        slots = self._slots
+        seen = self._seen
+        wanted = self._wanted
+        counters = self._counters
+        width = self._width
+        delta = util.counter_delta
+        rx_bits = self.rx_bits_per_second
+        rx_packets = self.rx_packets_per_second
+        tx_bits = self.tx_bits_per_second
+        tx_packets = self.tx_packets_per_second
+        for match in _LINE_REGEX.finditer(self._buffer, self._start, length):
+            # groups of a bytearray are bytearrays, which are unhashable, in
+            # Python 2
+            name = bytes(match.group(1))
+            slot = slots.get(name)
+            if slot is None:
+                if wanted is not None and name not in wanted:
+                    continue
+                slot = self._add(name)
+            seen[slot] = samples
+            present += 1
+
+            base = slot * 4
+            readings = match.group(2, 3, 4, 5)
+            if elapsed and counters[base] >= 0:
+                rx_bits[slot] = delta(counters[base], int(readings[0]),
+                                      width) * Information.BYTES / elapsed
+                rx_packets[slot] = delta(counters[base + 1], int(readings[1]),
+                                         width) / elapsed
+                tx_bits[slot] = delta(counters[base + 2], int(readings[2]),
+                                      width) * Information.BYTES / elapsed
+                tx_packets[slot] = delta(counters[base + 3], int(readings[3]),
+                                         width) / elapsed
+            counters[base] = int(readings[0])
+            counters[base + 1] = int(readings[1])
+            counters[base + 2] = int(readings[2])
+            counters[base + 3] = int(readings[3])
+        if present < len(self.names):
+            self._drop_missing()
+
+    def rates(self):
+        """
+        Get the rates of each interface as of the last sample.
+
+        :return: A generator of (interface name, receive `Speed`, transmit
+                 `Speed`) tuples, in the order interfaces were first seen.
+        """
+        for slot, name in enumerate(self.names):
+            yield (name, Speed(Information(self.rx_bits_per_second[slot])),
+                   Speed(Information(self.tx_bits_per_second[slot])))
+
+    def utilisation(self, interface, link):
+        """
+        Find the fraction of a link's capacity an interface used in each
+        direction as of the last sample.
+
+        :param interface: The name of the interface.
+        :param link: The `Speed` of the link in each direction, e.g.
+                     `Speed.TEN_GIGABIT`.
+        :return: A tuple of the received and transmitted fractions of the
+                 link's speed, between 0 and 1 unless the link is faster than
+                 stated.
+        :raises KeyError: If the interface has not been seen.
+        """
+        slot = self._slots[interface.encode('ascii')]
+        bits_per_second = link.information.bits * 1000000000 / \
+            link.duration.nanoseconds
+        return (self.rx_bits_per_second[slot] / bits_per_second,
+                self.tx_bits_per_second[slot] / bits_per_second)
@@ -378,18 +378,15 @@ class Information(object):
                  in the input `category` list.
         """
 
-        # unit: bits
-        expanded = cls._expand_units(category)
-
         # find the first unit smaller than or equal to `bits` in size
-        for unit, bits_ in six.iteritems(expanded):
-            if bits >= bits_:
+        for unit in category:
+            if bits >= cls._SYMBOLS[unit]:
                 # because categories are sorted descending, the first one where
                 # this is true is the unit we should use to avoid <1 of a unit
                 return unit
 
         # default to using the smallest unit we have
-        return next(reversed(expanded))
+        return category[-1]
 
     @decorators.python_2_format_compatible
     def __format__(self, format_spec):
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, division
+import errno
+import heapq
+import os
+import re
+import time
+
+from nibble import util, Information, Speed
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows, which has no /proc anyway
+    resource = None
+
+# `time.monotonic()` is unaffected by changes to the system clock, but is not
+# available in Python 2
+_clock = getattr(time, 'monotonic', time.time)
+
+_IO_REGEX = re.compile(br'rchar: (\d+)\nwchar: (\d+)\n.*?'
+                       br'read_bytes: (\d+)\nwrite_bytes: (\d+)', re.DOTALL)
+
+# errors reading a process's counters that mean it has exited
+_EXITED = frozenset([errno.ENOENT, errno.ESRCH])
+
+# errors reading a process's counters that mean we are not allowed to, which
+# may only be reported when reading rather than opening
+_DENIED = frozenset([errno.EACCES, errno.EPERM])
+
+# the kinds of I/O that can be ranked: 'disk' is what reached the storage
+# layer, 'all' includes reads and writes satisfied by the page cache, pipes
+# and sockets
+KINDS = ('disk', 'all')
+
+
+def _default_max_fds():
+    """
+    Find how many counter files to keep open, leaving plenty of the process's
+    file descriptor limit for everything else.
+
+    :return: The number of files.
+    """
+    if resource is None:
+        return 256
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft == resource.RLIM_INFINITY:
+        return 4096
+    return max(0, soft // 2)
+
+
+class _Process(object):
+    """
+    The state of one sampled process.
+    """
+
+    __slots__ = ('pid', 'name', 'fd', 'counters', 'rates')
+
+    def __init__(self, pid, name, fd):
+        self.pid = pid
+        self.name = name
+        self.fd = fd
+        # rchar, wchar, read_bytes, write_bytes
+        self.counters = None
+        # the bits per second of each counter
+        self.rates = (0., 0., 0., 0.)
+
+
+class ProcessSampler(object):
+    """
+    Samples the I/O counters of processes in `/proc/<pid>/io`, and computes
+    the rate of each since the last sample. Each sample lists `/proc` once
+    with `os.scandir()` where available to find new processes, and reads
+    each process's counters through a file descriptor opened when it was
+    first seen, so sampling costs a seek and a read per process. Processes
+    that cannot be read, usually because they belong to another user, are
+    skipped.
+    """
+
+    def __init__(self, pids=None, directory='/proc', max_fds=None):
+        """
+        Initialise a new sampler. Call `sample()` to take the first sample.
+
+        :param pids: The process IDs to sample. Defaults to all processes.
+        :param directory: Where procfs is mounted.
+        :param max_fds: The most counter files to keep open at once. Any
+                        further processes have their file opened for each
+                        sample. Defaults to half the file descriptor limit.
+        """
+        self._pids = None if pids is None else set(pids)
+        self._directory = directory
+        self._max_fds = _default_max_fds() if max_fds is None else max_fds
+        self._open_fds = 0
+        self._time = None
+        self.elapsed = 0
+        # pid: _Process
+        self.processes = {}
+        # processes whose counters could not be read, so are not retried until
+        # they leave /proc, after which their PIDs may be reused
+        self._denied = set()
+
+    def close(self):
+        """
+        Close every cached file descriptor.
+        """
+        for process in self.processes.values():
+            self._forget(process)
+        self.processes.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _forget(self, process):
+        """
+        Close a process's file descriptor, if it has one.
+
+        :param process: The `_Process`.
+        """
+        if process.fd is not None:
+            os.close(process.fd)
+            process.fd = None
+            self._open_fds -= 1
+
+    def _path(self, pid, name):
+        """
+        Get the path of a file in a process's procfs directory.
+
+        :param pid: The process ID.
+        :param name: The name of the file, e.g. 'io'.
+        :return: The path.
+        """
+        return os.path.join(self._directory, str(pid), name)
+
+    def _command(self, pid):
+        """
+        Read the command name of a process.
+
+        :param pid: The process ID.
+        :return: The name, e.g. 'python'.
+        :raises EnvironmentError: If the name cannot be read.
+        """
+        with open(self._path(pid, 'comm'), 'rb') as file_:
+            return file_.read().rstrip(b'\n').decode('utf-8', 'replace')
+
+    def _discover(self):
+        """
+        Find processes started since the last sample, and forget denied ones
+        that have exited.
+        """
+        listed = set()
+        for entry in util.scandir(self._directory):
+            name = entry.name
+            if not name.isdigit():
+                continue
+            pid = int(name)
+            listed.add(pid)
+            if pid in self.processes or pid in self._denied or \
+                    (self._pids is not None and pid not in self._pids):
+                continue
+
+            try:
+                command = self._command(pid)
+                fd = None
+                if self._open_fds < self._max_fds:
+                    fd = os.open(self._path(pid, 'io'), os.O_RDONLY)
+                    self._open_fds += 1
+            except EnvironmentError as e:
+                if e.errno in _DENIED:
+                    self._denied.add(pid)
+                elif e.errno not in _EXITED:
+                    raise
+                continue
+            self.processes[pid] = _Process(pid, command, fd)
+        self._denied &= listed
+
+    def _read(self, process):
+        """
+        Read a process's counters.
+
+        :param process: The `_Process`.
+        :return: The contents of its io file, as bytes.
+        """
+        if process.fd is not None:
+            # `os.pread()` would save a system call, but needs Python 3.3
+            os.lseek(process.fd, 0, os.SEEK_SET)
+            return os.read(process.fd, 512)
+        with open(self._path(process.pid, 'io'), 'rb') as file_:
+            return file_.read()
+
+    def sample(self, now=None):
+        """
+        Read the counters of every process, and update their rates since the
+        last sample. Processes that have exited, or whose counters we are not
+        allowed to read, are removed. Rates are zero after a process's first
+        sample.
+
+        :param now: The current time in seconds, from a monotonic clock.
+                    Defaults to now.
+        """
+        self._discover()
+        now = _clock() if now is None else now
+        elapsed = now - self._time if self._time is not None else 0
+        self._time = now
+        self.elapsed = elapsed
+
+        delta = util.counter_delta
+        scale = Information.BYTES / elapsed if elapsed else 0
+        removed = []
+        for process in self.processes.values():
+            try:
+                match = _IO_REGEX.search(self._read(process))
+            except EnvironmentError as e:
+                if e.errno in _DENIED:
+                    self._denied.add(process.pid)
+                elif e.errno not in _EXITED:
+                    raise
+                removed.append(process)
+                continue
+            if not match:
+                # a zombie has an empty io file
+                removed.append(process)
+                continue
+
+            counters = [int(value) for value in match.groups()]
+            previous = process.counters
+            process.counters = counters
+            if previous is not None and scale:
+                process.rates = tuple(
+                    delta(before, after) * scale
+                    for before, after in zip(previous, counters))
+
+        for process in removed:
+            self._forget(process)
+            del self.processes[process.pid]
+
+    def top(self, count=10, kind='disk'):
+        """
+        Find the processes with the highest I/O rate as of the last sample.
+
+        :param count: The number of processes to return.
+        :param kind: 'disk' to rank by reads from and writes to storage, or
+                     'all' to rank by all reads and writes, including those
+                     served by the page cache, pipes and sockets.
+        :return: A list of up to `count` (PID, command name, read `Speed`,
+                 write `Speed`) tuples, highest total rate first. Processes
+                 with no I/O are omitted.
+        :raises ValueError: If the kind is not recognised.
+        """
+        if kind not in KINDS:
+            raise ValueError('Unrecognised kind of I/O: {0}'.format(kind))
+        first = 2 if kind == 'disk' else 0
+
+        processes = heapq.nlargest(
+            count, [process for process in self.processes.values()
+                    if process.rates[first] or process.rates[first + 1]],
+            key=lambda process: process.rates[first] +
+            process.rates[first + 1])
+        for process in processes:
+            # names change when processes exec(), and only the few returned
+            # are worth refreshing
+            try:
+                process.name = self._command(process.pid)
+            except EnvironmentError:
+                pass
+        return [(process.pid, process.name,
+                 Speed(Information(process.rates[first])),
+                 Speed(Information(process.rates[first + 1])))
+                for process in processes]
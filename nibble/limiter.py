@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+"""
+Token-bucket bandwidth limiting: a `TokenBucket` is configured with a `Speed`
+and a burst `Information`, and wrappers pace writes to files and sockets
+through one. Tokens are whole bytes held as a float, refilled from the clock
+when a reservation is made, so there is no per-byte work and no background
+thread, and the long-run rate stays exact however late sleeps wake up.
+"""
+from __future__ import unicode_literals, division
+import threading
+import time
+
+from nibble import Information, Duration
+from nibble.metered import _length
+
+# `time.monotonic()` is unaffected by changes to the system clock, but is not
+# available in Python 2
+_clock = getattr(time, 'monotonic', time.time)
+
+
+class TokenBucket(object):
+    """
+    A token bucket, holding up to a burst of bytes, refilled at a rate.
+
+    Reservations may take more tokens than the bucket holds, leaving it in
+    debt; the reserver waits until the debt would be repaid, so each
+    acquisition needs at most one sleep, rather than polling, and large
+    acquisitions are not starved by small ones. Buckets are safe to share
+    between threads and `asyncio` tasks. A bucket with a parent also
+    reserves from its parent, so e.g. each upload can be limited separately
+    while all of them share an overall limit.
+    """
+
+    def __init__(self, rate, burst, parent=None, start=None):
+        """
+        Initialise a new bucket, full.
+
+        :param rate: The rate the bucket refills at, as a `Speed`.
+        :param burst: The most the bucket holds, as an `Information`. This is
+                      the most that can be transferred at once after a pause.
+                      Writes through the wrappers are split into chunks of
+                      this size.
+        :param parent: A `TokenBucket` to also reserve from. Defaults to none.
+        :param start: The clock time the bucket was full. Defaults to now.
+        :raises ValueError: If the rate or burst is not positive.
+        """
+        if not rate.information:
+            raise ValueError('The rate must be positive')
+        if burst.bits < Information.BYTES:
+            raise ValueError('The burst must be at least a byte')
+        self.rate = rate
+        self.burst = burst
+        self.parent = parent
+        # bytes per second
+        self._rate = rate.information.bits * Duration.SECONDS / \
+            rate.duration.nanoseconds / Information.BYTES
+        self._burst = burst.bits // Information.BYTES
+        self._tokens = float(self._burst)
+        self._last = _clock() if start is None else start
+        self._lock = threading.Lock()
+
+    @property
+    def burst_bytes(self):
+        """
+        :return: The most the bucket holds, in bytes.
+        """
+        return self._burst
+
+    def _refill(self, now):
+        """
+        Add the tokens accrued since the last refill. Call with the lock
+        held.
+
+        :param now: The current clock time.
+        """
+        if now > self._last:
+            self._tokens = min(self._burst,
+                               self._tokens + (now - self._last) * self._rate)
+            self._last = now
+
+    def reserve(self, bytes_, now=None, limit=None):
+        """
+        Take tokens for a transfer, from this bucket and its ancestors,
+        without waiting. The transfer should start once the returned time
+        has passed.
+
+        :param bytes_: The number of bytes to be transferred.
+        :param now: The current clock time. Defaults to now.
+        :param limit: The longest acceptable wait, in seconds. If the wait
+                      would be longer, no tokens are taken. Defaults to no
+                      limit.
+        :return: The number of seconds to wait, or None if that would exceed
+                 the limit.
+        """
+        with self._lock:
+            if now is None:
+                now = _clock()
+            self._refill(now)
+            tokens = self._tokens - bytes_
+            wait = max(0., -tokens / self._rate)
+            if limit is not None and wait > limit:
+                return None
+            self._tokens = tokens
+        if self.parent is None:
+            return wait
+        parent_wait = self.parent.reserve(bytes_, now, limit)
+        if parent_wait is None:
+            self._release(bytes_)
+            return None
+        return max(wait, parent_wait)
+
+    def _release(self, bytes_):
+        """
+        Return tokens to this bucket only.
+
+        :param bytes_: The number of bytes reserved but not transferred.
+        """
+        with self._lock:
+            self._tokens = min(self._burst, self._tokens + bytes_)
+
+    def release(self, bytes_):
+        """
+        Return tokens reserved for a transfer that turned out smaller, e.g. a
+        partial `send()`, to this bucket and its ancestors.
+
+        :param bytes_: The number of bytes reserved but not transferred.
+        """
+        bucket = self
+        while bucket is not None:
+            bucket._release(bytes_)
+            bucket = bucket.parent
+
+    def acquire(self, bytes_, blocking=True, timeout=None):
+        """
+        Take tokens for a transfer, waiting until it may start. Arguments
+        mirror `threading.Lock.acquire()`.
+
+        :param bytes_: The number of bytes to be transferred.
+        :param blocking: Whether to wait for tokens. If False, tokens are
+                         only taken if the transfer may start immediately.
+                         Defaults to True.
+        :param timeout: The longest to wait, as a `Duration`. If the wait
+                        would be longer, no tokens are taken, and this
+                        returns immediately. Defaults to no limit.
+        :return: Whether the tokens were taken.
+        """
+        if not blocking:
+            limit = 0
+        elif timeout is None:
+            limit = None
+        else:
+            limit = timeout.total_seconds()
+        wait = self.reserve(bytes_, limit=limit)
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    def __repr__(self):
+        return '<TokenBucket({0}, {1})>'.format(repr(self.rate),
+                                                repr(self.burst))
+
+
+def _chunks(data, size):
+    """
+    Split a buffer into chunks without copying it.
+
+    :param data: A one-dimensional buffer, e.g. bytes.
+    :param size: The largest chunk, in bytes.
+    :return: A generator of buffers. If the data fits in one chunk, it is
+             yielded unchanged.
+    """
+    if _length(data) <= size:
+        yield data
+        return
+    try:
+        view = memoryview(data)
+    except TypeError:
+        # arrays in Python 2 have no memoryview, so are copied once
+        view = memoryview(data.tostring())
+    if view.itemsize != 1:
+        view = view.cast('B')
+    for offset in range(0, len(view), size):
+        yield view[offset:offset + size]
+
+
+class _Limited(object):
+    """
+    The common parts of wrappers pacing the writes to another object through
+    a `TokenBucket`. Writes are split into chunks of at most the bucket's
+    burst, and each waits for its tokens. Waits shorter than a minimum are
+    skipped, and made up by the next longer wait, as the bucket stays in
+    debt, so a stream of small writes wakes a timer at most about once per
+    minimum rather than once per write. Attributes the wrapper does not
+    limit, including reads, are passed through to the wrapped object.
+    """
+
+    __slots__ = ('_wrapped', 'bucket', '_min_sleep')
+
+    def __init__(self, wrapped, bucket,
+                 min_sleep=Duration(milliseconds=5)):
+        """
+        Wrap an object.
+
+        :param wrapped: The object to pace the writes of.
+        :param bucket: The `TokenBucket`, which may be shared with other
+                       wrappers.
+        :param min_sleep: The shortest wait worth sleeping for, as a
+                          `Duration`. Defaults to 5 milliseconds.
+        """
+        self._wrapped = wrapped
+        self.bucket = bucket
+        self._min_sleep = min_sleep.total_seconds()
+
+    @property
+    def wrapped(self):
+        """
+        :return: The wrapped object.
+        """
+        return self._wrapped
+
+    def _pace(self, bytes_):
+        """
+        Reserve tokens for a write, sleeping if the wait is long enough.
+
+        :param bytes_: The number of bytes to be written.
+        """
+        wait = self.bucket.reserve(bytes_)
+        if wait >= self._min_sleep:
+            time.sleep(wait)
+
+    def __getattr__(self, name):
+        return getattr(self._wrapped, name)
+
+    def __enter__(self):
+        self._wrapped.__enter__()
+        return self
+
+    def __exit__(self, *args):
+        return self._wrapped.__exit__(*args)
+
+    def __repr__(self):
+        return '<{0}({1}, {2})>'.format(self.__class__.__name__,
+                                        repr(self._wrapped),
+                                        repr(self.bucket))
+
+
+class LimitedFile(_Limited):
+    """
+    Wraps a binary file object, pacing writes. Tokens are only charged for
+    the bytes the wrapped file accepts, so short writes of raw files, and
+    non-blocking ones that return None, are passed on as they are.
+    """
+
+    __slots__ = ()
+
+    def write(self, data):
+        written = 0
+        for chunk in _chunks(data, self.bucket.burst_bytes):
+            length = _length(chunk)
+            self._pace(length)
+            count = self._wrapped.write(chunk)
+            if count is None or count < length:
+                self.bucket.release(length - (count or 0))
+                # stop at a short write, as a raw file would
+                if count is None:
+                    return written or None
+                return written + count
+            written += count
+        return written
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+
+class LimitedSocket(_Limited):
+    """
+    Wraps a blocking socket, pacing sends. `sendfile()` is passed through
+    unlimited, as it sends without Python seeing the data.
+    """
+
+    __slots__ = ()
+
+    def send(self, data, *args):
+        chunk = next(_chunks(data, self.bucket.burst_bytes))
+        length = _length(chunk)
+        self._pace(length)
+        count = self._wrapped.send(chunk, *args)
+        if count < length:
+            self.bucket.release(length - count)
+        return count
+
+    def sendall(self, data, *args):
+        for chunk in _chunks(data, self.bucket.burst_bytes):
+            self._pace(_length(chunk))
+            self._wrapped.sendall(chunk, *args)
+
+    def sendto(self, data, *args):
+        self._pace(_length(data))
+        return self._wrapped.sendto(data, *args)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+`await`-able token-bucket limiting, kept separate from `nibble.limiter` as it
+needs Python 3.5.
+"""
+from __future__ import unicode_literals
+import asyncio
+
+from nibble import Duration
+from nibble.limiter import _clock
+from nibble.metered import _length
+
+
+async def acquire(bucket, bytes_, timeout=None):
+    """
+    Take tokens for a transfer from a `TokenBucket`, waiting without blocking
+    the event loop until it may start.
+
+    :param bucket: The `TokenBucket`, which may be shared with threads and
+                   other tasks.
+    :param bytes_: The number of bytes to be transferred.
+    :param timeout: The longest to wait, as a `Duration`. If the wait would
+                    be longer, no tokens are taken, and this returns
+                    immediately. Defaults to no limit.
+    :return: Whether the tokens were taken.
+    """
+    wait = bucket.reserve(
+        bytes_, limit=None if timeout is None else timeout.total_seconds())
+    if wait is None:
+        return False
+    if wait > 0:
+        await asyncio.sleep(wait)
+    return True
+
+
+class LimitedStreamWriter(object):
+    """
+    Wraps an `asyncio.StreamWriter`, pacing writes through a `TokenBucket`.
+    Writes are passed straight to the wrapped writer, without copying or
+    holding them, and take their tokens as they are written; `drain()` then
+    waits until the bucket has repaid them before draining. So a task that
+    drains after each write, as it should anyway, is held to the rate, and
+    nothing is lost if the writer is closed. Data written between drains
+    goes out at once, so write in chunks no larger than the burst to keep
+    bursts to it. Waits shorter than a minimum are skipped, and made up by
+    the next longer wait, so small writes do not each wake a timer.
+    """
+
+    __slots__ = ('_wrapped', 'bucket', '_min_sleep', '_until')
+
+    def __init__(self, wrapped, bucket,
+                 min_sleep=Duration(milliseconds=5)):
+        """
+        Wrap a stream writer.
+
+        :param wrapped: The `asyncio.StreamWriter`.
+        :param bucket: The `TokenBucket`, which may be shared with threads and
+                       other tasks.
+        :param min_sleep: The shortest wait worth sleeping for, as a
+                          `Duration`. Defaults to 5 milliseconds.
+        """
+        self._wrapped = wrapped
+        self.bucket = bucket
+        self._min_sleep = min_sleep.total_seconds()
+        # the clock time the tokens for writes so far will have been repaid
+        self._until = 0.
+
+    @property
+    def wrapped(self):
+        """
+        :return: The wrapped stream writer.
+        """
+        return self._wrapped
+
+    def write(self, data):
+        now = _clock()
+        wait = self.bucket.reserve(_length(data), now)
+        self._until = max(self._until, now + wait)
+        self._wrapped.write(data)
+
+    def writelines(self, data):
+        for line in data:
+            self.write(line)
+
+    async def drain(self):
+        wait = self._until - _clock()
+        if wait >= self._min_sleep:
+            await asyncio.sleep(wait)
+        await self._wrapped.drain()
+
+    def __getattr__(self, name):
+        return getattr(self._wrapped, name)
+
+    def __repr__(self):
+        return '<LimitedStreamWriter({0}, {1})>'.format(repr(self._wrapped),
+                                                        repr(self.bucket))
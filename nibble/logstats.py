@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, division
+import array
+import calendar
+import datetime
+import mmap
+import multiprocessing
+import os
+import re
+import six
+
+from nibble import Information, Duration, Speed
+from nibble.sketch import SpeedSketch
+
+# Matches the fields we need from a line in the combined log format, with an
+# optional request time after the quoted fields, as logged by nginx's
+# `$request_time` or Apache's `%T`/`%D`. Searching a whole chunk of the log
+# with one regular expression is much faster than splitting it into lines.
+_LINE_REGEX = re.compile(
+    br'\[(\d\d/\w\w\w/\d{4}:\d\d:\d\d):(\d\d) ([+-])(\d\d)(\d\d)\] '
+    # quoted strings are matched with Friedl's "unrolled loop", as a simple
+    # alternation of escaped and unescaped characters is several times slower
+    br'"[^"\\\n]*(?:\\.[^"\\\n]*)*" \d{3} (\d+|-)'
+    br'(?: "[^"\\\n]*(?:\\.[^"\\\n]*)*")*'
+    br'(?: (\d+(?:\.\d+)?))?')
+
+_MONTHS = {month.encode('ascii'): number for number, month in enumerate(
+    ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct',
+     'Nov', 'Dec'], 1)}
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+# the number of per-request speeds `scan()` collects before adding them to the
+# sketch in one go
+_SPEED_BATCH = 65536
+
+
+class LogStats(object):
+    """
+    Throughput statistics of a web server access log: the amount of data sent
+    in each period of time, and the distribution of the speeds at which
+    individual responses were sent.
+    """
+
+    def __init__(self, bucket=Duration(minutes=1)):
+        """
+        Initialise new, empty statistics.
+
+        :param bucket: The length of the periods to divide the log into.
+                       Must be a whole number of seconds. Defaults to one
+                       minute.
+        :raises ValueError: If the bucket is not a whole number of seconds.
+        """
+        seconds, remainder = divmod(bucket.nanoseconds, Duration.SECONDS)
+        if remainder or not seconds:
+            raise ValueError('Buckets must be a whole number of seconds')
+
+        self.bucket = bucket
+        self._bucket_seconds = seconds
+        # bucket index: [bytes, requests]
+        self._buckets = {}
+        # per-request speeds, so percentiles are accurate to within 1%
+        self._speeds = SpeedSketch(0.01)
+        self.requests = 0
+        self.sent_bytes = 0
+        # requests with a non-zero request time
+        self.timed_requests = 0
+
+    @property
+    def sent(self):
+        """
+        The total amount of data sent.
+
+        :return: The total as an `Information`.
+        """
+        return Information(self.sent_bytes, Information.BYTES)
+
+    def add(self, timestamp, sent_bytes, seconds=None):
+        """
+        Record a single request.
+
+        :param timestamp: The time of the request, in seconds since the epoch.
+        :param sent_bytes: The number of bytes sent in the response.
+        :param seconds: How long the request took, if known.
+        """
+        bucket = self._buckets.setdefault(timestamp // self._bucket_seconds,
+                                          [0, 0])
+        bucket[0] += sent_bytes
+        bucket[1] += 1
+        self.requests += 1
+        self.sent_bytes += sent_bytes
+        if seconds:
+            # in bits per nanosecond
+            self._speeds.add(sent_bytes * Information.BYTES /
+                             (seconds * Duration.SECONDS))
+            self.timed_requests += 1
+
+    def merge(self, other):
+        """
+        Include the statistics of another part of the log in these.
+
+        :param other: The other `LogStats`. Must have the same bucket size.
+        :raises ValueError: If the bucket sizes differ.
+        """
+        if other.bucket != self.bucket:
+            raise ValueError('Cannot merge statistics with different buckets')
+
+        for index, (sent_bytes, requests) in six.iteritems(other._buckets):
+            bucket = self._buckets.setdefault(index, [0, 0])
+            bucket[0] += sent_bytes
+            bucket[1] += requests
+        self._speeds.merge(other._speeds)
+        self.requests += other.requests
+        self.sent_bytes += other.sent_bytes
+        self.timed_requests += other.timed_requests
+
+    def series(self):
+        """
+        Get the amount of data sent in each period, from the first request to
+        the last, including periods with no requests.
+
+        :return: A generator of (start time as a UTC `datetime.datetime`,
+                 number of requests, `Information` sent, `Speed`) tuples.
+        """
+        if not self._buckets:
+            return
+
+        for index in range(min(self._buckets), max(self._buckets) + 1):
+            sent_bytes, requests = self._buckets.get(index, (0, 0))
+            information = Information(sent_bytes, Information.BYTES)
+            yield (_EPOCH + datetime.timedelta(
+                       seconds=index * self._bucket_seconds),
+                   requests,
+                   information,
+                   Speed(information, self.bucket))
+
+    def percentile(self, percentile):
+        """
+        Find the speed at or below which a percentage of responses were sent.
+        Only requests with a request time are included.
+
+        :param percentile: The percentage, between 0 and 100.
+        :return: The speed as a `Speed`, or None if no requests had a request
+                 time.
+        """
+        return self._speeds.percentile(percentile)
+
+
+def _minute_epoch(minute, sign, hours, minutes, cache):
+    """
+    Convert the minute of a log timestamp to seconds since the epoch.
+
+    :param minute: The timestamp up to the minute, e.g. b'10/Oct/2000:13:55'.
+    :param sign: The sign of the time zone offset, b'+' or b'-'.
+    :param hours: The hours of the time zone offset, e.g. b'07'.
+    :param minutes: The minutes of the time zone offset, e.g. b'00'.
+    :param cache: A dict of previous conversions. Most of a log's lines fall
+                  into far fewer minutes, so this avoids most conversions.
+    :return: The start of the minute in seconds since the epoch.
+    """
+    key = minute, sign, hours, minutes
+    try:
+        return cache[key]
+    except KeyError:
+        pass
+
+    epoch = calendar.timegm((int(minute[7:11]), _MONTHS[minute[3:6]],
+                             int(minute[0:2]), int(minute[12:14]),
+                             int(minute[15:17]), 0))
+    offset = int(hours) * 3600 + int(minutes) * 60
+    epoch += -offset if sign == b'+' else offset
+    cache[key] = epoch
+    return epoch
+
+
+def scan(buffer_, start, end, bucket=Duration(minutes=1),
+         time_unit=Duration.SECONDS):
+    """
+    Gather the statistics of part of a log.
+
+    :param buffer_: The log, as a bytes-like object such as an `mmap.mmap`.
+    :param start: The offset to start at.
+    :param end: The offset to stop at.
+    :param bucket: See `LogStats()`.
+    :param time_unit: The unit of request times, in nanoseconds. Defaults to
+                      seconds, as logged by nginx.
+    :return: The statistics as a `LogStats`.
+    """
+    stats = LogStats(bucket)
+    cache = {}
+    # this loop runs once per line, so does the work of `LogStats.add()`
+    # inline, with everything it needs in local variables
+    buckets = stats._buckets
+    bucket_seconds = stats._bucket_seconds
+    speeds = array.array(str('d'))
+    add_speed = speeds.append
+    sent_total = 0
+    requests = 0
+    for match in _LINE_REGEX.finditer(buffer_, start, end):
+        minute, second, sign, hours, minutes, sent, time = match.groups()
+        try:
+            timestamp = cache[minute, sign, hours, minutes] + int(second)
+        except KeyError:
+            timestamp = _minute_epoch(minute, sign, hours, minutes, cache) + \
+                int(second)
+        sent = 0 if sent == b'-' else int(sent)
+
+        index = timestamp // bucket_seconds
+        try:
+            counts = buckets[index]
+        except KeyError:
+            counts = buckets[index] = [0, 0]
+        counts[0] += sent
+        counts[1] += 1
+        sent_total += sent
+        requests += 1
+
+        if time:
+            nanoseconds = float(time) * time_unit
+            if nanoseconds:
+                add_speed(sent * Information.BYTES / nanoseconds)
+                if len(speeds) == _SPEED_BATCH:
+                    stats._speeds.add_many(speeds)
+                    del speeds[:]
+
+    stats._speeds.add_many(speeds)
+    stats.timed_requests = stats._speeds.count
+    stats.sent_bytes = sent_total
+    stats.requests = requests
+    return stats
+
+
+def _scan_file(task):
+    """
+    Gather the statistics of part of a log file in a worker process.
+
+    :param task: A tuple of the arguments to `scan_file()`, and the start and
+                 end offsets of the part to scan.
+    :return: The statistics as a `LogStats`.
+    """
+    path, bucket, time_unit, start, end = task
+    with open(path, 'rb') as file_:
+        buffer_ = mmap.mmap(file_.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return scan(buffer_, start, end, bucket, time_unit)
+        finally:
+            buffer_.close()
+
+
+def _line_boundaries(buffer_, parts):
+    """
+    Divide a buffer into roughly equal parts, each ending at a line break.
+
+    :param buffer_: The buffer to divide.
+    :param parts: The number of parts to divide it into.
+    :return: A list of (start, end) offset tuples.
+    """
+    size = len(buffer_)
+    boundaries = [0]
+    for part in range(1, parts):
+        newline = buffer_.find(b'\n', max(boundaries[-1], size * part // parts))
+        if newline == -1:
+            break
+        boundaries.append(newline + 1)
+    boundaries.append(size)
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:])
+            if end > start]
+
+
+def scan_file(path, bucket=Duration(minutes=1), time_unit=Duration.SECONDS,
+              jobs=1):
+    """
+    Gather the statistics of a log file. The file is memory mapped rather
+    than read, and with several jobs it is divided at line breaks into parts
+    scanned by separate processes.
+
+    :param path: The path of the log file.
+    :param bucket: See `LogStats()`.
+    :param time_unit: See `scan()`.
+    :param jobs: The number of processes to scan with. Defaults to 1, which
+                 scans in this process.
+    :return: The statistics as a `LogStats`.
+    """
+    if not os.path.getsize(path):
+        # empty files cannot be mapped
+        return LogStats(bucket)
+
+    with open(path, 'rb') as file_:
+        buffer_ = mmap.mmap(file_.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if jobs == 1:
+                return scan(buffer_, 0, len(buffer_), bucket, time_unit)
+            # more parts than jobs, so one slow part doesn't hold up the rest
+            parts = _line_boundaries(buffer_, jobs * 4)
+        finally:
+            buffer_.close()
+
+    pool = multiprocessing.Pool(jobs)
+    try:
+        results = pool.map(_scan_file, [(path, bucket, time_unit, start, end)
+                                        for start, end in parts])
+    finally:
+        pool.terminate()
+
+    stats = results[0]
+    for result in results[1:]:
+        stats.merge(result)
+    return stats
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import io
+
+from nibble.pv import Meter
+
+
+def _length(data):
+    """
+    Find the number of bytes in a buffer without copying it or creating a
+    `memoryview` of it.
+
+    :param data: A one-dimensional buffer, e.g. bytes, a bytearray, an
+                 `array.array` or a `memoryview`.
+    :return: The length in bytes.
+    """
+    return len(data) * getattr(data, 'itemsize', 1)
+
+
+class _Metered(object):
+    """
+    The common parts of wrappers counting the bytes read from and written to
+    another object. Counts are kept in a `Meter` for each direction, which
+    are plain integers updated without locks, so a wrapper should only be
+    used by one thread at a time, as is already true of most files and
+    sockets. Attributes the wrapper does not count are passed through to the
+    wrapped object.
+    """
+
+    __slots__ = ('_wrapped', 'read_meter', 'write_meter')
+
+    def __init__(self, wrapped, read_meter=None, write_meter=None):
+        """
+        Wrap an object.
+
+        :param wrapped: The object to count the reads and writes of.
+        :param read_meter: The `Meter` to count reads in, e.g. to share one
+                           between several wrappers. Defaults to a new one.
+        :param write_meter: The `Meter` to count writes in. Defaults to a new
+                            one.
+        """
+        self._wrapped = wrapped
+        self.read_meter = Meter() if read_meter is None else read_meter
+        self.write_meter = Meter() if write_meter is None else write_meter
+
+    @property
+    def wrapped(self):
+        """
+        :return: The wrapped object.
+        """
+        return self._wrapped
+
+    @property
+    def information_read(self):
+        """
+        :return: The amount read so far, as an `Information`.
+        """
+        return self.read_meter.transferred
+
+    @property
+    def information_written(self):
+        """
+        :return: The amount written so far, as an `Information`.
+        """
+        return self.write_meter.transferred
+
+    def sample(self, now=None):
+        """
+        Measure the read and write speeds since the last sample, and since
+        the wrapper was created.
+
+        :param now: The current clock time. Defaults to now.
+        :return: A tuple of the current read `Speed`, average read `Speed`,
+                 current write `Speed` and average write `Speed`.
+        """
+        read_current, read_average, _ = self.read_meter.sample(now)
+        write_current, write_average, _ = self.write_meter.sample(now)
+        return read_current, read_average, write_current, write_average
+
+    def __getattr__(self, name):
+        return getattr(self._wrapped, name)
+
+    def __enter__(self):
+        self._wrapped.__enter__()
+        return self
+
+    def __exit__(self, *args):
+        return self._wrapped.__exit__(*args)
+
+    def __repr__(self):
+        return '<{0}({1})>'.format(self.__class__.__name__,
+                                   repr(self._wrapped))
+
+
+class MeteredFile(_Metered):
+    """
+    Wraps a binary file object, counting the bytes read and written. Reads
+    into caller-provided buffers with `readinto()` are passed straight
+    through, so are still zero-copy.
+    """
+
+    __slots__ = ()
+
+    def read(self, size=-1):
+        data = self._wrapped.read(size)
+        if data:
+            self.read_meter.transferred_bytes += len(data)
+        return data
+
+    def read1(self, size=-1):
+        data = self._wrapped.read1(size)
+        if data:
+            self.read_meter.transferred_bytes += len(data)
+        return data
+
+    def readinto(self, buffer_):
+        count = self._wrapped.readinto(buffer_)
+        if count:
+            self.read_meter.transferred_bytes += count
+        return count
+
+    def readinto1(self, buffer_):
+        # files in Python 2 have no `readinto1()`
+        readinto1 = getattr(self._wrapped, 'readinto1', None) or \
+            self._wrapped.readinto
+        count = readinto1(buffer_)
+        if count:
+            self.read_meter.transferred_bytes += count
+        return count
+
+    def readline(self, size=-1):
+        line = self._wrapped.readline(size)
+        self.read_meter.transferred_bytes += len(line)
+        return line
+
+    def readlines(self, hint=-1):
+        lines = self._wrapped.readlines(hint)
+        self.read_meter.transferred_bytes += sum(len(line) for line in lines)
+        return lines
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self._wrapped.readline()
+        if not line:
+            raise StopIteration()
+        self.read_meter.transferred_bytes += len(line)
+        return line
+
+    # Python 2
+    next = __next__
+
+    def write(self, data):
+        count = self._wrapped.write(data)
+        if count is None:
+            # raw files in non-blocking mode return None if they would block,
+            # but Python 2's files return None having written everything
+            if not isinstance(self._wrapped, io.RawIOBase):
+                self.write_meter.transferred_bytes += _length(data)
+        elif count:
+            self.write_meter.transferred_bytes += count
+        return count
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+
+class MeteredSocket(_Metered):
+    """
+    Wraps a socket, counting the bytes sent and received. `recv_into()` and
+    `recvfrom_into()` are passed straight through, so are still zero-copy.
+    Files created with `makefile()` count into the same meters.
+    """
+
+    __slots__ = ()
+
+    def recv(self, *args):
+        data = self._wrapped.recv(*args)
+        self.read_meter.transferred_bytes += len(data)
+        return data
+
+    def recv_into(self, *args):
+        count = self._wrapped.recv_into(*args)
+        self.read_meter.transferred_bytes += count
+        return count
+
+    def recvfrom(self, *args):
+        data, address = self._wrapped.recvfrom(*args)
+        self.read_meter.transferred_bytes += len(data)
+        return data, address
+
+    def recvfrom_into(self, *args):
+        count, address = self._wrapped.recvfrom_into(*args)
+        self.read_meter.transferred_bytes += count
+        return count, address
+
+    def send(self, *args):
+        count = self._wrapped.send(*args)
+        self.write_meter.transferred_bytes += count
+        return count
+
+    def sendall(self, data, *args):
+        # raises if not everything was sent, in which case the amount sent
+        # is unknown
+        self._wrapped.sendall(data, *args)
+        self.write_meter.transferred_bytes += _length(data)
+
+    def sendto(self, *args):
+        count = self._wrapped.sendto(*args)
+        self.write_meter.transferred_bytes += count
+        return count
+
+    def sendfile(self, *args, **kwargs):
+        count = self._wrapped.sendfile(*args, **kwargs)
+        self.write_meter.transferred_bytes += count
+        return count
+
+    def makefile(self, *args, **kwargs):
+        """
+        Create a file object reading from and writing to this socket, which
+        counts into the same meters.
+
+        :return: A `MeteredFile`.
+        """
+        return MeteredFile(self._wrapped.makefile(*args, **kwargs),
+                           self.read_meter, self.write_meter)
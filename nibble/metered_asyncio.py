@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Metered wrappers of asyncio streams, kept separate from `nibble.metered` as
+they need Python 3.5.
+"""
+from __future__ import unicode_literals
+
+from nibble.metered import _Metered, _length
+
+
+class MeteredStreamReader(_Metered):
+    """
+    Wraps an `asyncio.StreamReader`, counting the bytes read.
+    """
+
+    __slots__ = ()
+
+    async def read(self, n=-1):
+        data = await self._wrapped.read(n)
+        self.read_meter.transferred_bytes += len(data)
+        return data
+
+    async def readline(self):
+        line = await self._wrapped.readline()
+        self.read_meter.transferred_bytes += len(line)
+        return line
+
+    async def readexactly(self, n):
+        data = await self._wrapped.readexactly(n)
+        self.read_meter.transferred_bytes += n
+        return data
+
+    async def readuntil(self, separator=b'\n'):
+        data = await self._wrapped.readuntil(separator)
+        self.read_meter.transferred_bytes += len(data)
+        return data
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        line = await self.readline()
+        if not line:
+            raise StopAsyncIteration()
+        return line
+
+
+class MeteredStreamWriter(_Metered):
+    """
+    Wraps an `asyncio.StreamWriter`, counting the bytes written. Writes are
+    counted when they are buffered, not when `drain()` sends them.
+    """
+
+    __slots__ = ()
+
+    def write(self, data):
+        self._wrapped.write(data)
+        self.write_meter.transferred_bytes += _length(data)
+
+    def writelines(self, data):
+        for line in data:
+            self.write(line)
+
+
+def wrap_streams(reader, writer):
+    """
+    Wrap the reader and writer of a connection, e.g. from
+    `asyncio.open_connection()`, sharing meters, so the writer's meters
+    count both directions.
+
+    :param reader: The `asyncio.StreamReader`.
+    :param writer: The `asyncio.StreamWriter`.
+    :return: A tuple of the `MeteredStreamReader` and `MeteredStreamWriter`.
+    """
+    writer = MeteredStreamWriter(writer)
+    return (MeteredStreamReader(reader, writer.read_meter,
+                                writer.write_meter), writer)
@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+
+from nibble import Information, Duration, Speed
+
+FAMILIES = ('tcp', 'unix')
+MODES = ('thread', 'asyncio')
+
+# `time.perf_counter_ns()` avoids the float conversion, but needs Python 3.7
+try:
+    _nanoseconds = time.perf_counter_ns
+except AttributeError:
+    _counter = getattr(time, 'perf_counter', time.time)
+
+    def _nanoseconds():
+        return int(_counter() * 1000000000)
+
+
+class NetBenchmarkResult(object):
+    """
+    The outcome of one socket benchmark.
+    """
+
+    def __init__(self, family, mode, sendfile, informations, durations,
+                 duration):
+        """
+        Initialise a new result.
+
+        :param family: 'tcp' or 'unix'.
+        :param mode: 'thread' or 'asyncio'.
+        :param sendfile: Whether data was sent with `sendfile()`.
+        :param informations: The amount received by each stream, as a list of
+                             `Information`.
+        :param durations: The time each stream took to receive everything sent
+                          to it, as a list of `Duration`.
+        :param duration: The time from the start of the benchmark until the
+                         last stream finished, as a `Duration`.
+        """
+        self.family = family
+        self.mode = mode
+        self.sendfile = sendfile
+        self.informations = informations
+        self.durations = durations
+        self.duration = duration
+
+    @property
+    def information(self):
+        """
+        The total amount received by every stream.
+
+        :return: The amount as an `Information`.
+        """
+        return Information(sum(information.bits
+                               for information in self.informations))
+
+    @property
+    def speed(self):
+        """
+        The aggregate throughput of every stream.
+
+        :return: The throughput as a `Speed`.
+        """
+        return Speed(self.information, self.duration)
+
+    @property
+    def stream_speeds(self):
+        """
+        The throughput of each stream.
+
+        :return: A list of `Speed`.
+        """
+        return [Speed(information, duration)
+                for information, duration in zip(self.informations,
+                                                  self.durations)]
+
+    def __repr__(self):
+        return '<NetBenchmarkResult({0}, {1}, {2})>'.format(
+            repr(self.family), repr(self.mode), repr(self.speed))
+
+
+def _connect(family, directory, streams):
+    """
+    Open connected pairs of sockets over a listener on the loopback
+    interface, or in a directory for Unix sockets.
+
+    :param family: 'tcp' or 'unix'.
+    :param directory: The directory to create a Unix socket in.
+    :param streams: The number of pairs.
+    :return: A tuple of the list of sending sockets, and the list of receiving
+             sockets.
+    """
+    if family == 'tcp':
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        address = ('127.0.0.1', 0)
+    else:
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        address = os.path.join(directory, 'socket')
+
+    senders = []
+    receivers = []
+    try:
+        listener.bind(address)
+        listener.listen(streams)
+        address = listener.getsockname()
+        for _ in range(streams):
+            sender = socket.socket(listener.family, socket.SOCK_STREAM)
+            senders.append(sender)
+            sender.connect(address)
+            receivers.append(listener.accept()[0])
+    except Exception:
+        for sock in senders + receivers:
+            sock.close()
+        raise
+    finally:
+        listener.close()
+    return senders, receivers
+
+
+def _send(sock, payload, file_, deadline):
+    """
+    Send data on a socket until a deadline, then shut down its sending side.
+
+    :param sock: The connected socket.
+    :param payload: The data to send with each call, as a memoryview.
+    :param file_: A file of the same length as the payload to send with
+                  `sendfile()` instead, or None.
+    :param deadline: The time to stop, in `_nanoseconds()`.
+    """
+    clock = _nanoseconds
+    if file_ is None:
+        sendall = sock.sendall
+        while clock() < deadline:
+            sendall(payload)
+    else:
+        sendfile = sock.sendfile
+        length = len(payload)
+        while clock() < deadline:
+            sendfile(file_, 0, length)
+    sock.shutdown(socket.SHUT_WR)
+
+
+def _receive(sock, buffer_size):
+    """
+    Receive data on a socket until the other end shuts down.
+
+    :param sock: The connected socket.
+    :param buffer_size: The size of the buffer to receive into, in bytes.
+    :return: A tuple of the number of bytes received, and the time the last
+             was received, in `_nanoseconds()`.
+    """
+    buffer_ = bytearray(buffer_size)
+    recv_into = sock.recv_into
+    received = 0
+    while True:
+        length = recv_into(buffer_)
+        if not length:
+            return received, _nanoseconds()
+        received += length
+
+
+def _transfer(senders, receivers, payload, files, duration, buffer_size):
+    """
+    Run a benchmark with a pair of threads per stream.
+
+    :param senders: The sending sockets.
+    :param receivers: The receiving sockets, in the same order.
+    :param payload: The data to send with each call, as a memoryview.
+    :param files: A file for each sender to send with `sendfile()`, or None
+                  for each.
+    :param duration: How long to send for, in nanoseconds.
+    :param buffer_size: The size of each receive buffer, in bytes.
+    :return: A tuple of the start time in `_nanoseconds()`, and a list of
+             (bytes received, finish time) tuples for each stream.
+    """
+    results = [None] * len(receivers)
+    errors = []
+    ready = threading.Event()
+    timing = {}
+
+    def send(sock, file_):
+        ready.wait()
+        try:
+            _send(sock, payload, file_, timing['deadline'])
+        except Exception as e:
+            errors.append(e)
+            # unblock the receiver
+            sock.close()
+
+    def receive(index, sock):
+        ready.wait()
+        try:
+            results[index] = _receive(sock, buffer_size)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=send, args=arguments)
+               for arguments in zip(senders, files)]
+    threads.extend(threading.Thread(target=receive, args=arguments)
+                   for arguments in enumerate(receivers))
+    for thread in threads:
+        thread.start()
+    start = _nanoseconds()
+    timing['deadline'] = start + duration
+    ready.set()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return start, results
+
+
+def run(streams=1, duration=Duration(seconds=10), family='tcp', mode='thread',
+        buffer_size=Information(128, Information.KIBIBYTES), sendfile=False):
+    """
+    Measure the throughput of sockets on this host, by sending data over
+    several streams at once for a period, then waiting for every stream to
+    receive everything sent. Data is sent with `sendall()` from, and
+    received with `recv_into()` into, buffers allocated beforehand, or sent
+    with `sendfile()` from a temporary file, so the benchmark measures the
+    kernel's networking stack rather than Python's memory allocator.
+
+    :param streams: The number of connections. Defaults to 1.
+    :param duration: How long to send for. Defaults to 10 seconds.
+    :param family: 'tcp' to use the loopback interface, or 'unix' to use Unix
+                   domain sockets. Defaults to 'tcp'.
+    :param mode: 'thread' to send and receive on each stream in its own
+                 thread, or 'asyncio' to use a single event loop. Defaults to
+                 'thread'.
+    :param buffer_size: The amount to send with each call, and the size of
+                        each receive buffer. Defaults to 128 KiB.
+    :param sendfile: Whether to send with `sendfile()`. Defaults to False.
+    :return: The `NetBenchmarkResult`.
+    :raises ValueError: If an argument is invalid, or not supported on this
+                        platform.
+    :raises EnvironmentError: If the sockets cannot be created.
+    """
+    if streams < 1:
+        raise ValueError('There must be at least 1 stream')
+    if family not in FAMILIES:
+        raise ValueError('Unrecognised family: {0}'.format(family))
+    if mode not in MODES:
+        raise ValueError('Unrecognised mode: {0}'.format(mode))
+    if family == 'unix' and not hasattr(socket, 'AF_UNIX'):
+        raise ValueError('Unix sockets are not supported on this platform')
+    if sendfile and not hasattr(socket.socket, 'sendfile'):
+        raise ValueError('sendfile() needs Python 3.5 or later')
+    size = buffer_size.bits // Information.BYTES
+    if not size:
+        raise ValueError('The buffer size must be at least 1 byte')
+    if mode == 'asyncio':
+        # imported here as it is not available in Python 2
+        from nibble import netbench_asyncio as implementation
+    else:
+        implementation = None
+
+    directory = tempfile.mkdtemp(prefix='nibble-netbench')
+    files = [None] * streams
+    try:
+        payload = memoryview(os.urandom(size))
+        if sendfile:
+            path = os.path.join(directory, 'payload')
+            with open(path, 'wb') as file_:
+                file_.write(payload)
+            # each sender needs its own file position
+            files = [open(path, 'rb') for _ in range(streams)]
+        senders, receivers = _connect(family, directory, streams)
+        try:
+            transfer = _transfer if implementation is None \
+                else implementation.transfer
+            start, results = transfer(senders, receivers, payload, files,
+                                      duration.nanoseconds, size)
+        finally:
+            for sock in senders + receivers:
+                sock.close()
+    finally:
+        for file_ in files:
+            if file_ is not None:
+                file_.close()
+        shutil.rmtree(directory)
+
+    durations = [Duration(nanoseconds=max(1, finish - start))
+                 for _, finish in results]
+    return NetBenchmarkResult(
+        family, mode, sendfile,
+        [Information(received, Information.BYTES) for received, _ in results],
+        durations, max(durations))
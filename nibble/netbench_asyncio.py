@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+The asyncio mode of `nibble.netbench`, kept separate as it needs Python 3.7.
+"""
+from __future__ import unicode_literals
+import asyncio
+import socket
+
+from nibble.netbench import _nanoseconds
+
+
+async def _send(loop, sock, payload, file_, deadline):
+    """
+    Send data on a socket until a deadline, then shut down its sending side.
+
+    :param loop: The event loop.
+    :param sock: The connected, non-blocking socket.
+    :param payload: The data to send with each call, as a memoryview.
+    :param file_: A file of the same length as the payload to send with
+                  `sendfile()` instead, or None.
+    :param deadline: The time to stop, in `_nanoseconds()`.
+    """
+    clock = _nanoseconds
+    if file_ is None:
+        while clock() < deadline:
+            await loop.sock_sendall(sock, payload)
+    else:
+        length = len(payload)
+        while clock() < deadline:
+            await loop.sock_sendfile(sock, file_, 0, length)
+    sock.shutdown(socket.SHUT_WR)
+
+
+async def _receive(loop, sock, buffer_size):
+    """
+    Receive data on a socket until the other end shuts down.
+
+    :param loop: The event loop.
+    :param sock: The connected, non-blocking socket.
+    :param buffer_size: The size of the buffer to receive into, in bytes.
+    :return: A tuple of the number of bytes received, and the time the last
+             was received, in `_nanoseconds()`.
+    """
+    buffer_ = bytearray(buffer_size)
+    received = 0
+    while True:
+        length = await loop.sock_recv_into(sock, buffer_)
+        if not length:
+            return received, _nanoseconds()
+        received += length
+
+
+async def _gather(loop, senders, receivers, payload, files, deadline,
+                  buffer_size):
+    """
+    Send and receive on every stream at once.
+
+    :return: A list of (bytes received, finish time) tuples for each stream.
+    """
+    sending = [_send(loop, sock, payload, file_, deadline)
+               for sock, file_ in zip(senders, files)]
+    receiving = [_receive(loop, sock, buffer_size) for sock in receivers]
+    results = await asyncio.gather(*(sending + receiving))
+    return results[len(sending):]
+
+
+def transfer(senders, receivers, payload, files, duration, buffer_size):
+    """
+    Run a benchmark with every stream on a single event loop.
+
+    :param senders: The sending sockets.
+    :param receivers: The receiving sockets, in the same order.
+    :param payload: The data to send with each call, as a memoryview.
+    :param files: A file for each sender to send with `sendfile()`, or None
+                  for each.
+    :param duration: How long to send for, in nanoseconds.
+    :param buffer_size: The size of each receive buffer, in bytes.
+    :return: A tuple of the start time in `_nanoseconds()`, and a list of
+             (bytes received, finish time) tuples for each stream.
+    """
+    for sock in senders + receivers:
+        sock.setblocking(False)
+    loop = asyncio.new_event_loop()
+    try:
+        start = _nanoseconds()
+        results = loop.run_until_complete(_gather(
+            loop, senders, receivers, payload, files, start + duration,
+            buffer_size))
+    finally:
+        loop.close()
+    return start, results
@@ -0,0 +1,529 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, division
+import array
+import heapq
+import mmap
+import socket
+import struct
+
+from nibble import Information, Duration, Speed
+
+# link-layer header types, from https://www.tcpdump.org/linktypes.html
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV4 = 228
+LINKTYPE_IPV6 = 229
+LINKTYPE_LINUX_SLL2 = 276
+
+_ETHERTYPE_IPV4 = 0x0800
+_ETHERTYPE_IPV6 = 0x86DD
+_ETHERTYPE_VLANS = frozenset([0x8100, 0x88A8, 0x9100])
+
+# address families used by the null link type, which vary by platform
+_NULL_IPV6 = frozenset([10, 24, 28, 30])
+
+# protocols whose headers start with a source and destination port
+_PORT_PROTOCOLS = frozenset([6, 17, 33, 132])
+
+_PROTOCOL_NAMES = {1: 'icmp', 6: 'tcp', 17: 'udp', 58: 'icmp6', 132: 'sctp'}
+
+_CLASSIC_MAGIC_MICROSECONDS = 0xA1B2C3D4
+_CLASSIC_MAGIC_NANOSECONDS = 0xA1B23C4D
+_PCAPNG_SECTION_HEADER = 0x0A0D0D0A
+_PCAPNG_BYTE_ORDER_MAGIC = 0x1A2B3C4D
+_PCAPNG_INTERFACE_DESCRIPTION = 1
+_PCAPNG_ENHANCED_PACKET = 6
+_PCAPNG_OPTION_END = 0
+_PCAPNG_OPTION_TSRESOL = 9
+
+_UINT16 = struct.Struct(str('!H'))
+_UINT32 = struct.Struct(str('!I'))
+# the version and header length, fragment offset, protocol, and source and
+# destination addresses of an IPv4 header
+_IPV4 = struct.Struct(str('!B5xHxB2x8s'))
+# the next header, and source and destination addresses of an IPv6 header
+_IPV6 = struct.Struct(str('!6xBx32s'))
+
+# the amount of a capture to read before asking the kernel to drop it from
+# this process's memory, so reading huge captures uses little memory
+_RELEASE_SIZE = 64 * 1024 * 1024
+
+
+def _structs(prefix):
+    """
+    Compile the structures of a capture in one byte order.
+
+    :param prefix: '<' for little-endian, '>' for big-endian.
+    :return: A dict of name to `struct.Struct`.
+    """
+    return {name: struct.Struct(str(prefix + format_))
+            for name, format_ in [('classic_header', 'IHHiIII'),
+                                  ('classic_record', 'IIII'),
+                                  ('block', 'II'),
+                                  ('interface', 'HxxI'),
+                                  ('option', 'HH'),
+                                  ('enhanced_packet', 'IIIII'),
+                                  ('uint32', 'I')]}
+
+
+_LITTLE_ENDIAN = _structs('<')
+_BIG_ENDIAN = _structs('>')
+
+
+def packets(buffer_):
+    """
+    Iterate over the packets in a classic pcap or a pcapng capture. The
+    packets' data is not copied: each is identified by its offset into the
+    buffer. Blocks other than interface descriptions and enhanced packets are
+    skipped, as is anything after a truncated packet at the end.
+
+    :param buffer_: The capture, e.g. an `mmap.mmap` of a file.
+    :return: A generator of (timestamp in nanoseconds since the epoch, link
+             type, offset, captured length, original length) tuples.
+    :raises ValueError: If the buffer is not a capture, or a pcapng capture
+                        is corrupt.
+    """
+    if len(buffer_) >= 24:
+        for structs in (_LITTLE_ENDIAN, _BIG_ENDIAN):
+            magic, = structs['uint32'].unpack_from(buffer_, 0)
+            if magic in (_CLASSIC_MAGIC_MICROSECONDS,
+                         _CLASSIC_MAGIC_NANOSECONDS):
+                return _classic_packets(buffer_, structs)
+        # the same in either byte order
+        if magic == _PCAPNG_SECTION_HEADER:
+            return _pcapng_packets(buffer_)
+    raise ValueError('Not a pcap or pcapng capture')
+
+
+def _classic_packets(buffer_, structs):
+    """
+    Iterate over the packets in a classic pcap capture.
+
+    :param buffer_: The capture.
+    :param structs: The structures in the capture's byte order.
+    :return: A generator as for `packets()`.
+    """
+    magic, _, _, _, _, _, linktype = structs['classic_header'].unpack_from(
+        buffer_, 0)
+    multiplier = 1000 if magic == _CLASSIC_MAGIC_MICROSECONDS else 1
+    unpack_record = structs['classic_record'].unpack_from
+    end = len(buffer_)
+    offset = 24
+    while offset + 16 <= end:
+        seconds, fraction, captured, length = unpack_record(buffer_, offset)
+        offset += 16
+        if offset + captured > end:
+            return
+        yield (seconds * 1000000000 + fraction * multiplier, linktype, offset,
+               captured, length)
+        offset += captured
+
+
+def _interface(buffer_, structs, offset, end):
+    """
+    Read a pcapng interface description block.
+
+    :param buffer_: The capture.
+    :param structs: The structures in the section's byte order.
+    :param offset: The offset of the block's body.
+    :param end: The offset of the block's trailing length.
+    :return: A tuple of the interface's link type, and the number of its
+             timestamp units per second.
+    """
+    linktype, _ = structs['interface'].unpack_from(buffer_, offset)
+    resolution = 1000000
+    unpack_option = structs['option'].unpack_from
+    offset += 8
+    while offset + 4 <= end:
+        code, length = unpack_option(buffer_, offset)
+        if code == _PCAPNG_OPTION_END:
+            break
+        if code == _PCAPNG_OPTION_TSRESOL and length >= 1:
+            value = bytearray(buffer_[offset + 4:offset + 5])[0]
+            # the high bit selects a power of two rather than ten
+            resolution = 2 ** (value & 0x7F) if value & 0x80 \
+                else 10 ** value
+        # values are padded to 32 bits
+        offset += 4 + (length + 3) // 4 * 4
+    return linktype, resolution
+
+
+def _pcapng_packets(buffer_):
+    """
+    Iterate over the packets in a pcapng capture, which may contain several
+    sections, each with its own byte order and interfaces.
+
+    :param buffer_: The capture.
+    :return: A generator as for `packets()`.
+    :raises ValueError: If a section header or packet is corrupt.
+    """
+    structs = _LITTLE_ENDIAN
+    interfaces = []
+    end = len(buffer_)
+    offset = 0
+    while offset + 12 <= end:
+        type_, = structs['uint32'].unpack_from(buffer_, offset)
+        if type_ == _PCAPNG_SECTION_HEADER:
+            for structs in (_LITTLE_ENDIAN, _BIG_ENDIAN):
+                magic, = structs['uint32'].unpack_from(buffer_, offset + 8)
+                if magic == _PCAPNG_BYTE_ORDER_MAGIC:
+                    break
+            else:
+                raise ValueError('Corrupt pcapng section header at offset '
+                                 '{0}'.format(offset))
+            interfaces = []
+
+        type_, total = structs['block'].unpack_from(buffer_, offset)
+        if total < 12 or offset + total > end:
+            return
+        if type_ == _PCAPNG_ENHANCED_PACKET:
+            interface, high, low, captured, length = \
+                structs['enhanced_packet'].unpack_from(buffer_, offset + 8)
+            if interface >= len(interfaces):
+                raise ValueError('Packet at offset {0} has no interface '
+                                 'description'.format(offset))
+            linktype, resolution = interfaces[interface]
+            yield (((high << 32) | low) * 1000000000 // resolution, linktype,
+                   offset + 28, min(captured, total - 32), length)
+        elif type_ == _PCAPNG_INTERFACE_DESCRIPTION:
+            interfaces.append(_interface(buffer_, structs, offset + 8,
+                                         offset + total - 4))
+        offset += total
+
+
+def _network_offset(buffer_, linktype, offset, captured):
+    """
+    Find where the IP header of a packet starts.
+
+    :param buffer_: The capture.
+    :param linktype: The link type of the packet.
+    :param offset: The offset of the packet.
+    :param captured: The captured length of the packet.
+    :return: A tuple of the IP version, 4 or 6, and the offset of its header,
+             or (None, None) if this is not an IP packet.
+    """
+    end = offset + captured
+    if linktype == LINKTYPE_ETHERNET:
+        type_offset = offset + 12
+        while type_offset + 2 <= end:
+            ethertype, = _UINT16.unpack_from(buffer_, type_offset)
+            if ethertype not in _ETHERTYPE_VLANS:
+                break
+            type_offset += 4
+        else:
+            return None, None
+        start = type_offset + 2
+    elif linktype == LINKTYPE_LINUX_SLL:
+        if captured < 16:
+            return None, None
+        ethertype, = _UINT16.unpack_from(buffer_, offset + 14)
+        start = offset + 16
+    elif linktype == LINKTYPE_LINUX_SLL2:
+        if captured < 20:
+            return None, None
+        ethertype, = _UINT16.unpack_from(buffer_, offset)
+        start = offset + 20
+    elif linktype == LINKTYPE_NULL:
+        if captured < 4:
+            return None, None
+        # in the byte order of the capturing host, which only matters for
+        # the first byte
+        family = bytearray(buffer_[offset:offset + 4])
+        family = family[0] or family[3]
+        ethertype = _ETHERTYPE_IPV6 if family in _NULL_IPV6 \
+            else _ETHERTYPE_IPV4 if family == 2 else None
+        start = offset + 4
+    elif linktype in (LINKTYPE_RAW, LINKTYPE_IPV4, LINKTYPE_IPV6):
+        if not captured:
+            return None, None
+        version = bytearray(buffer_[offset:offset + 1])[0] >> 4
+        ethertype = _ETHERTYPE_IPV4 if version == 4 \
+            else _ETHERTYPE_IPV6 if version == 6 else None
+        start = offset
+    else:
+        return None, None
+
+    if ethertype == _ETHERTYPE_IPV4 and start + 20 <= end:
+        return 4, start
+    if ethertype == _ETHERTYPE_IPV6 and start + 40 <= end:
+        return 6, start
+    return None, None
+
+
+class Flow(object):
+    """
+    The traffic of one 5-tuple: a protocol, and a source and destination
+    address and port. Traffic in each direction is a separate flow.
+    """
+
+    __slots__ = ('protocol', '_addresses', '_ports', 'first', 'buckets',
+                 'bytes', 'packets')
+
+    def __init__(self, protocol, addresses, ports, first):
+        """
+        Initialise a new flow with no traffic.
+
+        :param protocol: The IP protocol number, e.g. 6 for TCP.
+        :param addresses: The source then destination addresses, packed.
+        :param ports: The source then destination ports, packed into an int,
+                      or 0 for protocols without ports.
+        :param first: The index of the flow's first bucket in its timeline.
+        """
+        self.protocol = protocol
+        self._addresses = addresses
+        self._ports = ports
+        self.first = first
+        # bytes in each bucket from the first; doubles hold integers exactly
+        # up to 2^53, and unlike 'Q' are available in Python 2
+        self.buckets = array.array(str('d'))
+        self.bytes = 0
+        self.packets = 0
+
+    @property
+    def protocol_name(self):
+        """
+        The name of the flow's protocol.
+
+        :return: The name, e.g. 'tcp', or the number if it has no name.
+        """
+        return _PROTOCOL_NAMES.get(self.protocol, str(self.protocol))
+
+    def _address(self, index):
+        """
+        Format one of the flow's addresses.
+
+        :param index: 0 for the source, 1 for the destination.
+        :return: The address as a string.
+        """
+        length = len(self._addresses) // 2
+        packed = self._addresses[index * length:(index + 1) * length]
+        return socket.inet_ntop(socket.AF_INET if length == 4
+                                else socket.AF_INET6, packed)
+
+    @property
+    def source(self):
+        """
+        :return: The source address as a string.
+        """
+        return self._address(0)
+
+    @property
+    def destination(self):
+        """
+        :return: The destination address as a string.
+        """
+        return self._address(1)
+
+    @property
+    def source_port(self):
+        """
+        :return: The source port, or 0 for protocols without ports.
+        """
+        return self._ports >> 16
+
+    @property
+    def destination_port(self):
+        """
+        :return: The destination port, or 0 for protocols without ports.
+        """
+        return self._ports & 0xFFFF
+
+    @property
+    def information(self):
+        """
+        :return: The total traffic of the flow, as an `Information`.
+        """
+        return Information(self.bytes, Information.BYTES)
+
+    def __str__(self):
+        if self.protocol not in _PORT_PROTOCOLS:
+            return '{0} {1} > {2}'.format(self.protocol_name, self.source,
+                                          self.destination)
+        template = '{0} [{1}]:{2} > [{3}]:{4}' if len(self._addresses) > 8 \
+            else '{0} {1}:{2} > {3}:{4}'
+        return template.format(self.protocol_name, self.source,
+                               self.source_port, self.destination,
+                               self.destination_port)
+
+    def __repr__(self):
+        return '<Flow({0})>'.format(self)
+
+
+class FlowTimeline(object):
+    """
+    Aggregates the bytes sent by each flow in captures into fixed time
+    buckets, to show how each flow's throughput varied. Captures are memory
+    mapped and parsed in place, and the kernel is periodically told to drop
+    the pages already read, so memory use depends on the number of flows and
+    buckets rather than the size of the captures. Packets are counted at their
+    original length on the wire, including the link-layer header, even if the
+    capture truncated them.
+    """
+
+    def __init__(self, interval=Duration.SECOND):
+        """
+        Initialise an empty timeline.
+
+        :param interval: The length of each bucket. Defaults to 1 second.
+        :raises ValueError: If the interval is zero.
+        """
+        if interval.nanoseconds <= 0:
+            raise ValueError('The interval must be positive')
+        self.interval = interval
+        self._interval = interval.nanoseconds
+        # nanoseconds since the epoch of the start of the first bucket
+        self.start = None
+        self.buckets = 0
+        # (protocol, addresses, ports): `Flow`
+        self.flows = {}
+        self.packets = 0
+        # packets that were not IP
+        self.skipped = 0
+
+    def read(self, path):
+        """
+        Add the packets in a capture file to the timeline.
+
+        :param path: The path of a classic pcap or pcapng file.
+        :raises ValueError: If the file is not a capture.
+        :raises EnvironmentError: If the file cannot be read.
+        """
+        with open(path, 'rb') as file_:
+            try:
+                mapping = mmap.mmap(file_.fileno(), 0,
+                                    access=mmap.ACCESS_READ)
+            except ValueError:
+                # empty files cannot be mapped
+                raise ValueError('{0} is not a pcap or pcapng capture'.format(
+                    path))
+        try:
+            if hasattr(mapping, 'madvise'):
+                mapping.madvise(mmap.MADV_SEQUENTIAL)
+            self._add_packets(mapping)
+        finally:
+            mapping.close()
+
+    def _add_packets(self, buffer_):
+        """
+        Add the packets in a capture to the timeline.
+
+        :param buffer_: The capture.
+        """
+        unpack_ipv4 = _IPV4.unpack_from
+        unpack_ipv6 = _IPV6.unpack_from
+        unpack_ports = _UINT32.unpack_from
+        release = getattr(buffer_, 'madvise', None)
+        released = 0
+        for timestamp, linktype, offset, captured, length in packets(buffer_):
+            if release is not None and offset - released > _RELEASE_SIZE:
+                boundary = offset // mmap.PAGESIZE * mmap.PAGESIZE
+                release(mmap.MADV_DONTNEED, released, boundary - released)
+                released = boundary
+
+            version, start = _network_offset(buffer_, linktype, offset,
+                                              captured)
+            if version is None:
+                self.skipped += 1
+                continue
+            if version == 4:
+                first, fragment, protocol, addresses = unpack_ipv4(buffer_,
+                                                                   start)
+                # only the first fragment has the ports
+                transport = None if fragment & 0x1FFF \
+                    else start + (first & 0xF) * 4
+            else:
+                protocol, addresses = unpack_ipv6(buffer_, start)
+                transport = start + 40
+            ports = 0
+            if protocol in _PORT_PROTOCOLS and transport is not None and \
+                    transport + 4 <= offset + captured:
+                ports, = unpack_ports(buffer_, transport)
+
+            self._add(protocol, addresses, ports, timestamp, length)
+
+    def _add(self, protocol, addresses, ports, timestamp, length):
+        """
+        Add one packet to its flow.
+
+        :param protocol: The IP protocol number.
+        :param addresses: The packed source and destination addresses.
+        :param ports: The packed source and destination ports.
+        :param timestamp: When the packet was captured, in nanoseconds since
+                          the epoch.
+        :param length: The packet's original length in bytes.
+        """
+        interval = self._interval
+        if self.start is None:
+            self.start = timestamp // interval * interval
+        elif timestamp < self.start:
+            # captures from several interfaces may be slightly out of order
+            shift = -((timestamp - self.start) // interval)
+            self.start -= shift * interval
+            self.buckets += shift
+            for flow in self.flows.values():
+                flow.first += shift
+        bucket = (timestamp - self.start) // interval
+        if bucket >= self.buckets:
+            self.buckets = bucket + 1
+
+        self.packets += 1
+        key = (protocol, addresses, ports)
+        flow = self.flows.get(key)
+        if flow is None:
+            flow = self.flows[key] = Flow(protocol, addresses, ports, bucket)
+        elif bucket < flow.first:
+            flow.buckets[0:0] = array.array(str('d'),
+                                            [0.]) * (flow.first - bucket)
+            flow.first = bucket
+        index = bucket - flow.first
+        if index >= len(flow.buckets):
+            flow.buckets.extend([0.] * (index + 1 - len(flow.buckets)))
+        flow.buckets[index] += length
+        flow.bytes += length
+        flow.packets += 1
+
+    def top(self, count=10):
+        """
+        Find the flows that sent the most.
+
+        :param count: The number of flows to return.
+        :return: A list of up to `count` `Flow` objects, most bytes first.
+        """
+        return heapq.nlargest(count, self.flows.values(),
+                              key=lambda flow: flow.bytes)
+
+    def speeds(self, flow):
+        """
+        Get the throughput of a flow in every bucket of the timeline.
+
+        :param flow: The `Flow`.
+        :return: A list of `Speed`, one per bucket, zero outside the flow's
+                 lifetime.
+        """
+        speeds = [Speed.ZERO] * self.buckets
+        for index, bytes_ in enumerate(flow.buckets):
+            speeds[flow.first + index] = Speed(
+                Information(int(bytes_), Information.BYTES), self.interval)
+        return speeds
+
+    def average(self, flow):
+        """
+        Find the average throughput of a flow over the buckets from its first
+        packet to its last.
+
+        :param flow: The `Flow`.
+        :return: The throughput as a `Speed`.
+        """
+        return Speed(flow.information, self.interval * len(flow.buckets))
+
+    def peak(self, flow):
+        """
+        Find the highest throughput of a flow in any one bucket.
+
+        :param flow: The `Flow`.
+        :return: The throughput as a `Speed`.
+        """
+        return Speed(Information(int(max(flow.buckets)), Information.BYTES),
+                     self.interval)
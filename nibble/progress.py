@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, division
+import math
+import threading
+import time
+
+from nibble import Information, Duration, Speed
+from nibble.estimators import EwmaRate
+
+# `time.monotonic()` is unaffected by changes to the system clock, but is not
+# available in Python 2
+_clock = getattr(time, 'monotonic', time.time)
+
+
+def _eta(remaining, speed):
+    """
+    Find how long transferring the rest of something will take.
+
+    :param remaining: The number of bytes left.
+    :param speed: The current `Speed`.
+    :return: The `Duration`, which is zero if nothing is left, or None if
+             nothing is being transferred.
+    """
+    if not remaining:
+        return Duration.ZERO
+    if not speed.information:
+        return None
+    bits = remaining * Information.BYTES
+    return Duration(seconds=bits / speed.information.bits *
+                    speed.duration.total_seconds())
+
+
+class Task(object):
+    """
+    One transfer tracked by a `ProgressTracker`. A task's own counts are only
+    changed by its `update()` and `finish()`, so need no lock as long as one
+    thread or coroutine transfers it at a time.
+    """
+
+    __slots__ = ('name', 'size_bytes', 'transferred_bytes', 'finished',
+                 '_rate', '_tracker', '_counted', '_counted_at')
+
+    def __init__(self, tracker, size_bytes, name=None, start=None):
+        """
+        Initialise a new task. Use `ProgressTracker.add()` rather than
+        calling this directly.
+
+        :param tracker: The `ProgressTracker` the task belongs to.
+        :param size_bytes: The number of bytes the task is expected to
+                           transfer.
+        :param name: An optional name for the task, e.g. a path.
+        :param start: The clock time the task started. Defaults to now.
+        """
+        self.name = name
+        self.size_bytes = size_bytes
+        self.transferred_bytes = 0
+        self.finished = False
+        self._rate = EwmaRate(tracker.half_life, start)
+        self._tracker = tracker
+        # the rate last counted into the tracker's total, in bytes per second,
+        # and the clock time it was estimated at
+        self._counted = 0.
+        self._counted_at = self._rate.start
+
+    @property
+    def size(self):
+        """
+        :return: The amount the task is expected to transfer, as an
+                 `Information`.
+        """
+        return Information(self.size_bytes, Information.BYTES)
+
+    @property
+    def transferred(self):
+        """
+        :return: The amount transferred so far, as an `Information`.
+        """
+        return Information(self.transferred_bytes, Information.BYTES)
+
+    @property
+    def remaining_bytes(self):
+        """
+        :return: The number of bytes left to transfer, which is zero once the
+                 task has finished or transferred more than expected.
+        """
+        if self.finished:
+            return 0
+        return max(0, self.size_bytes - self.transferred_bytes)
+
+    def update(self, bytes_, now=None):
+        """
+        Count progress.
+
+        :param bytes_: The number of bytes transferred since the last update.
+        :param now: The clock time they were transferred. Defaults to now.
+        :raises ValueError: If the task has finished.
+        """
+        if self.finished:
+            raise ValueError('The task has finished')
+        now = _clock() if now is None else now
+        remaining = self.remaining_bytes
+        self.transferred_bytes += bytes_
+        self._rate.update(bytes_, now)
+        self._tracker._update(self, bytes_, min(bytes_, remaining),
+                              self._rate.bytes_per_second(now), now)
+
+    def finish(self):
+        """
+        Mark the task as finished, e.g. once it has transferred less than
+        expected, or failed. Finishing twice does nothing.
+        """
+        if self.finished:
+            return
+        remaining = self.remaining_bytes
+        self.finished = True
+        self._tracker._finish(self, remaining)
+
+    def speed(self, now=None):
+        """
+        Estimate the task's current rate.
+
+        :param now: The current clock time. Defaults to now.
+        :return: The smoothed `Speed`.
+        """
+        return self._rate.speed(now)
+
+    def eta(self, now=None):
+        """
+        Estimate how long the task will take to finish at its current rate.
+
+        :param now: The current clock time. Defaults to now.
+        :return: The `Duration`, or None if the task is not progressing.
+        """
+        return _eta(self.remaining_bytes, self.speed(now))
+
+    def __repr__(self):
+        return '<Task({0}, {1}, {2})>'.format(repr(self.name),
+                                              repr(self.transferred),
+                                              repr(self.size))
+
+
+class ProgressTracker(object):
+    """
+    Tracks the overall progress of many transfers happening at once, e.g. in
+    a pool of threads or in coroutines, and estimates when they will all be
+    done.
+
+    Totals are kept up to date incrementally, so updating a task and reading
+    the overall speed or ETA take constant time however many tasks there
+    are, and each holds a lock only for a few operations. The overall rate
+    is the sum of the unfinished tasks' smoothed rates, each measured from
+    when its task started: each update replaces the task's last rate in a
+    running total, which decays between updates as the rates in it do. A
+    task that stalls within a few half-lives of starting is overestimated
+    slightly until its next update, as its own estimate also decays as the
+    time it is measured over grows. The overall ETA divides the bytes the
+    unfinished tasks have left by the overall rate, so assumes each carries
+    on at its current rate. Bandwidth freed by tasks finishing is only
+    counted once other tasks speed up to use it.
+    """
+
+    def __init__(self, half_life=Duration(seconds=5), start=None):
+        """
+        Initialise a new tracker, with no tasks.
+
+        :param half_life: The half-life of the smoothing applied to rates.
+                          See `EwmaRate`. Defaults to 5 seconds.
+        :param start: The clock time tracking started. Defaults to the time
+                      of the first update.
+        """
+        self.half_life = half_life
+        self._lock = threading.Lock()
+        # the rate of decay per second
+        self._decay = math.log(2) / half_life.total_seconds()
+        # the sum of the tasks' rates in bytes per second, as of `_last`
+        self._rate = 0.
+        self._last = start
+        self.tasks = 0
+        self.active = 0
+        self.size_bytes = 0
+        self.transferred_bytes = 0
+        self.remaining_bytes = 0
+
+    def add(self, size, name=None, now=None):
+        """
+        Start tracking a task.
+
+        :param size: The amount the task is expected to transfer, as an
+                     `Information`.
+        :param name: An optional name for the task, e.g. a path.
+        :param now: The clock time the task started. Defaults to now.
+        :return: The `Task`, to report progress through.
+        """
+        size_bytes = size.bits // Information.BYTES
+        task = Task(self, size_bytes, name, now)
+        with self._lock:
+            self.tasks += 1
+            self.active += 1
+            self.size_bytes += size_bytes
+            self.remaining_bytes += size_bytes
+        return task
+
+    def _uncount(self, task):
+        """
+        Take a task's last counted rate out of the total. Call with the lock
+        held.
+
+        :param task: The `Task`.
+        """
+        self._rate -= task._counted * \
+            math.exp(-self._decay * (self._last - task._counted_at))
+        task._counted = 0.
+
+    def _update(self, task, bytes_, expected, rate, now):
+        """
+        Count progress made by a task.
+
+        :param task: The `Task`.
+        :param bytes_: The number of bytes transferred.
+        :param expected: How many of those the task was expected to transfer,
+                         i.e. not beyond its size.
+        :param rate: The task's rate after the update, in bytes per second.
+        :param now: The clock time of the update.
+        """
+        with self._lock:
+            self.transferred_bytes += bytes_
+            self.remaining_bytes -= expected
+            if self._last is None or now > self._last:
+                if self._last is not None:
+                    self._rate *= math.exp(-self._decay * (now - self._last))
+                self._last = now
+            # all the rates in the total decay alike, so the task's last rate
+            # can be replaced without visiting any other task
+            self._uncount(task)
+            self._rate += rate * math.exp(-self._decay * (self._last - now))
+            task._counted = rate
+            task._counted_at = now
+
+    def _finish(self, task, remaining):
+        """
+        Stop counting a task as active.
+
+        :param task: The `Task`.
+        :param remaining: The number of bytes the task had left.
+        """
+        with self._lock:
+            self.active -= 1
+            self.remaining_bytes -= remaining
+            if self._last is not None:
+                self._uncount(task)
+
+    @property
+    def size(self):
+        """
+        :return: The amount all tasks are expected to transfer, as an
+                 `Information`.
+        """
+        return Information(self.size_bytes, Information.BYTES)
+
+    @property
+    def transferred(self):
+        """
+        :return: The amount transferred by all tasks, as an `Information`.
+        """
+        return Information(self.transferred_bytes, Information.BYTES)
+
+    def speed(self, now=None):
+        """
+        Estimate the current overall rate.
+
+        :param now: The current clock time. Defaults to now.
+        :return: The sum of the unfinished tasks' smoothed `Speed`.
+        """
+        with self._lock:
+            rate = self._rate
+            last = self._last
+        if last is None:
+            return Speed.ZERO
+        now = _clock() if now is None else now
+        rate *= math.exp(-self._decay * max(0, now - last))
+        # rounding may leave a little less than nothing once tasks finish
+        return Speed(Information(max(0., rate) * Information.BYTES))
+
+    def eta(self, now=None):
+        """
+        Estimate how long the unfinished tasks will take to finish.
+
+        :param now: The current clock time. Defaults to now.
+        :return: The `Duration`, which is zero if every task has finished, or
+                 None if nothing is progressing.
+        """
+        return _eta(self.remaining_bytes, self.speed(now))
+
+    def __repr__(self):
+        return '<ProgressTracker({0}/{1} tasks, {2})>'.format(
+            self.active, self.tasks, repr(self.transferred))
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, division
+import errno
+import io
+import os
+import time
+
+from nibble import Information, Duration, Speed
+
+# `time.monotonic()` is unaffected by changes to the system clock, but is not
+# available in Python 2
+_clock = getattr(time, 'monotonic', time.time)
+
+# errors meaning a zero-copy system call cannot be used between two particular
+# file descriptors, e.g. `splice()` when neither is a pipe
+_UNSUPPORTED = frozenset([errno.EINVAL, errno.ENOSYS, errno.ESPIPE,
+                          getattr(errno, 'ENOTSUP', errno.EINVAL),
+                          getattr(errno, 'EOPNOTSUPP', errno.EINVAL)])
+
+
+def _splice(in_fd, out_fd, count):
+    """
+    Move data between file descriptors within the kernel, where one is a pipe.
+
+    :param in_fd: The file descriptor to read from.
+    :param out_fd: The file descriptor to write to.
+    :param count: The maximum number of bytes to move.
+    :return: The number of bytes moved; 0 at the end of the input.
+    """
+    return os.splice(in_fd, out_fd, count)
+
+
+def _sendfile(in_fd, out_fd, count):
+    """
+    Copy data from a file to another file descriptor within the kernel.
+
+    :param in_fd: The file descriptor to read from. Must support `mmap()`.
+    :param out_fd: The file descriptor to write to.
+    :param count: The maximum number of bytes to copy.
+    :return: The number of bytes copied; 0 at the end of the input.
+    """
+    return os.sendfile(out_fd, in_fd, None, count)
+
+
+def _zero_copy_calls():
+    """
+    Find the zero-copy system calls available on this platform.
+
+    :return: A list of functions taking an input file descriptor, output file
+             descriptor and maximum number of bytes, in order of preference.
+    """
+    calls = []
+    if hasattr(os, 'splice'):
+        calls.append(_splice)
+    if hasattr(os, 'sendfile'):
+        calls.append(_sendfile)
+    return calls
+
+
+def _zero_copy(call, in_fd, out_fd, count):
+    """
+    Copy everything from one file descriptor to another with a zero-copy
+    system call.
+
+    :param call: The system call. See `_zero_copy_calls()`.
+    :param in_fd: The file descriptor to read from.
+    :param out_fd: The file descriptor to write to.
+    :param count: The maximum number of bytes to copy per call.
+    :return: A generator of the number of bytes copied by each call.
+    :raises OSError: With an errno in `_UNSUPPORTED` before anything is
+                     yielded, if the call cannot copy between these
+                     descriptors. Such errors happen on the first call, before
+                     any data is consumed.
+    """
+    while True:
+        copied = call(in_fd, out_fd, count)
+        if not copied:
+            return
+        yield copied
+
+
+def _buffered_copy(in_fd, out_fd, buffer_size):
+    """
+    Copy everything from one file descriptor to another through a single
+    reusable buffer, for when no zero-copy system call can be used.
+
+    :param in_fd: The file descriptor to read from.
+    :param out_fd: The file descriptor to write to.
+    :param buffer_size: The size of the buffer in bytes.
+    :return: A generator of the number of bytes copied by each read.
+    """
+    buffer_ = bytearray(buffer_size)
+    view = memoryview(buffer_)
+    source = io.FileIO(in_fd, 'r', closefd=False)
+    write = os.write
+    while True:
+        read = source.readinto(buffer_)
+        if not read:
+            return
+        written = write(out_fd, view[:read])
+        while written < read:
+            # a pipe or socket may accept less than everything
+            written += write(out_fd, view[written:read])
+        yield read
+
+
+def copy(in_fd, out_fd, buffer_size=1024 * 1024, zero_copy=True):
+    """
+    Copy everything from one file descriptor to another as cheaply as
+    possible. `splice()` is used if either descriptor is a pipe, then
+    `sendfile()` if the input is a regular file, falling back on reading into
+    a single buffer that is reused for every read.
+
+    :param in_fd: The file descriptor to read from.
+    :param out_fd: The file descriptor to write to.
+    :param buffer_size: The maximum number of bytes to copy at a time, in
+                        bytes. Defaults to 1 MiB.
+    :param zero_copy: Whether to try zero-copy system calls. Defaults to true.
+    :return: A generator of the number of bytes copied at each step. The copy
+             progresses as it is consumed.
+    """
+    if zero_copy:
+        for call in _zero_copy_calls():
+            copies = _zero_copy(call, in_fd, out_fd, buffer_size)
+            try:
+                first = next(copies, 0)
+            except OSError as e:
+                if e.errno not in _UNSUPPORTED:
+                    raise
+                continue
+
+            if not first:
+                return
+            yield first
+            for copied in copies:
+                yield copied
+            return
+
+    for copied in _buffered_copy(in_fd, out_fd, buffer_size):
+        yield copied
+
+
+class Meter(object):
+    """
+    Tracks the progress of a transfer, and the current and average speed.
+    """
+
+    def __init__(self, size=None, start=None):
+        """
+        Initialise a new meter.
+
+        :param size: The total amount expected, as an `Information`, if known.
+        :param start: The clock time the transfer started. Defaults to now.
+        """
+        self.size = size
+        self.transferred_bytes = 0
+        self.start = _clock() if start is None else start
+        self._last_time = self.start
+        self._last_bytes = 0
+
+    @property
+    def transferred(self):
+        """
+        The amount transferred so far.
+
+        :return: The amount as an `Information`.
+        """
+        return Information(self.transferred_bytes, Information.BYTES)
+
+    def sample(self, now=None):
+        """
+        Measure the transfer's progress since the last sample.
+
+        :param now: The current clock time. Defaults to now.
+        :return: A tuple of the current `Speed`, since the last sample, the
+                 average `Speed` since the start, and the `Duration` the
+                 transfer is expected to take to complete, or None if the
+                 size is unknown or nothing has been transferred.
+        """
+        now = _clock() if now is None else now
+        current = self._speed(self.transferred_bytes - self._last_bytes,
+                              now - self._last_time)
+        average = self._speed(self.transferred_bytes, now - self.start)
+        self._last_time = now
+        self._last_bytes = self.transferred_bytes
+
+        eta = None
+        if self.size is not None and average:
+            remaining = max(0, self.size.bits -
+                            self.transferred_bytes * Information.BYTES)
+            eta = Duration(seconds=remaining / average.information.bits)
+        return current, average, eta
+
+    @staticmethod
+    def _speed(count, seconds):
+        """
+        Find the speed of a transfer.
+
+        :param count: The number of bytes transferred.
+        :param seconds: The time taken.
+        :return: The `Speed`, which is zero if no time has passed.
+        """
+        if seconds <= 0:
+            return Speed.ZERO
+        return Speed(Information(count * Information.BYTES / seconds))
+
+
+def pipe(in_fd, out_fd, report, interval=Duration.SECOND, size=None,
+         buffer_size=1024 * 1024, zero_copy=True):
+    """
+    Copy everything from one file descriptor to another, periodically
+    reporting progress. The clock is read once per copy, which is negligible
+    with large buffers.
+
+    :param in_fd: The file descriptor to read from.
+    :param out_fd: The file descriptor to write to.
+    :param report: A function taking the `Meter` and the result of
+                   `Meter.sample()`, called every interval and once at the
+                   end.
+    :param interval: How often to report progress, as a `Duration`.
+    :param size: The total amount expected, as an `Information`, if known.
+    :param buffer_size: See `copy()`.
+    :param zero_copy: See `copy()`.
+    :return: The `Meter` of the transfer.
+    """
+    meter = Meter(size)
+    seconds = interval.total_seconds()
+    deadline = meter.start + seconds
+    clock = _clock
+    for copied in copy(in_fd, out_fd, buffer_size, zero_copy):
+        meter.transferred_bytes += copied
+        now = clock()
+        if now >= deadline:
+            report(meter, meter.sample(now))
+            deadline = now + seconds
+    report(meter, meter.sample())
+    return meter
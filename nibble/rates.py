@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Conversion of samples of cumulative byte counters, e.g. from SNMP, `/proc` or
+exported metrics, into the rate in each interval between samples, and rollups
+of those rates into coarser windows.
+
+Whole series are processed at once by chaining `map()` over the built-in
+arithmetic operators, which does the work of each step in C rather than
+running Python bytecode per sample; only counters that have gone backwards
+are handled individually.
+"""
+from __future__ import unicode_literals, division
+import bisect
+import itertools
+import operator
+
+from six.moves import map
+
+from nibble import Information, Speed
+from nibble.util import counter_delta
+
+
+class RateSeries(object):
+    """
+    The amount transferred in each interval between samples of a counter.
+    """
+
+    def __init__(self, timestamps, intervals, deltas):
+        """
+        Initialise a new series. Use `counter_rates()` to create one from
+        counter samples.
+
+        :param timestamps: A sequence of the time each interval ended, in
+                           seconds, in increasing order.
+        :param intervals: A list of the length of each interval in seconds.
+        :param deltas: A list of the number of bytes transferred in each
+                       interval.
+        """
+        self.timestamps = timestamps
+        self.intervals = intervals
+        self.deltas = deltas
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @property
+    def rates(self):
+        """
+        The rate in each interval.
+
+        :return: A list of bytes per second.
+        """
+        return list(map(operator.truediv, self.deltas, self.intervals))
+
+    def speeds(self):
+        """
+        Get the rate in each interval as a `Speed`. Creating an object per
+        interval is much slower than the rest of the conversion, so use
+        `rates` for long series.
+
+        :return: A generator of `Speed`.
+        """
+        for bytes_per_second in self.rates:
+            yield Speed(Information(bytes_per_second, Information.BYTES))
+
+    def rollup(self, window):
+        """
+        Combine intervals into fixed windows, e.g. of 5 minutes, aligned to
+        multiples of the window since time zero. Each interval is counted in
+        the window it ended in, and windows with no intervals are omitted.
+
+        :param window: The length of each window, as a `Duration`.
+        :return: A list of (window start time in seconds, `Information`
+                 transferred, mean `Speed`, peak `Speed`) tuples, in time
+                 order. The mean is weighted by the length of each interval;
+                 the peak is the fastest interval.
+        :raises ValueError: If the window is not positive.
+        """
+        if window.nanoseconds <= 0:
+            raise ValueError('The window must be positive')
+
+        seconds = window.total_seconds()
+        timestamps = self.timestamps
+        deltas = self.deltas
+        intervals = self.intervals
+        rates = self.rates
+        windows = []
+        start = 0
+        while start < len(timestamps):
+            # intervals ending exactly on a boundary belong to the window
+            # before it
+            index = -int(-timestamps[start] // seconds) - 1
+            end = bisect.bisect_right(timestamps, (index + 1) * seconds,
+                                      start)
+            sent = sum(deltas[start:end])
+            windows.append((
+                index * seconds,
+                Information(sent, Information.BYTES),
+                Speed(Information(sent / sum(intervals[start:end]),
+                                  Information.BYTES)),
+                Speed(Information(max(rates[start:end]),
+                                  Information.BYTES))))
+            start = end
+        return windows
+
+    def __repr__(self):
+        return '<RateSeries({0} intervals)>'.format(len(self))
+
+
+def counter_rates(timestamps, counters, width=64):
+    """
+    Convert samples of a cumulative byte counter into the amount transferred
+    in each interval between them. Samples may be unevenly spaced.
+
+    :param timestamps: A sequence of the time of each sample in seconds, e.g.
+                       an `array.array` of floats, in strictly increasing
+                       order.
+    :param counters: A sequence of the counter's value at each sample, in
+                     bytes.
+    :param width: The number of bits in the counter, e.g. 32 for an SNMP
+                  Counter32. A counter that goes backwards is assumed to have
+                  wrapped around or been reset; see `util.counter_delta()`.
+                  Defaults to 64.
+    :return: The `RateSeries`, with one interval fewer than there are
+             samples.
+    :raises ValueError: If the sequences differ in length, or the timestamps
+                        are not strictly increasing.
+    """
+    if len(timestamps) != len(counters):
+        raise ValueError('There must be one counter per timestamp')
+    if len(timestamps) < 2:
+        return RateSeries(timestamps[:0], [], [])
+
+    # lists rather than arrays, as arrays box every element each time it is
+    # read
+    ends = timestamps[1:]
+    intervals = list(map(operator.sub, ends, timestamps[:-1]))
+    if min(intervals) <= 0:
+        raise ValueError('Timestamps must be strictly increasing')
+
+    previous = counters[:-1]
+    current = counters[1:]
+    deltas = list(map(operator.sub, current, previous))
+    if min(deltas) < 0:
+        for index in itertools.compress(
+                itertools.count(),
+                map(operator.lt, deltas, itertools.repeat(0))):
+            deltas[index] = counter_delta(previous[index], current[index],
+                                          width)
+    return RateSeries(ends, intervals, deltas)
@@ -0,0 +1,456 @@
+# -*- coding: utf-8 -*-
+"""
+A fixed-size, memory-mapped store of throughput history, in the style of
+RRDtool: the amount transferred in each interval is appended to a ring of
+records at the finest resolution, and consolidated into rings of coarser
+resolutions, so weeks or years of history take a constant amount of disk.
+
+A store has a single writer, and any number of readers in other processes.
+Records are written before the ring's count of records is updated to include
+them, and each record holds its own position in the ring, so a reader never
+sees a record a writer died part way through, and detects records that were
+overwritten while it was copying them. The file is in the byte order of the
+host, as it is not meant to be moved between hosts.
+"""
+from __future__ import unicode_literals, division
+import array
+import bisect
+import mmap
+import os
+import struct
+import time
+
+from nibble import Information, Duration, Speed
+
+try:
+    import fcntl
+except ImportError:
+    # not available on Windows
+    fcntl = None
+
+# magic, version, number of rings
+_HEADER = struct.Struct(str('=8sII'))
+_MAGIC = b'NIBBLERS'
+_VERSION = 1
+# resolution in nanoseconds, capacity, offset of the first record, head, i.e.
+# the number of records ever written
+_RING = struct.Struct(str('=qqqq'))
+_HEAD = struct.Struct(str('=q'))
+_HEAD_OFFSET = 24
+# position, start time in nanoseconds since the epoch, bits transferred, most
+# bits transferred in one interval of the finest ring
+_RECORD = struct.Struct(str('=qqqq'))
+_FIELDS = 4
+
+try:
+    array.array(str('q'))
+    _INT64 = str('q')
+except ValueError:
+    # Python 2 has no 'q', but 'l' is 64 bits on the platforms with `mmap`
+    # and `fcntl` that matter
+    _INT64 = str('l')
+
+# the number of times a reader copies a ring that keeps changing under it
+# before giving up
+_RETRIES = 10
+
+DEFAULT_RINGS = ((Duration.SECOND, 7 * 24 * 60 * 60),
+                 (Duration(minutes=1), 31 * 24 * 60),
+                 (Duration(hours=1), 366 * 24))
+
+
+class Series(object):
+    """
+    Records read from a ring, in time order, held in arrays without creating
+    an object per record.
+    """
+
+    def __init__(self, resolution, sample_resolution, timestamps, bits,
+                 peaks):
+        """
+        Initialise a new series.
+
+        :param resolution: The interval each record covers, as a `Duration`.
+        :param sample_resolution: The interval of the finest ring, which peaks
+                                  are measured over.
+        :param timestamps: An `array.array` of the start of each interval, in
+                           nanoseconds since the epoch.
+        :param bits: An `array.array` of the bits transferred in each
+                     interval.
+        :param peaks: An `array.array` of the most bits transferred in any
+                      interval of the finest ring within each interval.
+        """
+        self.resolution = resolution
+        self.sample_resolution = sample_resolution
+        self.timestamps = timestamps
+        self.bits = bits
+        self.peaks = peaks
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def information(self):
+        """
+        :return: A generator of the `Information` transferred in each
+                 interval.
+        """
+        for bits in self.bits:
+            yield Information(bits)
+
+    def speeds(self):
+        """
+        :return: A generator of the mean `Speed` in each interval.
+        """
+        for bits in self.bits:
+            yield Speed(Information(bits), self.resolution)
+
+    def peak_speeds(self):
+        """
+        :return: A generator of the fastest `Speed` over an interval of the
+                 finest ring within each interval.
+        """
+        for bits in self.peaks:
+            yield Speed(Information(bits), self.sample_resolution)
+
+    def __repr__(self):
+        return '<Series({0}, {1} records)>'.format(repr(self.resolution),
+                                                   len(self))
+
+
+def _now():
+    """
+    :return: The current time in nanoseconds since the epoch.
+    """
+    return int(time.time() * 1000000000)
+
+
+class RingStore(object):
+    """
+    A memory-mapped ring-buffer store of the amount transferred per interval.
+    """
+
+    def __init__(self, path, writable=False):
+        """
+        Open an existing store. Use `create()` to make a new one.
+
+        :param path: The path of the store.
+        :param writable: Whether to open the store to append to. Only one
+                         process may do so at a time. Defaults to false.
+        :raises ValueError: If the file is not a store.
+        :raises EnvironmentError: If the file cannot be opened, or another
+                                  process has it open to append to.
+        """
+        self.path = path
+        self.writable = writable
+        self._fd = os.open(path, os.O_RDWR if writable else os.O_RDONLY)
+        try:
+            if writable and fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            self._map = mmap.mmap(
+                self._fd, 0,
+                access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        except Exception:
+            os.close(self._fd)
+            raise
+
+        try:
+            self._read_header()
+        except Exception:
+            self.close()
+            raise
+        # the window being consolidated into each ring after the first, as
+        # lists of [start, bits, peak], or None
+        self._pending = [None] * len(self._rings)
+        self._last = None
+        if writable:
+            self._recover()
+
+    def _read_header(self):
+        """
+        Read the layout of the rings from the start of the file.
+
+        :raises ValueError: If the header is invalid.
+        """
+        if len(self._map) < _HEADER.size:
+            raise ValueError('{0} is not a ring store'.format(self.path))
+        magic, version, rings = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC:
+            raise ValueError('{0} is not a ring store'.format(self.path))
+        if version != _VERSION:
+            raise ValueError('Unsupported ring store version {0}'.format(
+                version))
+        self._rings = []
+        for ring in range(rings):
+            resolution, capacity, offset, _ = _RING.unpack_from(
+                self._map, _HEADER.size + ring * _RING.size)
+            if offset + capacity * _RECORD.size > len(self._map):
+                raise ValueError('{0} is truncated'.format(self.path))
+            self._rings.append((resolution, capacity, offset))
+
+    @classmethod
+    def create(cls, path, rings=DEFAULT_RINGS):
+        """
+        Create a new store, and open it to append to. The file is sized for
+        every ring up front, but is sparse until written.
+
+        :param path: The path of the store, which must not exist.
+        :param rings: A sequence of (resolution `Duration`, number of records)
+                      tuples, from finest to coarsest. Each resolution must be
+                      a multiple of the finest, and each ring must hold at
+                      least 2 records. Reads of a full ring omit its oldest
+                      record, which the writer may be overwriting. Defaults
+                      to a week of seconds, a month of minutes and a year of
+                      hours.
+        :return: The `RingStore`.
+        :raises ValueError: If the rings are invalid.
+        :raises EnvironmentError: If the file exists, or cannot be created.
+        """
+        if not rings:
+            raise ValueError('There must be at least 1 ring')
+        finest = rings[0][0].nanoseconds
+        for resolution, capacity in rings:
+            if resolution.nanoseconds <= 0 or \
+                    resolution.nanoseconds % finest:
+                raise ValueError('Resolutions must be multiples of the first')
+            if capacity < 2:
+                raise ValueError('Rings must hold at least 2 records')
+
+        header = bytearray(_HEADER.pack(_MAGIC, _VERSION, len(rings)))
+        offset = _HEADER.size + len(rings) * _RING.size
+        for resolution, capacity in rings:
+            header += _RING.pack(resolution.nanoseconds, capacity, offset, 0)
+            offset += capacity * _RECORD.size
+
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o644)
+        try:
+            os.ftruncate(fd, offset)
+            os.write(fd, bytes(header))
+        finally:
+            os.close(fd)
+        return cls(path, writable=True)
+
+    def close(self):
+        """
+        Unmap and close the store.
+        """
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def resolutions(self):
+        """
+        :return: A list of the resolution of each ring, as a `Duration`, from
+                 finest to coarsest.
+        """
+        return [Duration(nanoseconds=resolution)
+                for resolution, _, _ in self._rings]
+
+    def _head(self, ring):
+        """
+        :param ring: The index of the ring.
+        :return: The number of records ever written to the ring.
+        """
+        return _HEAD.unpack_from(
+            self._map, _HEADER.size + ring * _RING.size + _HEAD_OFFSET)[0]
+
+    def _write(self, ring, timestamp, bits, peak):
+        """
+        Append a record to a ring. The record is written before the head is
+        advanced past it, so readers never see it half written.
+
+        :param ring: The index of the ring.
+        :param timestamp: The start of the interval, in nanoseconds.
+        :param bits: The number of bits transferred in the interval.
+        :param peak: The most bits transferred in one finest interval.
+        """
+        _, capacity, offset = self._rings[ring]
+        head = self._head(ring)
+        _RECORD.pack_into(self._map, offset + head % capacity * _RECORD.size,
+                          head, timestamp, bits, peak)
+        _HEAD.pack_into(self._map,
+                        _HEADER.size + ring * _RING.size + _HEAD_OFFSET,
+                        head + 1)
+
+    def _snapshot(self, ring):
+        """
+        Copy the records of a ring, discarding any overwritten by the writer
+        during the copy. The oldest record of a full ring is always
+        discarded, as the writer may be overwriting it.
+
+        :param ring: The index of the ring.
+        :return: An `array.array` of the fields of each record in turn, oldest
+                 first.
+        :raises ValueError: If the ring keeps changing during the copy.
+        """
+        _, capacity, offset = self._rings[ring]
+        for _ in range(_RETRIES):
+            head = self._head(ring)
+            first = max(0, head - capacity)
+            start = first % capacity
+            end = start + head - first
+            # one or two copies of contiguous memory, depending on whether the
+            # records wrap around the end of the ring
+            data = self._map[offset + start * _RECORD.size:
+                             offset + min(end, capacity) * _RECORD.size]
+            if end > capacity:
+                data += self._map[offset:
+                                  offset + (end - capacity) * _RECORD.size]
+            records = array.array(_INT64, data)
+
+            # the writer may be part way through overwriting the record at its
+            # new position minus the capacity, and has overwritten those
+            # before it, whose positions may have been copied before the rest
+            overwritten = self._head(ring) - capacity - first + 1
+            if overwritten > 0:
+                del records[:overwritten * _FIELDS]
+                first += overwritten
+            if records[::_FIELDS] == array.array(_INT64, range(first, head)):
+                return records
+        raise ValueError('Ring {0} changed during every read'.format(ring))
+
+    def _recover(self):
+        """
+        Resume consolidating the windows that were in progress when the store
+        was last closed, or its writer died, from the finest ring.
+        """
+        records = self._snapshot(0)
+        if not records:
+            return
+        self._last = records[-_FIELDS + 1]
+        timestamps = records[1::_FIELDS]
+        for ring in range(1, len(self._rings)):
+            resolution = self._rings[ring][0]
+            consolidated = self._snapshot(ring)
+            # records in windows after the last one consolidated
+            after = consolidated[-_FIELDS + 1] + resolution if consolidated \
+                else timestamps[0] - timestamps[0] % resolution
+            index = bisect.bisect_left(timestamps, after)
+            for position in range(index * _FIELDS, len(records), _FIELDS):
+                self._consolidate(ring, records[position + 1],
+                                  records[position + 2])
+
+    def _consolidate(self, ring, timestamp, bits):
+        """
+        Count a finest interval in the window of a coarser ring it falls in,
+        appending the previous window to the ring if this one is later.
+
+        :param ring: The index of the coarser ring.
+        :param timestamp: The start of the finest interval.
+        :param bits: The number of bits transferred in the finest interval.
+        """
+        resolution = self._rings[ring][0]
+        window = timestamp - timestamp % resolution
+        pending = self._pending[ring]
+        if pending is None or window != pending[0]:
+            if pending is not None:
+                self._write(ring, *pending)
+            pending = self._pending[ring] = [window, 0, 0]
+        pending[1] += bits
+        pending[2] = max(pending[2], bits)
+
+    def append(self, bits, timestamp=None):
+        """
+        Record the number of bits transferred in an interval of the finest
+        resolution. The interval is also counted in the window of every
+        coarser ring it falls in; each window is appended to its ring once an
+        interval after it is appended.
+
+        :param bits: The number of bits transferred.
+        :param timestamp: The start of the interval, in nanoseconds since the
+                          epoch. Defaults to now.
+        :raises ValueError: If the store is not writable, or the interval
+                            does not start after the previous one.
+        """
+        if not self.writable:
+            raise ValueError('The store is not open to append to')
+        timestamp = _now() if timestamp is None else timestamp
+        if self._last is not None and timestamp <= self._last:
+            raise ValueError('Intervals must be appended in time order')
+        self._write(0, timestamp, bits, bits)
+        self._last = timestamp
+        for ring in range(1, len(self._rings)):
+            self._consolidate(ring, timestamp, bits)
+
+    def read(self, ring=0, start=None, end=None):
+        """
+        Read the records of one ring.
+
+        :param ring: The index of the ring; see `resolutions`. Defaults to the
+                     finest.
+        :param start: The earliest start time to include, in nanoseconds
+                      since the epoch. Defaults to the oldest record.
+        :param end: The start time to read up to, but not including. Defaults
+                    to after the newest record.
+        :return: The `Series`.
+        :raises ValueError: If the ring does not exist.
+        """
+        if not 0 <= ring < len(self._rings):
+            raise ValueError('There is no ring {0}'.format(ring))
+        records = self._snapshot(ring)
+        timestamps = records[1::_FIELDS]
+        first = 0 if start is None else bisect.bisect_left(timestamps, start)
+        last = len(timestamps) if end is None \
+            else bisect.bisect_left(timestamps, end)
+        resolutions = self.resolutions
+        return Series(
+            resolutions[ring], resolutions[0], timestamps[first:last],
+            records[first * _FIELDS + 2:last * _FIELDS:_FIELDS],
+            records[first * _FIELDS + 3:last * _FIELDS:_FIELDS])
+
+    def _oldest(self, ring):
+        """
+        Find the start time of the oldest record in a ring, without copying
+        the ring.
+
+        :param ring: The index of the ring.
+        :return: The start time in nanoseconds, or None if the ring is empty.
+        """
+        _, capacity, offset = self._rings[ring]
+        for _ in range(_RETRIES):
+            head = self._head(ring)
+            # as for `_snapshot()`, the oldest record of a full ring may be
+            # being overwritten
+            first = max(0, head - capacity + 1)
+            if first >= head:
+                return None
+            position, timestamp, _, _ = _RECORD.unpack_from(
+                self._map, offset + first % capacity * _RECORD.size)
+            if position == first and self._head(ring) - capacity < first:
+                return timestamp
+        raise ValueError('Ring {0} changed during every read'.format(ring))
+
+    def query(self, start, end=None):
+        """
+        Read the records of a period of time from the finest ring that still
+        holds its start, or the one holding the oldest records if none do.
+
+        :param start: The start of the period, in nanoseconds since the epoch.
+        :param end: The end of the period. Defaults to the newest record.
+        :return: The `Series`.
+        """
+        best = 0
+        oldest = None
+        for ring in range(len(self._rings)):
+            timestamp = self._oldest(ring)
+            if timestamp is None:
+                continue
+            if timestamp <= start:
+                best = ring
+                break
+            if oldest is None or timestamp < oldest:
+                best = ring
+                oldest = timestamp
+        return self.read(best, start, end)
+
+    def __repr__(self):
+        return '<RingStore({0})>'.format(repr(self.path))
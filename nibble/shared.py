@@ -0,0 +1,423 @@
+# -*- coding: utf-8 -*-
+"""
+Counters and histograms shared between processes, e.g. the workers of a
+pre-fork server, kept separate as `multiprocessing.shared_memory` needs
+Python 3.8.
+
+Each worker has its own slot in a shared memory segment, which only it writes
+to, so recording needs neither a lock nor a message to another process; any
+process can sum the slots at any time. Slots are aligned to cache lines, so
+workers on different cores do not slow each other down by writing to the same
+line. Values are 64-bit integers written and read whole, which the platforms
+with shared memory do atomically.
+"""
+from __future__ import unicode_literals, division
+import json
+import math
+import os
+import struct
+import threading
+import time
+
+from multiprocessing import resource_tracker, shared_memory
+
+from nibble import Duration
+from nibble.counter import Snapshot
+
+# `time.monotonic()` is unaffected by changes to the system clock
+_clock = time.monotonic
+
+# magic, version, workers, counters, histograms, buckets per histogram,
+# relative accuracy, index of the lowest bucket, length of the names
+_HEADER = struct.Struct(str('=8sIIIIIdqI'))
+_MAGIC = b'NIBBLESH'
+_VERSION = 1
+# the header and names are padded to this size, and each slot to a multiple
+# of the cache line size
+_HEADER_SIZE = 4096
+_CACHE_LINE = 64
+_WORD = 8
+
+# serialises the swapping of `resource_tracker.register` by `attach()`
+_register_lock = threading.Lock()
+
+
+class WorkerSlot(object):
+    """
+    The part of a `SharedStats` segment one worker records into.
+    """
+
+    def __init__(self, stats, view):
+        """
+        Initialise a new slot. Use `SharedStats.slot()` rather than calling
+        this directly.
+
+        :param stats: The `SharedStats` the slot is part of.
+        :param view: A `memoryview` of the slot's 64-bit integers.
+        """
+        self._stats = stats
+        self._view = view
+
+    @property
+    def pid(self):
+        """
+        :return: The ID of the process that last claimed the slot, or 0 if it
+                 has never been claimed.
+        """
+        return self._view[0]
+
+    def add(self, name, count):
+        """
+        Add to a counter.
+
+        :param name: The name of the counter.
+        :param count: The amount to add, e.g. a number of bytes.
+        :raises KeyError: If there is no such counter.
+        """
+        self._view[self._stats._counters[name]] += count
+
+    def record(self, name, duration):
+        """
+        Count a duration in a histogram.
+
+        :param name: The name of the histogram.
+        :param duration: The `Duration`.
+        :raises KeyError: If there is no such histogram.
+        """
+        self._view[self._stats._histograms[name] +
+                   self._stats._bucket(duration.nanoseconds)] += 1
+
+    def reset(self):
+        """
+        Zero every counter and histogram in the slot, e.g. when a worker's
+        counts should not carry over to its replacement. Totals drop by the
+        slot's counts, so rates spanning a reset are wrong.
+        """
+        for index in range(1, len(self._view)):
+            self._view[index] = 0
+
+
+class SharedStats(object):
+    """
+    Counters and histograms of durations in a shared memory segment, with a
+    slot for each of a fixed number of workers.
+
+    The process that creates a segment owns it: closing it there unlinks the
+    segment, as does the resource tracker of `multiprocessing` if the owner
+    dies without closing it. Workers forked from the owner inherit its
+    mapping; other processes `attach()` by name without registering the
+    segment with their own resource tracker, which would otherwise unlink it
+    when they exit. A restarted worker claims the slot of the worker it
+    replaces, and carries on from its counts, so totals and rates are
+    unaffected by restarts.
+    """
+
+    def __init__(self, workers, counters=('bytes',), histograms=(),
+                 relative_accuracy=0.02,
+                 lowest=Duration(microseconds=1),
+                 highest=Duration(minutes=10), name=None):
+        """
+        Create and own a new segment.
+
+        :param workers: The number of worker slots.
+        :param counters: The names of the counters. Defaults to a single
+                         counter, 'bytes'.
+        :param histograms: The names of the histograms of durations. Defaults
+                           to none.
+        :param relative_accuracy: The relative accuracy of histogram
+                                  percentiles between the lowest and highest
+                                  durations. Defaults to 2%.
+        :param lowest: Durations up to this are counted in the lowest bucket
+                       of each histogram. Defaults to 1 microsecond.
+        :param highest: Durations from this are counted in the highest bucket.
+                        Defaults to 10 minutes.
+        :param name: The name of the segment. Defaults to a random name.
+        :raises ValueError: If an argument is invalid.
+        :raises EnvironmentError: If the segment cannot be created.
+        """
+        if workers < 1:
+            raise ValueError('There must be at least 1 worker')
+        names = list(counters) + list(histograms)
+        if len(set(names)) != len(names):
+            raise ValueError('Counter and histogram names must be unique')
+        if not 0 < relative_accuracy < 1:
+            raise ValueError('The relative accuracy must be between 0 and 1')
+        if not 0 < lowest.nanoseconds < highest.nanoseconds:
+            raise ValueError('The lowest duration must be positive, and less '
+                             'than the highest')
+
+        multiplier = self._multiplier(relative_accuracy)
+        lowest_index = int(math.ceil(math.log(lowest.nanoseconds) *
+                                     multiplier))
+        buckets = int(math.ceil(math.log(highest.nanoseconds) *
+                                multiplier)) - lowest_index + 1
+        encoded = json.dumps([list(counters), list(histograms)]).encode(
+            'utf-8')
+        header = _HEADER.pack(_MAGIC, _VERSION, workers, len(counters),
+                              len(histograms), buckets, relative_accuracy,
+                              lowest_index, len(encoded)) + encoded
+        if len(header) > _HEADER_SIZE:
+            raise ValueError('Too many counters and histograms')
+
+        words = 1 + len(counters) + len(histograms) * buckets
+        slot_size = -(-words * _WORD // _CACHE_LINE) * _CACHE_LINE
+        self._memory = shared_memory.SharedMemory(
+            name, create=True, size=_HEADER_SIZE + workers * slot_size)
+        self._memory.buf[:len(header)] = header
+        self._owner = os.getpid()
+        self._layout()
+
+    @classmethod
+    def attach(cls, name):
+        """
+        Attach to a segment created by another process.
+
+        Before Python 3.13, this briefly replaces
+        `multiprocessing.resource_tracker.register` for the whole process, so
+        while it does, anything else registering a resource with the tracker
+        from another thread, such as a new `SharedMemory` or semaphore, goes
+        unregistered. Concurrent attaches wait for each other, but other
+        registrations do not, so attach before starting threads that create
+        such resources, or on Python 3.13 or later.
+
+        :param name: The name of the segment.
+        :return: The `SharedStats`, which does not own the segment.
+        :raises ValueError: If the segment is not a `SharedStats`.
+        :raises EnvironmentError: If the segment does not exist.
+        """
+        stats = cls.__new__(cls)
+        try:
+            stats._memory = shared_memory.SharedMemory(name, track=False)
+        except TypeError:
+            # before Python 3.13, attaching always registers the segment to
+            # be unlinked when this process exits. Unregistering afterwards
+            # would also forget the owner's registration when the tracker is
+            # shared with it, as it is with forked workers, so registration
+            # is skipped instead
+            with _register_lock:
+                register = resource_tracker.register
+                resource_tracker.register = lambda name, rtype: None
+                try:
+                    stats._memory = shared_memory.SharedMemory(name)
+                finally:
+                    resource_tracker.register = register
+        stats._owner = None
+        try:
+            stats._layout()
+        except ValueError:
+            stats._memory.close()
+            raise
+        return stats
+
+    @staticmethod
+    def _multiplier(relative_accuracy):
+        """
+        :param relative_accuracy: The relative accuracy of histograms.
+        :return: The factor to multiply the logarithm of a duration by to find
+                 its bucket index.
+        """
+        return 1 / math.log((1 + relative_accuracy) / (1 - relative_accuracy))
+
+    def _layout(self):
+        """
+        Read the layout of the segment from its header.
+
+        :raises ValueError: If the segment is not a `SharedStats`.
+        """
+        buffer_ = self._memory.buf
+        if len(buffer_) < _HEADER_SIZE or \
+                bytes(buffer_[:len(_MAGIC)]) != _MAGIC:
+            raise ValueError('{0} is not a shared stats segment'.format(
+                self.name))
+        _, version, self.workers, counters, histograms, self._buckets, \
+            self.relative_accuracy, self._lowest_index, length = \
+            _HEADER.unpack_from(buffer_)
+        if version != _VERSION:
+            raise ValueError('Unsupported shared stats version {0}'.format(
+                version))
+        counter_names, histogram_names = json.loads(bytes(
+            buffer_[_HEADER.size:_HEADER.size + length]).decode('utf-8'))
+
+        # name: index of the counter, or first bucket, within a slot
+        self._counters = {name: 1 + index
+                          for index, name in enumerate(counter_names)}
+        self._histograms = {
+            name: 1 + counters + index * self._buckets
+            for index, name in enumerate(histogram_names)}
+        self._gamma = (1 + self.relative_accuracy) / \
+            (1 - self.relative_accuracy)
+        self._log_multiplier = self._multiplier(self.relative_accuracy)
+
+        words = 1 + counters + histograms * self._buckets
+        self._slot_words = -(-words * _WORD // _CACHE_LINE) * \
+            _CACHE_LINE // _WORD
+        self._view = buffer_.cast('q')
+        self._words = words
+        # views of claimed slots, which must be released before closing
+        self._slots = []
+
+    @property
+    def name(self):
+        """
+        :return: The name of the segment, to `attach()` to it by.
+        """
+        return self._memory.name
+
+    @property
+    def owner(self):
+        """
+        :return: Whether this process created the segment, so unlinks it when
+                 closing it. Workers forked from the owner do not own it.
+        """
+        return self._owner == os.getpid()
+
+    def _bucket(self, nanoseconds):
+        """
+        Find the histogram bucket a duration is counted in.
+
+        :param nanoseconds: The duration in nanoseconds.
+        :return: The index of the bucket within the histogram.
+        """
+        if nanoseconds <= 0:
+            return 0
+        index = int(math.ceil(math.log(nanoseconds) *
+                              self._log_multiplier)) - self._lowest_index
+        return min(max(index, 0), self._buckets - 1)
+
+    def _slot_start(self, worker):
+        """
+        :param worker: The index of the worker.
+        :return: The index of the first word of the worker's slot.
+        """
+        return _HEADER_SIZE // _WORD + worker * self._slot_words
+
+    def slot(self, worker):
+        """
+        Claim a worker's slot to record into. Call this in the worker
+        process; a replacement for a worker that has exited claims the same
+        slot.
+
+        :param worker: The index of the worker, from 0.
+        :return: The `WorkerSlot`.
+        :raises ValueError: If there is no such worker.
+        """
+        if not 0 <= worker < self.workers:
+            raise ValueError('There is no worker {0}'.format(worker))
+        start = self._slot_start(worker)
+        view = self._view[start:start + self._words]
+        view[0] = os.getpid()
+        self._slots.append(view)
+        return WorkerSlot(self, view)
+
+    def _sum(self, index):
+        """
+        :param index: The index of a word within a slot.
+        :return: The sum of the word across every slot.
+        """
+        view = self._view
+        return sum(view[self._slot_start(worker) + index]
+                   for worker in range(self.workers))
+
+    def total(self, name):
+        """
+        Sum a counter across every worker.
+
+        :param name: The name of the counter.
+        :return: The total.
+        :raises KeyError: If there is no such counter.
+        """
+        return self._sum(self._counters[name])
+
+    def snapshot(self, name, now=None):
+        """
+        Take the total of a byte counter, e.g. to find the rate with
+        `Snapshot.speed_since()`.
+
+        :param name: The name of the counter.
+        :param now: The current clock time. Defaults to now.
+        :return: The `nibble.counter.Snapshot`.
+        :raises KeyError: If there is no such counter.
+        """
+        now = _clock() if now is None else now
+        return Snapshot(self.total(name), now)
+
+    def histogram(self, name):
+        """
+        Sum a histogram across every worker.
+
+        :param name: The name of the histogram.
+        :return: A list of the count in each bucket.
+        :raises KeyError: If there is no such histogram.
+        """
+        first = self._histograms[name]
+        counts = [0] * self._buckets
+        for worker in range(self.workers):
+            start = self._slot_start(worker) + first
+            counts = list(map(int.__add__, counts,
+                              self._view[start:start + self._buckets]))
+        return counts
+
+    def percentile(self, name, percentile):
+        """
+        Find the duration at or below which a percentage of the durations in
+        a histogram are.
+
+        :param name: The name of the histogram.
+        :param percentile: The percentage, between 0 and 100.
+        :return: The `Duration`, accurate to within the relative accuracy if
+                 between the lowest and highest durations, or None if the
+                 histogram is empty.
+        :raises KeyError: If there is no such histogram.
+        :raises ValueError: If the percentage is not between 0 and 100.
+        """
+        if not 0 <= percentile <= 100:
+            raise ValueError('Percentiles must be between 0 and 100')
+        counts = self.histogram(name)
+        total = sum(counts)
+        if not total:
+            return None
+
+        rank = max(1, int(math.ceil(total * percentile / 100)))
+        seen = 0
+        for bucket, count in enumerate(counts):
+            seen += count
+            if seen >= rank:
+                break
+        # the midpoint of the bucket in relative terms
+        # noinspection PyUnboundLocalVariable
+        nanoseconds = 2 * self._gamma ** (bucket + self._lowest_index) / \
+            (self._gamma + 1)
+        return Duration(nanoseconds=int(round(nanoseconds)))
+
+    def pids(self):
+        """
+        :return: A list of the ID of the process that last claimed each slot,
+                 or 0 for slots never claimed.
+        """
+        return [self._view[self._slot_start(worker)]
+                for worker in range(self.workers)]
+
+    def close(self):
+        """
+        Detach from the segment, and unlink it if this process owns it.
+        Workers' slots must not be used afterwards.
+        """
+        if self._memory is None:
+            return
+        for view in self._slots:
+            view.release()
+        self._view.release()
+        self._memory.close()
+        if self.owner:
+            self._memory.unlink()
+        self._memory = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __repr__(self):
+        return '<SharedStats({0}, {1} workers)>'.format(repr(self.name),
+                                                        self.workers)
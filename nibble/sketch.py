@@ -0,0 +1,348 @@
+# -*- coding: utf-8 -*-
+"""
+Quantile sketches, which summarise millions of samples in a few kilobytes,
+find any percentile to within a fixed relative error, and can be merged, e.g.
+to combine the samples of every host in a fleet. The algorithm is DDSketch,
+from "DDSketch: A Fast and Fully-Mergeable Quantile Sketch with
+Relative-Error Guarantees" (Masson, Rim and Lee, 2019).
+"""
+from __future__ import unicode_literals, division
+import collections
+import itertools
+import math
+import operator
+import struct
+
+from six.moves import map
+
+from nibble import Information, Duration, Speed
+
+# version, relative accuracy, maximum buckets, zero count, minimum, maximum
+_HEADER = struct.Struct('<BdIQdd')
+_VERSION = 1
+
+
+def _write_varint(buffer_, value):
+    """
+    Append an unsigned integer to a buffer in as few bytes as possible, seven
+    bits at a time, least significant first.
+
+    :param buffer_: The `bytearray` to append to.
+    :param value: The integer, which must not be negative.
+    """
+    while value > 0x7f:
+        buffer_.append(value & 0x7f | 0x80)
+        value >>= 7
+    buffer_.append(value)
+
+
+def _read_varint(buffer_, offset):
+    """
+    Read an unsigned integer written by `_write_varint()`.
+
+    :param buffer_: The `bytearray` to read from.
+    :param offset: The index of the integer's first byte.
+    :return: A tuple of the integer and the index of the byte after it.
+    :raises ValueError: If the buffer ends part way through the integer.
+    """
+    value = 0
+    shift = 0
+    while True:
+        if offset >= len(buffer_):
+            raise ValueError('Truncated sketch')
+        byte = buffer_[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+class QuantileSketch(object):
+    """
+    Summarises the distribution of non-negative numbers. Each is counted in a
+    bucket whose bounds grow geometrically, so the midpoint of any bucket is
+    within the relative accuracy of every number in it, and the number of
+    buckets grows only with the logarithm of the range of the numbers. If
+    they span more buckets than the maximum, the lowest are combined, so
+    the accuracy of upper percentiles is kept at the expense of the lowest.
+    Zero is counted separately, as its logarithm is undefined.
+    """
+
+    def __init__(self, relative_accuracy=0.01, max_buckets=2048):
+        """
+        Initialise a new, empty sketch.
+
+        :param relative_accuracy: The maximum error of percentiles, relative
+                                  to their true value. Defaults to 1%.
+        :param max_buckets: The maximum number of buckets to keep. Defaults to
+                            2048, enough for a 1% accurate sketch of numbers
+                            spanning 17 orders of magnitude.
+        :raises ValueError: If the accuracy is not between 0 and 1, or there
+                            are fewer than 1 buckets.
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError('The relative accuracy must be between 0 and 1')
+        if max_buckets < 1:
+            raise ValueError('There must be at least 1 bucket')
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        # the ratio of the upper bound of each bucket to its lower bound
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._multiplier = 1 / math.log(self._gamma)
+        # index: count of numbers in (gamma ** (index - 1), gamma ** index]
+        self._counts = collections.Counter()
+        self.zero_count = 0
+        self.count = 0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        """
+        Count a number.
+
+        :param value: The number. Must not be negative.
+        :raises ValueError: If the number is negative.
+        """
+        if value < 0:
+            raise ValueError('Values must not be negative')
+        if value:
+            self._counts[int(math.ceil(math.log(value) * self._multiplier))] \
+                += 1
+            if len(self._counts) > self.max_buckets:
+                self._collapse()
+        else:
+            self.zero_count += 1
+        self.count += 1
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def add_many(self, values):
+        """
+        Count many numbers at once, equivalent to calling `add()` for each,
+        but several times faster.
+
+        :param values: A sequence of numbers, e.g. an `array.array`. None may
+                       be negative.
+        :raises ValueError: If any number is negative, in which case none are
+                            counted.
+        """
+        if not len(values):
+            return
+        low = min(values)
+        if low < 0:
+            raise ValueError('Values must not be negative')
+        positive = values
+        if not low:
+            positive = [value for value in values if value]
+        # chaining `map()` and `Counter.update()` finds and counts every
+        # index in C, avoiding the Python bytecode of a loop or generator
+        self._counts.update(map(int, map(math.ceil, map(
+            operator.mul, map(math.log, positive),
+            itertools.repeat(self._multiplier)))))
+        if len(self._counts) > self.max_buckets:
+            self._collapse()
+        self.zero_count += len(values) - len(positive)
+        self.count += len(values)
+        high = max(values)
+        if self.min is None or low < self.min:
+            self.min = low
+        if self.max is None or high > self.max:
+            self.max = high
+
+    def _collapse(self):
+        """
+        Combine the lowest buckets so there are no more than the maximum.
+        """
+        indices = sorted(self._counts)
+        excess = len(indices) - self.max_buckets
+        lowest = indices[excess]
+        for index in indices[:excess]:
+            self._counts[lowest] += self._counts.pop(index)
+
+    def merge(self, other):
+        """
+        Include the numbers counted by another sketch in this one.
+
+        :param other: The other sketch. Must have the same relative accuracy.
+        :raises ValueError: If the relative accuracies differ.
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError('Cannot merge sketches with different accuracies')
+        if not other.count:
+            return
+        self._counts.update(other._counts)
+        if len(self._counts) > self.max_buckets:
+            self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        if self.min is None or other.min < self.min:
+            self.min = other.min
+        if self.max is None or other.max > self.max:
+            self.max = other.max
+
+    def percentile_value(self, percentile):
+        """
+        Find the number at or below which a percentage of the numbers counted
+        are.
+
+        :param percentile: The percentage, between 0 and 100.
+        :return: The number, accurate to within the sketch's relative
+                 accuracy, or None if the sketch is empty.
+        :raises ValueError: If the percentage is not between 0 and 100.
+        """
+        if not 0 <= percentile <= 100:
+            raise ValueError('Percentiles must be between 0 and 100')
+        if not self.count:
+            return None
+
+        rank = max(1, int(math.ceil(self.count * percentile / 100)))
+        # the smallest and largest numbers are known exactly
+        if rank == 1:
+            return self.min
+        if rank == self.count:
+            return self.max
+        if rank <= self.zero_count:
+            return 0.
+        seen = self.zero_count
+        for index in sorted(self._counts):
+            seen += self._counts[index]
+            if seen >= rank:
+                break
+
+        # the midpoint of the bucket in relative terms, which cannot be
+        # outside the numbers actually counted
+        # noinspection PyUnboundLocalVariable
+        value = 2 * self._gamma ** index / (self._gamma + 1)
+        return min(max(value, self.min), self.max)
+
+    def to_bytes(self):
+        """
+        Serialise the sketch compactly, e.g. to send to another host. Bucket
+        indices are stored as differences from the previous one, so most take
+        a single byte.
+
+        :return: The serialised sketch as bytes.
+        """
+        buffer_ = bytearray(_HEADER.pack(
+            _VERSION, self.relative_accuracy, self.max_buckets,
+            self.zero_count,
+            0. if self.min is None else self.min,
+            -1. if self.max is None else self.max))
+        indices = sorted(self._counts)
+        _write_varint(buffer_, len(indices))
+        previous = 0
+        for index in indices:
+            delta = index - previous
+            # zigzag encoding, so small negative numbers are small too
+            _write_varint(buffer_, delta * 2 if delta >= 0 else -delta * 2 - 1)
+            _write_varint(buffer_, self._counts[index])
+            previous = index
+        return bytes(buffer_)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Deserialise a sketch serialised by `to_bytes()`.
+
+        :param data: The serialised sketch.
+        :return: The sketch, of this class.
+        :raises ValueError: If the data is not a valid serialised sketch.
+        """
+        buffer_ = bytearray(data)
+        if len(buffer_) < _HEADER.size:
+            raise ValueError('Truncated sketch')
+        version, relative_accuracy, max_buckets, zero_count, min_, max_ = \
+            _HEADER.unpack_from(bytes(buffer_[:_HEADER.size]))
+        if version != _VERSION:
+            raise ValueError('Unsupported sketch version {0}'.format(version))
+        sketch = cls(relative_accuracy, max_buckets)
+        buckets, offset = _read_varint(buffer_, _HEADER.size)
+        index = 0
+        for _ in range(buckets):
+            delta, offset = _read_varint(buffer_, offset)
+            index += delta // 2 if not delta & 1 else -(delta + 1) // 2
+            count, offset = _read_varint(buffer_, offset)
+            sketch._counts[index] = count
+        if offset != len(buffer_):
+            raise ValueError('Unexpected data after sketch')
+        sketch.zero_count = zero_count
+        sketch.count = zero_count + sum(sketch._counts.values())
+        if sketch.count:
+            sketch.min = min_
+            sketch.max = max_
+        return sketch
+
+    def __eq__(self, other):
+        return type(self) is type(other) and \
+            self.relative_accuracy == other.relative_accuracy and \
+            self.max_buckets == other.max_buckets and \
+            self.zero_count == other.zero_count and \
+            self.min == other.min and self.max == other.max and \
+            self._counts == other._counts
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return '<{0}({1}, {2} buckets)>'.format(
+            self.__class__.__name__, repr(self.count), len(self._counts))
+
+
+class SpeedSketch(QuantileSketch):
+    """
+    A sketch of speeds, counted in bits per nanosecond, so a `Speed` can be
+    converted exactly.
+    """
+
+    def add_speed(self, speed):
+        """
+        Count a speed.
+
+        :param speed: The `Speed`.
+        """
+        self.add(speed.information.bits / speed.duration.nanoseconds)
+
+    def percentile(self, percentile):
+        """
+        Find the speed at or below which a percentage of the speeds counted
+        are.
+
+        :param percentile: The percentage, between 0 and 100.
+        :return: The `Speed`, or None if the sketch is empty.
+        :raises ValueError: If the percentage is not between 0 and 100.
+        """
+        value = self.percentile_value(percentile)
+        if value is None:
+            return None
+        return Speed(Information(value * Duration.SECONDS))
+
+
+class DurationSketch(QuantileSketch):
+    """
+    A sketch of durations, such as latencies, counted in nanoseconds.
+    """
+
+    def add_duration(self, duration):
+        """
+        Count a duration.
+
+        :param duration: The `Duration`.
+        """
+        self.add(duration.nanoseconds)
+
+    def percentile(self, percentile):
+        """
+        Find the duration at or below which a percentage of the durations
+        counted are.
+
+        :param percentile: The percentage, between 0 and 100.
+        :return: The `Duration`, or None if the sketch is empty.
+        :raises ValueError: If the percentage is not between 0 and 100.
+        """
+        value = self.percentile_value(percentile)
+        if value is None:
+            return None
+        return Duration(nanoseconds=int(round(value)))
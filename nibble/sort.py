@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, division
+import heapq
+import itertools
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+from six.moves import cPickle as pickle
+
+from nibble import util, Information, Duration
+from nibble.convert import QuantityParser
+
+
+class KeyExtractor(object):
+    """
+    Finds the quantity in a line to sort it by, either in a delimited field or
+    by regular expression, and reduces it to a number so quantities in any
+    mixture of units compare correctly.
+    """
+
+    def __init__(self, kind='information', unit=None, field=None,
+                 delimiter=None, regex=None):
+        """
+        Initialise a new key extractor. If neither a field nor a regular
+        expression is given, the whole line is used.
+
+        :param kind: The type of quantity to sort by. See `QuantityParser`.
+        :param unit: The unit of plain numbers. See `QuantityParser`.
+        :param field: The zero-based index of the field holding the quantity.
+        :param delimiter: The field delimiter. Defaults to runs of whitespace.
+        :param regex: A regular expression matching the quantity. If it
+                      contains a group, the first group is used.
+        :raises ValueError: If both a field and a regular expression are
+                            given, or the kind or unit is not recognised.
+        """
+        if field is not None and regex is not None:
+            raise ValueError('Specify a field or a regular expression, not '
+                             'both')
+
+        self.parser = QuantityParser(kind, unit)
+        self.field = field
+        self.delimiter = delimiter
+        self.regex = re.compile(regex) if regex is not None else None
+
+    def _value(self, line):
+        """
+        Find the string holding the quantity in a line.
+
+        :param line: The line to search.
+        :return: The string, or None if the line doesn't have one.
+        """
+        if self.regex is not None:
+            match = self.regex.search(line)
+            if not match:
+                return None
+            return match.group(1) if match.re.groups else match.group(0)
+
+        if self.field is not None:
+            fields = line.split(self.delimiter)
+            if self.field >= len(fields):
+                return None
+            return fields[self.field]
+
+        return line
+
+    def __call__(self, line):
+        """
+        Get the sort key of a line. Lines without a parsable quantity sort
+        before all others, as in `sort -h`.
+
+        :param line: The line to find the key of.
+        :return: A tuple comparing in the order of the line's quantity.
+        """
+        value = self._value(line)
+        if value is None:
+            return 0, 0
+
+        try:
+            quantity = self.parser.parse(value)
+        except ValueError:
+            return 0, 0
+
+        if isinstance(quantity, Information):
+            return 1, quantity.bits
+        if isinstance(quantity, Duration):
+            return 1, quantity.nanoseconds
+        # speeds in bits per nanosecond; this loses precision, but only at the
+        # 16th significant digit
+        return 1, quantity.information.bits / quantity.duration.nanoseconds
+
+
+def _records(lines, extractor, reverse=False, first=0):
+    """
+    Decorate lines for sorting. The sequence number breaks ties so the sort is
+    stable, in both directions, and lines never need to be compared.
+
+    :param lines: The lines to decorate.
+    :param extractor: The `KeyExtractor` to apply.
+    :param reverse: Whether to order largest first.
+    :param first: The sequence number of the first line.
+    :return: A generator of (key, sequence number, line) tuples.
+    """
+    for sequence, line in enumerate(lines, first):
+        flag, value = extractor(line)
+        if reverse:
+            yield (-flag, -value), sequence, line
+        else:
+            yield (flag, value), sequence, line
+
+
+# records are pickled this many at a time to amortise the per-call overhead
+_RUN_BATCH = 1024
+
+
+def _write_run(records, directory):
+    """
+    Write records to a new temporary file.
+
+    :param records: The records to write, in order.
+    :param directory: The directory to create the file in.
+    :return: The path of the file.
+    """
+    descriptor, path = tempfile.mkstemp(prefix='run', dir=directory)
+    with os.fdopen(descriptor, 'wb') as file_:
+        records = iter(records)
+        while True:
+            batch = list(itertools.islice(records, _RUN_BATCH))
+            if not batch:
+                break
+            pickle.dump(batch, file_, pickle.HIGHEST_PROTOCOL)
+    return path
+
+
+def _read_run(path):
+    """
+    Read the records in a file written by `_write_run()`, deleting it once
+    exhausted.
+
+    :param path: The path of the file.
+    :return: A generator of the records in the file.
+    """
+    with open(path, 'rb') as file_:
+        while True:
+            try:
+                batch = pickle.load(file_)
+            except EOFError:
+                break
+            for record in batch:
+                yield record
+    os.remove(path)
+
+
+# set in each worker process by `_init_worker()`, so the extractor is sent once
+# rather than with every chunk
+_worker_state = None
+
+
+def _init_worker(extractor, reverse, directory):
+    """
+    Prepare a worker process to generate runs.
+
+    :param extractor: The `KeyExtractor` to apply.
+    :param reverse: Whether to order largest first.
+    :param directory: The directory to write runs to.
+    """
+    global _worker_state
+    _worker_state = (extractor, reverse, directory)
+
+
+def _sort_chunk(chunk):
+    """
+    Sort a chunk of lines in a worker process, and write it out as a run.
+
+    :param chunk: A tuple of the sequence number of the first line, and the
+                  lines.
+    :return: The path of the run.
+    """
+    extractor, reverse, directory = _worker_state
+    return _write_sorted_run(extractor, reverse, directory, chunk)
+
+
+def _write_sorted_run(extractor, reverse, directory, chunk):
+    """
+    Sort a chunk of lines, and write it out as a run.
+
+    :param extractor: The `KeyExtractor` to apply.
+    :param reverse: Whether to order largest first.
+    :param directory: The directory to write the run to.
+    :param chunk: A tuple of the sequence number of the first line, and the
+                  lines.
+    :return: The path of the run.
+    """
+    first, lines = chunk
+    return _write_run(sorted(_records(lines, extractor, reverse, first)),
+                      directory)
+
+
+def _chunks(lines, buffer_size):
+    """
+    Split lines into chunks of roughly equal total length.
+
+    :param lines: The lines to split.
+    :param buffer_size: The approximate maximum number of characters per
+                        chunk.
+    :return: A generator of (first sequence number, lines) tuples.
+    """
+    first = 0
+    chunk = []
+    length = 0
+    for line in lines:
+        chunk.append(line)
+        length += len(line)
+        if length >= buffer_size:
+            yield first, chunk
+            first += len(chunk)
+            chunk = []
+            length = 0
+    if chunk:
+        yield first, chunk
+
+
+def _merge(paths, directory, fan_in):
+    """
+    Merge sorted runs, in several passes if there are too many to have open at
+    once.
+
+    :param paths: The paths of the runs.
+    :param directory: The directory to write intermediate runs to.
+    :param fan_in: The maximum number of runs to merge at a time.
+    :return: A generator of the merged records.
+    """
+    while len(paths) > fan_in:
+        paths = [_write_run(heapq.merge(*[_read_run(path)
+                                          for path in paths[i:i + fan_in]]),
+                            directory)
+                 for i in range(0, len(paths), fan_in)]
+    return heapq.merge(*[_read_run(path) for path in paths])
+
+
+def sort_lines(lines, extractor, reverse=False,
+               buffer_size=Information(64, Information.MEBIBYTES), jobs=1,
+               directory=None, fan_in=64):
+    """
+    Sort lines by the quantity each contains. The sort is stable. Input that
+    fits within the buffer is sorted in memory; larger input is sorted in
+    chunks written to temporary files, which are then merged, so memory use is
+    bounded however large the input.
+
+    :param lines: The lines to sort.
+    :param extractor: The `KeyExtractor` to find each line's quantity with.
+    :param reverse: Whether to order largest first.
+    :param buffer_size: The amount of text to sort in memory at a time, per
+                        job. Defaults to 64 MiB.
+    :param jobs: The number of processes to sort chunks in. Defaults to 1,
+                 which sorts in this process.
+    :param directory: Where to create temporary files. Defaults to the system
+                      temporary directory.
+    :param fan_in: The maximum number of temporary files to merge at once.
+    :return: A generator of the sorted lines.
+    """
+    # an approximation, as characters may be several bytes
+    chunks = _chunks(lines, buffer_size.bits // Information.BYTES)
+
+    first = next(chunks, None)
+    if first is None:
+        return
+    second = next(chunks, None)
+    if second is None:
+        # fits in memory
+        for _, _, line in sorted(_records(first[1], extractor, reverse)):
+            yield line
+        return
+
+    directory = tempfile.mkdtemp(prefix='nibble', dir=directory)
+    pool = None
+    try:
+        chunks = itertools.chain([first, second], chunks)
+        if jobs == 1:
+            paths = [_write_sorted_run(extractor, reverse, directory, chunk)
+                     for chunk in chunks]
+        else:
+            pool = multiprocessing.Pool(jobs, initializer=_init_worker,
+                                        initargs=(extractor, reverse,
+                                                  directory))
+            paths = list(util.imap_bounded(pool, _sort_chunk, chunks, jobs))
+
+        for _, _, line in _merge(paths, directory, fan_in):
+            yield line
+    finally:
+        if pool is not None:
+            pool.terminate()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def top_lines(lines, extractor, count, reverse=False):
+    """
+    Find the lines containing the smallest quantities, in order, without
+    sorting the whole input. Memory use is proportional to `count`.
+
+    :param lines: The lines to search.
+    :param extractor: The `KeyExtractor` to find each line's quantity with.
+    :param count: The number of lines to return.
+    :param reverse: Whether to find the largest quantities instead.
+    :return: A list of at most `count` lines.
+    """
+    return [line for _, _, line in
+            heapq.nsmallest(count, _records(lines, extractor, reverse))]
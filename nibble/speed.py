@@ -46,6 +46,33 @@ class Speed(object):
         duration = Duration.from_quantity_unit(1, duration_unit)
         return Speed(information, duration)
 
+    @classmethod
+    def parse(cls, string):
+        """
+        Get an object representing a speed string, e.g. "10Gb/s" or
+        "3 MiB/5m".
+
+        :param string: The speed string.
+        :return: The parsed speed.
+        :raises ValueError: If the string could not be parsed. Check the message
+                            for the reason why.
+        """
+        information_str, separator, duration_str = string.partition('/')
+        if not separator:
+            raise ValueError(
+                'Unable to parse speed string: {0}'.format(string))
+
+        information = Information.parse(information_str)
+
+        duration_str = duration_str.strip()
+        if Duration.is_valid_symbol(duration_str):
+            # no quantity, e.g. "/s"
+            duration = Duration.from_quantity_unit(1, duration_str)
+        else:
+            duration = Duration.parse(duration_str)
+
+        return Speed(information, duration)
+
     @property
     def _per_second(self):
         """
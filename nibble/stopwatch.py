@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import functools
+import time
+
+from nibble.information import Information
+from nibble.duration import Duration
+from nibble.speed import Speed
+
+# `time.perf_counter_ns()` avoids the float conversion, but needs Python 3.7
+try:
+    _nanoseconds = time.perf_counter_ns
+except AttributeError:
+    _counter = getattr(time, 'perf_counter', time.time)
+
+    def _nanoseconds():
+        return int(_counter() * 1000000000)
+
+
+class Stopwatch(object):
+    """
+    Measures elapsed time in integer nanoseconds, without going through float
+    seconds. A stopwatch accumulates the time of every section it times,
+    whether used as a context manager around a block, or as a decorator
+    around every call of a function.
+
+    Timing a section with `with` or the decorator costs two reads of
+    `time.perf_counter_ns()`, plus about as much again for the statement or
+    wrapper call and updating the total; `benchmarks/stopwatch.py` measures
+    this on a given machine. No objects are created until `duration` is
+    read, so stopwatches can be left in hot code. `stop()` is slower, as it
+    creates a `Duration` for the section. A stopwatch is not thread-safe, and
+    a section must not be nested inside another timed by the same stopwatch;
+    the decorator does allow recursion, but then counts the time of nested
+    calls twice.
+    """
+
+    __slots__ = ('_started', 'elapsed', 'laps')
+
+    def __init__(self):
+        """
+        Initialise a new stopwatch, with no time elapsed.
+        """
+        self._started = None
+        # nanoseconds
+        self.elapsed = 0
+        self.laps = 0
+
+    def start(self):
+        """
+        Start timing a section.
+
+        :return: This stopwatch.
+        """
+        self._started = _nanoseconds()
+        return self
+
+    def stop(self):
+        """
+        Stop timing a section, and add its time to the total.
+
+        :return: The time the section took, as a `Duration`.
+        :raises ValueError: If the stopwatch has not been started.
+        """
+        stopped = _nanoseconds()
+        if self._started is None:
+            raise ValueError('The stopwatch has not been started')
+        lap = stopped - self._started
+        self._started = None
+        self.elapsed += lap
+        self.laps += 1
+        return Duration(nanoseconds=lap)
+
+    def reset(self):
+        """
+        Discard all elapsed time.
+        """
+        self._started = None
+        self.elapsed = 0
+        self.laps = 0
+
+    @property
+    def duration(self):
+        """
+        The total time of every section timed.
+
+        :return: The time as a `Duration`.
+        """
+        return Duration(nanoseconds=self.elapsed)
+
+    def __enter__(self):
+        self._started = _nanoseconds()
+        return self
+
+    def __exit__(self, *args):
+        self.elapsed += _nanoseconds() - self._started
+        self._started = None
+        self.laps += 1
+
+    def __call__(self, function):
+        """
+        Decorate a function to add the time of every call to this stopwatch,
+        including calls that raise.
+
+        :param function: The function to time.
+        :return: The wrapper.
+        """
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started = _nanoseconds()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.elapsed += _nanoseconds() - started
+                self.laps += 1
+
+        return wrapper
+
+    def __repr__(self):
+        return '<{0}({1})>'.format(self.__class__.__name__,
+                                   repr(self.duration))
+
+
+class ThroughputTimer(Stopwatch):
+    """
+    A stopwatch that also counts the bytes processed in the sections it
+    times, to find the rate they were processed at. Bytes can be given up
+    front, e.g. `with ThroughputTimer(len(data)) as timer:`, or added with
+    `add()` as they are processed, e.g. by a decorated function that cannot
+    know its count in advance.
+    """
+
+    __slots__ = ('bytes',)
+
+    def __init__(self, bytes_=0):
+        """
+        Initialise a new timer.
+
+        :param bytes_: The number of bytes the first section will process.
+                       Defaults to 0.
+        """
+        super(ThroughputTimer, self).__init__()
+        self.bytes = bytes_
+
+    def add(self, bytes_):
+        """
+        Count bytes processed.
+
+        :param bytes_: The number of bytes.
+        """
+        self.bytes += bytes_
+
+    def reset(self):
+        """
+        Discard all elapsed time and bytes counted.
+        """
+        super(ThroughputTimer, self).reset()
+        self.bytes = 0
+
+    @property
+    def information(self):
+        """
+        The amount processed.
+
+        :return: The amount as an `Information`.
+        """
+        return Information(self.bytes, Information.BYTES)
+
+    @property
+    def speed(self):
+        """
+        The rate bytes were processed at, over every section timed.
+
+        :return: The rate as a `Speed`.
+        :raises ValueError: If no time has elapsed.
+        """
+        if not self.elapsed:
+            raise ValueError('No time has elapsed')
+        return Speed(self.information, self.duration)
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, division
+import csv
+import json
+
+from nibble import Information, Duration
+
+
+def linear_range(start, stop, step):
+    """
+    Generate evenly spaced quantities of information, like `range()`, but
+    including the stop value if reached.
+
+    :param start: The first `Information`.
+    :param stop: The largest `Information` to include.
+    :param step: The `Information` to add each time.
+    :return: A generator of `Information`s.
+    :raises ValueError: If the step is zero.
+    """
+    if not step:
+        raise ValueError('Step must be greater than zero')
+    for bits in range(start.bits, stop.bits + 1, step.bits):
+        yield Information(bits)
+
+
+def geometric_range(start, stop, factor):
+    """
+    Generate quantities of information each a multiple of the last, e.g. 1 GiB,
+    10 GiB, 100 GiB.
+
+    :param start: The first `Information`.
+    :param stop: The largest `Information` to include.
+    :param factor: The number to multiply by each time.
+    :return: A generator of `Information`s.
+    :raises ValueError: If the start is zero or the factor is not greater than
+                        1, as the range would be infinite.
+    """
+    if not start or factor <= 1:
+        raise ValueError('Geometric ranges must start above zero and grow')
+    information = start
+    while information <= stop:
+        yield information
+        information = information * factor
+
+
+class TransferTable(object):
+    """
+    The time taken to transfer each of several quantities of information at
+    each of several speeds. Every cell is computed up front as an integral
+    number of nanoseconds, but `Duration` objects are only created as cells
+    are formatted, so tables with millions of cells are cheap to build.
+    """
+
+    def __init__(self, informations, speeds, information_labels=None,
+                 speed_labels=None):
+        """
+        Compute a new transfer table.
+
+        :param informations: The quantities of information, one per row.
+        :param speeds: The speeds, one per column.
+        :param information_labels: Row headings. Defaults to the formatted
+                                   quantities of information.
+        :param speed_labels: Column headings. Defaults to the speeds formatted
+                             in decimal bits per second, e.g. '10 Gb/s'.
+        :raises ValueError: If any of the speeds is zero.
+        """
+        self.informations = list(informations)
+        self.speeds = list(speeds)
+        if not all(speed.information for speed in self.speeds):
+            raise ValueError('Cannot transfer anything at zero speed')
+
+        self.information_labels = information_labels or \
+            ['{0}'.format(information) for information in self.informations]
+        self.speed_labels = speed_labels or \
+            ['{0: db}'.format(speed) for speed in self.speeds]
+
+        # a speed of i bits per d nanoseconds takes b * d / i nanoseconds to
+        # transfer b bits; adding half the divisor rounds to the nearest
+        rates = [(speed.duration.nanoseconds, speed.information.bits,
+                  speed.information.bits // 2) for speed in self.speeds]
+        self.nanoseconds = [
+            [(information.bits * nanoseconds + half) // bits
+             for nanoseconds, bits, half in rates]
+            for information in self.informations]
+
+    def duration(self, row, column):
+        """
+        Get a single cell of the table.
+
+        :param row: The index of the quantity of information.
+        :param column: The index of the speed.
+        :return: The time taken, as a `Duration`.
+        """
+        return Duration(nanoseconds=self.nanoseconds[row][column])
+
+    def _formatted_rows(self, format_spec):
+        """
+        Format each row of the table.
+
+        :param format_spec: The format specification for durations.
+        :return: A generator of (row label, list of formatted cells) tuples.
+        """
+        for label, row in zip(self.information_labels, self.nanoseconds):
+            yield label, ['{0:{1}}'.format(Duration(nanoseconds=nanoseconds),
+                                           format_spec)
+                          for nanoseconds in row]
+
+    def write_text(self, file_, format_spec=' '):
+        """
+        Write the table as aligned columns of text. Rows are formatted twice,
+        first to find the width of each column, so memory use does not grow
+        with the size of the table.
+
+        :param file_: The text file to write to.
+        :param format_spec: The format specification for durations. Defaults
+                            to the largest whole unit, e.g. '1.5 h'.
+        """
+        widths = [len(label) for label in self.speed_labels]
+        label_width = max([len(label) for label in self.information_labels] +
+                          [0])
+        for _, cells in self._formatted_rows(format_spec):
+            widths = [max(width, len(cell))
+                      for width, cell in zip(widths, cells)]
+
+        def write_row(label, cells):
+            file_.write('  '.join(
+                [label.ljust(label_width)] +
+                [cell.rjust(width) for cell, width in zip(cells, widths)])
+                .rstrip() + '\n')
+
+        write_row('', self.speed_labels)
+        for label, cells in self._formatted_rows(format_spec):
+            write_row(label, cells)
+
+    def write_csv(self, file_, format_spec=' '):
+        """
+        Write the table as CSV, with a header row of speeds.
+
+        :param file_: The text file to write to.
+        :param format_spec: The format specification for durations.
+        """
+        writer = csv.writer(file_, lineterminator='\n')
+        writer.writerow([''] + self.speed_labels)
+        for label, cells in self._formatted_rows(format_spec):
+            writer.writerow([label] + cells)
+
+    def write_json(self, file_, format_spec=' '):
+        """
+        Write the table as a JSON object, with both formatted and nanosecond
+        durations. Rows are written one at a time, rather than building the
+        whole document in memory.
+
+        :param file_: The text file to write to.
+        :param format_spec: The format specification for durations.
+        """
+        file_.write('{{"speeds": {0}, "rows": ['.format(
+            json.dumps(self.speed_labels)))
+        rows = zip(self._formatted_rows(format_spec), self.nanoseconds)
+        for index, ((label, cells), nanoseconds) in enumerate(rows):
+            file_.write('{0}\n{1}'.format(',' if index else '', json.dumps({
+                'size': label,
+                'durations': cells,
+                'nanoseconds': nanoseconds
+            }, sort_keys=True)))
+        file_.write(']}\n')
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+Coroutines used by the tests of the asyncio modules, kept out of the test
+modules so they still compile on versions of Python without `async def`.
+Only import this on Python 3.5 or later.
+"""
+from __future__ import unicode_literals
+
+
+async def collect(iterable):
+    """
+    :param iterable: An asynchronous iterable.
+    :return: A list of its items.
+    """
+    items = []
+    async for item in iterable:
+        items.append(item)
+    return items
+
+
+async def nothing(*args):
+    """
+    Do nothing, e.g. in place of `asyncio.sleep()` or a stream's `drain()`.
+    """
+
+
+async def acquire_concurrently(bucket, tasks, count, bytes_):
+    """
+    Acquire from a token bucket in several tasks at once.
+
+    :param bucket: The `TokenBucket`.
+    :param tasks: The number of tasks.
+    :param count: The number of acquisitions each task makes.
+    :param bytes_: The number of bytes each acquisition takes.
+    """
+    import asyncio
+    from nibble.limiter_asyncio import acquire
+
+    async def work():
+        for _ in range(count):
+            await acquire(bucket, bytes_)
+
+    await asyncio.gather(*[work() for _ in range(tasks)])
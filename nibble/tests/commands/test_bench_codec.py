@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+import tempfile
+import shutil
+import os
+
+from nibble import __main__ as main
+from nibble.tests.test_main import CaptureStdOut, _suppress_stderr
+
+
+class TestBenchCodec(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def test_synthetic(self):
+        with CaptureStdOut() as stdout:
+            self.assertEqual(main.main(['nibble', 'bench-codec', '-s', '8KiB',
+                                        '-a', 'zlib,sha1', '-c', '4KiB']), 0)
+        self.assertEqual(stdout[0].split(),
+                         ['algorithm', 'level', 'chunk', 'speed', 'ratio',
+                          'vs', 'raw'])
+        # three zlib levels, and one hash
+        self.assertEqual(len(stdout), 5)
+        self.assertEqual(stdout[4].split()[-2:], ['-', '-'])
+
+    def test_file_levels(self):
+        path = os.path.join(self._directory, 'sample')
+        with open(path, 'wb') as f:
+            f.write(b'nibble ' * 1000)
+        with CaptureStdOut() as stdout:
+            self.assertEqual(main.main(['nibble', 'bench-codec', '-a', 'zlib',
+                                        '-L', '1,9', '-c', '1KiB', path]), 0)
+        self.assertEqual([line.split()[1] for line in stdout[1:]],
+                         ['1', '9'])
+
+    def test_empty_file(self):
+        path = os.path.join(self._directory, 'sample')
+        open(path, 'wb').close()
+        with CaptureStdOut(), _suppress_stderr():
+            self.assertEqual(main.main(['nibble', 'bench-codec', path]), 1)
+
+    def test_invalid_algorithm(self):
+        with self.assertRaises(SystemExit), _suppress_stderr():
+            main._parse_args(['nibble', 'bench-codec', '-a', 'zlib,rot13'])
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+import tempfile
+import shutil
+import os
+
+from nibble import __main__ as main
+from nibble.tests.test_main import CaptureStdOut, _suppress_stderr
+
+
+class TestBenchDisk(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def test_output(self):
+        with CaptureStdOut() as stdout:
+            self.assertEqual(main.main(['nibble', 'bench-disk', '-s', '64KiB',
+                                        '-b', '4KiB', '-q', '1,2',
+                                        '-P', '50,90', self._directory]), 0)
+        self.assertEqual(stdout[0].split(),
+                         ['operation', 'pattern', 'block', 'qd', 'speed',
+                          'iops', 'p50', 'p90'])
+        # read and write, sequential and random, at two queue depths
+        self.assertEqual(len(stdout), 9)
+        self.assertEqual(os.listdir(self._directory), [])
+
+    def test_existing_file_reads_only(self):
+        path = os.path.join(self._directory, 'file')
+        with open(path, 'wb') as f:
+            f.write(b'\0' * 65536)
+        with CaptureStdOut() as stdout:
+            self.assertEqual(main.main(['nibble', 'bench-disk', '-b', '4KiB',
+                                        '-q', '1', '-p', 'random', path]), 0)
+        self.assertEqual(len(stdout), 2)
+        self.assertTrue(stdout[1].startswith('read'))
+
+    def test_invalid_operation(self):
+        with self.assertRaises(SystemExit), _suppress_stderr():
+            main._parse_args(['nibble', 'bench-disk', '-o', 'read,erase',
+                              self._directory])
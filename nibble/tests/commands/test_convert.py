@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+import tempfile
+import shutil
+import os
+import io
+
+from nibble import __main__ as main
+from nibble.tests.test_main import CaptureStdOut, _suppress_stderr
+
+
+class TestConvert(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._path = os.path.join(self._directory, 'input.csv')
+        with io.open(self._path, 'w') as f:
+            f.write('name,size\na,1024\nb,2048\n')
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def test_column_index(self):
+        with CaptureStdOut() as stdout:
+            self.assertEqual(main.main(['nibble', 'convert', '-H', '-c', '2',
+                                        self._path]), 0)
+        self.assertListEqual(stdout, ['name,size', 'a,1 KiB', 'b,2 KiB'])
+
+    def test_column_name(self):
+        with CaptureStdOut() as stdout:
+            self.assertEqual(main.main(['nibble', 'convert', '-H', '-c',
+                                        'size', '-f', ' KB', self._path]), 0)
+        self.assertListEqual(stdout, ['name,size', 'a,1.02 KB', 'b,2.05 KB'])
+
+    def test_column_name_no_header(self):
+        with CaptureStdOut() as stdout, _suppress_stderr():
+            self.assertEqual(main.main(['nibble', 'convert', '-c', 'size',
+                                        self._path]), 1)
+        self.assertFalse(stdout)
+
+    def test_column_zero(self):
+        with CaptureStdOut(), _suppress_stderr():
+            self.assertEqual(main.main(['nibble', 'convert', '-c', '0',
+                                        self._path]), 1)
+
+    def test_output(self):
+        output = os.path.join(self._directory, 'output.tsv')
+        self.assertEqual(main.main(['nibble', 'convert', '-H', '-c', '2',
+                                    '-o', output, self._path]), 0)
+        with io.open(output) as f:
+            self.assertEqual(f.read(), 'name,size\na,1 KiB\nb,2 KiB\n')
+
+    def test_bad_value(self):
+        with CaptureStdOut(), _suppress_stderr():
+            self.assertEqual(main.main(['nibble', 'convert', '-c', '2',
+                                        self._path]), 1)
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+import tempfile
+import shutil
+import os
+
+from nibble import __main__ as main
+from nibble.tests.test_main import CaptureStdOut, _suppress_stderr
+
+
+class TestDf(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def test_path(self):
+        with CaptureStdOut() as stdout:
+            self.assertEqual(main.main(['nibble', 'df', '-c', '2', '-i', '1ms',
+                                        self._directory]), 0)
+        self.assertEqual(len(stdout), 4)
+        self.assertEqual(stdout[0].split()[1:],
+                         ['mount', 'size', 'used', 'avail', 'use%', 'growth',
+                          'full', 'in'])
+        self.assertEqual(stdout[1].split()[1], self._directory)
+
+    def test_top(self):
+        path = os.path.join(self._directory, 'mounts')
+        with open(path, 'w') as f:
+            f.write('a / ext4 rw 0 0\nb {0} ext4 rw 0 0\n'.format(
+                self._directory))
+        with CaptureStdOut() as stdout:
+            self.assertEqual(main.main(['nibble', 'df', '-c', '1', '-i', '1ms',
+                                        '-n', '1', '--mounts', path]), 0)
+        self.assertEqual(len(stdout), 2)
+
+    def test_missing_path(self):
+        with CaptureStdOut(), _suppress_stderr():
+            self.assertEqual(main.main(['nibble', 'df', '-c', '1',
+                                        os.path.join(self._directory,
+                                                     'missing')]), 1)
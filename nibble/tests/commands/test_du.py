@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+import tempfile
+import shutil
+import os
+
+from nibble import __main__ as main
+from nibble.tests.test_main import CaptureStdOut
+
+
+class TestDu(unittest.TestCase):
+
+    def setUp(self):
+        self._root = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self._root, 'sub'))
+        with open(os.path.join(self._root, 'sub', 'file'), 'wb') as f:
+            f.write(b'\0' * 125000)
+
+    def tearDown(self):
+        shutil.rmtree(self._root)
+
+    def test_summarize(self):
+        with CaptureStdOut() as stdout:
+            self.assertEqual(main.main(['nibble', 'du', '-s', self._root]), 0)
+        self.assertEqual(len(stdout), 1)
+        self.assertTrue(stdout[0].endswith('\t' + self._root))
+
+    def test_speed(self):
+        with CaptureStdOut() as stdout:
+            self.assertEqual(main.main(['nibble', 'du', '-A', '-f', ' MB',
+                                        '-S', '1Mb/s',
+                                        os.path.join(self._root, 'sub',
+                                                     'file')]), 0)
+        self.assertListEqual(stdout, ['0.13 MB\t1 s\t' +
+                                      os.path.join(self._root, 'sub', 'file')])
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+import tempfile
+import shutil
+import os
+
+from nibble import __main__ as main
+from nibble.tests.test_main import CaptureStdOut, _suppress_stderr
+from nibble.tests.test_ifstat import _counters
+
+
+class TestIfstat(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._path = os.path.join(self._directory, 'dev')
+        with open(self._path, 'w') as f:
+            f.write(_counters([('lo', 0, 0, 0, 0), ('eth0', 0, 0, 0, 0)]))
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def test_output(self):
+        with CaptureStdOut() as stdout:
+            self.assertEqual(main.main(['nibble', 'ifstat', '--path',
+                                        self._path, '-c', '2', '-i', '1ms',
+                                        '-l', 'GIGABIT', '-I', 'eth0']), 0)
+        self.assertEqual(len(stdout), 4)
+        self.assertEqual(stdout[0].split()[1:],
+                         ['interface', 'rx', 'tx', 'rx%', 'tx%'])
+        self.assertEqual(stdout[1].split()[1:],
+                         ['eth0', '0.00', 'b/s', '0.00', 'b/s', '0.0%',
+                          '0.0%'])
+
+    def test_missing_file(self):
+        with CaptureStdOut(), _suppress_stderr():
+            self.assertEqual(main.main(['nibble', 'ifstat', '--path',
+                                        os.path.join(self._directory,
+                                                     'missing')]), 1)
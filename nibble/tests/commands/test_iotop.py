@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+import tempfile
+import shutil
+import os
+
+from nibble import __main__ as main
+from nibble.tests.test_main import CaptureStdOut, _suppress_stderr
+
+
+class TestIotop(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def test_real(self):
+        if not os.path.exists('/proc/self/io'):
+            self.skipTest('Process I/O counters are not available')
+        with CaptureStdOut():
+            self.assertEqual(main.main(['nibble', 'iotop', '-c', '1', '-i',
+                                        '1ms', '-k', 'all']), 0)
+
+    def test_missing_proc(self):
+        with CaptureStdOut(), _suppress_stderr():
+            self.assertEqual(main.main(['nibble', 'iotop', '--proc',
+                                        os.path.join(self._directory,
+                                                     'missing')]), 1)
+
+    def test_invalid_pids(self):
+        with self.assertRaises(SystemExit), _suppress_stderr():
+            main._parse_args(['nibble', 'iotop', '-p', '1,x'])
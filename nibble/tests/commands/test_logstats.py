@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+import tempfile
+import shutil
+import os
+
+from nibble import __main__ as main
+from nibble.tests.test_main import CaptureStdOut, _suppress_stderr
+
+
+class TestLogstats(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._path = os.path.join(self._directory, 'access.log')
+        with open(self._path, 'wb') as f:
+            f.write(b'1.2.3.4 - - [10/Oct/2017:13:55:36 +0000] "GET / '
+                    b'HTTP/1.1" 200 7500000 "-" "curl/7.5" 1.000\n')
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def test_output(self):
+        with CaptureStdOut() as stdout:
+            self.assertEqual(main.main(['nibble', 'logstats', '-f', ' Mb/s',
+                                        '-p', '50', self._path]), 0)
+        self.assertEqual(stdout[0], '2017-10-10T13:55:00Z\t1\t7.15 MiB\t1 Mb/s')
+        self.assertEqual(stdout[1], '1 requests, 7.15 MiB sent')
+        self.assertTrue(stdout[2].startswith('p50\t'))
+
+    def test_bad_percentile(self):
+        with self.assertRaises(SystemExit), _suppress_stderr():
+            main._parse_args(['nibble', 'logstats', '-p', '101', self._path])
+
+    def test_missing_file(self):
+        with CaptureStdOut(), _suppress_stderr():
+            self.assertEqual(main.main(['nibble', 'logstats',
+                                        os.path.join(self._directory,
+                                                     'missing')]), 1)
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+
+from nibble import __main__ as main
+from nibble.tests.test_main import CaptureStdOut
+
+
+class TestNetbench(unittest.TestCase):
+
+    def test_single_stream(self):
+        with CaptureStdOut() as stdout:
+            self.assertEqual(main.main(['nibble', 'netbench', '-t', '10ms']),
+                             0)
+        self.assertEqual(stdout[0].split(),
+                         ['stream', 'speed', 'received', 'duration'])
+        self.assertEqual(len(stdout), 2)
+
+    def test_total(self):
+        with CaptureStdOut() as stdout:
+            self.assertEqual(main.main(['nibble', 'netbench', '-t', '10ms',
+                                        '-n', '2', '-b', '4KiB']), 0)
+        self.assertEqual(len(stdout), 4)
+        self.assertTrue(stdout[3].startswith('total'))
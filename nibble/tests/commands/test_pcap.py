@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+import tempfile
+import shutil
+import os
+
+from nibble import __main__ as main
+from nibble.tests.test_main import CaptureStdOut, _suppress_stderr
+from nibble.tests.test_pcap import classic, ethernet, ipv4
+
+
+class TestPcap(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._path = os.path.join(self._directory, 'capture.pcap')
+        with open(self._path, 'wb') as f:
+            f.write(classic([
+                (0, ethernet(ipv4('10.0.0.1', '10.0.0.2', payload=100))),
+                (1500000000, ethernet(ipv4('10.0.0.3', '10.0.0.2')))]))
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def test_top(self):
+        with CaptureStdOut() as stdout:
+            self.assertEqual(main.main(['nibble', 'pcap', self._path]), 0)
+        self.assertEqual(stdout[0].split(),
+                         ['flow', 'packets', 'bytes', 'average', 'peak'])
+        self.assertEqual(len(stdout), 3)
+        self.assertTrue(stdout[1].startswith('#1  tcp 10.0.0.1:1234 > '))
+
+    def test_series(self):
+        with CaptureStdOut() as stdout:
+            self.assertEqual(main.main(['nibble', 'pcap', '-n', '1', '-s',
+                                        '-i', '500ms', self._path]), 0)
+        self.assertEqual(stdout[3].split(), ['time', '#1'])
+        # four half-second buckets
+        self.assertEqual(len(stdout), 8)
+
+    def test_not_capture(self):
+        path = os.path.join(self._directory, 'empty')
+        open(path, 'wb').close()
+        with CaptureStdOut(), _suppress_stderr():
+            self.assertEqual(main.main(['nibble', 'pcap', path]), 1)
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+import tempfile
+import shutil
+import os
+
+from nibble import __main__ as main
+from nibble.tests.test_main import CaptureStdOut, _suppress_stderr
+
+
+class TestPv(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._source = os.path.join(self._directory, 'source')
+        self._destination = os.path.join(self._directory, 'destination')
+        with open(self._source, 'wb') as f:
+            f.write(b'nibble' * 1000)
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def _pv(self, *args):
+        with _suppress_stderr():
+            self.assertEqual(main.main(['nibble', 'pv', self._source, '-o',
+                                        self._destination] + list(args)), 0)
+        with open(self._destination, 'rb') as f:
+            self.assertEqual(f.read(), b'nibble' * 1000)
+
+    def test_copy(self):
+        self._pv()
+
+    def test_no_zero_copy(self):
+        self._pv('--no-zero-copy', '-B', '1KiB')
+
+    def test_size(self):
+        self._pv('-s', '1MB')
+
+    def test_zero_buffer(self):
+        with CaptureStdOut(), _suppress_stderr():
+            self.assertEqual(main.main(['nibble', 'pv', self._source,
+                                        '-B', '4b']), 1)
+
+    def test_missing_file(self):
+        with CaptureStdOut(), _suppress_stderr():
+            self.assertEqual(main.main(['nibble', 'pv',
+                                        os.path.join(self._directory,
+                                                     'missing')]), 1)
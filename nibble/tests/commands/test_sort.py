@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+import tempfile
+import shutil
+import os
+import io
+
+from nibble import __main__ as main
+from nibble.tests.test_main import CaptureStdOut, _suppress_stderr
+
+
+class TestSort(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._path = os.path.join(self._directory, 'input.txt')
+        with io.open(self._path, 'w') as f:
+            f.write('a,1 GiB\nb,1 GB\nc,1 Gb')
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def test_field(self):
+        with CaptureStdOut() as stdout:
+            self.assertEqual(main.main(['nibble', 'sort', '-f', '2', '-t', ',',
+                                        self._path]), 0)
+        self.assertListEqual(stdout, ['c,1 Gb', 'b,1 GB', 'a,1 GiB'])
+
+    def test_regex_reverse_top(self):
+        with CaptureStdOut() as stdout:
+            self.assertEqual(main.main(['nibble', 'sort', '-e', ',(.*)', '-r',
+                                        '-n', '1', self._path]), 0)
+        self.assertListEqual(stdout, ['a,1 GiB'])
+
+    def test_output_is_input(self):
+        self.assertEqual(main.main(['nibble', 'sort', '-f', '2', '-t', ',',
+                                    '-o', self._path, self._path]), 0)
+        with io.open(self._path) as f:
+            self.assertEqual(f.read(), 'c,1 Gb\nb,1 GB\na,1 GiB\n')
+
+    def test_field_and_regex(self):
+        with self.assertRaises(SystemExit), _suppress_stderr():
+            main._parse_args(['nibble', 'sort', '-f', '1', '-e', '.'])
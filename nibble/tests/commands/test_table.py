@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+import argparse
+
+from nibble import __main__ as main, Information, Speed
+from nibble.commands import table
+from nibble.tests.test_main import CaptureStdOut, _suppress_stderr
+
+
+class TestSizesArg(unittest.TestCase):
+
+    def test_list(self):
+        self.assertEqual(table.sizes_arg('1GiB, 2 GiB'),
+                         [Information(1, Information.GIBIBYTES),
+                          Information(2, Information.GIBIBYTES)])
+
+    def test_geometric(self):
+        self.assertEqual(table.sizes_arg('1KB..100KB*10'),
+                         [Information(1, Information.KILOBYTES),
+                          Information(10, Information.KILOBYTES),
+                          Information(100, Information.KILOBYTES)])
+
+    def test_linear(self):
+        self.assertEqual(table.sizes_arg('1KB..3KB+1KB'),
+                         [Information(1, Information.KILOBYTES),
+                          Information(2, Information.KILOBYTES),
+                          Information(3, Information.KILOBYTES)])
+
+    def test_invalid(self):
+        for string in ['foo', '1KB..3KB', '1KB..3KB*x']:
+            with self.assertRaises(argparse.ArgumentTypeError):
+                table.sizes_arg(string)
+
+
+class TestSpeedsArg(unittest.TestCase):
+
+    def test_labels(self):
+        self.assertEqual(table.speeds_arg('GIGABIT,10Mb/s'),
+                         [('GIGABIT', Speed.GIGABIT),
+                          ('10 Mb/s', Speed.parse('10Mb/s'))])
+
+    def test_zero(self):
+        with self.assertRaises(argparse.ArgumentTypeError):
+            table.speeds_arg('0b/s')
+
+
+class TestTable(unittest.TestCase):
+
+    def test_text(self):
+        with CaptureStdOut() as stdout:
+            self.assertEqual(main.main(['nibble', 'table', '-s', '1GB,10GB',
+                                        '-F', ' dB', '-S', 'GIGABIT',
+                                        '-f', ' s']), 0)
+        self.assertEqual(stdout, ['       GIGABIT', '1 GB       8 s',
+                                  '10 GB     80 s'])
+
+    def test_csv(self):
+        with CaptureStdOut() as stdout:
+            self.assertEqual(main.main(['nibble', 'table', '-s', '1GB',
+                                        '-F', ' dB', '-S', 'GIGABIT',
+                                        '-S', '2Gb/s', '--csv']), 0)
+        self.assertEqual(stdout, [',GIGABIT,2 Gb/s', '1 GB,8 s,4 s'])
+
+    def test_defaults(self):
+        with CaptureStdOut() as stdout:
+            self.assertEqual(main.main(['nibble', 'table']), 0)
+        self.assertEqual(len(stdout), 6)
+
+    def test_invalid_sizes(self):
+        with self.assertRaises(SystemExit), _suppress_stderr():
+            main._parse_args(['nibble', 'table', '-s', '1GB..2GB'])
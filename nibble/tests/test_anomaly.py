@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, division
+import random
+import unittest
+
+from nibble import Information, Duration, Speed
+from nibble.anomaly import Anomaly, EwmaBands, Cusum, SeasonalBaseline
+
+
+def _speed(bytes_per_second):
+    return Speed(Information(bytes_per_second, Information.BYTES))
+
+
+def _bytes(speed):
+    return speed.information.bits / Information.BYTES
+
+
+def _noisy(count, mean=1000000, deviation=10000, seed=1):
+    """
+    :return: A list of normally distributed rates in bytes per second.
+    """
+    generator = random.Random(seed)
+    return [generator.gauss(mean, deviation) for _ in range(count)]
+
+
+class TestAnomaly(unittest.TestCase):
+
+    def test_drop(self):
+        anomaly = Anomaly(10, _speed(1000), _speed(4000), -5.)
+        self.assertTrue(anomaly.drop)
+        self.assertEqual(anomaly.deviation, _speed(3000))
+        self.assertEqual(str(anomaly), '{0} is {1} below the expected {2} '
+                                       '(-5.0 sd)'.format(_speed(1000),
+                                                          _speed(3000),
+                                                          _speed(4000)))
+
+    def test_rise(self):
+        anomaly = Anomaly(10, _speed(4000), _speed(1000), 4.25)
+        self.assertFalse(anomaly.drop)
+        self.assertEqual(anomaly.deviation, _speed(3000))
+        self.assertIn('above', str(anomaly))
+        self.assertIn('+4.2 sd', str(anomaly))
+
+
+class TestEwmaBands(unittest.TestCase):
+
+    def test_steady(self):
+        rates = _noisy(500)
+        self.assertLess(len(EwmaBands(width=4).backfill(range(500), rates)),
+                        3)
+
+    def test_warmup(self):
+        detector = EwmaBands(warmup=5)
+        for now in range(5):
+            self.assertIsNone(detector.update(_speed(1000 * (now + 1)), now))
+
+    def test_drop(self):
+        detector = EwmaBands()
+        for now, rate in enumerate(_noisy(100)):
+            detector.update(_speed(rate), now)
+        anomaly = detector.update(_speed(100000), 100)
+        self.assertIsNotNone(anomaly)
+        self.assertEqual(anomaly.time, 100)
+        self.assertEqual(anomaly.speed, _speed(100000))
+        self.assertAlmostEqual(_bytes(anomaly.expected), 1000000,
+                               delta=10000)
+        self.assertLess(anomaly.score, -50)
+
+    def test_rises(self):
+        rates = _noisy(100) + [2000000]
+        self.assertEqual(EwmaBands().backfill(range(101), rates), [])
+        anomalies = EwmaBands(rises=True).backfill(range(101), rates)
+        self.assertEqual([anomaly.time for anomaly in anomalies], [100])
+        self.assertFalse(anomalies[0].drop)
+
+    def test_tolerance(self):
+        # a perfectly steady rate has no variance, so without a tolerance
+        # any change would be anomalous
+        rates = [1000000] * 50 + [995000, 900000]
+        anomalies = EwmaBands().backfill(range(52), rates)
+        self.assertEqual([anomaly.time for anomaly in anomalies], [51])
+
+    def test_backfill_matches_update(self):
+        rates = _noisy(300)
+        rates[150:160] = [500000] * 10
+        detector = EwmaBands()
+        updated = [detector.update(_speed(rate), now)
+                   for now, rate in enumerate(rates)]
+        self.assertEqual(
+            [anomaly.time for anomaly in EwmaBands().backfill(range(300),
+                                                              rates)],
+            [anomaly.time for anomaly in updated if anomaly is not None])
+
+    def test_backfill_lengths(self):
+        with self.assertRaises(ValueError):
+            EwmaBands().backfill([1, 2], [3])
+
+    def test_expected(self):
+        detector = EwmaBands(alpha=0.5)
+        self.assertIsNone(detector.expected())
+        detector.update(_speed(1000), 0)
+        detector.update(_speed(3000), 1)
+        self.assertEqual(detector.expected(), _speed(2000))
+        self.assertEqual(detector.expected(100), _speed(2000))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            EwmaBands(alpha=0)
+        with self.assertRaises(ValueError):
+            EwmaBands(width=0)
+        with self.assertRaises(ValueError):
+            EwmaBands(warmup=0)
+        with self.assertRaises(ValueError):
+            EwmaBands(tolerance=-1)
+
+
+class TestCusum(unittest.TestCase):
+
+    def test_steady(self):
+        self.assertLess(len(Cusum().backfill(range(1000), _noisy(1000))), 3)
+
+    def test_small_persistent_drop(self):
+        # a 2% drop, 2 standard deviations, stays within 4 standard deviation
+        # bands but accumulates
+        rates = _noisy(1000, deviation=10000)
+        rates[600:] = [rate - 20000 for rate in rates[600:]]
+        self.assertEqual(EwmaBands(width=4).backfill(range(610),
+                                                     rates[:610]), [])
+        anomalies = Cusum().backfill(range(1000), rates)
+        self.assertTrue(anomalies)
+        self.assertTrue(all(anomaly.drop for anomaly in anomalies))
+        self.assertGreaterEqual(anomalies[0].time, 600)
+        self.assertLess(anomalies[0].time, 620)
+        self.assertLess(anomalies[0].score, -5)
+
+    def test_rises(self):
+        rates = _noisy(200)
+        rates[100:] = [rate + 30000 for rate in rates[100:]]
+        self.assertEqual(Cusum().backfill(range(200), rates), [])
+        anomalies = Cusum(rises=True).backfill(range(200), rates)
+        self.assertTrue(anomalies)
+        self.assertGreater(anomalies[0].score, 5)
+
+    def test_expected(self):
+        detector = Cusum()
+        self.assertIsNone(detector.expected(0))
+        detector.update(_speed(1000), 0)
+        self.assertEqual(detector.expected(), _speed(1000))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            Cusum(slack=-1)
+        with self.assertRaises(ValueError):
+            Cusum(threshold=0)
+
+
+class TestSeasonalBaseline(unittest.TestCase):
+
+    _DAY = 86400
+
+    def _history(self, days):
+        """
+        :return: Timestamps and rates every 5 minutes, busy during the day and
+                 quiet at night.
+        """
+        timestamps = list(range(0, days * self._DAY, 300))
+        generator = random.Random(2)
+        rates = [generator.gauss(5000000 if 8 <= now % self._DAY // 3600 < 20
+                                 else 500000, 20000)
+                 for now in timestamps]
+        return timestamps, rates
+
+    def test_daily(self):
+        timestamps, rates = self._history(14)
+        detector = SeasonalBaseline(bins=24, alpha=0.05, width=4,
+                                    warmup=20)
+        self.assertLess(len(detector.backfill(timestamps, rates)), 5)
+        # a quiet night is expected, but the same rate at midday is not
+        now = 15 * self._DAY
+        self.assertIsNone(detector.update(_speed(500000), now + 3 * 3600))
+        anomaly = detector.update(_speed(500000), now + 12 * 3600)
+        self.assertIsNotNone(anomaly)
+        self.assertAlmostEqual(_bytes(anomaly.expected), 5000000,
+                               delta=50000)
+
+    def test_expected(self):
+        detector = SeasonalBaseline(period=Duration(hours=1), bins=4)
+        self.assertIsNone(detector.expected(0))
+        detector.update(_speed(1000), 60)
+        detector.update(_speed(3000), 3600 + 120)
+        self.assertEqual(detector.expected(7200 + 600), _speed(2000))
+        self.assertIsNone(detector.expected(7200 + 900))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            SeasonalBaseline(period=Duration.ZERO)
+        with self.assertRaises(ValueError):
+            SeasonalBaseline(bins=0)
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+
+from nibble import Information, Duration, Speed
+from nibble import bench_codec
+from nibble.bench_codec import CodecResult, CodecBenchmark
+
+_CHUNK = Information(4, Information.KIBIBYTES)
+
+
+class TestSyntheticData(unittest.TestCase):
+
+    def test_size(self):
+        for seed in range(100):
+            self.assertEqual(len(bench_codec.synthetic_data(
+                Information(1000, Information.BYTES), seed)), 1000)
+
+    def test_seed(self):
+        size = Information(1, Information.KIBIBYTES)
+        self.assertEqual(bench_codec.synthetic_data(size, 1),
+                         bench_codec.synthetic_data(size, 1))
+
+
+class TestLevels(unittest.TestCase):
+
+    def test_compressor(self):
+        self.assertEqual(bench_codec.levels('zlib'), (1, 6, 9))
+
+    def test_hash(self):
+        self.assertEqual(bench_codec.levels('sha1'), (None,))
+
+    def test_unrecognised(self):
+        with self.assertRaises(ValueError):
+            bench_codec.levels('rot13')
+
+
+class TestCodecResult(unittest.TestCase):
+
+    def setUp(self):
+        # 1 MB compressed to 250 kB in 1 ms
+        self._result = CodecResult(
+            'zlib', 6, _CHUNK, 1, Information(1, Information.MEGABYTES),
+            Information(250, Information.KILOBYTES),
+            Duration(milliseconds=1))
+
+    def test_speed(self):
+        self.assertEqual(self._result.speed,
+                         Speed(Information(1, Information.GIGABYTES)))
+
+    def test_ratio(self):
+        self.assertEqual(self._result.ratio, 4)
+
+    def test_transfer_durations_link_bound(self):
+        self.assertEqual(self._result.transfer_durations(Speed.GIGABIT),
+                         (Duration(milliseconds=8), Duration(milliseconds=2)))
+        self.assertEqual(self._result.speedup(Speed.GIGABIT), 4)
+
+    def test_transfer_durations_compressor_bound(self):
+        # the link would send the compressed data in 0.02 ms
+        link = Speed(Information(100, Information.GIGABITS))
+        self.assertEqual(self._result.transfer_durations(link),
+                         (Duration(microseconds=80), Duration(milliseconds=1)))
+        self.assertLess(self._result.speedup(link), 1)
+
+    def test_hash(self):
+        result = CodecResult('sha1', None, _CHUNK, 1,
+                             Information(1, Information.MEGABYTES), None,
+                             Duration(milliseconds=1))
+        self.assertIsNone(result.ratio)
+        with self.assertRaises(ValueError):
+            result.transfer_durations(Speed.GIGABIT)
+
+
+class TestCodecBenchmark(unittest.TestCase):
+
+    def setUp(self):
+        self._data = bench_codec.synthetic_data(
+            Information(32, Information.KIBIBYTES), 0)
+
+    def test_compressors(self):
+        with CodecBenchmark(self._data) as benchmark:
+            for algorithm in bench_codec.COMPRESSORS:
+                result = benchmark.run(algorithm, chunk_size=_CHUNK)
+                self.assertEqual(result.information,
+                                 Information(32, Information.KIBIBYTES))
+                self.assertGreater(result.ratio, 1)
+                self.assertTrue(result.duration)
+
+    def test_hashes(self):
+        with CodecBenchmark(self._data) as benchmark:
+            for algorithm in bench_codec.HASHES:
+                result = benchmark.run(algorithm, chunk_size=_CHUNK)
+                self.assertIsNone(result.level)
+                self.assertIsNone(result.ratio)
+
+    def test_default_level(self):
+        with CodecBenchmark(self._data) as benchmark:
+            self.assertEqual(benchmark.run('zlib').level, 6)
+
+    def test_chunk_size_affects_ratio(self):
+        with CodecBenchmark(self._data) as benchmark:
+            small = benchmark.run('zlib', 6, Information(64, Information.BYTES))
+            large = benchmark.run('zlib', 6, _CHUNK)
+        self.assertLess(small.ratio, large.ratio)
+
+    def test_processes(self):
+        with CodecBenchmark(self._data) as single:
+            expected = single.run('zlib', 1, _CHUNK).output
+        with CodecBenchmark(self._data, 2) as benchmark:
+            result = benchmark.run('zlib', 1, _CHUNK)
+            self.assertEqual(result.processes, 2)
+            self.assertEqual(result.output, expected)
+            # hashes are not split across processes
+            self.assertEqual(benchmark.run('sha1', None, _CHUNK).processes, 1)
+
+    def test_invalid(self):
+        with CodecBenchmark(self._data) as benchmark:
+            for args in [('rot13',), ('zlib', 10), ('bz2', 0), ('sha1', 1),
+                         ('zlib', 6, Information(1))]:
+                with self.assertRaises(ValueError):
+                    benchmark.run(*args)
+
+    def test_empty(self):
+        with self.assertRaises(ValueError):
+            CodecBenchmark(b'')
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+import tempfile
+import shutil
+import os
+import mmap
+
+import mock
+
+from nibble import Information, Duration, Speed
+from nibble.bench_disk import BenchmarkResult, DiskBenchmark, _seek_op
+
+
+class TestBenchmarkResult(unittest.TestCase):
+
+    def setUp(self):
+        self._result = BenchmarkResult(
+            'read', 'random', 'buffered', Information(1, Information.KIBIBYTES),
+            1, Information(4, Information.KIBIBYTES), Duration(seconds=2),
+            [10, 20, 30, 40])
+
+    def test_speed(self):
+        self.assertEqual(self._result.speed,
+                         Speed(Information(2, Information.KIBIBYTES)))
+
+    def test_operations_per_second(self):
+        self.assertEqual(self._result.operations_per_second, 2)
+
+    def test_percentile(self):
+        self.assertEqual(self._result.percentile(50), Duration(20))
+        self.assertEqual(self._result.percentile(51), Duration(30))
+        self.assertEqual(self._result.percentile(100), Duration(40))
+        self.assertEqual(self._result.percentile(0), Duration(10))
+
+
+class TestDiskBenchmark(unittest.TestCase):
+
+    _SIZE = Information(64, Information.KIBIBYTES)
+    _BLOCK = Information(mmap.PAGESIZE, Information.BYTES)
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._benchmark = DiskBenchmark(self._directory, self._SIZE)
+
+    def tearDown(self):
+        self._benchmark.close()
+        shutil.rmtree(self._directory)
+
+    def test_creates_file(self):
+        self.assertEqual(os.path.getsize(self._benchmark.path), 64 * 1024)
+        self.assertEqual(self._benchmark.size, self._SIZE)
+
+    def test_close_removes_file(self):
+        self._benchmark.close()
+        self.assertEqual(os.listdir(self._directory), [])
+
+    def test_read(self):
+        result = self._benchmark.run('read', 'sequential', self._BLOCK)
+        self.assertEqual(result.information, self._SIZE)
+        self.assertEqual(len(result.latencies), 64 * 1024 // mmap.PAGESIZE)
+        self.assertEqual(result.latencies, sorted(result.latencies))
+
+    def test_write_random(self):
+        result = self._benchmark.run('write', 'random', self._BLOCK, 4,
+                                     seed=1)
+        self.assertEqual(result.information, self._SIZE)
+        self.assertEqual(os.path.getsize(self._benchmark.path), 64 * 1024)
+
+    def test_mmap(self):
+        result = self._benchmark.run('read', 'random', self._BLOCK, 2, 'mmap')
+        self.assertEqual(result.mode, 'mmap')
+        self.assertEqual(result.information, self._SIZE)
+
+    def test_direct(self):
+        try:
+            result = self._benchmark.run('read', 'sequential', self._BLOCK,
+                                         mode='direct')
+        except ValueError:
+            self.skipTest('Direct I/O is not supported here')
+        self.assertEqual(result.information, self._SIZE)
+
+    def test_limit(self):
+        result = self._benchmark.run('read', 'random', self._BLOCK, limit=3)
+        self.assertEqual(len(result.latencies), 3)
+        self.assertEqual(result.information, self._BLOCK * 3)
+
+    def test_direct_without_preadv(self):
+        with mock.patch('nibble.bench_disk.os') as os_:
+            del os_.preadv
+            with self.assertRaises(ValueError):
+                self._benchmark.run('read', block_size=self._BLOCK,
+                                    mode='direct')
+
+    def test_seek_op(self):
+        # used where `os.pread()` and `os.pwrite()` are unavailable
+        fd = os.open(self._benchmark.path, os.O_RDWR)
+        try:
+            _seek_op('write')(fd, b'abcd', 8)
+            buffer_ = bytearray(4)
+            _seek_op('read')(fd, buffer_, 8)
+        finally:
+            os.close(fd)
+        self.assertEqual(buffer_, b'abcd')
+
+    def test_direct_unaligned(self):
+        with self.assertRaises(ValueError):
+            self._benchmark.run('read', block_size=Information(100),
+                                mode='direct')
+
+    def test_mmap_write(self):
+        with self.assertRaises(ValueError):
+            self._benchmark.run('write', mode='mmap')
+
+    def test_block_too_large(self):
+        with self.assertRaises(ValueError):
+            self._benchmark.run(block_size=self._SIZE * 2)
+
+    def test_invalid_arguments(self):
+        for kwargs in [{'operation': 'erase'}, {'pattern': 'zigzag'},
+                       {'mode': 'magic'}, {'queue_depth': 0}, {'limit': 0}]:
+            with self.assertRaises(ValueError):
+                self._benchmark.run(**kwargs)
+
+    def test_existing_file(self):
+        with DiskBenchmark(self._benchmark.path) as benchmark:
+            self.assertEqual(benchmark.size, self._SIZE)
+            result = benchmark.run('read', block_size=self._BLOCK)
+            self.assertEqual(result.information, self._SIZE)
+            with self.assertRaises(ValueError):
+                benchmark.run('write', block_size=self._BLOCK)
+        # the file was not created by the benchmark, so is not removed
+        self.assertTrue(os.path.exists(self._benchmark.path))
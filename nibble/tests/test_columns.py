@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+
+from nibble import Information, Duration, Speed
+from nibble.columns import format_column
+
+
+class TestFormatColumn(unittest.TestCase):
+
+    _SIZES = [Information(1, Information.GIBIBYTES),
+              Information(300, Information.MEBIBYTES),
+              Information(5)]
+
+    def test_empty(self):
+        self.assertEqual(format_column([]), [])
+
+    def test_max(self):
+        self.assertEqual(format_column(self._SIZES),
+                         ['1.00 GiB', '0.29 GiB', '0.00 GiB'])
+
+    def test_median(self):
+        self.assertEqual(format_column(self._SIZES, statistic='median'),
+                         ['1,024.00 MiB', '  300.00 MiB', '    0.00 MiB'])
+
+    def test_negative(self):
+        self.assertEqual(format_column([Information(-5000), Information(10)]),
+                         ['-625.00 B', '   1.25 B'])
+
+    def test_generator(self):
+        self.assertEqual(format_column(iter(self._SIZES[:2])),
+                         ['1.00 GiB', '0.29 GiB'])
+
+    def test_category(self):
+        self.assertEqual(format_column([Information(1, Information.MEGABYTES),
+                                        Information(2, Information.KILOBYTES)],
+                                       'dB'),
+                         ['1.00 MB', '0.00 MB'])
+
+    def test_unit(self):
+        self.assertEqual(format_column([Information(8), Information(16)],
+                                       'KB', separator=''),
+                         ['0.0010KB', '0.0020KB'])
+
+    def test_small_representative(self):
+        self.assertEqual(format_column([Information(1), Information(2)],
+                                       'B'),
+                         ['0.12 B', '0.25 B'])
+
+    def test_zero(self):
+        self.assertEqual(format_column([Information.ZERO]), ['0.00 B'])
+
+    def test_duration(self):
+        self.assertEqual(format_column([Duration(seconds=90),
+                                        Duration(milliseconds=5)]),
+                         ['1.50 m', '0.00 m'])
+
+    def test_duration_unit(self):
+        self.assertEqual(format_column([Duration(seconds=90),
+                                        Duration(milliseconds=5)], 'ms'),
+                         ['90,000.00 ms', '     5.00 ms'])
+
+    def test_speed(self):
+        self.assertEqual(format_column([Speed.GIGABIT, Speed.E1], 'db'),
+                         ['1.00 Gb/s', '0.00 Gb/s'])
+
+    def test_speed_time_unit(self):
+        self.assertEqual(format_column([Speed.GIGABIT, Speed.E1], 'dB/m'),
+                         ['7.50 GB/m', '0.02 GB/m'])
+
+    def test_mixed_types(self):
+        with self.assertRaises(TypeError):
+            format_column([Information(1), Duration(1)])
+
+    def test_unsupported_type(self):
+        with self.assertRaises(TypeError):
+            format_column([1, 2])
+
+    def test_invalid_category(self):
+        with self.assertRaises(ValueError):
+            format_column([Information(1)], 'foo')
+
+    def test_invalid_statistic(self):
+        with self.assertRaises(ValueError):
+            format_column([Information(1)], statistic='mean')
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, division
+import unittest
+import six
+
+from nibble import Information, Duration, Speed
+from nibble.convert import ColumnConverter, convert
+
+
+class TestColumnConverter(unittest.TestCase):
+
+    def test_init_bad_kind(self):
+        with self.assertRaises(ValueError):
+            ColumnConverter(0, kind='distance')
+
+    def test_init_bad_unit(self):
+        with self.assertRaises(ValueError):
+            ColumnConverter(0, unit='furlongs')
+
+    def test_parse_integer_default_unit(self):
+        self.assertEqual(ColumnConverter(0).parse('1024'),
+                         Information(1, Information.KIBIBYTES))
+
+    def test_parse_integer_unit(self):
+        self.assertEqual(ColumnConverter(0, unit='Mb').parse(' 5 '),
+                         Information(5, Information.MEGABITS))
+
+    def test_parse_float(self):
+        self.assertEqual(ColumnConverter(0, unit='KiB').parse('1.5'),
+                         Information(1536, Information.BYTES))
+
+    def test_parse_suffixed(self):
+        self.assertEqual(ColumnConverter(0, unit='Mb').parse('2 GiB'),
+                         Information(2, Information.GIBIBYTES))
+
+    def test_parse_rubbish(self):
+        with self.assertRaises(ValueError):
+            ColumnConverter(0).parse('rubbish')
+
+    def test_parse_not_finite(self):
+        for value in ['inf', '-inf', 'nan']:
+            with self.assertRaises(ValueError):
+                ColumnConverter(0).parse(value)
+
+    def test_parse_duration(self):
+        converter = ColumnConverter(0, kind='duration', unit='ms')
+        self.assertEqual(converter.parse('1500'), Duration(seconds=1.5))
+        self.assertEqual(converter.parse('2h'), Duration(hours=2))
+
+    def test_parse_speed(self):
+        converter = ColumnConverter(0, kind='speed', unit='Gb/s')
+        self.assertEqual(converter.parse('10'), Speed.TEN_GIGABIT)
+        self.assertEqual(converter.parse('1 Gb/s'), Speed.GIGABIT)
+
+    def test_convert_value(self):
+        self.assertEqual(ColumnConverter(0, ' MiB').convert_value('1048576'),
+                         '1 MiB')
+
+    def test_convert_row(self):
+        self.assertListEqual(ColumnConverter(1).convert_row(['a', '2048']),
+                             ['a', '2 KiB'])
+
+    def test_convert_row_missing_column(self):
+        with self.assertRaises(ValueError):
+            ColumnConverter(2).convert_row(['a', '2048'])
+
+
+class TestConvert(unittest.TestCase):
+
+    _INPUT = 'name,size\na,1024\nb,"3 MiB"\nc,1.5 GB\n'
+
+    def _convert(self, input_, converter, **kwargs):
+        outfile = six.StringIO()
+        count = convert(six.StringIO(input_), outfile, converter, **kwargs)
+        return count, outfile.getvalue()
+
+    def test_header(self):
+        self.assertEqual(self._convert(self._INPUT, ColumnConverter(1),
+                                       header=True),
+                         (3, 'name,size\na,1 KiB\nb,3 MiB\nc,1.4 GiB\n'))
+
+    def test_empty(self):
+        self.assertEqual(self._convert('', ColumnConverter(1), header=True),
+                         (0, ''))
+
+    def test_delimiter(self):
+        self.assertEqual(self._convert('a\t8\n', ColumnConverter(1, 'b'),
+                                       delimiter='\t'),
+                         (1, 'a\t64b\n'))
+
+    def test_quoting(self):
+        self.assertEqual(self._convert('a,1000\n',
+                                       ColumnConverter(1, ',.0f|B')),
+                         (1, 'a,"1,000B"\n'))
+
+    def test_batches(self):
+        input_ = ''.join('{0},{0}\n'.format(i) for i in range(10))
+        self.assertEqual(self._convert(input_, ColumnConverter(0),
+                                       batch_size=3),
+                         self._convert(input_, ColumnConverter(0)))
+
+    def test_error_row(self):
+        with six.assertRaisesRegex(self, ValueError, 'Row 5'):
+            self._convert(self._INPUT + 'd,rubbish\n', ColumnConverter(1),
+                          header=True, batch_size=2)
+
+    def test_jobs(self):
+        input_ = ''.join('{0},{0}\n'.format(i * 999) for i in range(100))
+        self.assertEqual(self._convert(input_, ColumnConverter(1), jobs=2,
+                                       batch_size=7),
+                         self._convert(input_, ColumnConverter(1)))
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+import threading
+
+from nibble import Information, Speed
+from nibble.counter import ByteCounter, Snapshot
+
+
+class TestByteCounter(unittest.TestCase):
+
+    def test_empty(self):
+        self.assertEqual(ByteCounter().information, Information.ZERO)
+
+    def test_add(self):
+        counter = ByteCounter()
+        counter.add(100)
+        counter.add(50)
+        self.assertEqual(counter.bytes, 150)
+        self.assertEqual(counter.information,
+                         Information(150, Information.BYTES))
+
+    def test_threads(self):
+        counter = ByteCounter()
+
+        def work():
+            for _ in range(10000):
+                counter.add(3)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counter.add(1)
+        self.assertEqual(counter.bytes, 240001)
+        # the exited threads' shards were folded when read
+        self.assertEqual(len(counter._shards), 1)
+
+    def test_exited_threads(self):
+        counter = ByteCounter()
+        for _ in range(40):
+            thread = threading.Thread(target=counter.add, args=(2,))
+            thread.start()
+            thread.join()
+        # folded as new threads registered, without reading
+        self.assertLess(len(counter._shards), 40)
+        counter.add(1)
+        self.assertEqual(counter.bytes, 81)
+        # only the current thread's shard is left
+        self.assertEqual(len(counter._shards), 1)
+
+    def test_snapshot(self):
+        counter = ByteCounter()
+        counter.add(1000)
+        earlier = counter.snapshot(10)
+        counter.add(500)
+        later = counter.snapshot(12)
+        self.assertEqual(later.information,
+                         Information(1500, Information.BYTES))
+        self.assertEqual(later.speed_since(earlier),
+                         Speed(Information(250, Information.BYTES)))
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def test_speed_no_time(self):
+        self.assertEqual(Snapshot(100, 5).speed_since(Snapshot(0, 5)),
+                         Speed.ZERO)
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+import tempfile
+import shutil
+import os
+import collections
+import mock
+
+from nibble import Information, Duration, Speed
+from nibble.df import mount_points, GrowthFit, Filesystem, FilesystemSampler
+
+_StatVfs = collections.namedtuple('_StatVfs', ['f_frsize', 'f_blocks',
+                                               'f_bfree', 'f_bavail'])
+
+
+class TestMountPoints(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def test_parse(self):
+        path = os.path.join(self._directory, 'mounts')
+        with open(path, 'wb') as f:
+            f.write(b'proc /proc proc rw,relatime 0 0\n'
+                    b'/dev/sda1 / ext4 rw 0 0\n'
+                    b'/dev/sdb1 /mnt/my\\040disk ext4 rw 0 0\n')
+        self.assertEqual(mount_points(path), ['/proc', '/', '/mnt/my disk'])
+
+    def test_missing(self):
+        with self.assertRaises(EnvironmentError):
+            mount_points(os.path.join(self._directory, 'missing'))
+
+
+class TestGrowthFit(unittest.TestCase):
+
+    def test_empty(self):
+        self.assertIsNone(GrowthFit().slope)
+
+    def test_single_time(self):
+        fit = GrowthFit()
+        fit.add(1, 10)
+        fit.add(1, 20)
+        self.assertIsNone(fit.slope)
+
+    def test_line(self):
+        fit = GrowthFit()
+        for time_ in range(10):
+            fit.add(time_, 100 + 3 * time_)
+        self.assertAlmostEqual(fit.slope, 3)
+        self.assertEqual(fit.count, 10)
+
+    def test_noise(self):
+        fit = GrowthFit()
+        for time_, value in [(0, 1), (1, 3), (2, 2), (3, 4)]:
+            fit.add(time_, value)
+        # the ordinary least squares slope
+        self.assertAlmostEqual(fit.slope, 0.8)
+
+    def test_large_times(self):
+        fit = GrowthFit()
+        for time_ in range(100):
+            fit.add(1.5e9 + time_, 1e12 + 7 * time_)
+        self.assertAlmostEqual(fit.slope, 7, places=3)
+
+
+class TestFilesystem(unittest.TestCase):
+
+    def setUp(self):
+        self._filesystem = Filesystem('/')
+        self._filesystem.available = 1000
+
+    def test_unsampled(self):
+        self.assertIsNone(self._filesystem.rate)
+        self.assertIsNone(self._filesystem.time_to_full)
+
+    def test_growing(self):
+        self._filesystem.fit.add(0, 0)
+        self._filesystem.fit.add(10, 100)
+        self.assertEqual(self._filesystem.rate,
+                         Speed(Information(10, Information.BYTES)))
+        self.assertEqual(self._filesystem.time_to_full,
+                         Duration(seconds=100))
+
+    def test_shrinking(self):
+        self._filesystem.fit.add(0, 100)
+        self._filesystem.fit.add(10, 0)
+        self.assertEqual(self._filesystem.rate,
+                         Speed(Information(-10, Information.BYTES)))
+        self.assertIsNone(self._filesystem.time_to_full)
+
+    def test_slow(self):
+        # one byte per day
+        self._filesystem.fit.add(0, 0)
+        self._filesystem.fit.add(86400, 1)
+        self.assertEqual(self._filesystem.rate,
+                         Speed(Information(1, Information.BYTES),
+                               Duration(days=1)))
+
+
+class TestFilesystemSampler(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def test_sample(self):
+        sampler = FilesystemSampler([self._directory])
+        self.assertEqual(len(sampler.filesystems), 1)
+        readings = [_StatVfs(4096, 100, 50, 40), _StatVfs(4096, 100, 40, 30)]
+        with mock.patch('os.statvfs', side_effect=readings):
+            sampler.sample(0)
+            sampler.sample(10)
+        filesystem = sampler.filesystems[0]
+        self.assertEqual(filesystem.size, 409600)
+        self.assertEqual(filesystem.used, 245760)
+        self.assertEqual(filesystem.available, 122880)
+        self.assertEqual(filesystem.rate,
+                         Speed(Information(4096, Information.BYTES)))
+        self.assertEqual(filesystem.time_to_full, Duration(seconds=30))
+
+    def test_duplicates(self):
+        sampler = FilesystemSampler([self._directory, self._directory])
+        self.assertEqual(len(sampler.filesystems), 1)
+
+    def test_missing_path(self):
+        with self.assertRaises(EnvironmentError):
+            FilesystemSampler([os.path.join(self._directory, 'missing')])
+
+    def test_mount_table(self):
+        path = os.path.join(self._directory, 'mounts')
+        with open(path, 'w') as f:
+            f.write('/dev/sda1 {0} ext4 rw 0 0\n'
+                    'gone {1} ext4 rw 0 0\n'.format(
+                        self._directory,
+                        os.path.join(self._directory, 'gone')))
+        sampler = FilesystemSampler(mounts=path)
+        self.assertEqual([filesystem.path
+                          for filesystem in sampler.filesystems],
+                         [self._directory])
+
+    def test_unmounted(self):
+        sampler = FilesystemSampler([self._directory])
+        with mock.patch('os.statvfs', side_effect=[_StatVfs(1, 10, 5, 5),
+                                                   OSError(2, 'Gone')]):
+            sampler.sample(0)
+            sampler.sample(1)
+        self.assertEqual(sampler.filesystems[0].fit.count, 1)
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, division
+import unittest
+import os
+import shutil
+import tempfile
+
+import mock
+
+from nibble import Information, Duration, Speed
+from nibble.du import DirectoryUsage, scan
+
+
+class TestDirectoryUsage(unittest.TestCase):
+
+    def test_apparent(self):
+        usage = DirectoryUsage('a', 0)
+        usage.apparent_bytes = 1024
+        self.assertEqual(usage.apparent, Information(1, Information.KIBIBYTES))
+
+    def test_allocated(self):
+        usage = DirectoryUsage('a', 0)
+        usage.allocated_bytes = 4096
+        self.assertEqual(usage.allocated,
+                         Information(4, Information.KIBIBYTES))
+
+    def test_at_speed(self):
+        usage = DirectoryUsage('a', 0)
+        usage.apparent_bytes = 125 * 10 ** 6
+        self.assertEqual(usage.at_speed(Speed.GIGABIT), Duration(seconds=1))
+
+
+class TestScan(unittest.TestCase):
+
+    def setUp(self):
+        # root/
+        #   a (100 B)
+        #   sub/
+        #     b (200 B)
+        #     c -> ../a (hard link)
+        #     deeper/
+        #       d (300 B)
+        #   link -> sub (symbolic link)
+        self._root = tempfile.mkdtemp()
+        self._write('a', 100)
+        os.makedirs(os.path.join(self._root, 'sub', 'deeper'))
+        self._write(os.path.join('sub', 'b'), 200)
+        self._write(os.path.join('sub', 'deeper', 'd'), 300)
+        os.link(os.path.join(self._root, 'a'),
+                os.path.join(self._root, 'sub', 'c'))
+        os.symlink('sub', os.path.join(self._root, 'link'))
+
+    def tearDown(self):
+        shutil.rmtree(self._root)
+
+    def _write(self, name, size):
+        with open(os.path.join(self._root, name), 'wb') as f:
+            f.write(b'\0' * size)
+
+    def _directory_bytes(self, *names):
+        return sum(os.lstat(os.path.join(self._root, name)).st_size
+                   for name in names)
+
+    def test_order(self):
+        paths = [usage.path for usage in scan(self._root, jobs=2)]
+        self.assertEqual(len(paths), 3)
+        self.assertLess(paths.index(os.path.join(self._root, 'sub', 'deeper')),
+                        paths.index(os.path.join(self._root, 'sub')))
+        self.assertEqual(paths[-1], self._root)
+
+    def test_totals(self):
+        root = list(scan(self._root, jobs=3))[-1]
+        # a, b, d and the symbolic link; the hard link is skipped
+        self.assertEqual(root.files, 4)
+        self.assertEqual(root.directories, 3)
+        self.assertEqual(root.errors, 0)
+        # the hard link is only counted once
+        self.assertEqual(root.apparent_bytes,
+                         600 + len('sub') +
+                         self._directory_bytes('', 'sub', 'sub/deeper'))
+        self.assertGreater(root.allocated_bytes, 0)
+
+    def test_max_depth(self):
+        usages = list(scan(self._root, max_depth=1))
+        self.assertListEqual(sorted(usage.depth for usage in usages), [0, 1])
+
+    def test_file(self):
+        usages = list(scan(os.path.join(self._root, 'a')))
+        self.assertEqual(len(usages), 1)
+        self.assertEqual(usages[0].apparent_bytes, 100)
+
+    def test_missing(self):
+        with self.assertRaises(OSError):
+            list(scan(os.path.join(self._root, 'missing')))
+
+    def test_stop_early(self):
+        usages = scan(self._root)
+        next(usages)
+        usages.close()
+
+
+class TestScanWithoutScandir(TestScan):
+    """
+    The scan tests again, listing with `os.listdir()` and `os.lstat()`.
+    """
+
+    def setUp(self):
+        super(TestScanWithoutScandir, self).setUp()
+        patcher = mock.patch('nibble.util._scandir', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
@@ -54,6 +54,24 @@ class TestDuration(unittest.TestCase):
     def test_is_valid_symbol_false(self):
         self.assertFalse(Duration.is_valid_symbol('dz'))
 
+    def test_parse_rubbish(self):
+        with self.assertRaises(ValueError):
+            Duration.parse('rubbish')
+
+    def test_parse_invalid_number(self):
+        with self.assertRaises(ValueError):
+            Duration.parse('1.2.3 h')
+
+    def test_parse_invalid_unit(self):
+        with self.assertRaises(ValueError):
+            Duration.parse('1 fortnight')
+
+    def test_parse_integer(self):
+        self.assertEqual(Duration.parse('90 s'), Duration(minutes=1.5))
+
+    def test_parse_decimal(self):
+        self.assertEqual(Duration.parse('1.5h'), Duration(minutes=90))
+
     def test_total_seconds(self):
         self.assertEqual(Duration(seconds=1.5).total_seconds(),
                          datetime.timedelta(seconds=1.5).total_seconds())
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, division
+import unittest
+import array
+import math
+
+from nibble import Information, Duration, Speed
+from nibble.estimators import EwmaRate, WindowRate
+
+
+def _bytes_per_second(speed):
+    # `Information` rounds up to whole bits, so this is only accurate to
+    # within an eighth of a byte
+    return speed.information.bits / Information.BYTES / \
+        speed.duration.total_seconds()
+
+
+class TestEwmaRate(unittest.TestCase):
+
+    def test_invalid_half_life(self):
+        with self.assertRaises(ValueError):
+            EwmaRate(Duration.ZERO)
+
+    def test_no_time(self):
+        estimator = EwmaRate(start=10)
+        estimator.update(100, 10)
+        self.assertEqual(estimator.speed(10), Speed.ZERO)
+
+    def test_constant_rate(self):
+        # exact from the first update, before a half-life has passed
+        estimator = EwmaRate(Duration(seconds=10), start=0)
+        for second in range(1, 31):
+            estimator.update(1000, second)
+            self.assertAlmostEqual(
+                _bytes_per_second(estimator.speed(second)), 1000, delta=0.2)
+
+    def test_half_life(self):
+        estimator = EwmaRate(Duration(seconds=1), start=0)
+        for tenth in range(1, 1001):
+            estimator.update(100, tenth / 10)
+        # the rate drops from 1000 B/s to 0, so after one half-life, half the
+        # weight is on the second of silence
+        self.assertAlmostEqual(_bytes_per_second(estimator.speed(101)), 500,
+                               delta=1)
+
+    def test_out_of_order(self):
+        estimator = EwmaRate(Duration(seconds=1), start=0)
+        estimator.update(100, 2)
+        without = _bytes_per_second(estimator.speed(2))
+        estimator.update(100, 1)
+        # counted a half-life ago, so worth 50 bytes now, over the decayed
+        # time since the start
+        seconds = (1 - 0.25) / math.log(2)
+        self.assertAlmostEqual(_bytes_per_second(estimator.speed(2)),
+                               without + 50 / seconds, delta=0.2)
+
+    def test_add(self):
+        # an estimator counting the weighted updates of others has their sum
+        first = EwmaRate(Duration(seconds=1), start=0)
+        second = EwmaRate(Duration(seconds=1), start=0)
+        total = EwmaRate(Duration(seconds=1), start=0)
+        for now, count in ((0.5, 100), (1, 300), (1.5, 50), (3, 700)):
+            total.add(first.update(count, now), now)
+            total.add(second.update(count * 2, now + 0.25), now + 0.25)
+        self.assertAlmostEqual(
+            _bytes_per_second(total.speed(4)),
+            _bytes_per_second(first.speed(4)) +
+            _bytes_per_second(second.speed(4)), delta=0.3)
+
+    def test_update_many(self):
+        timestamps = array.array(str('d'), [0.5, 1, 1.25, 0.75, 3])
+        counts = array.array(str('l'), [10, 20, 30, 40, 50])
+        single = EwmaRate(start=0)
+        for timestamp, count in zip(timestamps, counts):
+            single.update(count, timestamp)
+        batched = EwmaRate(start=0)
+        batched.update_many(timestamps, counts)
+        self.assertAlmostEqual(_bytes_per_second(single.speed(4)),
+                               _bytes_per_second(batched.speed(4)))
+
+    def test_update_many_mismatched(self):
+        with self.assertRaises(ValueError):
+            EwmaRate(start=0).update_many([1, 2], [3])
+
+
+class TestWindowRate(unittest.TestCase):
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            WindowRate(Duration.ZERO)
+        with self.assertRaises(ValueError):
+            WindowRate(buckets=0)
+
+    def test_filling(self):
+        estimator = WindowRate(Duration(seconds=10), start=0)
+        estimator.update(500, 0.5)
+        estimator.update(500, 1.5)
+        self.assertEqual(estimator.speed(2),
+                         Speed(Information(500, Information.BYTES)))
+        self.assertEqual(estimator.information,
+                         Information(1000, Information.BYTES))
+
+    def test_slides(self):
+        estimator = WindowRate(Duration(seconds=4), buckets=4, start=0)
+        for second in range(8):
+            estimator.update(100 * second, second + 0.5)
+        self.assertEqual(estimator.information,
+                         Information(2200, Information.BYTES))
+        # buckets 5, 6 and 7, and none of bucket 8
+        self.assertAlmostEqual(_bytes_per_second(estimator.speed(8)), 600)
+        self.assertEqual(estimator.information,
+                         Information(1800, Information.BYTES))
+        self.assertAlmostEqual(_bytes_per_second(estimator.speed(8.5)),
+                               1800 / 3.5, delta=0.2)
+
+    def test_expires(self):
+        estimator = WindowRate(Duration(seconds=4), buckets=4, start=0)
+        estimator.update(100, 1)
+        self.assertEqual(estimator.speed(100), Speed.ZERO)
+        self.assertEqual(estimator.information, Information.ZERO)
+
+    def test_ignores_old(self):
+        estimator = WindowRate(Duration(seconds=4), buckets=4, start=0)
+        estimator.update(100, 10)
+        estimator.update(100, 5)
+        estimator.update(100, 7)
+        self.assertEqual(estimator.information,
+                         Information(200, Information.BYTES))
+
+    def test_update_many(self):
+        timestamps = [0.5, 2, 1, 5, 9.5, 6, 11]
+        counts = [10, 20, 30, 40, 50, 60, 70]
+        single = WindowRate(Duration(seconds=4), buckets=8, start=0)
+        for timestamp, count in zip(timestamps, counts):
+            single.update(count, timestamp)
+        batched = WindowRate(Duration(seconds=4), buckets=8, start=0)
+        batched.update_many(timestamps, counts)
+        self.assertEqual(single.information, batched.information)
+        self.assertEqual(single.speed(12), batched.speed(12))
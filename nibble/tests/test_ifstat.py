@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+import tempfile
+import shutil
+import os
+
+from nibble import Information, Speed
+from nibble.ifstat import InterfaceSampler, link_speed
+
+_HEADER = (
+    'Inter-|   Receive                                                |  '
+    'Transmit\n'
+    ' face |bytes    packets errs drop fifo frame compressed multicast|'
+    'bytes    packets errs drop fifo colls carrier compressed\n')
+
+
+def _counters(interfaces):
+    """
+    Generate the contents of /proc/net/dev.
+
+    :param interfaces: A list of (name, rx bytes, rx packets, tx bytes, tx
+                       packets) tuples.
+    :return: The contents as a string.
+    """
+    return _HEADER + ''.join(
+        '{0:>6}: {1} {2} 0 0 0 0 0 0 {3} {4} 0 0 0 0 0 0\n'.format(*interface)
+        for interface in interfaces)
+
+
+class TestLinkSpeed(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        for name, speed in [('eth0', '10000\n'), ('eth1', '-1\n'),
+                            ('eth2', 'x\n')]:
+            os.mkdir(os.path.join(self._directory, name))
+            with open(os.path.join(self._directory, name, 'speed'), 'w') as f:
+                f.write(speed)
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def test_speed(self):
+        self.assertEqual(link_speed('eth0', self._directory),
+                         Speed.TEN_GIGABIT)
+
+    def test_unknown(self):
+        self.assertIsNone(link_speed('eth1', self._directory))
+
+    def test_invalid(self):
+        self.assertIsNone(link_speed('eth2', self._directory))
+
+    def test_missing(self):
+        self.assertIsNone(link_speed('eth3', self._directory))
+
+
+class TestInterfaceSampler(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._path = os.path.join(self._directory, 'dev')
+        self._write([('lo', 1000, 10, 1000, 10), ('eth0', 0, 0, 500, 5)])
+        self._sampler = InterfaceSampler(path=self._path)
+
+    def tearDown(self):
+        self._sampler.close()
+        shutil.rmtree(self._directory)
+
+    def _write(self, interfaces):
+        with open(self._path, 'w') as f:
+            f.write(_counters(interfaces))
+
+    def test_first_sample(self):
+        self._sampler.sample(0)
+        self.assertEqual(self._sampler.names, ['lo', 'eth0'])
+        self.assertEqual(list(self._sampler.rates()),
+                         [('lo', Speed.ZERO, Speed.ZERO),
+                          ('eth0', Speed.ZERO, Speed.ZERO)])
+
+    def test_rates(self):
+        self._sampler.sample(0)
+        self._write([('lo', 3000, 20, 1000, 10), ('eth0', 0, 0, 1500, 15)])
+        self._sampler.sample(2)
+        self.assertEqual(self._sampler.elapsed, 2)
+        self.assertEqual(list(self._sampler.rates()), [
+            ('lo', Speed(Information(1000, Information.BYTES)), Speed.ZERO),
+            ('eth0', Speed.ZERO, Speed(Information(500, Information.BYTES)))])
+        self.assertEqual(list(self._sampler.rx_packets_per_second), [5, 0])
+        self.assertEqual(list(self._sampler.tx_packets_per_second), [0, 5])
+
+    def test_reset(self):
+        self._sampler.sample(0)
+        self._write([('lo', 1000, 10, 1000, 10), ('eth0', 0, 0, 100, 1)])
+        self._sampler.sample(1)
+        self.assertEqual(self._sampler.tx_bits_per_second[1], 800)
+
+    def test_wrap(self):
+        sampler = InterfaceSampler(path=self._path, width=32)
+        try:
+            self._write([('eth0', 2 ** 32 - 100, 0, 0, 0)])
+            sampler.sample(0)
+            self._write([('eth0', 100, 0, 0, 0)])
+            sampler.sample(1)
+            self.assertEqual(sampler.rx_bits_per_second[0], 1600)
+        finally:
+            sampler.close()
+
+    def test_new_interface(self):
+        self._sampler.sample(0)
+        self._write([('lo', 1000, 10, 1000, 10), ('eth0', 0, 0, 500, 5),
+                     ('eth1', 800, 1, 0, 0)])
+        self._sampler.sample(1)
+        self.assertEqual(self._sampler.names, ['lo', 'eth0', 'eth1'])
+        # no previous reading, so no rate yet
+        self.assertEqual(self._sampler.rx_bits_per_second[2], 0)
+
+    def test_removed_interface(self):
+        self._sampler.sample(0)
+        self._write([('eth0', 0, 0, 1500, 15)])
+        self._sampler.sample(2)
+        self.assertEqual(self._sampler.names, ['eth0'])
+        self.assertEqual(list(self._sampler.rates()), [
+            ('eth0', Speed.ZERO, Speed(Information(500, Information.BYTES)))])
+        self.assertEqual(list(self._sampler.tx_packets_per_second), [5])
+        with self.assertRaises(KeyError):
+            self._sampler.utilisation('lo', Speed.GIGABIT)
+        # back again, so starts afresh
+        self._write([('eth0', 0, 0, 1500, 15), ('lo', 5000, 50, 5000, 50)])
+        self._sampler.sample(3)
+        self.assertEqual(self._sampler.names, ['eth0', 'lo'])
+        self.assertEqual(self._sampler.rx_bits_per_second[1], 0)
+
+    def test_interfaces(self):
+        sampler = InterfaceSampler(['eth0'], path=self._path)
+        try:
+            sampler.sample(0)
+            self.assertEqual(sampler.names, ['eth0'])
+        finally:
+            sampler.close()
+
+    def test_large_file(self):
+        self._write([('veth{0}'.format(i), i, i, i, i) for i in range(200)])
+        self._sampler.sample(0)
+        self.assertEqual(len(self._sampler.names), 200)
+
+    def test_utilisation(self):
+        self._sampler.sample(0)
+        self._write([('lo', 1000, 10, 1000, 10),
+                     ('eth0', 125000000, 0, 12500500, 5)])
+        self._sampler.sample(1)
+        self.assertEqual(self._sampler.utilisation('eth0', Speed.GIGABIT),
+                         (1, .1))
+
+    def test_utilisation_unknown(self):
+        with self.assertRaises(KeyError):
+            self._sampler.utilisation('eth9', Speed.GIGABIT)
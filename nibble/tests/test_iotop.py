@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+import tempfile
+import shutil
+import os
+import errno
+import mock
+
+from nibble import Information, Speed
+from nibble.iotop import ProcessSampler
+
+
+class TestProcessSampler(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self._directory, 'self'))
+        self._process(1, 'init')
+        self._process(42, 'writer')
+        self._sampler = ProcessSampler(directory=self._directory)
+
+    def tearDown(self):
+        self._sampler.close()
+        shutil.rmtree(self._directory)
+
+    def _process(self, pid, name, rchar=0, wchar=0, read=0, write=0):
+        directory = os.path.join(self._directory, str(pid))
+        if not os.path.isdir(directory):
+            os.mkdir(directory)
+            with open(os.path.join(directory, 'comm'), 'w') as f:
+                f.write(name + '\n')
+        # rewritten in place, so open descriptors see the new counters
+        with open(os.path.join(directory, 'io'), 'w') as f:
+            f.write('rchar: {0}\nwchar: {1}\nsyscr: 0\nsyscw: 0\n'
+                    'read_bytes: {2}\nwrite_bytes: {3}\n'
+                    'cancelled_write_bytes: 0\n'.format(rchar, wchar, read,
+                                                        write))
+
+    def test_discovery(self):
+        self._sampler.sample(0)
+        self.assertEqual(sorted(self._sampler.processes), [1, 42])
+        self.assertEqual(self._sampler.processes[42].name, 'writer')
+
+    def test_first_sample_idle(self):
+        self._sampler.sample(0)
+        self.assertEqual(self._sampler.top(), [])
+
+    def test_top_disk(self):
+        self._sampler.sample(0)
+        self._process(1, 'init', read=100)
+        self._process(42, 'writer', rchar=10 ** 6, write=1000)
+        self._sampler.sample(2)
+        self.assertEqual(self._sampler.top(), [
+            (42, 'writer', Speed.ZERO,
+             Speed(Information(500, Information.BYTES))),
+            (1, 'init', Speed(Information(50, Information.BYTES)),
+             Speed.ZERO)])
+
+    def test_top_all(self):
+        self._sampler.sample(0)
+        self._process(42, 'writer', rchar=1000, wchar=2000)
+        self._sampler.sample(1)
+        self.assertEqual(self._sampler.top(kind='all'), [
+            (42, 'writer', Speed(Information(1000, Information.BYTES)),
+             Speed(Information(2000, Information.BYTES)))])
+
+    def test_top_count(self):
+        self._sampler.sample(0)
+        self._process(1, 'init', read=100)
+        self._process(42, 'writer', write=1000)
+        self._sampler.sample(1)
+        self.assertEqual([pid for pid, _, _, _ in self._sampler.top(1)], [42])
+
+    def test_top_invalid_kind(self):
+        with self.assertRaises(ValueError):
+            self._sampler.top(kind='network')
+
+    def test_pids(self):
+        with ProcessSampler([42], self._directory) as sampler:
+            sampler.sample(0)
+            self.assertEqual(list(sampler.processes), [42])
+
+    def test_new_process(self):
+        self._sampler.sample(0)
+        self._process(7, 'new', write=100)
+        self._sampler.sample(1)
+        self.assertIn(7, self._sampler.processes)
+        # no rate until its second sample
+        self.assertEqual(self._sampler.top(), [])
+
+    def test_exited_uncached(self):
+        with ProcessSampler(directory=self._directory, max_fds=0) as sampler:
+            sampler.sample(0)
+            shutil.rmtree(os.path.join(self._directory, '42'))
+            sampler.sample(1)
+            self.assertEqual(list(sampler.processes), [1])
+
+    def test_zombie(self):
+        self._sampler.sample(0)
+        open(os.path.join(self._directory, '42', 'io'), 'w').close()
+        self._sampler.sample(1)
+        self.assertEqual(list(self._sampler.processes), [1])
+
+    def test_denied(self):
+        self._sampler.sample(0)
+        with mock.patch('os.read',
+                        side_effect=OSError(errno.EACCES, 'Denied')):
+            self._sampler.sample(1)
+        self.assertEqual(self._sampler.processes, {})
+        # not retried
+        self._sampler.sample(2)
+        self.assertEqual(self._sampler.processes, {})
+
+    def test_denied_pid_reused(self):
+        self._sampler.sample(0)
+        with mock.patch('os.read',
+                        side_effect=OSError(errno.EACCES, 'Denied')):
+            self._sampler.sample(1)
+        shutil.rmtree(os.path.join(self._directory, '42'))
+        self._sampler.sample(2)
+        # a new process with the same PID is readable
+        self._process(42, 'reader')
+        self._sampler.sample(3)
+        self.assertEqual(self._sampler.processes[42].name, 'reader')
+        self.assertNotIn(1, self._sampler.processes)
+
+    def test_close(self):
+        self._sampler.sample(0)
+        self._sampler.close()
+        self.assertEqual(self._sampler.processes, {})
+        self.assertEqual(self._sampler._open_fds, 0)
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, division
+import array
+import io
+import threading
+import time
+import unittest
+
+import mock
+
+from nibble import Information, Duration, Speed
+from nibble.limiter import TokenBucket, LimitedFile, LimitedSocket
+
+
+def _bucket(bytes_per_second=1000, burst=500, parent=None):
+    return TokenBucket(Speed(Information(bytes_per_second,
+                                         Information.BYTES)),
+                       Information(burst, Information.BYTES), parent, start=0)
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_burst(self):
+        bucket = _bucket()
+        self.assertEqual(bucket.burst_bytes, 500)
+        self.assertEqual(bucket.reserve(300, 0), 0)
+        self.assertEqual(bucket.reserve(200, 0), 0)
+        self.assertAlmostEqual(bucket.reserve(100, 0), 0.1)
+
+    def test_refill(self):
+        bucket = _bucket()
+        bucket.reserve(500, 0)
+        self.assertEqual(bucket.reserve(250, 0.25), 0)
+        # refills no further than the burst
+        self.assertEqual(bucket.reserve(500, 10), 0)
+        self.assertAlmostEqual(bucket.reserve(1, 10), 0.001)
+
+    def test_debt(self):
+        bucket = _bucket()
+        # larger than the burst, so waits for the excess
+        self.assertAlmostEqual(bucket.reserve(2500, 0), 2)
+        # queued behind the debt
+        self.assertAlmostEqual(bucket.reserve(500, 1), 1.5)
+
+    def test_limit(self):
+        bucket = _bucket()
+        bucket.reserve(500, 0)
+        self.assertIsNone(bucket.reserve(100, 0, limit=0.05))
+        # nothing was taken
+        self.assertAlmostEqual(bucket.reserve(100, 0, limit=0.1), 0.1)
+
+    def test_parent(self):
+        parent = _bucket(bytes_per_second=100, burst=100)
+        child = _bucket(parent=parent)
+        sibling = _bucket(parent=parent)
+        self.assertEqual(child.reserve(100, 0), 0)
+        self.assertAlmostEqual(sibling.reserve(100, 0), 1)
+        # the parent's limit is the tighter
+        self.assertAlmostEqual(child.reserve(50, 0), 1.5)
+
+    def test_parent_limit(self):
+        parent = _bucket(burst=100)
+        child = _bucket(parent=parent)
+        self.assertIsNone(child.reserve(200, 0, limit=0))
+        # the child's tokens were returned
+        self.assertEqual(child.reserve(500, 0, limit=1), 0.4)
+
+    def test_release(self):
+        parent = _bucket()
+        child = _bucket(parent=parent)
+        child.reserve(1000, 0)
+        self.assertAlmostEqual(parent.reserve(0, 0), 0.5)
+        child.release(500)
+        self.assertEqual(child.reserve(0, 0), 0)
+        self.assertEqual(parent.reserve(0, 0), 0)
+
+    def test_acquire(self):
+        bucket = TokenBucket(Speed(Information(1000, Information.BYTES)),
+                             Information(100, Information.BYTES))
+        with mock.patch('time.sleep') as sleep:
+            self.assertTrue(bucket.acquire(100))
+            sleep.assert_not_called()
+            self.assertTrue(bucket.acquire(100))
+            self.assertAlmostEqual(sleep.call_args[0][0], 0.1, delta=0.01)
+
+    def test_acquire_non_blocking(self):
+        bucket = TokenBucket(Speed(Information(1000, Information.BYTES)),
+                             Information(100, Information.BYTES))
+        with mock.patch('time.sleep') as sleep:
+            self.assertTrue(bucket.acquire(100, blocking=False))
+            self.assertFalse(bucket.acquire(100, blocking=False))
+            self.assertFalse(bucket.acquire(
+                100, timeout=Duration(milliseconds=10)))
+            self.assertTrue(bucket.acquire(100, timeout=Duration(seconds=1)))
+            self.assertEqual(sleep.call_count, 1)
+
+    def test_threads(self):
+        # 20 kB/s, so 8 threads taking 1 kB 5 times each after the first 5 kB
+        # burst takes about 1.75 seconds
+        bucket = TokenBucket(Speed(Information(20, Information.KILOBYTES)),
+                             Information(5, Information.KILOBYTES))
+
+        def work():
+            for _ in range(5):
+                bucket.acquire(1000)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        started = time.time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertAlmostEqual(time.time() - started, 1.75, delta=0.25)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(Speed.ZERO, Information(1, Information.BYTES))
+        with self.assertRaises(ValueError):
+            TokenBucket(Speed.GIGABIT, Information(4))
+
+
+class TestLimitedFile(unittest.TestCase):
+
+    def setUp(self):
+        self._file = io.BytesIO()
+        self._limited = LimitedFile(self._file, _bucket(burst=4),
+                                    min_sleep=Duration(milliseconds=5))
+
+    def test_chunks(self):
+        with mock.patch.object(self._limited.bucket, 'reserve',
+                               return_value=0) as reserve:
+            self.assertEqual(self._limited.write(b'0123456789'), 10)
+        self.assertEqual(self._file.getvalue(), b'0123456789')
+        self.assertEqual([call[0][0] for call in reserve.call_args_list],
+                         [4, 4, 2])
+
+    def test_array(self):
+        with mock.patch.object(self._limited.bucket, 'reserve',
+                               return_value=0) as reserve:
+            self._limited.write(array.array(str('i'), [1, 2, 3]))
+        self.assertEqual(self._file.tell(), 12)
+        self.assertEqual(reserve.call_count, 3)
+
+    def test_min_sleep(self):
+        with mock.patch.object(self._limited.bucket, 'reserve',
+                               side_effect=[0.001, 0.004, 0.006]), \
+                mock.patch('time.sleep') as sleep:
+            self._limited.writelines([b'a', b'b', b'c'])
+        sleep.assert_called_once_with(0.006)
+        self.assertEqual(self._file.getvalue(), b'abc')
+
+    def test_short_write(self):
+        raw = mock.Mock()
+        raw.write.return_value = 3
+        limited = LimitedFile(raw, _bucket(burst=4))
+        with mock.patch.object(limited.bucket, 'release') as release:
+            self.assertEqual(limited.write(b'0123456789'), 3)
+        # stops at the short write, and only charges for what was written
+        self.assertEqual(raw.write.call_count, 1)
+        release.assert_called_once_with(1)
+
+    def test_would_block(self):
+        raw = mock.Mock()
+        raw.write.side_effect = [4, None, None]
+        limited = LimitedFile(raw, _bucket(burst=4))
+        with mock.patch.object(limited.bucket, 'release') as release:
+            self.assertEqual(limited.write(b'0123456789'), 4)
+            self.assertIsNone(limited.write(b'abc'))
+        self.assertEqual(release.call_args_list, [mock.call(4),
+                                                  mock.call(3)])
+
+    def test_passthrough(self):
+        self._limited.write(b'abc')
+        self._limited.seek(0)
+        self.assertEqual(self._limited.read(), b'abc')
+        self.assertIs(self._limited.wrapped, self._file)
+
+    def test_rate(self):
+        limited = LimitedFile(self._file, TokenBucket(
+            Speed(Information(1, Information.MEGABYTES)),
+            Information(100, Information.KILOBYTES)))
+        started = time.time()
+        limited.write(b'\0' * 300000)
+        self.assertAlmostEqual(time.time() - started, 0.2, delta=0.05)
+
+
+class TestLimitedSocket(unittest.TestCase):
+
+    def setUp(self):
+        self._socket = mock.Mock()
+        self._limited = LimitedSocket(self._socket, _bucket(burst=4))
+
+    def test_sendall(self):
+        self._limited.sendall(b'0123456789')
+        self.assertEqual([memoryview(call[0][0]).tobytes()
+                          for call in self._socket.sendall.call_args_list],
+                         [b'0123', b'4567', b'89'])
+
+    def test_partial_send(self):
+        self._socket.send.return_value = 1
+        with mock.patch.object(self._limited.bucket, 'release') as release:
+            self.assertEqual(self._limited.send(b'0123456789'), 1)
+        sent = self._socket.send.call_args[0][0]
+        self.assertEqual(memoryview(sent).tobytes(), b'0123')
+        release.assert_called_once_with(3)
+
+    def test_sendto(self):
+        self._socket.sendto.return_value = 3
+        self.assertEqual(self._limited.sendto(b'abc', ('::1', 53)), 3)
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+import sys
+import time
+
+import mock
+
+from nibble import Information, Duration, Speed
+from nibble.limiter import TokenBucket
+
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+
+
+def _bucket(burst):
+    return TokenBucket(Speed(Information(1, Information.MEGABYTES)),
+                       Information(burst, Information.BYTES))
+
+
+@unittest.skipIf(sys.version_info < (3, 5), 'async def needs Python 3.5')
+class TestAcquire(unittest.TestCase):
+
+    def setUp(self):
+        self._loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self._loop.close()
+
+    def test_acquire(self):
+        from nibble.limiter_asyncio import acquire
+        bucket = _bucket(100000)
+        started = time.time()
+        for _ in range(3):
+            self.assertTrue(self._loop.run_until_complete(
+                acquire(bucket, 100000)))
+        self.assertAlmostEqual(time.time() - started, 0.2, delta=0.05)
+
+    def test_timeout(self):
+        from nibble.limiter_asyncio import acquire
+        bucket = _bucket(100000)
+        self.assertTrue(self._loop.run_until_complete(
+            acquire(bucket, 100000, Duration.ZERO)))
+        self.assertFalse(self._loop.run_until_complete(
+            acquire(bucket, 100000, Duration(milliseconds=50))))
+
+    def test_tasks(self):
+        from nibble.tests._coroutines import acquire_concurrently
+        started = time.time()
+        self._loop.run_until_complete(
+            acquire_concurrently(_bucket(100000), 4, 2, 50000))
+        self.assertAlmostEqual(time.time() - started, 0.3, delta=0.05)
+
+
+@unittest.skipIf(sys.version_info < (3, 5), 'async def needs Python 3.5')
+class TestLimitedStreamWriter(unittest.TestCase):
+
+    def setUp(self):
+        from nibble.limiter_asyncio import LimitedStreamWriter
+        from nibble.tests._coroutines import nothing
+        self._loop = asyncio.new_event_loop()
+        self._stream = mock.Mock()
+        self._stream.drain.side_effect = nothing
+        self._writer = LimitedStreamWriter(self._stream, _bucket(4))
+
+    def tearDown(self):
+        self._loop.close()
+
+    def test_passed_through(self):
+        data = bytearray(b'abc')
+        self._writer.write(data)
+        self._writer.writelines([b'de', b'f'])
+        # written straight away, without copying
+        self.assertIs(self._stream.write.call_args_list[0][0][0], data)
+        self.assertEqual([call[0][0]
+                          for call in self._stream.write.call_args_list[1:]],
+                         [b'de', b'f'])
+        # nothing is held back, so closing loses nothing
+        self._writer.close()
+        self._stream.close.assert_called_once_with()
+
+    def test_paced(self):
+        from nibble.tests._coroutines import nothing
+        with mock.patch.object(self._writer.bucket, 'reserve',
+                               side_effect=[0.001, 0.02]), \
+                mock.patch('nibble.limiter_asyncio._clock', return_value=0), \
+                mock.patch('asyncio.sleep', side_effect=nothing) as sleep:
+            self._writer.write(b'a')
+            self._loop.run_until_complete(self._writer.drain())
+            # too short to sleep for
+            sleep.assert_not_called()
+            self._writer.write(b'b')
+            self._loop.run_until_complete(self._writer.drain())
+        sleep.assert_called_once_with(0.02)
+        self.assertEqual(self._stream.drain.call_count, 2)
+
+    def test_rate(self):
+        writer = type(self._writer)(self._stream, _bucket(100000))
+        started = time.time()
+        for _ in range(3):
+            writer.write(b'\0' * 100000)
+            self._loop.run_until_complete(writer.drain())
+        self.assertAlmostEqual(time.time() - started, 0.2, delta=0.05)
+
+    def test_passthrough(self):
+        self.assertIs(self._writer.wrapped, self._stream)
+        self.assertIs(self._writer.transport, self._stream.transport)
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, division
+import unittest
+import datetime
+import os
+import shutil
+import tempfile
+
+from nibble import Information, Duration, Speed
+from nibble.logstats import LogStats, scan, scan_file
+
+
+_LOG = (b'1.2.3.4 - - [10/Oct/2017:13:55:36 +0100] "GET / HTTP/1.1" 200 1000 '
+        b'"-" "curl/7.5" 0.001\n'
+        b'1.2.3.4 - - [10/Oct/2017:13:55:59 +0100] "GET /\\"q\\" HTTP/1.1" 200 '
+        b'3000 "-" "Mozilla (\\"x\\")" "fwd" 0.010\n'
+        b'garbage\n'
+        b'1.2.3.4 - - [10/Oct/2017:12:57:01 +0000] "GET / HTTP/1.1" 304 - '
+        b'"-" "curl/7.5"\n')
+
+
+class TestLogStats(unittest.TestCase):
+
+    def test_init_bucket(self):
+        with self.assertRaises(ValueError):
+            LogStats(Duration(milliseconds=1500))
+
+    def test_add(self):
+        stats = LogStats()
+        stats.add(60, 1000, 0.5)
+        stats.add(61, 500)
+        self.assertEqual(stats.requests, 2)
+        self.assertEqual(stats.timed_requests, 1)
+        self.assertEqual(stats.sent, Information(1500, Information.BYTES))
+
+    def test_series(self):
+        stats = LogStats()
+        stats.add(60, 6000)
+        stats.add(185, 1200)
+        self.assertListEqual(
+            list(stats.series()),
+            [(datetime.datetime(1970, 1, 1, 0, 1), 1,
+              Information(6000, Information.BYTES),
+              Speed(Information(100, Information.BYTES))),
+             (datetime.datetime(1970, 1, 1, 0, 2), 0, Information.ZERO,
+              Speed.ZERO),
+             (datetime.datetime(1970, 1, 1, 0, 3), 1,
+              Information(1200, Information.BYTES),
+              Speed(Information(20, Information.BYTES)))])
+
+    def test_series_empty(self):
+        self.assertListEqual(list(LogStats().series()), [])
+
+    def test_percentile_empty(self):
+        self.assertIsNone(LogStats().percentile(50))
+
+    def test_percentile(self):
+        stats = LogStats()
+        for kilobits in range(1, 101):
+            stats.add(0, kilobits * 125, 1)
+        for percentile in [1, 50, 99, 100]:
+            expected = percentile * 1000
+            actual = stats.percentile(percentile).information.bits
+            self.assertAlmostEqual(actual / expected, 1, delta=0.01)
+
+    def test_merge(self):
+        first = LogStats()
+        first.add(0, 100, 1)
+        second = LogStats()
+        second.add(0, 200)
+        second.add(60, 300, 1)
+        first.merge(second)
+        self.assertEqual(first.requests, 3)
+        self.assertEqual(first.timed_requests, 2)
+        self.assertEqual([requests for _, requests, _, _ in first.series()],
+                         [2, 1])
+
+    def test_merge_different_buckets(self):
+        with self.assertRaises(ValueError):
+            LogStats().merge(LogStats(Duration(seconds=1)))
+
+
+class TestScan(unittest.TestCase):
+
+    def test_lines(self):
+        stats = scan(_LOG, 0, len(_LOG))
+        self.assertEqual(stats.requests, 3)
+        self.assertEqual(stats.timed_requests, 2)
+        self.assertEqual(stats.sent, Information(4000, Information.BYTES))
+        self.assertListEqual(
+            [(start, requests) for start, requests, _, _ in stats.series()],
+            [(datetime.datetime(2017, 10, 10, 12, 55), 2),
+             (datetime.datetime(2017, 10, 10, 12, 56), 0),
+             (datetime.datetime(2017, 10, 10, 12, 57), 1)])
+
+    def test_time_unit(self):
+        stats = scan(_LOG, 0, len(_LOG), time_unit=Duration.MILLISECONDS)
+        self.assertAlmostEqual(
+            stats.percentile(100).information.bits / (1000 * 8 * 10 ** 6), 1,
+            delta=0.01)
+
+    def test_range(self):
+        self.assertEqual(scan(_LOG, _LOG.index(b'garbage'), len(_LOG))
+                         .requests, 1)
+
+
+class TestScanFile(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._path = os.path.join(self._directory, 'access.log')
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def _write(self, content):
+        with open(self._path, 'wb') as f:
+            f.write(content)
+
+    def test_empty(self):
+        self._write(b'')
+        self.assertEqual(scan_file(self._path).requests, 0)
+
+    def test_jobs(self):
+        self._write(_LOG * 50)
+        single = scan_file(self._path)
+        parallel = scan_file(self._path, jobs=2)
+        self.assertEqual(parallel.requests, 150)
+        self.assertListEqual(list(parallel.series()), list(single.series()))
+        self.assertEqual(parallel.percentile(50), single.percentile(50))
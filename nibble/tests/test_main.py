@@ -7,7 +7,7 @@ import os
 import contextlib
 import six
 
-from nibble import __main__ as main
+from nibble import __main__ as main, commands
 
 
 @contextlib.contextmanager
@@ -63,6 +63,20 @@ class TestParseArgs(unittest.TestCase):
                                           ['in MiB/s']).expression,
                          ['10Gb', 'in MiB/s'])
 
+    def test_expression_no_command(self):
+        self.assertIsNone(main._parse_args(self._BASE_ARGV).command)
+
+    def test_command(self):
+        self.assertIs(main._parse_args(self._CMD +
+                                       ['convert', '-c', '1']).command,
+                      commands.COMMANDS['convert'])
+
+    def test_command_verbosity(self):
+        self.assertEqual(main._parse_args(self._CMD +
+                                          ['convert', '-c', '1',
+                                           '-vv']).verbosity,
+                         2)
+
 
 class TestMain(unittest.TestCase):
     def test_lex_fail(self):
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+import array
+import io
+import socket
+
+import mock
+
+from nibble import Information, Speed
+from nibble.metered import MeteredFile, MeteredSocket
+from nibble.pv import Meter
+
+
+class _WouldBlock(io.RawIOBase):
+    """
+    A raw file in non-blocking mode that is never ready to write.
+    """
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return None
+
+
+class TestMeteredFile(unittest.TestCase):
+
+    def setUp(self):
+        self._file = MeteredFile(io.BytesIO(b'first\nsecond\nthird\n'))
+
+    def test_read(self):
+        self.assertEqual(self._file.read(3), b'fir')
+        self.assertEqual(self._file.read1(2), b'st')
+        self.assertEqual(self._file.read(), b'\nsecond\nthird\n')
+        self.assertEqual(self._file.read(), b'')
+        self.assertEqual(self._file.information_read,
+                         Information(19, Information.BYTES))
+
+    def test_readinto(self):
+        buffer_ = bytearray(4)
+        self.assertEqual(self._file.readinto(buffer_), 4)
+        self.assertEqual(self._file.readinto1(memoryview(buffer_)[:2]), 2)
+        self.assertEqual(buffer_, b't\nrs')
+        self.assertEqual(self._file.read_meter.transferred_bytes, 6)
+
+    def test_lines(self):
+        self.assertEqual(self._file.readline(), b'first\n')
+        self.assertEqual(self._file.readlines(), [b'second\n', b'third\n'])
+        self.assertEqual(self._file.read_meter.transferred_bytes, 19)
+
+    def test_iterate(self):
+        self.assertEqual(list(self._file), [b'first\n', b'second\n',
+                                            b'third\n'])
+        self.assertEqual(self._file.read_meter.transferred_bytes, 19)
+
+    def test_write(self):
+        self.assertEqual(self._file.write(b'abc'), 3)
+        self._file.writelines([b'de', memoryview(b'fgh')])
+        self.assertEqual(self._file.information_written,
+                         Information(8, Information.BYTES))
+        self.assertEqual(self._file.information_read, Information.ZERO)
+
+    def test_write_returns_none(self):
+        # as Python 2's files do, having written everything
+        wrapped = mock.Mock()
+        wrapped.write.return_value = None
+        self.assertIsNone(MeteredFile(wrapped).write(b'abc'))
+        metered = MeteredFile(wrapped)
+        metered.write(b'abc')
+        self.assertEqual(metered.write_meter.transferred_bytes, 3)
+
+    def test_write_would_block(self):
+        metered = MeteredFile(_WouldBlock())
+        self.assertIsNone(metered.write(b'abc'))
+        self.assertEqual(metered.write_meter.transferred_bytes, 0)
+
+    def test_passthrough(self):
+        self._file.seek(6)
+        self.assertEqual(self._file.tell(), 6)
+        self.assertEqual(self._file.getvalue(), b'first\nsecond\nthird\n')
+
+    def test_context_manager(self):
+        with self._file as file_:
+            self.assertIs(file_, self._file)
+        self.assertTrue(self._file.closed)
+
+    def test_sample(self):
+        self._file.read_meter = Meter(start=0)
+        self._file.write_meter = Meter(start=0)
+        self._file.read(10)
+        read_current, read_average, write_current, write_average = \
+            self._file.sample(2)
+        self.assertEqual(read_current,
+                         Speed(Information(5, Information.BYTES)))
+        self.assertEqual(read_average, read_current)
+        self.assertEqual(write_current, Speed.ZERO)
+        self.assertEqual(write_average, Speed.ZERO)
+
+
+class TestMeteredSocket(unittest.TestCase):
+
+    def setUp(self):
+        left, right = socket.socketpair()
+        self._left = MeteredSocket(left)
+        self._right = MeteredSocket(right)
+
+    def tearDown(self):
+        self._left.close()
+        self._right.close()
+
+    def test_send_recv(self):
+        self.assertEqual(self._left.send(b'abc'), 3)
+        self._left.sendall(memoryview(b'defg'))
+        self._left.sendall(array.array(str('H'), [1, 2]))
+        self.assertEqual(self._left.write_meter.transferred_bytes, 11)
+
+        self.assertEqual(self._right.recv(3), b'abc')
+        buffer_ = bytearray(8)
+        self.assertEqual(self._right.recv_into(buffer_), 8)
+        self.assertEqual(self._right.information_read,
+                         Information(11, Information.BYTES))
+
+    def test_makefile(self):
+        with self._left.makefile('wb') as writer:
+            writer.write(b'line\n')
+        with self._right.makefile('rb') as reader:
+            self.assertEqual(reader.readline(), b'line\n')
+        self.assertEqual(self._left.write_meter.transferred_bytes, 5)
+        self.assertEqual(self._right.read_meter.transferred_bytes, 5)
+
+    def test_passthrough(self):
+        self.assertEqual(self._left.family, self._left.wrapped.family)
+        self.assertEqual(self._left.fileno(), self._left.wrapped.fileno())
+
+
+class TestMeteredDatagramSocket(unittest.TestCase):
+
+    def setUp(self):
+        self._receiver = MeteredSocket(socket.socket(socket.AF_INET,
+                                                     socket.SOCK_DGRAM))
+        self._receiver.bind(('127.0.0.1', 0))
+        self._sender = MeteredSocket(socket.socket(socket.AF_INET,
+                                                   socket.SOCK_DGRAM))
+
+    def tearDown(self):
+        self._receiver.close()
+        self._sender.close()
+
+    def test_datagrams(self):
+        address = self._receiver.getsockname()
+        self.assertEqual(self._sender.sendto(b'hello', address), 5)
+        self.assertEqual(self._sender.sendto(b'hi', address), 2)
+        self.assertEqual(self._receiver.recvfrom(16)[0], b'hello')
+        buffer_ = bytearray(16)
+        self.assertEqual(self._receiver.recvfrom_into(buffer_)[0], 2)
+        self.assertEqual(self._sender.write_meter.transferred_bytes, 7)
+        self.assertEqual(self._receiver.read_meter.transferred_bytes, 7)
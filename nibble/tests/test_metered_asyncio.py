@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+import sys
+
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+
+
+@unittest.skipIf(sys.version_info < (3, 5), 'async def needs Python 3.5')
+class TestMeteredStreams(unittest.TestCase):
+
+    def setUp(self):
+        from nibble.metered_asyncio import MeteredStreamReader
+        self._loop = asyncio.new_event_loop()
+        self._stream = asyncio.StreamReader(loop=self._loop) \
+            if sys.version_info < (3, 10) else asyncio.StreamReader()
+        self._stream.feed_data(b'first\nsecond\nthird\nrest')
+        self._stream.feed_eof()
+        self._reader = MeteredStreamReader(self._stream)
+
+    def tearDown(self):
+        self._loop.close()
+
+    def _run(self, coroutine):
+        return self._loop.run_until_complete(coroutine)
+
+    def test_reads(self):
+        self.assertEqual(self._run(self._reader.readline()), b'first\n')
+        self.assertEqual(self._run(self._reader.readexactly(3)), b'sec')
+        self.assertEqual(self._run(self._reader.readuntil(b'\n')), b'ond\n')
+        self.assertEqual(self._run(self._reader.read(2)), b'th')
+        self.assertEqual(self._run(self._reader.read()), b'ird\nrest')
+        self.assertEqual(self._reader.read_meter.transferred_bytes, 23)
+        self.assertTrue(self._reader.at_eof())
+
+    def test_iterate(self):
+        from nibble.tests._coroutines import collect
+        self.assertEqual(self._run(collect(self._reader)),
+                         [b'first\n', b'second\n', b'third\n', b'rest'])
+        self.assertEqual(self._reader.read_meter.transferred_bytes, 23)
+
+    def test_writer(self):
+        from nibble.metered_asyncio import wrap_streams
+
+        class Writer(object):
+            def __init__(self):
+                self.written = []
+
+            def write(self, data):
+                self.written.append(bytes(data))
+
+        reader, writer = wrap_streams(self._stream, Writer())
+        writer.write(b'abc')
+        writer.writelines([b'de', memoryview(b'f')])
+        self.assertEqual(writer.written, [b'abc', b'de', b'f'])
+        self.assertEqual(writer.write_meter.transferred_bytes, 6)
+        self._run(reader.readline())
+        self.assertEqual(writer.read_meter.transferred_bytes, 6)
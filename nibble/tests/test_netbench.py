@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+import socket
+import sys
+
+from nibble import Information, Duration, Speed
+from nibble import netbench
+from nibble.netbench import NetBenchmarkResult
+
+_DURATION = Duration(milliseconds=20)
+
+
+class TestNetBenchmarkResult(unittest.TestCase):
+
+    def setUp(self):
+        self._result = NetBenchmarkResult(
+            'tcp', 'thread', False,
+            [Information(3, Information.BYTES),
+             Information(1, Information.BYTES)],
+            [Duration(seconds=1), Duration(seconds=2)], Duration(seconds=2))
+
+    def test_information(self):
+        self.assertEqual(self._result.information,
+                         Information(4, Information.BYTES))
+
+    def test_speed(self):
+        self.assertEqual(self._result.speed,
+                         Speed(Information(2, Information.BYTES)))
+
+    def test_stream_speeds(self):
+        self.assertEqual(self._result.stream_speeds,
+                         [Speed(Information(3, Information.BYTES)),
+                          Speed(Information(1, Information.BYTES),
+                                Duration(seconds=2))])
+
+
+class TestRun(unittest.TestCase):
+
+    def _assert_valid(self, result, streams):
+        self.assertEqual(len(result.informations), streams)
+        self.assertEqual(len(result.durations), streams)
+        for information, duration in zip(result.informations,
+                                         result.durations):
+            self.assertTrue(information.bits)
+            # every stream sends until the deadline
+            self.assertGreaterEqual(duration, _DURATION)
+        self.assertEqual(result.duration, max(result.durations))
+
+    def test_tcp(self):
+        self._assert_valid(netbench.run(2, _DURATION), 2)
+
+    def test_small_buffer(self):
+        self._assert_valid(netbench.run(
+            1, _DURATION, buffer_size=Information(1, Information.BYTES)), 1)
+
+    @unittest.skipUnless(hasattr(socket, 'AF_UNIX'),
+                         'Unix sockets are not supported')
+    def test_unix(self):
+        self._assert_valid(netbench.run(2, _DURATION, 'unix'), 2)
+
+    @unittest.skipUnless(hasattr(socket.socket, 'sendfile'),
+                         'sendfile() is not supported')
+    def test_sendfile(self):
+        result = netbench.run(2, _DURATION, sendfile=True)
+        self._assert_valid(result, 2)
+        self.assertTrue(result.sendfile)
+
+    @unittest.skipIf(sys.version_info < (3, 7), 'asyncio mode needs 3.7')
+    def test_asyncio(self):
+        self._assert_valid(netbench.run(3, _DURATION, mode='asyncio'), 3)
+
+    @unittest.skipIf(sys.version_info < (3, 7), 'asyncio mode needs 3.7')
+    def test_asyncio_sendfile(self):
+        self._assert_valid(netbench.run(2, _DURATION, 'unix', 'asyncio',
+                                        sendfile=True), 2)
+
+    def test_invalid(self):
+        for kwargs in [{'streams': 0}, {'family': 'udp'}, {'mode': 'fork'},
+                       {'buffer_size': Information(1)}]:
+            with self.assertRaises(ValueError):
+                netbench.run(duration=_DURATION, **kwargs)
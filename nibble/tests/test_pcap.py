@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+import tempfile
+import shutil
+import os
+import socket
+import struct
+
+from nibble import Information, Duration, Speed
+from nibble.pcap import packets, FlowTimeline, LINKTYPE_ETHERNET, \
+    LINKTYPE_RAW, LINKTYPE_LINUX_SLL, LINKTYPE_NULL
+
+
+def ipv4(source, destination, protocol=6, ports=(1234, 80), payload=0,
+         fragment=0):
+    """
+    Build an IPv4 packet.
+
+    :return: The packet as bytes.
+    """
+    transport = struct.pack(str('!HH'), *ports) + b'\0' * (16 + payload)
+    return struct.pack(str('!BBHHHBBH4s4s'), 0x45, 0, 20 + len(transport),
+                       0, fragment, 64, protocol, 0,
+                       socket.inet_aton(source),
+                       socket.inet_aton(destination)) + transport
+
+
+def ipv6(source, destination, protocol=17, ports=(53, 5353)):
+    """
+    Build an IPv6 packet.
+
+    :return: The packet as bytes.
+    """
+    transport = struct.pack(str('!HH'), *ports) + b'\0' * 4
+    return struct.pack(str('!IHBB16s16s'), 6 << 28, len(transport), protocol,
+                       64, socket.inet_pton(socket.AF_INET6, source),
+                       socket.inet_pton(socket.AF_INET6, destination)) + \
+        transport
+
+
+def ethernet(packet, ethertype=0x0800, vlan=False):
+    """
+    Wrap a packet in an Ethernet frame.
+
+    :return: The frame as bytes.
+    """
+    tag = struct.pack(str('!HH'), 0x8100, 100) if vlan else b''
+    return b'\x00\x01\x02\x03\x04\x05' * 2 + tag + \
+        struct.pack(str('!H'), ethertype) + packet
+
+
+def classic(records, linktype=LINKTYPE_ETHERNET, byte_order='<',
+            nanoseconds=False):
+    """
+    Build a classic pcap capture.
+
+    :param records: A list of (timestamp in nanoseconds, packet) tuples.
+    :return: The capture as bytes.
+    """
+    magic = 0xA1B23C4D if nanoseconds else 0xA1B2C3D4
+    data = struct.pack(str(byte_order + 'IHHiIII'), magic, 2, 4, 0, 0, 65535,
+                       linktype)
+    for timestamp, packet in records:
+        fraction = timestamp % 1000000000
+        if not nanoseconds:
+            fraction //= 1000
+        data += struct.pack(str(byte_order + 'IIII'),
+                            timestamp // 1000000000, fraction, len(packet),
+                            len(packet)) + packet
+    return data
+
+
+def _block(type_, body, byte_order):
+    body += b'\0' * (-len(body) % 4)
+    length = struct.pack(str(byte_order + 'I'), len(body) + 12)
+    return struct.pack(str(byte_order + 'I'), type_) + length + body + length
+
+
+def pcapng(records, linktype=LINKTYPE_ETHERNET, byte_order='<',
+           resolution=None):
+    """
+    Build a pcapng capture with one section and interface.
+
+    :param records: A list of (timestamp in interface units, packet) tuples.
+    :param resolution: The value of the if_tsresol option, if any.
+    :return: The capture as bytes.
+    """
+    data = _block(0x0A0D0D0A, struct.pack(str(byte_order + 'IHHq'),
+                                          0x1A2B3C4D, 1, 0, -1), byte_order)
+    options = b''
+    if resolution is not None:
+        options = struct.pack(str(byte_order + 'HHB3x'), 9, 1, resolution) + \
+            struct.pack(str(byte_order + 'HH'), 0, 0)
+    data += _block(1, struct.pack(str(byte_order + 'HHI'), linktype, 0,
+                                  65535) + options, byte_order)
+    # a block to skip
+    data += _block(5, b'statistics', byte_order)
+    for timestamp, packet in records:
+        data += _block(6, struct.pack(str(byte_order + 'IIIII'), 0,
+                                      timestamp >> 32,
+                                      timestamp & 0xFFFFFFFF, len(packet),
+                                      len(packet)) + packet, byte_order)
+    return data
+
+
+_PACKET = ethernet(ipv4('10.0.0.1', '10.0.0.2'))
+
+
+class TestPackets(unittest.TestCase):
+
+    def _assert_packets(self, capture, timestamps):
+        self.assertEqual([(timestamp, LINKTYPE_ETHERNET, len(_PACKET),
+                           len(_PACKET))
+                          for timestamp in timestamps],
+                         [(timestamp, linktype, captured, length)
+                          for timestamp, linktype, _, captured, length
+                          in packets(capture)])
+        for _, _, offset, captured, _ in packets(capture):
+            self.assertEqual(capture[offset:offset + captured], _PACKET)
+
+    def test_classic(self):
+        self._assert_packets(
+            classic([(1500000000123456000, _PACKET), (1999, _PACKET)]),
+            [1500000000123456000, 1000])
+
+    def test_classic_big_endian(self):
+        self._assert_packets(classic([(5000, _PACKET)], byte_order='>'),
+                             [5000])
+
+    def test_classic_nanoseconds(self):
+        self._assert_packets(classic([(1500000000123456789, _PACKET)],
+                                     nanoseconds=True),
+                             [1500000000123456789])
+
+    def test_classic_truncated(self):
+        capture = classic([(0, _PACKET), (1000, _PACKET)])
+        self._assert_packets(capture[:-1], [0])
+
+    def test_pcapng(self):
+        self._assert_packets(pcapng([(1500000000123456, _PACKET)]),
+                             [1500000000123456000])
+
+    def test_pcapng_big_endian(self):
+        self._assert_packets(pcapng([(7, _PACKET)], byte_order='>'), [7000])
+
+    def test_pcapng_resolution(self):
+        self._assert_packets(pcapng([(1500000000123456789, _PACKET)],
+                                    resolution=9),
+                             [1500000000123456789])
+        # 2^-10 seconds
+        self._assert_packets(pcapng([(1024, _PACKET)], resolution=0x8A),
+                             [1000000000])
+
+    def test_pcapng_sections(self):
+        capture = pcapng([(1, _PACKET)]) + pcapng([(2, _PACKET)],
+                                                  byte_order='>')
+        self._assert_packets(capture, [1000, 2000])
+
+    def test_pcapng_no_interface(self):
+        capture = _block(0x0A0D0D0A, struct.pack(str('<IHHq'), 0x1A2B3C4D, 1,
+                                                 0, -1), '<') + \
+            _block(6, struct.pack(str('<IIIII'), 0, 0, 0, 0, 0), '<')
+        with self.assertRaises(ValueError):
+            list(packets(capture))
+
+    def test_not_capture(self):
+        for data in [b'', b'\0' * 100]:
+            with self.assertRaises(ValueError):
+                packets(data)
+
+
+class TestFlowTimeline(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._timeline = FlowTimeline()
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def _read(self, capture):
+        path = os.path.join(self._directory, 'capture')
+        with open(path, 'wb') as f:
+            f.write(capture)
+        self._timeline.read(path)
+
+    def test_flows(self):
+        reply = ethernet(ipv4('10.0.0.2', '10.0.0.1', ports=(80, 1234),
+                              payload=1000))
+        self._read(classic([(0, _PACKET), (500000000, reply),
+                            (2100000000, reply), (2200000000, _PACKET)]))
+        self.assertEqual(self._timeline.packets, 4)
+        self.assertEqual(self._timeline.buckets, 3)
+
+        top, bottom = self._timeline.top()
+        self.assertEqual(str(top), 'tcp 10.0.0.2:80 > 10.0.0.1:1234')
+        self.assertEqual((top.source, top.source_port, top.destination,
+                          top.destination_port),
+                         ('10.0.0.2', 80, '10.0.0.1', 1234))
+        self.assertEqual(top.packets, 2)
+        self.assertEqual(top.information,
+                         Information(2 * len(reply), Information.BYTES))
+        self.assertEqual(self._timeline.speeds(top), [
+            Speed(Information(len(reply), Information.BYTES)), Speed.ZERO,
+            Speed(Information(len(reply), Information.BYTES))])
+        self.assertEqual(self._timeline.average(top),
+                         Speed(Information(2 * len(reply), Information.BYTES),
+                               Duration(seconds=3)))
+        self.assertEqual(self._timeline.peak(top),
+                         Speed(Information(len(reply), Information.BYTES)))
+        self.assertEqual(str(bottom), 'tcp 10.0.0.1:1234 > 10.0.0.2:80')
+
+    def test_top_count(self):
+        self._read(classic([(0, _PACKET), (0, ethernet(ipv4('10.0.0.3',
+                                                            '10.0.0.4')))]))
+        self.assertEqual(len(self._timeline.top(1)), 1)
+
+    def test_interval(self):
+        self._timeline = FlowTimeline(Duration(milliseconds=100))
+        self._read(classic([(1000000000, _PACKET), (1250000000, _PACKET)]))
+        flow, = self._timeline.top()
+        self.assertEqual(self._timeline.buckets, 3)
+        self.assertEqual(self._timeline.speeds(flow)[0],
+                         Speed(Information(len(_PACKET), Information.BYTES),
+                               Duration(milliseconds=100)))
+
+    def test_out_of_order(self):
+        other = ethernet(ipv4('10.0.0.3', '10.0.0.4'))
+        self._read(classic([(2000000000, _PACKET), (3000000000, other),
+                            (0, other)]))
+        self.assertEqual(self._timeline.buckets, 4)
+        self.assertEqual(self._timeline.start, 0)
+        flows = {str(flow): flow for flow in self._timeline.top()}
+        self.assertEqual(
+            [bool(speed) for speed in self._timeline.speeds(
+                flows['tcp 10.0.0.1:1234 > 10.0.0.2:80'])],
+            [False, False, True, False])
+        self.assertEqual(
+            [bool(speed) for speed in self._timeline.speeds(
+                flows['tcp 10.0.0.3:1234 > 10.0.0.4:80'])],
+            [True, False, False, True])
+
+    def test_ipv6(self):
+        self._read(pcapng([(0, ethernet(ipv6('2001:db8::1', '2001:db8::2'),
+                                        0x86DD))]))
+        flow, = self._timeline.top()
+        self.assertEqual(str(flow),
+                         'udp [2001:db8::1]:53 > [2001:db8::2]:5353')
+
+    def test_vlan(self):
+        self._read(classic([(0, ethernet(ipv4('10.0.0.1', '10.0.0.2'),
+                                         vlan=True))]))
+        flow, = self._timeline.top()
+        self.assertEqual(flow.destination, '10.0.0.2')
+
+    def test_link_types(self):
+        packet = ipv4('10.0.0.1', '10.0.0.2')
+        for linktype, frame in [
+                (LINKTYPE_RAW, packet),
+                (LINKTYPE_NULL, struct.pack(str('<I'), 2) + packet),
+                (LINKTYPE_LINUX_SLL, b'\0' * 14 + b'\x08\x00' + packet)]:
+            self._timeline = FlowTimeline()
+            self._read(classic([(0, frame)], linktype))
+            flow, = self._timeline.top()
+            self.assertEqual(flow.source, '10.0.0.1')
+
+    def test_no_ports(self):
+        self._read(classic([
+            (0, ethernet(ipv4('10.0.0.1', '10.0.0.2', protocol=1))),
+            (0, ethernet(ipv4('10.0.0.1', '10.0.0.2', fragment=100)))]))
+        icmp, fragment = sorted(self._timeline.top(),
+                                key=lambda flow: flow.protocol)
+        self.assertEqual(str(icmp), 'icmp 10.0.0.1 > 10.0.0.2')
+        self.assertEqual(fragment.source_port, 0)
+
+    def test_skipped(self):
+        self._read(classic([(0, ethernet(b'\0' * 28, 0x0806))]))
+        self.assertEqual(self._timeline.skipped, 1)
+        self.assertEqual(self._timeline.top(), [])
+
+    def test_empty_file(self):
+        with self.assertRaises(ValueError):
+            self._read(b'')
+
+    def test_invalid_interval(self):
+        with self.assertRaises(ValueError):
+            FlowTimeline(Duration.ZERO)
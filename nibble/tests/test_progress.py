@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+import threading
+
+from nibble import Information, Duration
+from nibble.progress import ProgressTracker
+
+
+class TestProgressTracker(unittest.TestCase):
+
+    def setUp(self):
+        self._tracker = ProgressTracker(Duration(seconds=1))
+
+    def test_add(self):
+        self._tracker.add(Information(100, Information.BYTES), 'a', 0)
+        self._tracker.add(Information(50, Information.BYTES), 'b', 0)
+        self.assertEqual(self._tracker.tasks, 2)
+        self.assertEqual(self._tracker.active, 2)
+        self.assertEqual(self._tracker.size,
+                         Information(150, Information.BYTES))
+        self.assertEqual(self._tracker.remaining_bytes, 150)
+
+    def test_no_progress(self):
+        self._tracker.add(Information(100, Information.BYTES), now=0)
+        self.assertIsNone(self._tracker.eta(10))
+
+    def test_no_tasks(self):
+        self.assertEqual(self._tracker.eta(10), Duration.ZERO)
+
+    def test_eta(self):
+        first = self._tracker.add(Information(1000, Information.BYTES),
+                                  now=0)
+        second = self._tracker.add(Information(3000, Information.BYTES),
+                                   now=0)
+        for second_ in range(1, 5):
+            first.update(100, second_)
+            second.update(100, second_)
+        self.assertEqual(self._tracker.transferred,
+                         Information(800, Information.BYTES))
+        # `Information` rounds each task's rate up to whole bits
+        self.assertAlmostEqual(self._tracker.speed(4).information.bits,
+                               200 * Information.BYTES, delta=2)
+        # 3200 bytes left at 200 B/s
+        self.assertAlmostEqual(self._tracker.eta(4).total_seconds(), 16,
+                               places=1)
+        self.assertAlmostEqual(first.eta(4).total_seconds(), 6, places=1)
+        self.assertAlmostEqual(second.eta(4).total_seconds(), 26, places=1)
+
+    def test_added_later(self):
+        # a task added long after the tracker was created is counted at its
+        # own rate, measured from when it started
+        task = self._tracker.add(Information(2000, Information.BYTES),
+                                 now=100)
+        for second_ in range(101, 106):
+            task.update(100, second_)
+        self.assertAlmostEqual(self._tracker.speed(105).information.bits,
+                               100 * Information.BYTES, delta=1)
+        self.assertEqual(self._tracker.speed(105), task.speed(105))
+        # 1500 bytes left at 100 B/s
+        self.assertAlmostEqual(self._tracker.eta(105).total_seconds(), 15,
+                               places=1)
+
+    def test_stalled(self):
+        # the total decays between updates as the task's own estimate does
+        task = self._tracker.add(Information(1000, Information.BYTES), now=0)
+        for second_ in range(1, 11):
+            task.update(10, second_)
+        self.assertAlmostEqual(self._tracker.speed(12).information.bits,
+                               task.speed(12).information.bits, delta=1)
+        self.assertAlmostEqual(self._tracker.speed(12).information.bits,
+                               20, delta=1)
+
+    def test_start(self):
+        tracker = ProgressTracker(Duration(seconds=1), start=0)
+        task = tracker.add(Information(1000, Information.BYTES), now=0)
+        task.update(100, 1)
+        self.assertEqual(tracker.speed(1), task.speed(1))
+        self.assertEqual(tracker.speed(0), task.speed(1))
+
+    def test_finished_not_counted(self):
+        first = self._tracker.add(Information(100, Information.BYTES),
+                                  now=0)
+        second = self._tracker.add(Information(1000, Information.BYTES),
+                                   now=0)
+        first.update(100, 1)
+        second.update(100, 1)
+        first.finish()
+        self.assertEqual(self._tracker.speed(1), second.speed(1))
+
+    def test_overrun(self):
+        task = self._tracker.add(Information(100, Information.BYTES), now=0)
+        task.update(150, 1)
+        self.assertEqual(task.remaining_bytes, 0)
+        self.assertEqual(self._tracker.remaining_bytes, 0)
+        self.assertEqual(self._tracker.transferred_bytes, 150)
+        self.assertEqual(self._tracker.eta(1), Duration.ZERO)
+
+    def test_finish(self):
+        first = self._tracker.add(Information(100, Information.BYTES),
+                                  now=0)
+        second = self._tracker.add(Information(100, Information.BYTES),
+                                   now=0)
+        first.update(40, 1)
+        first.finish()
+        first.finish()
+        self.assertTrue(first.finished)
+        self.assertEqual(self._tracker.active, 1)
+        self.assertEqual(self._tracker.remaining_bytes, 100)
+        with self.assertRaises(ValueError):
+            first.update(10, 2)
+        second.update(100, 2)
+        second.finish()
+        self.assertEqual(self._tracker.active, 0)
+        self.assertEqual(self._tracker.remaining_bytes, 0)
+
+    def test_threads(self):
+        tasks = [self._tracker.add(Information(10000, Information.BYTES))
+                 for _ in range(8)]
+
+        def transfer(task):
+            for _ in range(1000):
+                task.update(10)
+            task.finish()
+
+        threads = [threading.Thread(target=transfer, args=(task,))
+                   for task in tasks]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self._tracker.transferred_bytes, 80000)
+        self.assertEqual(self._tracker.remaining_bytes, 0)
+        self.assertEqual(self._tracker.active, 0)
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+import tempfile
+import shutil
+import os
+import threading
+
+from nibble import Information, Duration, Speed
+from nibble.pv import copy, Meter, pipe
+
+
+class TestCopy(unittest.TestCase):
+
+    _DATA = b'nibble' * 100000
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._source = os.path.join(self._directory, 'source')
+        self._destination = os.path.join(self._directory, 'destination')
+        with open(self._source, 'wb') as f:
+            f.write(self._DATA)
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def _file_to_file(self, **kwargs):
+        with open(self._source, 'rb') as source, \
+                open(self._destination, 'wb') as destination:
+            copied = sum(copy(source.fileno(), destination.fileno(),
+                              **kwargs))
+        self.assertEqual(copied, len(self._DATA))
+        with open(self._destination, 'rb') as f:
+            self.assertEqual(f.read(), self._DATA)
+
+    def test_file_to_file(self):
+        self._file_to_file()
+
+    def test_buffered(self):
+        self._file_to_file(zero_copy=False, buffer_size=4096)
+
+    def test_small_buffer(self):
+        self._file_to_file(buffer_size=7)
+
+    def test_pipe_to_file(self):
+        read_fd, write_fd = os.pipe()
+
+        def feed():
+            with os.fdopen(write_fd, 'wb') as f:
+                f.write(self._DATA)
+
+        thread = threading.Thread(target=feed)
+        thread.start()
+        try:
+            with os.fdopen(read_fd, 'rb') as source, \
+                    open(self._destination, 'wb') as destination:
+                copied = sum(copy(source.fileno(), destination.fileno()))
+        finally:
+            thread.join()
+        self.assertEqual(copied, len(self._DATA))
+        with open(self._destination, 'rb') as f:
+            self.assertEqual(f.read(), self._DATA)
+
+    def test_empty(self):
+        with open(self._source, 'wb'):
+            pass
+        with open(self._source, 'rb') as source, \
+                open(self._destination, 'wb') as destination:
+            self.assertEqual(list(copy(source.fileno(),
+                                       destination.fileno())), [])
+
+
+class TestMeter(unittest.TestCase):
+
+    def test_transferred(self):
+        meter = Meter(start=0)
+        meter.transferred_bytes = 1024
+        self.assertEqual(meter.transferred,
+                         Information(1, Information.KIBIBYTES))
+
+    def test_sample(self):
+        meter = Meter(Information(300, Information.BYTES), start=0)
+        meter.transferred_bytes = 100
+        current, average, eta = meter.sample(1)
+        self.assertEqual(current, Speed(Information(100, Information.BYTES)))
+        self.assertEqual(average, current)
+        self.assertEqual(eta, Duration(seconds=2))
+
+        meter.transferred_bytes = 300
+        current, average, eta = meter.sample(2)
+        self.assertEqual(current, Speed(Information(200, Information.BYTES)))
+        self.assertEqual(average, Speed(Information(150, Information.BYTES)))
+        self.assertEqual(eta, Duration.ZERO)
+
+    def test_sample_unknown_size(self):
+        meter = Meter(start=0)
+        meter.transferred_bytes = 100
+        self.assertIsNone(meter.sample(1)[2])
+
+    def test_sample_no_time(self):
+        meter = Meter(Information(1), start=0)
+        self.assertEqual(meter.sample(0), (Speed.ZERO, Speed.ZERO, None))
+
+
+class TestPipe(unittest.TestCase):
+
+    def test_reports(self):
+        read_fd, write_fd = os.pipe()
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        reports = []
+        try:
+            os.write(write_fd, b'x' * 1000)
+            os.close(write_fd)
+            meter = pipe(read_fd, devnull,
+                         lambda meter, sample: reports.append(sample),
+                         Duration(nanoseconds=1), buffer_size=100)
+        finally:
+            os.close(read_fd)
+            os.close(devnull)
+        self.assertEqual(meter.transferred_bytes, 1000)
+        # one per copy, as the interval is so short, plus the last
+        self.assertTrue(2 <= len(reports) <= 11)
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+import array
+
+from nibble import Information, Duration, Speed
+from nibble.rates import counter_rates
+
+
+def _bytes(count):
+    return Information(count, Information.BYTES)
+
+
+class TestCounterRates(unittest.TestCase):
+
+    def test_mismatched(self):
+        with self.assertRaises(ValueError):
+            counter_rates([1, 2], [3])
+
+    def test_not_increasing(self):
+        with self.assertRaises(ValueError):
+            counter_rates([1, 2, 2], [0, 10, 20])
+
+    def test_too_few(self):
+        self.assertEqual(len(counter_rates([], [])), 0)
+        self.assertEqual(len(counter_rates([5], [100])), 0)
+
+    def test_uneven(self):
+        series = counter_rates(array.array(str('d'), [10, 11, 13, 13.5]),
+                               [1000, 1100, 1500, 1600])
+        self.assertEqual(list(series.timestamps), [11, 13, 13.5])
+        self.assertEqual(series.intervals, [1, 2, 0.5])
+        self.assertEqual(series.deltas, [100, 400, 100])
+        self.assertEqual(series.rates, [100, 200, 200])
+        self.assertEqual(list(series.speeds()),
+                         [Speed(_bytes(100)), Speed(_bytes(200)),
+                          Speed(_bytes(200))])
+
+    def test_wrap_32(self):
+        series = counter_rates([0, 1, 2], [2 ** 32 - 100, 50, 150], 32)
+        self.assertEqual(series.deltas, [150, 100])
+
+    def test_wrap_64(self):
+        series = counter_rates([0, 1], [2 ** 64 - 1, 9])
+        self.assertEqual(series.deltas, [10])
+
+    def test_reset(self):
+        series = counter_rates([0, 1, 2, 3], [10 ** 9, 10 ** 9 + 10, 30, 40],
+                               32)
+        self.assertEqual(series.deltas, [10, 30, 10])
+
+
+class TestRollup(unittest.TestCase):
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            counter_rates([0, 1], [0, 1]).rollup(Duration.ZERO)
+
+    def test_empty(self):
+        self.assertEqual(counter_rates([], []).rollup(Duration(minutes=1)),
+                         [])
+
+    def test_rollup(self):
+        # one sample every 30 seconds, then a gap of two minutes
+        timestamps = [0, 30, 60, 90, 120, 240, 270]
+        counters = [0, 300, 900, 1200, 1800, 3000, 3300]
+        windows = counter_rates(timestamps, counters).rollup(
+            Duration(minutes=1))
+        self.assertEqual(windows, [
+            (0, _bytes(900), Speed(_bytes(15)), Speed(_bytes(20))),
+            (60, _bytes(900), Speed(_bytes(15)), Speed(_bytes(20))),
+            # the 2 minute interval ends in this window
+            (180, _bytes(1200), Speed(_bytes(10)), Speed(_bytes(10))),
+            (240, _bytes(300), Speed(_bytes(10)), Speed(_bytes(10)))])
+
+    def test_coarse(self):
+        timestamps = list(range(0, 7201))
+        counters = [second * 1000 for second in timestamps]
+        windows = counter_rates(timestamps, counters).rollup(
+            Duration(hours=1))
+        self.assertEqual([window[0] for window in windows], [0, 3600])
+        self.assertEqual(windows[0][1], _bytes(3600000))
+        self.assertEqual(windows[1][2], Speed(_bytes(1000)))
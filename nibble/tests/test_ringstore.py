@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+import os
+import shutil
+import tempfile
+
+import mock
+
+from nibble import Information, Duration, Speed
+from nibble.ringstore import RingStore, _RECORD
+
+_SECOND = 1000000000
+
+
+class TestRingStore(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._path = os.path.join(self._directory, 'store')
+        self._store = RingStore.create(
+            self._path, [(Duration.SECOND, 10), (Duration(seconds=5), 4)])
+
+    def tearDown(self):
+        self._store.close()
+        shutil.rmtree(self._directory)
+
+    def _append(self, seconds, store=None):
+        for second in seconds:
+            (store or self._store).append(second * 8, second * _SECOND)
+
+    def test_create_invalid(self):
+        path = os.path.join(self._directory, 'invalid')
+        for rings in [[], [(Duration.ZERO, 2)], [(Duration.SECOND, 1)],
+                      [(Duration.SECOND, 2), (Duration(seconds=1.5), 2)]]:
+            with self.assertRaises(ValueError):
+                RingStore.create(path, rings)
+        self.assertFalse(os.path.exists(path))
+
+    def test_create_exists(self):
+        with self.assertRaises(EnvironmentError):
+            RingStore.create(self._path)
+
+    def test_not_a_store(self):
+        path = os.path.join(self._directory, 'other')
+        with open(path, 'wb') as file_:
+            file_.write(b'\0' * 100)
+        with self.assertRaises(ValueError):
+            RingStore(path)
+
+    def test_one_writer(self):
+        with self.assertRaises(EnvironmentError):
+            RingStore(self._path, writable=True)
+
+    def test_resolutions(self):
+        self.assertEqual(self._store.resolutions,
+                         [Duration.SECOND, Duration(seconds=5)])
+
+    def test_read(self):
+        self._append(range(1, 4))
+        series = self._store.read()
+        self.assertEqual(list(series.timestamps),
+                         [_SECOND, 2 * _SECOND, 3 * _SECOND])
+        self.assertEqual(list(series.bits), [8, 16, 24])
+        self.assertEqual(list(series.information()),
+                         [Information(8), Information(16), Information(24)])
+        self.assertEqual(list(series.speeds())[0],
+                         Speed(Information(1, Information.BYTES)))
+
+    def test_read_empty(self):
+        self.assertEqual(len(self._store.read()), 0)
+        self.assertEqual(len(self._store.read(1)), 0)
+
+    def test_read_invalid_ring(self):
+        with self.assertRaises(ValueError):
+            self._store.read(2)
+
+    def test_read_range(self):
+        self._append(range(10))
+        series = self._store.read(start=3 * _SECOND, end=6 * _SECOND)
+        self.assertEqual(list(series.bits), [24, 32, 40])
+        self.assertEqual(list(series.peaks), [24, 32, 40])
+
+    def test_wraps(self):
+        self._append(range(25))
+        series = self._store.read()
+        # the oldest record may be being overwritten, so is left out
+        self.assertEqual(list(series.timestamps),
+                         [second * _SECOND for second in range(16, 25)])
+
+    def test_consolidates(self):
+        self._append(range(12))
+        series = self._store.read(1)
+        # the window starting at 10 seconds is still in progress
+        self.assertEqual(list(series.timestamps), [0, 5 * _SECOND])
+        self.assertEqual(list(series.bits), [80, 280])
+        self.assertEqual(list(series.peaks), [32, 72])
+        self.assertEqual(list(series.speeds())[1],
+                         Speed(Information(7, Information.BYTES)))
+        self.assertEqual(list(series.peak_speeds())[1],
+                         Speed(Information(9, Information.BYTES)))
+
+    def test_gaps(self):
+        self._append([1, 2, 13])
+        self.assertEqual(list(self._store.read(1).bits), [24])
+
+    def test_append_order(self):
+        self._append([5])
+        with self.assertRaises(ValueError):
+            self._append([5])
+
+    def test_read_only(self):
+        self._append([1])
+        with RingStore(self._path) as reader:
+            self.assertEqual(list(reader.read().bits), [8])
+            with self.assertRaises(ValueError):
+                reader.append(8)
+
+    def test_reopen(self):
+        self._append(range(7))
+        self._store.close()
+        self._store = RingStore(self._path, writable=True)
+        with self.assertRaises(ValueError):
+            self._append([6])
+        # the window from 5 seconds includes intervals from before and after
+        # reopening
+        self._append(range(7, 11))
+        self.assertEqual(list(self._store.read(1).bits), [80, 280])
+
+    def test_writer_died(self):
+        self._append([1])
+        # a record written without advancing the head, as if the writer died
+        # before finishing the append
+        _RECORD.pack_into(self._store._map, self._store._rings[0][2] +
+                          _RECORD.size, 1, 2 * _SECOND, 7, 7)
+        with RingStore(self._path) as reader:
+            self.assertEqual(list(reader.read().bits), [8])
+
+    def test_overwritten_during_read(self):
+        self._append(range(12))
+        # the reader sees the head before the last two appends, but copies
+        # the records after them
+        with mock.patch.object(self._store, '_head', side_effect=[10, 12]):
+            series = self._store.read()
+        self.assertEqual(list(series.timestamps),
+                         [second * _SECOND for second in range(3, 10)])
+
+    def test_overwriting_during_read(self):
+        self._append(range(10))
+        # the writer has started overwriting the oldest record, position 0,
+        # with position 10 but not advanced the head, and the reader copied
+        # the old position with the new start time
+        _RECORD.pack_into(self._store._map, self._store._rings[0][2], 0,
+                          10 * _SECOND, 80, 80)
+        series = self._store.read()
+        self.assertEqual(list(series.timestamps),
+                         [second * _SECOND for second in range(1, 10)])
+        self.assertEqual(self._store._oldest(0), _SECOND)
+
+    def test_changing(self):
+        with mock.patch.object(self._store, '_head', return_value=5):
+            with self.assertRaises(ValueError):
+                self._store.read()
+
+    def test_query(self):
+        self._append(range(30))
+        # seconds from 20 are still in the finest ring
+        self.assertEqual(self._store.query(22 * _SECOND).resolution,
+                         Duration.SECOND)
+        self.assertEqual(len(self._store.query(22 * _SECOND,
+                                               25 * _SECOND)), 3)
+        self.assertEqual(self._store.query(12 * _SECOND).resolution,
+                         Duration(seconds=5))
+        series = self._store.query(0)
+        self.assertEqual(series.resolution, Duration(seconds=5))
+        self.assertEqual(list(series.timestamps),
+                         [second * _SECOND for second in range(10, 25, 5)])
+
+    def test_query_empty(self):
+        self.assertEqual(len(self._store.query(0)), 0)
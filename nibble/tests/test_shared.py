@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, division
+import multiprocessing
+import os
+import sys
+import threading
+import unittest
+
+from nibble import Duration, Information, Speed
+
+
+def _record(name, worker, bytes_):
+    """
+    Attach to a segment and record into a worker's slot, in a child process.
+    """
+    from nibble.shared import SharedStats
+    stats = SharedStats.attach(name)
+    try:
+        slot = stats.slot(worker)
+        slot.add('bytes', bytes_)
+        slot.record('latency', Duration(milliseconds=5))
+    finally:
+        stats.close()
+
+
+@unittest.skipIf(sys.version_info < (3, 8), 'shared memory needs Python 3.8')
+class TestSharedStats(unittest.TestCase):
+
+    def setUp(self):
+        from nibble.shared import SharedStats
+        self._stats = SharedStats(4, counters=('bytes', 'requests'),
+                                  histograms=('latency',))
+
+    def tearDown(self):
+        self._stats.close()
+
+    def test_totals(self):
+        self._stats.slot(0).add('bytes', 100)
+        slot = self._stats.slot(3)
+        slot.add('bytes', 50)
+        slot.add('requests', 2)
+        self.assertEqual(self._stats.total('bytes'), 150)
+        self.assertEqual(self._stats.total('requests'), 2)
+
+    def test_unknown(self):
+        with self.assertRaises(KeyError):
+            self._stats.slot(0).add('packets', 1)
+        with self.assertRaises(KeyError):
+            self._stats.total('latency')
+        with self.assertRaises(ValueError):
+            self._stats.slot(4)
+
+    def test_slots_aligned(self):
+        from nibble.shared import _CACHE_LINE, _WORD
+        self.assertEqual(self._stats._slot_start(1) * _WORD % _CACHE_LINE, 0)
+        self.assertGreaterEqual(self._stats._slot_words,
+                                self._stats._words)
+
+    def test_snapshot(self):
+        slot = self._stats.slot(1)
+        earlier = self._stats.snapshot('bytes', now=10)
+        slot.add('bytes', 2000)
+        later = self._stats.snapshot('bytes', now=12)
+        self.assertEqual(later.information,
+                         Information(2000, Information.BYTES))
+        self.assertEqual(later.speed_since(earlier),
+                         Speed(Information(1000, Information.BYTES)))
+
+    def test_percentile(self):
+        first = self._stats.slot(0)
+        second = self._stats.slot(1)
+        for milliseconds in range(1, 101):
+            (first if milliseconds % 2 else second).record(
+                'latency', Duration(milliseconds=milliseconds))
+        for percentile, milliseconds in ((1, 1), (50, 50), (99, 99),
+                                         (100, 100)):
+            duration = self._stats.percentile('latency', percentile)
+            self.assertAlmostEqual(duration.nanoseconds / 1000000,
+                                   milliseconds, delta=milliseconds * 0.02)
+        self.assertEqual(sum(self._stats.histogram('latency')), 100)
+
+    def test_percentile_empty(self):
+        self.assertIsNone(self._stats.percentile('latency', 50))
+        with self.assertRaises(ValueError):
+            self._stats.percentile('latency', 101)
+
+    def test_percentile_clamped(self):
+        slot = self._stats.slot(0)
+        slot.record('latency', Duration(nanoseconds=0))
+        slot.record('latency', Duration(hours=1))
+        self.assertLessEqual(
+            self._stats.percentile('latency', 1).nanoseconds,
+            Duration(microseconds=1).nanoseconds * 1.02)
+        self.assertLessEqual(
+            self._stats.percentile('latency', 100).nanoseconds,
+            Duration(minutes=10).nanoseconds * 1.02)
+
+    def test_restart(self):
+        slot = self._stats.slot(2)
+        slot.add('bytes', 10)
+        del slot
+        # a replacement worker claims the same slot and carries on
+        replacement = self._stats.slot(2)
+        replacement.add('bytes', 5)
+        self.assertEqual(replacement.pid, os.getpid())
+        self.assertEqual(self._stats.total('bytes'), 15)
+        replacement.reset()
+        self.assertEqual(self._stats.total('bytes'), 0)
+        self.assertEqual(replacement.pid, os.getpid())
+
+    def test_pids(self):
+        self._stats.slot(1)
+        self.assertEqual(self._stats.pids(), [0, os.getpid(), 0, 0])
+
+    def test_attach(self):
+        from nibble.shared import SharedStats
+        with SharedStats.attach(self._stats.name) as attached:
+            self.assertFalse(attached.owner)
+            self.assertEqual(attached.workers, 4)
+            attached.slot(0).add('bytes', 7)
+        # closing an attached segment does not unlink it
+        self.assertEqual(self._stats.total('bytes'), 7)
+        with SharedStats.attach(self._stats.name) as attached:
+            self.assertEqual(attached.total('bytes'), 7)
+
+    def test_attach_threads(self):
+        from nibble.shared import SharedStats
+        from multiprocessing import resource_tracker
+        register = resource_tracker.register
+        attached = []
+
+        def attach():
+            for _ in range(20):
+                stats = SharedStats.attach(self._stats.name)
+                attached.append(stats)
+                stats.close()
+
+        threads = [threading.Thread(target=attach) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(attached), 80)
+        # concurrent swaps did not leave registration disabled
+        self.assertIs(resource_tracker.register, register)
+
+    @unittest.skipIf(sys.platform == 'win32', 'needs fork')
+    def test_processes(self):
+        context = multiprocessing.get_context('fork')
+        processes = [context.Process(target=_record,
+                                     args=(self._stats.name, worker, 100))
+                     for worker in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+            self.assertEqual(process.exitcode, 0)
+        self.assertEqual(self._stats.total('bytes'), 400)
+        self.assertEqual(sum(self._stats.histogram('latency')), 4)
+        self.assertEqual(sorted(self._stats.pids()),
+                         sorted(process.pid for process in processes))
+
+    def test_close_unlinks(self):
+        from nibble.shared import SharedStats
+        name = self._stats.name
+        self.assertTrue(self._stats.owner)
+        self._stats.slot(0)
+        self._stats.close()
+        self._stats.close()
+        with self.assertRaises(EnvironmentError):
+            SharedStats.attach(name)
+
+    def test_invalid(self):
+        from nibble.shared import SharedStats
+        with self.assertRaises(ValueError):
+            SharedStats(0)
+        with self.assertRaises(ValueError):
+            SharedStats(1, counters=('a',), histograms=('a',))
+        with self.assertRaises(ValueError):
+            SharedStats(1, relative_accuracy=1)
+        with self.assertRaises(ValueError):
+            SharedStats(1, lowest=Duration(seconds=2),
+                        highest=Duration(seconds=1))
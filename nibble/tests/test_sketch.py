@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, division
+import unittest
+import array
+import math
+import random
+
+from nibble import Information, Duration, Speed
+from nibble.sketch import QuantileSketch, SpeedSketch, DurationSketch
+
+
+def _exact(values, percentile):
+    ordered = sorted(values)
+    rank = max(1, int(math.ceil(len(ordered) * percentile / 100)))
+    return ordered[rank - 1]
+
+
+class TestQuantileSketch(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(42)
+        self._values = [rng.lognormvariate(10, 3) for _ in range(10000)]
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            QuantileSketch(0)
+        with self.assertRaises(ValueError):
+            QuantileSketch(1)
+        with self.assertRaises(ValueError):
+            QuantileSketch(max_buckets=0)
+
+    def test_empty(self):
+        self.assertIsNone(QuantileSketch().percentile_value(50))
+
+    def test_invalid_percentile(self):
+        sketch = QuantileSketch()
+        sketch.add(1)
+        for percentile in [-1, 101]:
+            with self.assertRaises(ValueError):
+                sketch.percentile_value(percentile)
+
+    def test_negative(self):
+        sketch = QuantileSketch()
+        with self.assertRaises(ValueError):
+            sketch.add(-1)
+        with self.assertRaises(ValueError):
+            sketch.add_many([1, -1])
+        self.assertEqual(sketch.count, 0)
+
+    def test_accuracy(self):
+        sketch = QuantileSketch(0.01)
+        for value in self._values:
+            sketch.add(value)
+        self.assertEqual(sketch.count, len(self._values))
+        for percentile in [0, 1, 25, 50, 75, 99, 99.9, 100]:
+            expected = _exact(self._values, percentile)
+            self.assertAlmostEqual(sketch.percentile_value(percentile) /
+                                   expected, 1, delta=0.01)
+
+    def test_extremes(self):
+        sketch = QuantileSketch(0.05)
+        sketch.add_many([3, 1000, 7])
+        self.assertEqual(sketch.percentile_value(0), 3)
+        self.assertEqual(sketch.percentile_value(100), 1000)
+
+    def test_zero(self):
+        sketch = QuantileSketch()
+        sketch.add(0)
+        sketch.add_many([0, 0, 10])
+        self.assertEqual(sketch.zero_count, 3)
+        self.assertEqual(sketch.percentile_value(75), 0)
+        self.assertAlmostEqual(sketch.percentile_value(76), 10, delta=0.1)
+
+    def test_add_many(self):
+        single = QuantileSketch()
+        for value in self._values:
+            single.add(value)
+        batched = QuantileSketch()
+        batched.add_many(array.array(str('d'), self._values))
+        batched.add_many([])
+        self.assertEqual(single, batched)
+
+    def test_merge(self):
+        whole = QuantileSketch()
+        whole.add_many(self._values)
+        first = QuantileSketch()
+        first.add_many(self._values[:3000])
+        second = QuantileSketch()
+        second.add_many(self._values[3000:])
+        first.merge(second)
+        first.merge(QuantileSketch())
+        self.assertEqual(first, whole)
+
+    def test_merge_into_empty(self):
+        sketch = QuantileSketch()
+        other = QuantileSketch()
+        other.add(5)
+        sketch.merge(other)
+        self.assertEqual(sketch, other)
+
+    def test_merge_different_accuracy(self):
+        with self.assertRaises(ValueError):
+            QuantileSketch(0.01).merge(QuantileSketch(0.02))
+
+    def test_collapse(self):
+        sketch = QuantileSketch(0.01, max_buckets=100)
+        sketch.add_many(self._values)
+        sketch.add(1e-9)
+        self.assertLessEqual(len(sketch._counts), 100)
+        self.assertEqual(sketch.count, len(self._values) + 1)
+        # upper percentiles keep their accuracy
+        expected = _exact(self._values, 99)
+        self.assertAlmostEqual(sketch.percentile_value(99) / expected, 1,
+                               delta=0.01)
+
+    def test_serialise(self):
+        sketch = QuantileSketch()
+        sketch.add_many(self._values)
+        sketch.add(0)
+        data = sketch.to_bytes()
+        # mostly one byte each for the index and count of each bucket
+        self.assertLess(len(data), 4 * len(sketch._counts))
+        self.assertEqual(QuantileSketch.from_bytes(data), sketch)
+
+    def test_serialise_small(self):
+        sketch = QuantileSketch()
+        sketch.add_many([0.001, 0.5, 2])
+        self.assertEqual(QuantileSketch.from_bytes(sketch.to_bytes()), sketch)
+
+    def test_serialise_empty(self):
+        sketch = QuantileSketch.from_bytes(QuantileSketch(0.02).to_bytes())
+        self.assertEqual(sketch, QuantileSketch(0.02))
+        self.assertIsNone(sketch.min)
+
+    def test_deserialise_invalid(self):
+        sketch = QuantileSketch()
+        sketch.add_many(self._values)
+        data = sketch.to_bytes()
+        for invalid in [b'', data[:10], data[:-1], data + b'\0',
+                        b'\2' + data[1:]]:
+            with self.assertRaises(ValueError):
+                QuantileSketch.from_bytes(invalid)
+
+
+class TestSpeedSketch(unittest.TestCase):
+
+    def test_percentile(self):
+        sketch = SpeedSketch()
+        for megabits in range(1, 101):
+            sketch.add_speed(Speed(Information(megabits,
+                                               Information.MEGABITS)))
+        self.assertIsInstance(sketch.percentile(50), Speed)
+        self.assertAlmostEqual(sketch.percentile(50).information.bits /
+                               (50 * 10 ** 6), 1, delta=0.01)
+        self.assertEqual(sketch.percentile(100),
+                         Speed(Information(100, Information.MEGABITS)))
+
+    def test_empty(self):
+        self.assertIsNone(SpeedSketch().percentile(50))
+
+    def test_deserialise(self):
+        sketch = SpeedSketch()
+        sketch.add_many([0.1, 1, 10])
+        self.assertIsInstance(SpeedSketch.from_bytes(sketch.to_bytes()),
+                              SpeedSketch)
+
+
+class TestDurationSketch(unittest.TestCase):
+
+    def test_percentile(self):
+        sketch = DurationSketch()
+        for milliseconds in range(1, 1001):
+            sketch.add_duration(Duration(milliseconds=milliseconds))
+        self.assertAlmostEqual(sketch.percentile(99).nanoseconds /
+                               Duration.MILLISECONDS, 990, delta=9.9)
+        self.assertEqual(sketch.percentile(0), Duration(milliseconds=1))
+
+    def test_empty(self):
+        self.assertIsNone(DurationSketch().percentile(50))
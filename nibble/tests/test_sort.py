@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, division
+import unittest
+import os
+import shutil
+import tempfile
+
+from nibble import Information
+from nibble.sort import KeyExtractor, sort_lines, top_lines
+
+
+class TestKeyExtractor(unittest.TestCase):
+
+    def test_init_field_and_regex(self):
+        with self.assertRaises(ValueError):
+            KeyExtractor(field=1, regex='.*')
+
+    def test_whole_line(self):
+        self.assertEqual(KeyExtractor()('1 KiB\n'), (1, 8192))
+
+    def test_field(self):
+        self.assertEqual(KeyExtractor(field=1)('a 2KiB b'), (1, 16384))
+
+    def test_field_delimiter(self):
+        self.assertEqual(KeyExtractor(field=1, delimiter=',')('a,2 KiB,b'),
+                         (1, 16384))
+
+    def test_field_missing(self):
+        self.assertEqual(KeyExtractor(field=3)('a 2KiB b'), (0, 0))
+
+    def test_regex_group(self):
+        self.assertEqual(KeyExtractor(regex=r'size=(\S+)')('a size=1Kb'),
+                         (1, 1000))
+
+    def test_regex_no_group(self):
+        self.assertEqual(KeyExtractor(regex=r'\d+Kb')('a size=1Kb'),
+                         (1, 1000))
+
+    def test_regex_no_match(self):
+        self.assertEqual(KeyExtractor(regex=r'\d+Kb')('a size=1'), (0, 0))
+
+    def test_unparsable(self):
+        self.assertEqual(KeyExtractor()('lots'), (0, 0))
+
+    def test_unit(self):
+        self.assertEqual(KeyExtractor(unit='b')('12'), (1, 12))
+
+    def test_duration(self):
+        self.assertEqual(KeyExtractor('duration')('2ms'), (1, 2000000))
+
+    def test_speed(self):
+        self.assertEqual(KeyExtractor('speed')('1 Gb/s'), (1, 1))
+
+
+class TestSortLines(unittest.TestCase):
+
+    _LINES = ['1 GiB\n', '1 GB\n', 'none\n', '1 Gb\n', '1024 MiB\n',
+              '10 KiB\n']
+    _SORTED = ['none\n', '10 KiB\n', '1 Gb\n', '1 GB\n', '1 GiB\n',
+               '1024 MiB\n']
+    _REVERSED = ['1 GiB\n', '1024 MiB\n', '1 GB\n', '1 Gb\n', '10 KiB\n',
+                 'none\n']
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def _sort(self, **kwargs):
+        return list(sort_lines(self._LINES, KeyExtractor(),
+                               directory=self._directory, **kwargs))
+
+    def test_empty(self):
+        self.assertListEqual(list(sort_lines([], KeyExtractor())), [])
+
+    def test_memory(self):
+        self.assertListEqual(self._sort(), self._SORTED)
+
+    def test_memory_reverse(self):
+        self.assertListEqual(self._sort(reverse=True), self._REVERSED)
+
+    def test_external(self):
+        self.assertListEqual(self._sort(buffer_size=Information(8)),
+                             self._SORTED)
+
+    def test_external_reverse(self):
+        self.assertListEqual(self._sort(buffer_size=Information(8),
+                                        reverse=True),
+                             self._REVERSED)
+
+    def test_external_multiple_passes(self):
+        self.assertListEqual(self._sort(buffer_size=Information(8), fan_in=2),
+                             self._SORTED)
+
+    def test_external_jobs(self):
+        self.assertListEqual(self._sort(buffer_size=Information(16), jobs=2),
+                             self._SORTED)
+
+    def test_external_cleans_up(self):
+        self._sort(buffer_size=Information(8))
+        self.assertListEqual(os.listdir(self._directory), [])
+
+
+class TestTopLines(unittest.TestCase):
+
+    _LINES = ['3 KiB\n', '1 KiB\n', '2 KiB\n', '1024 B\n']
+
+    def test_smallest(self):
+        self.assertListEqual(top_lines(self._LINES, KeyExtractor(), 2),
+                             ['1 KiB\n', '1024 B\n'])
+
+    def test_largest(self):
+        self.assertListEqual(top_lines(self._LINES, KeyExtractor(), 2, True),
+                             ['3 KiB\n', '2 KiB\n'])
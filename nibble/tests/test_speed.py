@@ -19,6 +19,26 @@ class TestSpeed(unittest.TestCase):
                          Speed(Information(1.35, Information.KILOBYTES),
                                Duration(weeks=1)))
 
+    def test_parse_no_duration(self):
+        with self.assertRaises(ValueError):
+            Speed.parse('10 Gb')
+
+    def test_parse_invalid_information(self):
+        with self.assertRaises(ValueError):
+            Speed.parse('10 Gbz/s')
+
+    def test_parse_invalid_duration(self):
+        with self.assertRaises(ValueError):
+            Speed.parse('10 Gb/fortnight')
+
+    def test_parse_unit(self):
+        self.assertEqual(Speed.parse('10Gb/s'), Speed.TEN_GIGABIT)
+
+    def test_parse_quantity_unit(self):
+        self.assertEqual(Speed.parse('2 GiB / 4 h'),
+                         Speed(Information(2, Information.GIBIBYTES),
+                               Duration(hours=4)))
+
     def test_per_second(self):
         self.assertEqual(Speed.FORTY_GIGABIT._per_second,
                          Information(40000, Information.MEGABITS))
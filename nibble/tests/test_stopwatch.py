@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+import mock
+
+from nibble import Information, Duration, Speed
+from nibble.stopwatch import Stopwatch, ThroughputTimer
+
+
+def _clock(*readings):
+    """
+    Replace the stopwatch's clock with one returning fixed readings.
+
+    :param readings: The readings in nanoseconds, in order.
+    :return: The patcher.
+    """
+    return mock.patch('nibble.stopwatch._nanoseconds',
+                      side_effect=list(readings))
+
+
+class TestStopwatch(unittest.TestCase):
+
+    def test_initial(self):
+        stopwatch = Stopwatch()
+        self.assertEqual(stopwatch.duration, Duration.ZERO)
+        self.assertEqual(stopwatch.laps, 0)
+
+    def test_context_manager(self):
+        stopwatch = Stopwatch()
+        with _clock(100, 350, 1000, 1001):
+            with stopwatch as entered:
+                self.assertIs(entered, stopwatch)
+            with stopwatch:
+                pass
+        self.assertEqual(stopwatch.duration, Duration(nanoseconds=251))
+        self.assertEqual(stopwatch.laps, 2)
+
+    def test_context_manager_raises(self):
+        stopwatch = Stopwatch()
+        with _clock(0, 10):
+            with self.assertRaises(KeyError):
+                with stopwatch:
+                    raise KeyError()
+        self.assertEqual(stopwatch.elapsed, 10)
+
+    def test_start_stop(self):
+        stopwatch = Stopwatch()
+        with _clock(5, 12):
+            self.assertIs(stopwatch.start(), stopwatch)
+            self.assertEqual(stopwatch.stop(), Duration(nanoseconds=7))
+        self.assertEqual(stopwatch.laps, 1)
+
+    def test_stop_not_started(self):
+        with self.assertRaises(ValueError):
+            Stopwatch().stop()
+
+    def test_decorator(self):
+        stopwatch = Stopwatch()
+
+        @stopwatch
+        def add(a, b=0):
+            """Add two numbers."""
+            return a + b
+
+        with _clock(0, 3, 10, 15):
+            self.assertEqual(add(1, b=2), 3)
+            self.assertEqual(add(4), 4)
+        self.assertEqual(stopwatch.elapsed, 8)
+        self.assertEqual(stopwatch.laps, 2)
+        self.assertEqual(add.__name__, 'add')
+        self.assertEqual(add.__doc__, 'Add two numbers.')
+
+    def test_decorator_raises(self):
+        stopwatch = Stopwatch()
+
+        @stopwatch
+        def fail():
+            raise KeyError()
+
+        with _clock(0, 4):
+            with self.assertRaises(KeyError):
+                fail()
+        self.assertEqual(stopwatch.elapsed, 4)
+
+    def test_reset(self):
+        stopwatch = Stopwatch()
+        with _clock(0, 4):
+            with stopwatch:
+                pass
+        stopwatch.reset()
+        self.assertEqual(stopwatch.elapsed, 0)
+        self.assertEqual(stopwatch.laps, 0)
+
+    def test_real_clock(self):
+        stopwatch = Stopwatch()
+        with stopwatch:
+            sum(range(1000))
+        self.assertGreater(stopwatch.elapsed, 0)
+        self.assertIsInstance(stopwatch.elapsed, int)
+
+
+class TestThroughputTimer(unittest.TestCase):
+
+    def test_bytes_up_front(self):
+        timer = ThroughputTimer(1000)
+        with _clock(0, 1000000):
+            with timer:
+                pass
+        self.assertEqual(timer.information,
+                         Information(1000, Information.BYTES))
+        self.assertEqual(timer.speed,
+                         Speed(Information(1, Information.MEGABYTES)))
+
+    def test_add(self):
+        timer = ThroughputTimer()
+
+        @timer
+        def write(data):
+            timer.add(len(data))
+
+        with _clock(0, 500000000, 600000000, 1100000000):
+            write(b'a' * 100)
+            write(b'a' * 50)
+        self.assertEqual(timer.speed,
+                         Speed(Information(150, Information.BYTES)))
+
+    def test_reset(self):
+        timer = ThroughputTimer(10)
+        timer.reset()
+        self.assertEqual(timer.bytes, 0)
+
+    def test_no_time(self):
+        with self.assertRaises(ValueError):
+            ThroughputTimer(10).speed
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+import json
+import six
+
+from nibble import Information, Duration, Speed
+from nibble.table import TransferTable, linear_range, geometric_range
+
+
+class TestLinearRange(unittest.TestCase):
+
+    def test_inclusive(self):
+        self.assertEqual(list(linear_range(Information(1), Information(3),
+                                           Information(1))),
+                         [Information(1), Information(2), Information(3)])
+
+    def test_stop_not_reached(self):
+        self.assertEqual(list(linear_range(Information(1), Information(4),
+                                           Information(2))),
+                         [Information(1), Information(3)])
+
+    def test_zero_step(self):
+        with self.assertRaises(ValueError):
+            list(linear_range(Information(1), Information(4), Information(0)))
+
+
+class TestGeometricRange(unittest.TestCase):
+
+    def test_range(self):
+        self.assertEqual(list(geometric_range(Information(1), Information(100),
+                                              10)),
+                         [Information(1), Information(10), Information(100)])
+
+    def test_zero_start(self):
+        with self.assertRaises(ValueError):
+            list(geometric_range(Information(0), Information(100), 10))
+
+    def test_not_growing(self):
+        with self.assertRaises(ValueError):
+            list(geometric_range(Information(1), Information(100), 1))
+
+
+class TestTransferTable(unittest.TestCase):
+
+    def setUp(self):
+        self._table = TransferTable(
+            [Information(1, Information.GIGABYTES),
+             Information(10, Information.GIGABYTES)],
+            [Speed.GIGABIT, Speed(Information(2))], ['1 GB', '10 GB'])
+
+    def test_nanoseconds(self):
+        self.assertEqual(self._table.nanoseconds,
+                         [[8 * 10 ** 9, 4 * 10 ** 18],
+                          [80 * 10 ** 9, 40 * 10 ** 18]])
+
+    def test_rounding(self):
+        table = TransferTable([Information(1)],
+                              [Speed(Information(3), Duration(1))])
+        self.assertEqual(table.nanoseconds, [[0]])
+        table = TransferTable([Information(2)],
+                              [Speed(Information(3), Duration(1))])
+        self.assertEqual(table.nanoseconds, [[1]])
+
+    def test_duration(self):
+        self.assertEqual(self._table.duration(1, 0), Duration(seconds=80))
+
+    def test_zero_speed(self):
+        with self.assertRaises(ValueError):
+            TransferTable([Information(1)], [Speed(Information(0))])
+
+    def test_zero_speed_slow(self):
+        # rounds to zero bits per second, but is not zero
+        table = TransferTable([Information(1)],
+                              [Speed(Information(1), Duration(seconds=3))])
+        self.assertEqual(table.duration(0, 0), Duration(seconds=3))
+
+    def test_default_labels(self):
+        table = TransferTable([Information(1, Information.GIBIBYTES)],
+                              [Speed.TEN_GIGABIT])
+        self.assertEqual(table.information_labels, ['1 GiB'])
+        self.assertEqual(table.speed_labels, ['10 Gb/s'])
+
+    def test_text(self):
+        output = six.StringIO()
+        self._table.write_text(output, ' s')
+        self.assertEqual(output.getvalue().splitlines(), [
+            '       1 Gb/s' + ' ' * 13 + '2 b/s',
+            '1 GB      8 s   4,000,000,000 s',
+            '10 GB    80 s  40,000,000,000 s'])
+
+    def test_csv(self):
+        output = six.StringIO()
+        self._table.write_csv(output, ' s')
+        self.assertEqual(output.getvalue().splitlines(), [
+            ',1 Gb/s,2 b/s',
+            '1 GB,8 s,"4,000,000,000 s"',
+            '10 GB,80 s,"40,000,000,000 s"'])
+
+    def test_json(self):
+        output = six.StringIO()
+        self._table.write_json(output, ' s')
+        document = json.loads(output.getvalue())
+        self.assertEqual(document['speeds'], ['1 Gb/s', '2 b/s'])
+        self.assertEqual(document['rows'][1], {
+            'size': '10 GB',
+            'durations': ['80 s', '40,000,000,000 s'],
+            'nanoseconds': [80 * 10 ** 9, 40 * 10 ** 18]})
+
+    def test_json_empty(self):
+        output = six.StringIO()
+        TransferTable([], [Speed.GIGABIT]).write_json(output)
+        self.assertEqual(json.loads(output.getvalue()),
+                         {'speeds': ['1 Gb/s'], 'rows': []})
@@ -2,9 +2,13 @@
 from __future__ import unicode_literals, division
 import unittest
 import sys
+import os
+import shutil
+import tempfile
 import logging
 from decimal import Decimal
 import six
+import mock
 
 from nibble import util
 
@@ -75,3 +79,92 @@ class TestRoundTwoNonZeroDp(unittest.TestCase):
     def test_all(self):
         for input_, output in six.iteritems(self._CASES):
             self.assertEqual(util.round_two_non_zero_dp(input_), output)
+
+
+class TestImapBounded(unittest.TestCase):
+
+    class _Pool(object):
+        """
+        Runs functions synchronously, recording how many results are pending.
+        """
+
+        class _Result(object):
+
+            def __init__(self, value):
+                self.value = value
+
+            def get(self):
+                return self.value
+
+        def __init__(self):
+            self.submitted = 0
+
+        def apply_async(self, func, args):
+            self.submitted += 1
+            return self._Result(func(*args))
+
+    def test_order(self):
+        self.assertListEqual(
+            list(util.imap_bounded(self._Pool(), abs, [-1, 2, -3], 2)),
+            [1, 2, 3])
+
+    def test_bounded(self):
+        pool = self._Pool()
+        results = util.imap_bounded(pool, abs, six.moves.range(100), 3)
+        next(results)
+        self.assertEqual(pool.submitted, 3)
+
+
+class TestCounterDelta(unittest.TestCase):
+
+    def test_increase(self):
+        self.assertEqual(util.counter_delta(10, 15), 5)
+
+    def test_unchanged(self):
+        self.assertEqual(util.counter_delta(10, 10), 0)
+
+    def test_wrap(self):
+        self.assertEqual(util.counter_delta(2 ** 32 - 10, 5, 32), 15)
+
+    def test_wrap_64(self):
+        self.assertEqual(util.counter_delta(2 ** 64 - 1, 0), 1)
+
+    def test_reset(self):
+        self.assertEqual(util.counter_delta(1000000, 50), 50)
+
+    def test_reset_32(self):
+        self.assertEqual(util.counter_delta(2 ** 30, 50, 32), 50)
+
+    def test_previous_exceeds_width(self):
+        self.assertEqual(util.counter_delta(2 ** 40, 50, 32), 50)
+
+
+class TestScandir(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self._directory, 'sub'))
+        with open(os.path.join(self._directory, 'file'), 'wb') as f:
+            f.write(b'abc')
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def _check(self):
+        entries = sorted(util.scandir(self._directory),
+                         key=lambda entry: entry.name)
+        self.assertEqual([entry.name for entry in entries], ['file', 'sub'])
+        self.assertEqual(entries[0].path,
+                         os.path.join(self._directory, 'file'))
+        self.assertFalse(entries[0].is_dir(follow_symlinks=False))
+        self.assertTrue(entries[1].is_dir())
+        stat_result = entries[0].stat(follow_symlinks=False)
+        self.assertEqual(stat_result.st_size, 3)
+        self.assertEqual(entries[0].inode(), stat_result.st_ino)
+
+    def test_scandir(self):
+        self._check()
+
+    def test_listdir(self):
+        with mock.patch('nibble.util._scandir', None):
+            self._check()
@@ -1,8 +1,20 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals, print_function, division
 import sys
+import os
+import stat
 import logging
-from decimal import Decimal, ROUND_FLOOR, ROUND_HALF_UP
+import collections
+from decimal import Decimal, ROUND_HALF_UP
+
+try:
+    from os import scandir as _scandir
+except ImportError:
+    try:
+        # the backport, for Python before 3.5
+        from scandir import scandir as _scandir
+    except ImportError:
+        _scandir = None
 
 
 def print_error(msg):
@@ -54,7 +66,101 @@ def round_two_non_zero_dp(decimal):
     :param decimal: The decimal number to round.
     :return: A new decimal representing the rounded value.
     """
-    log10 = decimal.log10().to_integral_exact(rounding=ROUND_FLOOR) \
-        if decimal else 0
+    # the adjusted exponent is floor(log10(|decimal|)), without the expense of
+    # computing the logarithm to full precision
+    log10 = decimal.adjusted() if decimal else 0
     div = Decimal(10) ** (Decimal(1) - log10) if log10 < 0 else Decimal(100)
     return (decimal * div).to_integral_exact(rounding=ROUND_HALF_UP) / div
+
+
+def imap_bounded(pool, func, iterable, max_pending):
+    """
+    Like `multiprocessing.Pool.imap()`, but never submits more than a fixed
+    number of items ahead of the consumer. `imap()` drains its input as fast as
+    it can, so with a huge input and a slow consumer its memory use is
+    unbounded; this keeps it constant.
+
+    :param pool: The `multiprocessing.Pool` to execute `func` in.
+    :param func: The function to apply to each item. Must be picklable.
+    :param iterable: The items to process.
+    :param max_pending: The maximum number of items submitted but not yet
+                        yielded.
+    :return: A generator yielding the results of `func`, in input order.
+    """
+    pending = collections.deque()
+    for item in iterable:
+        if len(pending) >= max_pending:
+            yield pending.popleft().get()
+        pending.append(pool.apply_async(func, (item,)))
+
+    while pending:
+        yield pending.popleft().get()
+
+
+def counter_delta(previous, current, width=64):
+    """
+    Find how much a monotonically increasing counter, such as an interface's
+    byte count, has increased between two readings, allowing for it wrapping
+    around or being reset to zero in between.
+
+    :param previous: The earlier reading.
+    :param current: The later reading.
+    :param width: The number of bits in the counter. Defaults to 64.
+    :return: The increase. If the counter has gone backwards, it is assumed to
+             have wrapped if that means it increased by less than half its
+             range, and otherwise to have been reset to zero, in which case
+             the increase is the current reading.
+    """
+    if current >= previous:
+        return current - previous
+
+    wrapped = current + (1 << width) - previous
+    if 0 < wrapped < 1 << (width - 1):
+        return wrapped
+    return current
+
+
+class _Entry(object):
+    """
+    The parts of `os.DirEntry` used in this package, for when neither
+    `os.scandir()` nor its backport is available. The entry is `lstat()`ed
+    at most once, when first needed, so this is only slower than
+    `os.scandir()` by the `lstat()` of each directory, which it avoids on
+    Linux.
+    """
+
+    __slots__ = ('name', 'path', '_stat')
+
+    def __init__(self, directory, name):
+        self.name = name
+        self.path = os.path.join(directory, name)
+        self._stat = None
+
+    def stat(self, follow_symlinks=True):
+        if not follow_symlinks:
+            if self._stat is None:
+                self._stat = os.lstat(self.path)
+            return self._stat
+        return os.stat(self.path)
+
+    def is_dir(self, follow_symlinks=True):
+        return stat.S_ISDIR(self.stat(follow_symlinks).st_mode)
+
+    def inode(self):
+        return self.stat(follow_symlinks=False).st_ino
+
+
+def scandir(path):
+    """
+    List a directory, with `os.scandir()`, its backport for Python before
+    3.5, or failing those `os.listdir()`.
+
+    :param path: The path of the directory.
+    :return: An iterable of `os.DirEntry`s, or of objects with their `name`
+             and `path` attributes and `stat()`, `is_dir()` and `inode()`
+             methods.
+    :raises OSError: If the directory cannot be listed.
+    """
+    if _scandir is not None:
+        return _scandir(path)
+    return [_Entry(path, name) for name in os.listdir(path)]